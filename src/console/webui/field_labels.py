@@ -53,6 +53,7 @@ FIELD_LABELS: dict[str, str] = {
     "dream_history_recent_dedupe_max": "近期梦去重条数",
     "dream_message_retention_days": "梦消息保留天数",
     "dream_prefer_learned_echo_probability": "优先已学回声概率",
+    "dream_scheduler_workers": "做梦发送 worker 数",
     "dream_worker_sleep_max_sec": "做梦线程最长休眠（秒）",
     "dream_worker_sleep_min_sec": "做梦线程最短休眠（秒）",
     "drunk_tts_threshold": "醉酒转语音字数",
@@ -163,6 +164,7 @@ FIELD_LABELS: dict[str, str] = {
     "pallas_image_draw_unlimited_user_ids": "无限次数用户",
     "pallas_image_http_transport": "HTTP 客户端",
     "pallas_image_http_user_agent": "User-Agent",
+    "pallas_image_inflight_budget_mb": "在途图片内存（MB）",
     "pallas_image_max_concurrency": "全局并发上限",
     "pallas_image_max_param_attempts": "参数尝试上限",
     "pallas_image_merge_reference_urls_into_prompt": "参考图写进提示词",
@@ -202,6 +204,7 @@ FIELD_LABELS: dict[str, str] = {
     "pallas_protocol_linux_xvfb_args": "虚拟显示器参数",
     "pallas_protocol_linux_xvfb_command": "虚拟显示器命令",
     "pallas_protocol_max_log_lines": "协议日志行数上限",
+    "pallas_protocol_startup_concurrency": "启动并发数",
     "pallas_protocol_onebot_client_name": "连接牛牛名称",
     "pallas_protocol_onebot_ws_host": "牛牛 WS 主机",
     "pallas_protocol_onebot_ws_path": "牛牛 WS 路径",
@@ -247,6 +250,8 @@ FIELD_LABELS: dict[str, str] = {
     "pallas_webui_log_lines_max": "运行日志行数上限",
     "path": "样式目录路径",
     "play_endpoint": "播放接口路径",
+    "prerender_enabled": "后台预渲染帮助图",
+    "prerender_workers": "帮助图渲染进程数",
     "reaction_probability": "表情回应概率",
     "remote_find_enabled": "本机未命中时查共享池",
     "repeat_ignore_user_ids": "复读忽略 QQ 列表",
@@ -298,6 +303,8 @@ FIELD_LABELS: dict[str, str] = {
     "topics_importance": "关键词命中加成",
     "topics_size": "上下文关键词条数",
     "tts_enable": "启用 tts 语音合成",
+    "warm_snapshot_interval_sec": "热状态快照间隔（秒）",
+    "warm_snapshot_max_age_sec": "热状态快照有效期（秒）",
 }
 
 
@@ -1,70 +1,130 @@
-"""黑名单门禁全量内存快照：周期性批量刷新 DB。"""
+"""黑名单门禁内存快照：启动时全量加载，之后按协调 Redis 上的版本化变更日志增量同步。"""
 
 from __future__ import annotations
 
 import asyncio
+import json
 import os
 import time
+from typing import Any
 
 from nonebot import logger
 
 from src.foundation.db import get_db_backend
+from src.foundation.id_set import IdSet
 
+# 变更日志不可用（无协调 Redis）时的全量刷新间隔
 _SNAPSHOT_REFRESH_SEC = float(os.getenv("PALLAS_BAN_SNAPSHOT_REFRESH_SEC", "30"))
+# 变更日志可用时仍定期全量校准，兜底绕过门禁直接改库的写入
+_FULL_RESYNC_SEC = float(os.getenv("PALLAS_BAN_SNAPSHOT_FULL_RESYNC_SEC", "1800"))
 _SNAPSHOT_STALE_SEC = float(os.getenv("PALLAS_BAN_SNAPSHOT_STALE_SEC", "120"))
 _FALLBACK_DB_TIMEOUT_SEC = float(os.getenv("PALLAS_BAN_GATE_DB_TIMEOUT_SEC", "0.8"))
-_REDIS_GEN_KEY = "pallas:ban_gate:snapshot_gen"
-_REMOTE_GEN_SYNC_TTL_SEC = 2.0
-
-_global_banned: frozenset[int] = frozenset()
-_group_blocked: dict[int, frozenset[int]] = {}
-_banned_groups: frozenset[int] = frozenset()
+_CHANGELOG_MAXLEN = int(os.getenv("PALLAS_BAN_CHANGELOG_MAXLEN", "10000"))
+_DELTA_POLL_SEC = 2.0
+_DELTA_BATCH = 500
+
+# 变更日志：Redis stream，每条带单调版本号 v；版本计数器与 XADD 在同一脚本内原子执行
+_REDIS_VERSION_KEY = "pallas:ban_gate:version"
+_REDIS_CHANGELOG_KEY = "pallas:ban_gate:changes"
+_APPEND_CHANGE_LUA = """
+local v = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', 'v', v, 'c', ARGV[1])
+return v
+"""
+
+_global_banned: set[int] = set()
+_group_blocked: dict[int, IdSet] = {}
+_banned_groups: set[int] = set()
 _last_refresh_mono: float = 0.0
+_last_full_mono: float = 0.0
 _ready: bool = False
 _lock = asyncio.Lock()
 _refresh_task: asyncio.Task[None] | None = None
-_synced_redis_gen: int = -1
-_remote_gen_checked_at: float = 0.0
+# 快照已包含的变更日志位置 (version, stream_id)；None 表示变更日志不可用，退回周期全量刷新
+_applied: tuple[int, str] | None = None
 
 
-def bump_ban_gate_snapshot_remote_generation() -> None:
-    try:
-        from src.platform.coord.redis_claim import get_coord_redis_client
+def _changelog_client():
+    from src.platform.coord.redis_claim import get_coord_redis_client
 
-        client = get_coord_redis_client()
-        if client is not None:
-            client.incr(_REDIS_GEN_KEY)
-    except Exception:
-        pass
+    return get_coord_redis_client()
 
 
-def sync_ban_gate_snapshot_remote_generation() -> bool:
-    """对比 Redis 世代；变化时返回 True。"""
-    global _synced_redis_gen, _remote_gen_checked_at
-    now = time.monotonic()
-    if _remote_gen_checked_at and now - _remote_gen_checked_at < _REMOTE_GEN_SYNC_TTL_SEC:
-        return False
+def _text(raw: Any) -> str:
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
+
+
+def append_ban_gate_change_sync(change: dict[str, Any]) -> int | None:
+    """追加一条变更并返回其版本；变更日志不可用时返回 None。"""
+    client = _changelog_client()
+    if client is None:
+        return None
     try:
-        from src.platform.coord.redis_claim import get_coord_redis_client
+        payload = json.dumps(change, separators=(",", ":"))
+        return int(
+            client.eval(_APPEND_CHANGE_LUA, 2, _REDIS_VERSION_KEY, _REDIS_CHANGELOG_KEY, payload, _CHANGELOG_MAXLEN)
+        )
+    except Exception as e:
+        logger.debug("ban_gate changelog append failed: {}", e)
+        return None
 
-        client = get_coord_redis_client()
-        if client is None:
-            _remote_gen_checked_at = now
-            return False
-        raw = client.get(_REDIS_GEN_KEY)
-        _remote_gen_checked_at = now
-        remote = int(raw) if raw else 0
-        if remote == _synced_redis_gen:
-            return False
-        _synced_redis_gen = remote
-        return True
-    except Exception:
-        _remote_gen_checked_at = now
+
+def bump_ban_gate_version_sync() -> bool:
+    """追加失败时只推进版本号：其它进程增量同步时看到缺口，退回全量重载。"""
+    client = _changelog_client()
+    if client is None:
         return False
+    try:
+        client.incr(_REDIS_VERSION_KEY)
+    except Exception as e:
+        logger.warning("ban_gate version bump failed: {}", e)
+        return False
+    return True
+
+
+def changelog_head_sync() -> tuple[int, str] | None:
+    """当前变更日志头 (version, stream_id)；空日志为 (version, '0-0')。"""
+    client = _changelog_client()
+    if client is None:
+        return None
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.get(_REDIS_VERSION_KEY)
+        pipe.xrevrange(_REDIS_CHANGELOG_KEY, count=1)
+        raw_version, rows = pipe.execute()
+    except Exception as e:
+        logger.debug("ban_gate changelog head failed: {}", e)
+        return None
+    version = int(raw_version) if raw_version else 0
+    return version, (_text(rows[0][0]) if rows else "0-0")
+
+
+def read_changes_since_sync(stream_id: str) -> tuple[int, list[tuple[str, int, dict[str, Any]]]] | None:
+    """读取当前版本号与 stream_id 之后的变更 (stream_id, version, change)；不可用返回 None。"""
+    client = _changelog_client()
+    if client is None:
+        return None
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.get(_REDIS_VERSION_KEY)
+        pipe.xrange(_REDIS_CHANGELOG_KEY, min=f"({stream_id}", count=_DELTA_BATCH)
+        raw_version, rows = pipe.execute()
+    except Exception as e:
+        logger.debug("ban_gate changelog read failed: {}", e)
+        return None
+    out: list[tuple[str, int, dict[str, Any]]] = []
+    for sid, fields in rows:
+        fields = {_text(k): v for k, v in fields.items()}
+        try:
+            change = json.loads(_text(fields["c"]))
+            out.append((_text(sid), int(fields["v"]), change if isinstance(change, dict) else {}))
+        except (KeyError, TypeError, ValueError):
+            out.append((_text(sid), int(fields.get("v") or 0), {}))
+    return (int(raw_version) if raw_version else 0), out
 
 
 def schedule_ban_gate_snapshot_refresh() -> None:
-    bump_ban_gate_snapshot_remote_generation()
+    """强制本进程全量重载（批量导入等绕过增量日志的场景）。"""
     asyncio.create_task(refresh_ban_gate_snapshot())
 
 
@@ -74,6 +134,11 @@ def snapshot_ready() -> bool:
     return (time.monotonic() - _last_refresh_mono) <= _SNAPSHOT_STALE_SEC
 
 
+def snapshot_version() -> int | None:
+    """快照对应的变更日志版本；变更日志不可用时为 None。"""
+    return _applied[0] if _applied is not None else None
+
+
 def is_user_globally_banned_fast(user_id: int) -> bool | None:
     """命中快照返回 bool；快照未就绪返回 None。"""
     if not snapshot_ready():
@@ -100,44 +165,91 @@ def fallback_db_timeout_sec() -> float:
     return _FALLBACK_DB_TIMEOUT_SEC
 
 
-async def patch_user_banned(user_id: int, banned: bool) -> None:
-    async with _lock:
-        global _global_banned
-        cur = set(_global_banned)
-        if banned:
-            cur.add(user_id)
+def _apply_change(change: dict[str, Any]) -> None:
+    """应用一条变更；变更都是目标状态而非增减，重复应用幂等。"""
+    kind = change.get("k")
+    try:
+        target = int(change.get("id"))
+    except (TypeError, ValueError):
+        return
+    if kind == "user":
+        if change.get("on"):
+            _global_banned.add(target)
+        else:
+            _global_banned.discard(target)
+    elif kind == "group":
+        if change.get("on"):
+            _banned_groups.add(target)
+        else:
+            _banned_groups.discard(target)
+    elif kind == "blocked":
+        uids = IdSet(change.get("uids") or [])
+        if uids:
+            _group_blocked[target] = uids
         else:
-            cur.discard(user_id)
-        _global_banned = frozenset(cur)
+            _group_blocked.pop(target, None)
 
 
-async def patch_group_blocked_users(group_id: int, user_ids: list[int] | None = None) -> None:
+async def _patch(change: dict[str, Any]) -> None:
     async with _lock:
-        global _group_blocked
-        if user_ids is None:
-            _group_blocked.pop(group_id, None)
-            return
-        uids = frozenset(int(u) for u in user_ids)
-        if uids:
-            _group_blocked[group_id] = uids
-        else:
-            _group_blocked.pop(group_id, None)
+        _apply_change(change)
+    # 写入日志后其它进程下次轮询即可增量应用；本进程回放同一条时幂等
+    if await asyncio.to_thread(append_ban_gate_change_sync, change) is not None:
+        return
+    if _changelog_client() is None:
+        return
+    # 配了协调 Redis 但追加失败：退回旧的版本号信号，各进程（含本进程）看到缺口后全量重载
+    await asyncio.to_thread(bump_ban_gate_version_sync)
+    schedule_ban_gate_snapshot_refresh()
+
+
+async def patch_user_banned(user_id: int, banned: bool) -> None:
+    await _patch({"k": "user", "id": int(user_id), "on": bool(banned)})
+
+
+async def patch_group_blocked_users(group_id: int, user_ids: list[int] | None = None) -> None:
+    await _patch({"k": "blocked", "id": int(group_id), "uids": [int(u) for u in user_ids or []]})
 
 
 async def patch_group_banned(group_id: int, banned: bool) -> None:
-    async with _lock:
-        global _banned_groups
-        cur = set(_banned_groups)
-        if banned:
-            cur.add(int(group_id))
-        else:
-            cur.discard(int(group_id))
-        _banned_groups = frozenset(cur)
+    await _patch({"k": "group", "id": int(group_id), "on": bool(banned)})
+
+
+async def sync_ban_gate_deltas() -> bool:
+    """按版本应用日志中的新变更；日志不可用或出现缺口（已被裁剪）时返回 False，由调用方全量重载。"""
+    global _applied, _last_refresh_mono
+    if _applied is None:
+        return False
+    while True:
+        version, stream_id = _applied
+        read = await asyncio.to_thread(read_changes_since_sync, stream_id)
+        if read is None:
+            return False
+        head_version, rows = read
+        async with _lock:
+            for sid, v, change in rows:
+                if v != version + 1:
+                    logger.info("ban_gate changelog gap: have v{} next v{}, full reload", version, v)
+                    return False
+                _apply_change(change)
+                version, stream_id = v, sid
+            _applied = (version, stream_id)
+            _last_refresh_mono = time.monotonic()
+        if len(rows) < _DELTA_BATCH:
+            if head_version > version:
+                # 只推进了版本号、没有日志条目（追加失败的回退信号）
+                logger.info(
+                    "ban_gate version bumped without changelog: have v{} head v{}, full reload", version, head_version
+                )
+                return False
+            return True
 
 
 async def refresh_ban_gate_snapshot() -> None:
-    global _global_banned, _group_blocked, _banned_groups, _last_refresh_mono, _ready
+    global _global_banned, _group_blocked, _banned_groups, _last_refresh_mono, _last_full_mono, _ready, _applied
     backend = get_db_backend()
+    # 先取日志头再读库：其间的变更会在下次增量同步时回放（幂等）
+    head = await asyncio.to_thread(changelog_head_sync)
     try:
         if backend == "mongodb":
             users, groups, banned_groups = await _load_snapshot_mongodb()
@@ -153,27 +265,29 @@ async def refresh_ban_gate_snapshot() -> None:
         return
 
     async with _lock:
-        _global_banned = users
+        _global_banned = set(users)
         _group_blocked = groups
-        _banned_groups = banned_groups
-        _last_refresh_mono = time.monotonic()
+        _banned_groups = set(banned_groups)
+        _last_refresh_mono = _last_full_mono = time.monotonic()
+        _applied = head
         _ready = True
     logger.debug(
-        "ban_gate_snapshot refreshed: global_banned={} groups_with_blocks={} banned_groups={}",
+        "ban_gate_snapshot refreshed: global_banned={} groups_with_blocks={} banned_groups={} version={}",
         len(users),
         len(groups),
         len(banned_groups),
+        head[0] if head is not None else None,
     )
 
 
-async def _load_snapshot_mongodb() -> tuple[frozenset[int], dict[int, frozenset[int]], frozenset[int]]:
+async def _load_snapshot_mongodb() -> tuple[frozenset[int], dict[int, IdSet], frozenset[int]]:
     from src.foundation.db.modules import GroupConfigModule, UserConfigModule
 
     user_docs = await UserConfigModule.find(UserConfigModule.banned == True).to_list()  # noqa: E712
     users = frozenset(int(d.user_id) for d in user_docs)
 
     group_docs = await GroupConfigModule.find().to_list()
-    groups: dict[int, frozenset[int]] = {}
+    groups: dict[int, IdSet] = {}
     for doc in group_docs:
         raw = getattr(doc, "blocked_user_ids", None) or []
         uids: list[int] = []
@@ -183,13 +297,13 @@ async def _load_snapshot_mongodb() -> tuple[frozenset[int], dict[int, frozenset[
             except (TypeError, ValueError):
                 continue
         if uids:
-            groups[int(doc.group_id)] = frozenset(uids)
+            groups[int(doc.group_id)] = IdSet(uids)
     banned_group_docs = await GroupConfigModule.find(GroupConfigModule.banned == True).to_list()  # noqa: E712
     banned_groups = frozenset(int(d.group_id) for d in banned_group_docs)
     return users, groups, banned_groups
 
 
-async def _load_snapshot_postgresql() -> tuple[frozenset[int], dict[int, frozenset[int]], frozenset[int]]:
+async def _load_snapshot_postgresql() -> tuple[frozenset[int], dict[int, IdSet], frozenset[int]]:
     from sqlalchemy import select
 
     from src.foundation.db.repository_pg import GroupConfigRow, UserConfigRow, get_session
@@ -203,7 +317,7 @@ async def _load_snapshot_postgresql() -> tuple[frozenset[int], dict[int, frozens
                 GroupConfigRow.blocked_user_ids != []
             )
         )
-        groups: dict[int, frozenset[int]] = {}
+        groups: dict[int, IdSet] = {}
         for gid, raw in group_rows.all():
             uids: list[int] = []
             for x in raw or []:
@@ -212,7 +326,7 @@ async def _load_snapshot_postgresql() -> tuple[frozenset[int], dict[int, frozens
                 except (TypeError, ValueError):
                     continue
             if uids:
-                groups[int(gid)] = frozenset(uids)
+                groups[int(gid)] = IdSet(uids)
 
         banned_group_rows = await session.execute(
             select(GroupConfigRow.group_id).where(GroupConfigRow.banned.is_(True))
@@ -223,14 +337,14 @@ async def _load_snapshot_postgresql() -> tuple[frozenset[int], dict[int, frozens
 
 async def _refresh_loop() -> None:
     while True:
-        await asyncio.shield(refresh_ban_gate_snapshot())
-        waited = 0.0
-        while waited < _SNAPSHOT_REFRESH_SEC:
-            chunk = min(_REMOTE_GEN_SYNC_TTL_SEC, _SNAPSHOT_REFRESH_SEC - waited)
-            await asyncio.sleep(chunk)
-            waited += chunk
-            if sync_ban_gate_snapshot_remote_generation():
-                break
+        if _applied is None:
+            await asyncio.sleep(_SNAPSHOT_REFRESH_SEC)
+            await asyncio.shield(refresh_ban_gate_snapshot())
+            continue
+        await asyncio.sleep(_DELTA_POLL_SEC)
+        synced = await asyncio.shield(sync_ban_gate_deltas())
+        if not synced or time.monotonic() - _last_full_mono >= _FULL_RESYNC_SEC:
+            await asyncio.shield(refresh_ban_gate_snapshot())
 
 
 async def start_ban_gate_snapshot() -> None:
@@ -253,14 +367,13 @@ async def stop_ban_gate_snapshot() -> None:
 
 async def reset_ban_gate_snapshot_for_tests() -> None:
     """测试用：清空快照并停止后台任务。"""
-    global _global_banned, _group_blocked, _banned_groups, _last_refresh_mono, _ready  # noqa: FURB154
-    global _synced_redis_gen, _remote_gen_checked_at  # noqa: FURB154
+    global _global_banned, _group_blocked, _banned_groups, _last_refresh_mono, _last_full_mono, _ready, _applied  # noqa: FURB154
     await stop_ban_gate_snapshot()
     async with _lock:
-        _global_banned = frozenset()
+        _global_banned = set()
         _group_blocked = {}
-        _banned_groups = frozenset()
+        _banned_groups = set()
         _last_refresh_mono = 0.0
+        _last_full_mono = 0.0
         _ready = False
-    _synced_redis_gen = -1
-    _remote_gen_checked_at = 0.0
+        _applied = None
@@ -1,8 +1,17 @@
-"""社区语料 HTTP 仓储。"""
+"""社区语料 HTTP 仓储。
+
+开启 ``PALLAS_CORPUS_REMOTE_BATCH_ENDPOINTS`` 时 find 与写回经 ``remote_batch`` 合批，find 走
+``POST {base}/context/batch``、写回 gzip 后走 ``POST {base}/contribute/batch``；否则（或端点不支持批量时）逐条请求，
+每条各占一个远程并发槽。
+装了 ``h2`` 时共享客户端走 HTTP/2 多路复用。
+"""
 
 from __future__ import annotations
 
 import asyncio
+import gzip
+import importlib.util
+import json
 from typing import Any
 
 import httpx
@@ -13,6 +22,19 @@ from src.foundation.config.repo_settings import repo_env_raw_value
 from src.foundation.db.modules import Answer, Ban, Context
 from src.foundation.db.repository import ContextRepositoryExistenceMixin
 
+from .remote_batch import (
+    batch_endpoint_supported,
+    contribute_batcher_for,
+    find_coalescer_for,
+    mark_batch_endpoint_unsupported,
+    remote_batch_endpoints_enabled,
+)
+
+# 批量端点返回这些状态码视为服务端尚不支持，退回逐条
+_BATCH_UNSUPPORTED_STATUS = frozenset({404, 405, 415, 501})
+_KEEPALIVE_MAX = 16
+_KEEPALIVE_EXPIRY_SEC = 60.0
+
 
 def remote_corpus_timeout_sec() -> float:
     raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_TIMEOUT_SEC")
@@ -24,6 +46,10 @@ def remote_corpus_timeout_sec() -> float:
     return 2.0
 
 
+def remote_corpus_http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
 _shared_client: httpx.AsyncClient | None = None
 _shared_client_timeout: float | None = None
 _shared_client_lock = asyncio.Lock()
@@ -36,11 +62,88 @@ async def shared_remote_corpus_client(timeout_sec: float) -> httpx.AsyncClient:
         if _shared_client is None or _shared_client_timeout != timeout:
             if _shared_client is not None:
                 await _shared_client.aclose()
-            _shared_client = httpx.AsyncClient(timeout=timeout)
+            _shared_client = httpx.AsyncClient(
+                timeout=timeout,
+                http2=remote_corpus_http2_available(),
+                limits=httpx.Limits(
+                    max_keepalive_connections=_KEEPALIVE_MAX,
+                    keepalive_expiry=_KEEPALIVE_EXPIRY_SEC,
+                ),
+            )
             _shared_client_timeout = timeout
     return _shared_client
 
 
+def context_from_payload(data: dict[str, Any]) -> Context:
+    """社区语料 JSON 载荷 → Context；缺字段按默认值补齐。"""
+    answers_raw = data.get("answers")
+    answers: list[Answer] = []
+    if isinstance(answers_raw, list):
+        for item in answers_raw:
+            if not isinstance(item, dict):
+                continue
+            answers.append(
+                Answer(
+                    keywords=str(item.get("keywords") or ""),
+                    group_id=int(item.get("group_id") or 0),
+                    count=int(item.get("count") or 1),
+                    time=int(item.get("time") or 0),
+                    messages=[str(m) for m in (item.get("messages") or []) if m is not None],
+                )
+            )
+    ban_raw = data.get("ban")
+    bans: list[Ban] = []
+    if isinstance(ban_raw, list):
+        for item in ban_raw:
+            if not isinstance(item, dict):
+                continue
+            bans.append(
+                Ban(
+                    keywords=str(item.get("keywords") or ""),
+                    group_id=int(item.get("group_id") or 0),
+                    reason=str(item.get("reason") or ""),
+                    time=int(item.get("time") or 0),
+                )
+            )
+    return Context.model_construct(
+        keywords=str(data.get("keywords") or ""),
+        time=int(data.get("time") or 0),
+        trigger_count=int(data.get("trigger_count") or data.get("count") or 1),
+        answers=answers,
+        ban=bans,
+        clear_time=int(data.get("clear_time") or 0),
+    )
+
+
+def context_to_payload(context: Context) -> dict[str, Any]:
+    """Context → 社区语料 JSON 载荷（远端写回、find 缓存快照、本地远端层共用）。"""
+    return {
+        "keywords": context.keywords,
+        "time": int(context.time),
+        "trigger_count": int(context.trigger_count),
+        "clear_time": int(context.clear_time),
+        "answers": [
+            {
+                "keywords": a.keywords,
+                "group_id": int(a.group_id),
+                "count": int(a.count),
+                "time": int(a.time),
+                "messages": list(a.messages),
+            }
+            for a in context.answers
+        ],
+        "ban": [
+            {
+                "keywords": b.keywords,
+                "group_id": int(b.group_id),
+                "reason": b.reason,
+                "time": int(b.time),
+            }
+            for b in context.ban
+        ],
+    }
+
+
 class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
     def __init__(
         self,
@@ -75,9 +178,18 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
 
         await maybe_refresh_corpus_enrollment_on_auth_failure()
 
+    def _batch_key(self) -> tuple[Any, ...]:
+        return (tuple(self._api_bases), self._token, self._timeout)
+
     async def find_by_keywords(self, keywords: str) -> Context | None:
         if not keywords or not self._api_bases:
             return None
+        if not remote_batch_endpoints_enabled():
+            # 没有批量端点时合批省不了请求，不让热路径多等一个窗口
+            return await self._find_one_budgeted(keywords)
+        return await find_coalescer_for(self._batch_key(), self._find_many_http).find(keywords)
+
+    async def _find_one_budgeted(self, keywords: str) -> Context | None:
         from src.features.corpus.remote_budget import RemoteCorpusBudget
 
         async with RemoteCorpusBudget(hot_path=True, wait=False) as budget:
@@ -85,6 +197,67 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                 return None
             return await self._find_by_keywords_http(keywords)
 
+    async def find_many_by_keywords(self, keywords: list[str]) -> dict[str, Context | None]:
+        """多个 key 一起查；与其它并发 find 同窗合批。单 key 失败记为 None。"""
+        keys = list(dict.fromkeys(k for k in keywords if k))
+        if not keys or not self._api_bases:
+            return {}
+        results = await asyncio.gather(*(self.find_by_keywords(k) for k in keys), return_exceptions=True)
+        return {k: None if isinstance(r, BaseException) else r for k, r in zip(keys, results, strict=True)}
+
+    async def _find_many_http(self, keys: list[str]) -> dict[str, Context | BaseException | None]:
+        from src.features.corpus.remote_budget import RemoteCorpusBudget
+
+        if len(keys) > 1:
+            # 批量请求只占一个远程并发槽
+            async with RemoteCorpusBudget(hot_path=True, wait=False) as budget:
+                if budget.skipped:
+                    return {}
+                batched = await self._find_batch_http(keys)
+            if batched is not None:
+                return batched
+        # 逐条回退每条各占一个槽，槽满的记为未命中
+        results = await asyncio.gather(*(self._find_one_budgeted(k) for k in keys), return_exceptions=True)
+        return dict(zip(keys, results, strict=True))
+
+    async def _find_batch_http(self, keys: list[str]) -> dict[str, Context | BaseException | None] | None:
+        """批量端点可用时返回结果；全部端点不支持批量时返回 None 交给逐条。"""
+        last_error: httpx.HTTPError | None = None
+        async with scrub_http_log_noise():
+            client = await shared_remote_corpus_client(self._timeout)
+            for base in self._api_bases:
+                batch_url = f"{base}/context/batch"
+                if not batch_url.startswith("http") or not batch_endpoint_supported(batch_url):
+                    continue
+                try:
+                    resp = await client.post(batch_url, json={"keywords": keys}, headers=self._headers())
+                except httpx.HTTPError as e:
+                    last_error = e
+                    logger.warning(f"corpus community batch find failed api_base={base}: {e}")
+                    continue
+                if resp.status_code == 401:
+                    asyncio.create_task(self.schedule_auth_refresh())
+                    return {}
+                if resp.status_code in _BATCH_UNSUPPORTED_STATUS:
+                    mark_batch_endpoint_unsupported(batch_url)
+                    continue
+                if resp.status_code != 200:
+                    preview = (resp.text or "")[:200]
+                    logger.warning(f"corpus community batch find HTTP {resp.status_code} api_base={base}: {preview}")
+                    continue
+                data = resp.json()
+                contexts = data.get("contexts") if isinstance(data, dict) else None
+                if not isinstance(contexts, dict):
+                    return {}
+                return {
+                    k: context_from_payload(v) if isinstance(v, dict) else None
+                    for k, v in contexts.items()
+                    if k in keys
+                }
+        if last_error is not None:
+            return dict.fromkeys(keys, last_error)
+        return None
+
     async def _find_by_keywords_http(self, keywords: str) -> Context | None:
         last_error: httpx.HTTPError | None = None
         try:
@@ -116,7 +289,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                     data = resp.json()
                     if not isinstance(data, dict):
                         return None
-                    return self._context_from_payload(data)
+                    return context_from_payload(data)
         except httpx.HTTPError as e:
             logger.warning(f"corpus community find failed: {e}")
             raise
@@ -128,7 +301,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
         return None
 
     async def insert(self, context: Context) -> None:
-        await self._post_contribute({"op": "insert", "context": self._context_to_payload(context)})
+        await self._post_contribute({"op": "insert", "context": context_to_payload(context)})
 
     async def delete_expired(self, expiration: int, threshold: int) -> None:
         return None
@@ -165,15 +338,73 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
         return None
 
     async def _post_contribute(self, body: dict[str, Any]) -> None:
+        """写回；开启批量端点时交给批次发送并等待所在批次的结果。失败照常抛给调用方。"""
         if not self._api_bases:
             return
+        if not remote_batch_endpoints_enabled():
+            await self._post_contribute_one(body)
+            return
+        await contribute_batcher_for(self._batch_key(), self._post_contribute_many).submit(body)
+
+    async def _post_contribute_one(self, body: dict[str, Any]) -> None:
         from src.features.corpus.remote_budget import RemoteCorpusBudget
 
-        async with RemoteCorpusBudget(hot_path=False, wait=False) as budget:
+        async with RemoteCorpusBudget(hot_path=False, wait=True) as budget:
             if budget.skipped:
                 return
             await self._post_contribute_http(body)
 
+    async def _post_contribute_many(self, bodies: list[dict[str, Any]]) -> None:
+        from src.features.corpus.remote_budget import RemoteCorpusBudget
+
+        if len(bodies) > 1:
+            async with RemoteCorpusBudget(hot_path=False, wait=True) as budget:
+                if budget.skipped:
+                    return
+                if await self._post_contribute_batch_http(bodies):
+                    return
+        # 逐条回退每条各占一个槽，在途请求数不超过远程并发上限
+        results = await asyncio.gather(*(self._post_contribute_one(b) for b in bodies), return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
+
+    async def _post_contribute_batch_http(self, bodies: list[dict[str, Any]]) -> bool:
+        """gzip 压缩整批发送；成功返回 True，端点均不支持批量时返回 False 交给逐条。"""
+        raw = json.dumps({"ops": bodies}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = gzip.compress(raw, compresslevel=6)
+        headers = {**self._headers(), "Content-Type": "application/json", "Content-Encoding": "gzip"}
+        last_error: httpx.HTTPError | None = None
+        async with scrub_http_log_noise():
+            client = await shared_remote_corpus_client(self._timeout)
+            for base in self._api_bases:
+                batch_url = f"{base}/contribute/batch"
+                if not batch_url.startswith("http") or not batch_endpoint_supported(batch_url):
+                    continue
+                try:
+                    resp = await client.post(batch_url, content=payload, headers=headers)
+                except httpx.HTTPError as e:
+                    last_error = e
+                    logger.warning(f"corpus community batch contribute failed api_base={base}: {e}")
+                    continue
+                if resp.status_code in (200, 202):
+                    logger.debug(
+                        "corpus community batch contribute ops={} bytes={}/{} api_base={}",
+                        len(bodies),
+                        len(payload),
+                        len(raw),
+                        base,
+                    )
+                    return True
+                if resp.status_code in _BATCH_UNSUPPORTED_STATUS:
+                    mark_batch_endpoint_unsupported(batch_url)
+                    continue
+                preview = (resp.text or "")[:200]
+                logger.warning(f"corpus community batch contribute HTTP {resp.status_code} api_base={base}: {preview}")
+        if last_error is not None:
+            raise last_error
+        return False
+
     async def _post_contribute_http(self, body: dict[str, Any]) -> None:
         last_error: httpx.HTTPError | None = None
         try:
@@ -200,71 +431,3 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
             raise
         if last_error is not None:
             raise last_error
-
-    @staticmethod
-    def _context_from_payload(data: dict[str, Any]) -> Context:
-        answers_raw = data.get("answers")
-        answers: list[Answer] = []
-        if isinstance(answers_raw, list):
-            for item in answers_raw:
-                if not isinstance(item, dict):
-                    continue
-                answers.append(
-                    Answer(
-                        keywords=str(item.get("keywords") or ""),
-                        group_id=int(item.get("group_id") or 0),
-                        count=int(item.get("count") or 1),
-                        time=int(item.get("time") or 0),
-                        messages=[str(m) for m in (item.get("messages") or []) if m is not None],
-                    )
-                )
-        ban_raw = data.get("ban")
-        bans: list[Ban] = []
-        if isinstance(ban_raw, list):
-            for item in ban_raw:
-                if not isinstance(item, dict):
-                    continue
-                bans.append(
-                    Ban(
-                        keywords=str(item.get("keywords") or ""),
-                        group_id=int(item.get("group_id") or 0),
-                        reason=str(item.get("reason") or ""),
-                        time=int(item.get("time") or 0),
-                    )
-                )
-        return Context.model_construct(
-            keywords=str(data.get("keywords") or ""),
-            time=int(data.get("time") or 0),
-            trigger_count=int(data.get("trigger_count") or data.get("count") or 1),
-            answers=answers,
-            ban=bans,
-            clear_time=int(data.get("clear_time") or 0),
-        )
-
-    @staticmethod
-    def _context_to_payload(context: Context) -> dict[str, Any]:
-        return {
-            "keywords": context.keywords,
-            "time": int(context.time),
-            "trigger_count": int(context.trigger_count),
-            "clear_time": int(context.clear_time),
-            "answers": [
-                {
-                    "keywords": a.keywords,
-                    "group_id": int(a.group_id),
-                    "count": int(a.count),
-                    "time": int(a.time),
-                    "messages": list(a.messages),
-                }
-                for a in context.answers
-            ],
-            "ban": [
-                {
-                    "keywords": b.keywords,
-                    "group_id": int(b.group_id),
-                    "reason": b.reason,
-                    "time": int(b.time),
-                }
-                for b in context.ban
-            ],
-        }
@@ -66,6 +66,13 @@ class CompositeContextRepository:
         if self.local_first_has_answers(ctx):
             return ctx
         if mode == "prefetch":
+            from src.features.corpus.remote_tier import TieredRemoteCorpusRepository
+
+            # 社区语料本地缓存层命中时直接用，不等回填
+            if isinstance(self._community, TieredRemoteCorpusRepository):
+                tier_ctx = await self._community.peek(keywords)
+                if self.local_first_has_answers(tier_ctx):
+                    return tier_ctx
             from src.features.corpus.prefetch import schedule_corpus_prefetch
 
             schedule_corpus_prefetch(keywords)
@@ -28,7 +28,12 @@ def build_community_repository() -> ContextRepository | None:
     token = resolved_community_token()
     if not api_bases or not token:
         return None
-    return RemoteCorpusRepository(api_bases=api_bases, token=token)
+    remote = RemoteCorpusRepository(api_bases=api_bases, token=token)
+    from src.features.corpus.remote_tier import TieredRemoteCorpusRepository, remote_tier_enabled
+
+    if remote_tier_enabled():
+        return TieredRemoteCorpusRepository(remote)
+    return remote
 
 
 def build_fed_repository() -> ContextRepository | None:
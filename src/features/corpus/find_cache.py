@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from nonebot import logger
 
@@ -12,6 +12,8 @@ from src.features.corpus.reply_perf_config import find_cache_max_entries, find_c
 from src.foundation.db.pool_budget import is_pg_pool_timeout_error
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from src.foundation.db.modules import Context
 
 _find_cache: dict[str, tuple[float, Context | None]] = {}
@@ -140,5 +142,39 @@ async def invalidate_find_cache(keywords: str | None = None) -> None:
             _reply_db_fail_until.pop(key, None)
 
 
+def export_find_cache_entries(*, for_reply: bool) -> list[tuple[str, float, dict[str, Any] | None]]:
+    """未过期条目 (keywords, 剩余秒数, context 载荷)，供热启动快照。"""
+    from src.features.corpus.community_source import context_to_payload
+
+    cache = _reply_find_cache if for_reply else _find_cache
+    now = time.monotonic()
+    return [
+        (key, exp - now, None if ctx is None else context_to_payload(ctx))
+        for key, (exp, ctx) in cache.items()
+        if exp > now
+    ]
+
+
+def restore_find_cache_entries(entries: Iterable[tuple[str, float, dict[str, Any] | None]], *, for_reply: bool) -> int:
+    """从快照回填；剩余秒数不超过当前 TTL，已有条目不覆盖。返回回填条数。"""
+    from src.features.corpus.community_source import context_from_payload
+
+    cache = _reply_find_cache if for_reply else _find_cache
+    now = time.monotonic()
+    ttl_max = find_cache_ttl_sec()
+    cache_max = find_cache_max_entries()
+    restored = 0
+    for key, ttl, payload in entries:
+        ttl = min(float(ttl), ttl_max)
+        if not key or ttl <= 0 or key in cache:
+            continue
+        if len(cache) >= cache_max:
+            break
+        ctx = None if payload is None else context_from_payload(payload)
+        cache[key] = (now + ttl, ctx)
+        restored += 1
+    return restored
+
+
 async def reset_find_cache_for_tests() -> None:
     await invalidate_find_cache(None)
@@ -28,6 +28,7 @@ _RECENT_MISS_TTL_SEC = 45.0
 _RECENT_MISS_MAX = 20_000
 _SHORT_KEY_REPEAT_LEN = 6
 _SHORT_KEY_REPEAT_MISSES = 2
+_PREFETCH_BATCH_MAX = 16
 _LIFECYCLE_BOUND = False
 
 
@@ -151,7 +152,23 @@ async def import_remote_context_to_local(local, ctx: Context) -> bool:
     return True
 
 
+async def _local_has_answers(local, key: str) -> bool:
+    if not await local.context_exists_by_keywords(key):
+        return False
+    find_reply = getattr(local, "find_by_keywords_for_reply", None)
+    if callable(find_reply):
+        local_ctx = await find_reply(key)
+    else:
+        local_ctx = await local.find_by_keywords(key)
+    return local_ctx is not None and bool(local_ctx.answers)
+
+
 async def execute_corpus_prefetch(keywords: str) -> None:
+    await execute_corpus_prefetch_batch([keywords])
+
+
+async def execute_corpus_prefetch_batch(keywords: list[str]) -> None:
+    """本地逐条判断是否缺语料，缺的合成一次远程批量查询，再逐条导入本地。"""
     from src.platform.ingress.message_load import should_pause_tasks
 
     if should_pause_tasks():
@@ -162,8 +179,8 @@ async def execute_corpus_prefetch(keywords: str) -> None:
     from src.features.corpus.factory import build_community_repository
     from src.features.corpus.remote_budget import should_skip_remote_corpus
 
-    key = (keywords or "").strip()
-    if not key:
+    keys = [k for k in dict.fromkeys((kw or "").strip() for kw in keywords) if k]
+    if not keys:
         return
     if should_skip_remote_corpus(hot_path=False):
         return
@@ -176,38 +193,59 @@ async def execute_corpus_prefetch(keywords: str) -> None:
     local = getattr(repo, "_local", None)
     if local is None:
         return
-    if await local.context_exists_by_keywords(key):
-        find_reply = getattr(local, "find_by_keywords_for_reply", None)
-        if callable(find_reply):
-            local_ctx = await find_reply(key)
-        else:
-            local_ctx = await local.find_by_keywords(key)
-        if local_ctx is not None and local_ctx.answers:
-            return
-    try:
-        remote_ctx = await community.find_by_keywords(key)
-    except Exception as e:
-        logger.debug("corpus prefetch remote find failed keywords_len={}: {}", len(key), e)
-        return
-    if remote_ctx is None or not remote_ctx.answers:
+    missing = [key for key in keys if not await _local_has_answers(local, key)]
+    if not missing:
         return
+    from src.features.corpus.remote_tier import TieredRemoteCorpusRepository
+
+    tiered = isinstance(community, TieredRemoteCorpusRepository)
+    find_many = getattr(community, "find_many_by_keywords", None)
     try:
-        await import_remote_context_to_local(local, remote_ctx)
-        global _prefetch_completed
-        _prefetch_completed += 1
+        if tiered:
+            # 接话时 peek 已计过这次访问的频率
+            found = await community.find_many_by_keywords(missing, count=False)
+        elif callable(find_many):
+            found = await find_many(missing)
+        else:
+            found = {key: await community.find_by_keywords(key) for key in missing}
     except Exception as e:
-        logger.debug("corpus prefetch local import failed keywords_len={}: {}", len(key), e)
+        logger.debug("corpus prefetch remote find failed keys={}: {}", len(missing), e)
+        return
+    global _prefetch_completed
+    # 本地缓存层已在查询时收下远程结果，不再写入主库 context 表
+    for key in missing:
+        remote_ctx = found.get(key)
+        if remote_ctx is None or not remote_ctx.answers:
+            continue
+        if tiered:
+            await invalidate_find_cache(key)
+            _prefetch_completed += 1
+            continue
+        try:
+            await import_remote_context_to_local(local, remote_ctx)
+            _prefetch_completed += 1
+        except Exception as e:
+            logger.debug("corpus prefetch local import failed keywords_len={}: {}", len(key), e)
 
 
 async def run_prefetch_consumer() -> None:
     while True:
-        key = await prefetch_queue().get()
+        queue = prefetch_queue()
+        keys = [await queue.get()]
+        # 积压时一次取一批，远程查询合成一个请求
+        while len(keys) < _PREFETCH_BATCH_MAX and not queue.empty():
+            keys.append(queue.get_nowait())
         try:
-            await execute_corpus_prefetch(key)
+            if len(keys) == 1:
+                await execute_corpus_prefetch(keys[0])
+            else:
+                await execute_corpus_prefetch_batch(keys)
         finally:
-            _scheduled_keys.discard(key)
-            _recent_prefetch_until[key] = time.monotonic() + _RECENT_PREFETCH_TTL_SEC
-            prefetch_queue().task_done()
+            until = time.monotonic() + _RECENT_PREFETCH_TTL_SEC
+            for key in keys:
+                _scheduled_keys.discard(key)
+                _recent_prefetch_until[key] = until
+                queue.task_done()
 
 
 def prefetch_concurrency() -> int:
@@ -261,3 +299,6 @@ def bind_corpus_prefetch_lifecycle() -> None:
     @driver.on_shutdown
     async def _on_shutdown() -> None:
         await stop_corpus_prefetch_workers()
+        from src.features.corpus.remote_tier import close_remote_tier
+
+        close_remote_tier()
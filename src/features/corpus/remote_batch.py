@@ -0,0 +1,295 @@
+"""社区语料远程请求合批：短窗口内并发的 find 合成一次多 key 请求，写回攒批压缩发送。
+
+find：同 key 并发共享一个 future，窗口（``PALLAS_CORPUS_REMOTE_BATCH_WINDOW_MS``）内的不同 key 合成一批，
+满 ``PALLAS_CORPUS_REMOTE_BATCH_MAX`` 条立即发。批量请求只占一个远程并发槽。
+contribute：同窗口内的写回攒成一批发出，调用方等待所在批次的结果；每批耗时记入 ``remote_batch_stats``。
+合批依赖服务端的 ``/context/batch``、``/contribute/batch``，``PALLAS_CORPUS_REMOTE_BATCH_ENDPOINTS`` 开启后才走这里；
+默认不探测，find / 写回直接逐条请求，不经合批窗口。端点不支持批量时的逐条回退每条各占一个并发槽。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+
+from src.foundation.config.repo_settings import repo_env_raw_value
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Mapping
+
+    from src.foundation.db.modules import Context
+
+_CONTRIBUTE_BATCH_MAX = 64
+_CONTRIBUTE_PENDING_MAX = 2048
+# 端点不支持批量（404/405/…）后多久再试
+_BATCH_UNSUPPORTED_RETRY_SEC = 600.0
+
+
+def remote_batch_endpoints_enabled() -> bool:
+    raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_BATCH_ENDPOINTS")
+    return raw is not None and str(raw).strip().lower() in ("1", "true", "yes", "on")
+
+
+def remote_batch_window_sec() -> float:
+    raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_BATCH_WINDOW_MS")
+    if raw is not None:
+        try:
+            return min(200.0, max(0.0, float(str(raw).strip()))) / 1000.0
+        except ValueError:
+            pass
+    return 0.008
+
+
+def remote_batch_max_keys() -> int:
+    raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_BATCH_MAX")
+    if raw is not None:
+        try:
+            return min(256, max(1, int(str(raw).strip())))
+        except ValueError:
+            pass
+    return 32
+
+
+@dataclass(slots=True)
+class _BatchStat:
+    batches: int = 0
+    items: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+_stats: dict[str, _BatchStat] = {}
+_batch_unsupported_until: dict[str, float] = {}
+
+
+def record_remote_batch(kind: str, size: int, elapsed_ms: float) -> None:
+    stat = _stats.get(kind)
+    if stat is None:
+        stat = _stats[kind] = _BatchStat()
+    stat.batches += 1
+    stat.items += size
+    stat.total_ms += elapsed_ms
+    stat.last_ms = elapsed_ms
+    stat.max_ms = max(stat.max_ms, elapsed_ms)
+    logger.debug("corpus remote {} batch n={} ms={:.0f}", kind, size, elapsed_ms)
+
+
+def remote_batch_stats() -> dict[str, dict[str, float]]:
+    return {
+        kind: {
+            "batches": s.batches,
+            "items": s.items,
+            "avg_items": round(s.items / s.batches, 2) if s.batches else 0.0,
+            "avg_ms": round(s.total_ms / s.batches, 1) if s.batches else 0.0,
+            "last_ms": round(s.last_ms, 1),
+            "max_ms": round(s.max_ms, 1),
+        }
+        for kind, s in _stats.items()
+    }
+
+
+def batch_endpoint_supported(url: str) -> bool:
+    until = _batch_unsupported_until.get(url)
+    if until is None:
+        return True
+    if time.monotonic() >= until:
+        _batch_unsupported_until.pop(url, None)
+        return True
+    return False
+
+
+def mark_batch_endpoint_unsupported(url: str) -> None:
+    if url not in _batch_unsupported_until:
+        logger.info("corpus remote batch endpoint unavailable, falling back to per-item requests: {}", url)
+    _batch_unsupported_until[url] = time.monotonic() + _BATCH_UNSUPPORTED_RETRY_SEC
+
+
+def clear_remote_batch_state() -> None:
+    _stats.clear()
+    _batch_unsupported_until.clear()
+    _find_coalescers.clear()
+    _contribute_batchers.clear()
+
+
+def _consume_exception(fut: asyncio.Future[Any]) -> None:
+    # 等待方已取消时避免 "exception was never retrieved"
+    if not fut.cancelled():
+        fut.exception()
+
+
+class RemoteFindCoalescer:
+    """合并并发 find；fetch_many 返回 key -> Context | None | 异常。"""
+
+    def __init__(
+        self,
+        fetch_many: Callable[[list[str]], Awaitable[Mapping[str, Context | BaseException | None]]],
+    ) -> None:
+        self._fetch_many = fetch_many
+        self._pending: dict[str, asyncio.Future[Context | None]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runs: set[asyncio.Task[None]] = set()
+
+    async def find(self, key: str) -> Context | None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 换了事件循环（测试 / 重启驱动）：旧循环上的等待全部作废
+            self._loop = loop
+            self._pending = {}
+            self._timer = None
+        fut = self._pending.get(key)
+        if fut is None:
+            fut = loop.create_future()
+            fut.add_done_callback(_consume_exception)
+            self._pending[key] = fut
+            if len(self._pending) >= remote_batch_max_keys():
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(remote_batch_window_sec(), self._flush)
+        return await asyncio.shield(fut)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        run = asyncio.get_running_loop().create_task(self._run(batch))
+        self._runs.add(run)
+        run.add_done_callback(self._runs.discard)
+
+    async def _run(self, batch: dict[str, asyncio.Future[Context | None]]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await self._fetch_many(list(batch))
+            for key, fut in batch.items():
+                if fut.done():
+                    continue
+                value = results.get(key)
+                if isinstance(value, BaseException):
+                    fut.set_exception(value)
+                else:
+                    fut.set_result(value)
+        except Exception as e:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(e)
+        finally:
+            # 任务被取消时也不能让等待方挂住
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(RuntimeError("corpus remote find batch aborted"))
+            record_remote_batch("find", len(batch), (time.perf_counter() - started) * 1000.0)
+
+
+class RemoteContributeBatcher:
+    """写回攒批：submit 返回该条的 future，窗口到期或攒满一批后由 send_many 发送，整批结果回填。"""
+
+    def __init__(self, send_many: Callable[[list[dict[str, Any]]], Awaitable[None]]) -> None:
+        self._send_many = send_many
+        self._pending: list[tuple[dict[str, Any], asyncio.Future[None]]] = []
+        self._timer: asyncio.Handle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runs: set[asyncio.Task[None]] = set()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, body: dict[str, Any]) -> asyncio.Future[None]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+        fut: asyncio.Future[None] = loop.create_future()
+        fut.add_done_callback(_consume_exception)
+        if len(self._pending) >= _CONTRIBUTE_PENDING_MAX:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 200 == 0:
+                logger.info(
+                    "corpus contribute batch backlog full (max={}), dropped={}", _CONTRIBUTE_PENDING_MAX, self.dropped
+                )
+            fut.set_exception(RuntimeError("corpus contribute batch backlog full"))
+            return fut
+        self._pending.append((body, fut))
+        if len(self._pending) >= _CONTRIBUTE_BATCH_MAX:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(remote_batch_window_sec(), self.flush)
+        return fut
+
+    def flush(self) -> asyncio.Task[None] | None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:_CONTRIBUTE_BATCH_MAX], self._pending[_CONTRIBUTE_BATCH_MAX:]
+        if self._pending and self._loop is not None:
+            self._timer = self._loop.call_soon(self.flush)
+        if not batch:
+            return None
+        run = asyncio.get_running_loop().create_task(self._run(batch))
+        self._runs.add(run)
+        run.add_done_callback(self._runs.discard)
+        return run
+
+    async def drain(self) -> None:
+        """立即发出积压并等待在途批次完成（退出前调用）。"""
+        while self._pending:
+            self.flush()
+        if self._runs:
+            await asyncio.gather(*self._runs, return_exceptions=True)
+
+    async def _run(self, batch: list[tuple[dict[str, Any], asyncio.Future[None]]]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._send_many([body for body, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_result(None)
+        finally:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(RuntimeError("corpus contribute batch aborted"))
+            record_remote_batch("contribute", len(batch), (time.perf_counter() - started) * 1000.0)
+
+
+_find_coalescers: dict[tuple[Any, ...], RemoteFindCoalescer] = {}
+_contribute_batchers: dict[tuple[Any, ...], RemoteContributeBatcher] = {}
+
+
+def find_coalescer_for(
+    key: tuple[Any, ...],
+    fetch_many: Callable[[list[str]], Awaitable[Mapping[str, Context | BaseException | None]]],
+) -> RemoteFindCoalescer:
+    """同一组端点 + 凭据共用一个合并器，跨仓储实例合批。"""
+    coalescer = _find_coalescers.get(key)
+    if coalescer is None:
+        coalescer = _find_coalescers[key] = RemoteFindCoalescer(fetch_many)
+    return coalescer
+
+
+def contribute_batcher_for(
+    key: tuple[Any, ...],
+    send_many: Callable[[list[dict[str, Any]]], Awaitable[None]],
+) -> RemoteContributeBatcher:
+    batcher = _contribute_batchers.get(key)
+    if batcher is None:
+        batcher = _contribute_batchers[key] = RemoteContributeBatcher(send_many)
+    return batcher
+
+
+async def drain_remote_contribute_batches() -> None:
+    for batcher in list(_contribute_batchers.values()):
+        await batcher.drain()
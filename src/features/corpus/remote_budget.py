@@ -57,6 +57,17 @@ def should_skip_remote_corpus(*, hot_path: bool = False) -> bool:
     return False
 
 
+async def _try_acquire_nowait(sem: asyncio.Semaphore) -> bool:
+    """有空槽时立即占用（未上锁时 acquire 不挂起）。
+
+    wait_for(timeout=0) 在 3.12 上协程还没跑就超时，空闲时也会被当成槽满跳过。
+    """
+    if sem.locked():
+        return False
+    await sem.acquire()
+    return True
+
+
 class _RemoteCorpusSlot:
     __slots__ = ("acquired",)
 
@@ -75,9 +86,7 @@ async def try_remote_corpus_slot(*, wait: bool = True) -> _RemoteCorpusSlot | No
         slot = _RemoteCorpusSlot()
         slot.acquired = True
         return slot
-    try:
-        await asyncio.wait_for(sem.acquire(), timeout=0)
-    except TimeoutError:
+    if not await _try_acquire_nowait(sem):
         _skipped_busy += 1
         return None
     slot = _RemoteCorpusSlot()
@@ -111,9 +120,7 @@ class RemoteCorpusBudget:
             self._slot = _RemoteCorpusSlot()
             self._slot.acquired = True
         else:
-            try:
-                await asyncio.wait_for(sem.acquire(), timeout=0)
-            except TimeoutError:
+            if not await _try_acquire_nowait(sem):
                 global _skipped_busy
                 _skipped_busy += 1
                 self.skipped = True
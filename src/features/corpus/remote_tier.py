@@ -0,0 +1,415 @@
+"""社区语料本地缓存层：远程查到的 context 落本地 SQLite，跨重启复用，不写主库 context 表。
+
+- 准入：TinyLFU 风格。内存里一个 count-min 频率草图，库满时新 key 的估计频率须高于 LRU 队尾才换入，
+  偶发的冷门 key 挤不走常用 key。草图启动时按库内命中数回填。
+- 容量：按压缩后字节数计，上限 ``PALLAS_CORPUS_REMOTE_TIER_MAX_MB``。
+- 新鲜度：``PALLAS_CORPUS_REMOTE_TIER_FRESH_SEC`` 内直接用；过期但未超过最长保留时先返回旧值，后台重新拉取
+  （stale-while-revalidate）。
+
+远程返回 None 可能只是限流 / 鉴权失败，不缓存空结果。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING
+
+from nonebot import logger
+
+from src.features.corpus.community_source import RemoteCorpusRepository, context_from_payload, context_to_payload
+from src.foundation.config.repo_settings import repo_env_raw_value
+from src.foundation.db.repository import ContextRepositoryExistenceMixin
+from src.foundation.paths import plugin_data_dir
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from src.foundation.db.modules import Answer, Ban, Context
+
+_MAX_STALE_SEC = 7 * 86400
+# 命中时间批量回写，避免每次命中都写库
+_TOUCH_FLUSH_MAX = 256
+_SKETCH_WIDTH = 1 << 16
+_SKETCH_DEPTH = 4
+_SKETCH_COUNTER_MAX = 15
+# 累计增量达到宽度 10 倍后整体减半，过气的热词逐步退场
+_SKETCH_SAMPLE = _SKETCH_WIDTH * 10
+_HALVE = bytes(i >> 1 for i in range(256))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS remote_context (
+    keywords TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_hit REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS remote_context_last_hit ON remote_context (last_hit);
+"""
+
+
+def _env_float(key: str, default: float, *, lo: float, hi: float) -> float:
+    raw = repo_env_raw_value(key)
+    if raw is not None:
+        try:
+            return min(hi, max(lo, float(str(raw).strip())))
+        except ValueError:
+            pass
+    return default
+
+
+def remote_tier_enabled() -> bool:
+    raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_TIER")
+    if raw is None:
+        return True
+    return str(raw).strip().lower() not in ("0", "false", "no", "off")
+
+
+def remote_tier_max_bytes() -> int:
+    return int(_env_float("PALLAS_CORPUS_REMOTE_TIER_MAX_MB", 64.0, lo=1.0, hi=4096.0) * 1024 * 1024)
+
+
+def remote_tier_fresh_sec() -> float:
+    return _env_float("PALLAS_CORPUS_REMOTE_TIER_FRESH_SEC", 6 * 3600.0, lo=60.0, hi=float(_MAX_STALE_SEC))
+
+
+class FrequencySketch:
+    """4 行 count-min，计数上限 15；累计增量到采样数后整体减半。"""
+
+    __slots__ = ("_additions", "_rows")
+
+    def __init__(self) -> None:
+        self._rows = [bytearray(_SKETCH_WIDTH) for _ in range(_SKETCH_DEPTH)]
+        self._additions = 0
+
+    @staticmethod
+    def _slots(key: str) -> list[int]:
+        return [hash((i, key)) & (_SKETCH_WIDTH - 1) for i in range(_SKETCH_DEPTH)]
+
+    def increment(self, key: str, times: int = 1) -> None:
+        for row, idx in zip(self._rows, self._slots(key), strict=True):
+            row[idx] = min(_SKETCH_COUNTER_MAX, row[idx] + times)
+        self._additions += times
+        if self._additions >= _SKETCH_SAMPLE:
+            self._additions //= 2
+            for row in self._rows:
+                row[:] = row.translate(_HALVE)
+
+    def estimate(self, key: str) -> int:
+        return min(row[idx] for row, idx in zip(self._rows, self._slots(key), strict=True))
+
+
+_lock = threading.RLock()
+# 频率表在事件循环里累加、在写库线程里估计；单独一把短锁，不让事件循环等 SQLite
+_sketch_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+_path_override: Path | None = None
+_total_bytes = 0
+_touched: dict[str, int] = {}
+_sketch = FrequencySketch()
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "admitted": 0, "rejected": 0, "evicted": 0}
+
+
+def remote_tier_path() -> Path:
+    if _path_override is not None:
+        return _path_override
+    from src.platform.shard import context as shard_ctx
+
+    name = "remote_tier.sqlite3"
+    if shard_ctx.sharding_active():
+        name = f"remote_tier.{shard_ctx.role()}{shard_ctx.shard_id()}.sqlite3"
+    return plugin_data_dir("corpus") / name
+
+
+def set_remote_tier_path(path: Path | None) -> None:
+    """测试用：切换库文件并重置内存状态。"""
+    global _path_override, _sketch
+    close_remote_tier()
+    _path_override = path
+    _sketch = FrequencySketch()
+    for k in _stats:
+        _stats[k] = 0
+
+
+def _db() -> sqlite3.Connection:
+    global _conn, _total_bytes, _sketch
+    if _conn is None:
+        path = remote_tier_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        conn.execute("DELETE FROM remote_context WHERE fetched_at < ?", (time.time() - _MAX_STALE_SEC,))
+        _total_bytes = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM remote_context").fetchone()[0])
+        # 重开时按库里的命中数重建，不在旧计数上叠加
+        sketch = FrequencySketch()
+        for keywords, hits in conn.execute("SELECT keywords, hits FROM remote_context"):
+            sketch.increment(keywords, min(int(hits), _SKETCH_COUNTER_MAX))
+        with _sketch_lock:
+            _sketch = sketch
+        _conn = conn
+    return _conn
+
+
+def close_remote_tier() -> None:
+    global _conn, _total_bytes
+    with _lock:
+        if _conn is not None:
+            _flush_touches(_conn)
+            _conn.close()
+            _conn = None
+        _total_bytes = 0
+        _touched.clear()
+
+
+def _flush_touches(conn: sqlite3.Connection) -> None:
+    if not _touched:
+        return
+    now = time.time()
+    conn.executemany(
+        "UPDATE remote_context SET last_hit = ?, hits = hits + ? WHERE keywords = ?",
+        [(now, n, k) for k, n in _touched.items()],
+    )
+    _touched.clear()
+
+
+def encode_context(ctx: Context) -> bytes:
+    body = json.dumps(context_to_payload(ctx), ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(body.encode("utf-8"), 6)
+
+
+def decode_context(blob: bytes) -> Context | None:
+    try:
+        data = json.loads(zlib.decompress(blob))
+    except (zlib.error, ValueError):
+        return None
+    return context_from_payload(data) if isinstance(data, dict) else None
+
+
+def tier_get_many_sync(keys: list[str]) -> dict[str, tuple[bytes, float]]:
+    """命中的 key -> (压缩载荷, 拉取时间)；超过最长保留的视为未命中。"""
+    if not keys:
+        return {}
+    oldest = time.time() - _MAX_STALE_SEC
+    out: dict[str, tuple[bytes, float]] = {}
+    with _lock:
+        conn = _db()
+        marks = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT keywords, payload, fetched_at FROM remote_context WHERE keywords IN ({marks})",  # noqa: S608
+            keys,
+        ).fetchall()
+        for keywords, payload, fetched_at in rows:
+            if fetched_at < oldest:
+                continue
+            out[keywords] = (payload, float(fetched_at))
+            _touched[keywords] = _touched.get(keywords, 0) + 1
+        if len(_touched) >= _TOUCH_FLUSH_MAX:
+            _flush_touches(conn)
+    return out
+
+
+def tier_put_sync(key: str, blob: bytes, *, max_bytes: int) -> bool:
+    """写入或刷新一条；库满时按频率决定是否挤掉 LRU 队尾。返回是否在库中。"""
+    global _total_bytes
+    size = len(blob)
+    if size > max_bytes:
+        return False
+    now = time.time()
+    with _lock:
+        conn = _db()
+        _flush_touches(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT size FROM remote_context WHERE keywords = ?", (key,)).fetchone()
+            old_size = int(row[0]) if row else 0
+            need = _total_bytes - old_size + size - max_bytes
+            victims: list[tuple[str, int]] = []
+            if need > 0:
+                candidate = _sketch_estimate(key)
+                freed = 0
+                for victim, victim_size in conn.execute(
+                    "SELECT keywords, size FROM remote_context WHERE keywords != ? ORDER BY last_hit",
+                    (key,),
+                ):
+                    if freed >= need:
+                        break
+                    if row is None and _sketch_estimate(victim) >= candidate:
+                        # 新 key 不比队尾更常用：不准入
+                        conn.execute("ROLLBACK")
+                        _stats["rejected"] += 1
+                        return False
+                    victims.append((victim, int(victim_size)))
+                    freed += int(victim_size)
+                if freed < need:
+                    conn.execute("ROLLBACK")
+                    _stats["rejected"] += 1
+                    return False
+                conn.executemany("DELETE FROM remote_context WHERE keywords = ?", [(v,) for v, _ in victims])
+            conn.execute(
+                "INSERT INTO remote_context (keywords, payload, size, fetched_at, last_hit, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0) "
+                "ON CONFLICT (keywords) DO UPDATE SET payload = excluded.payload, size = excluded.size, "
+                "fetched_at = excluded.fetched_at",
+                (key, blob, size, now, now),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        _total_bytes += size - old_size - sum(s for _, s in victims)
+        _stats["evicted"] += len(victims)
+        if row is None:
+            _stats["admitted"] += 1
+    return True
+
+
+def _sketch_estimate(key: str) -> int:
+    with _sketch_lock:
+        return _sketch.estimate(key)
+
+
+def remote_tier_stats() -> dict[str, int]:
+    return {**_stats, "bytes": _total_bytes, "max_bytes": remote_tier_max_bytes()}
+
+
+class TieredRemoteCorpusRepository(ContextRepositoryExistenceMixin):
+    """在社区语料仓储前加一层本地缓存；写操作原样转发。"""
+
+    def __init__(self, inner: RemoteCorpusRepository) -> None:
+        self._inner = inner
+        self._revalidating: set[str] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def _lookup(self, keys: list[str], *, count: bool = True) -> tuple[dict[str, Context], list[str]]:
+        """返回 (可直接使用的结果, 需要远程拉取的 key)；过期命中照常返回并后台刷新。
+
+        count=False 时不计入访问频率（同一次访问的后续查询，避免重复计数）。
+        """
+        if count:
+            with _sketch_lock:
+                for key in keys:
+                    _sketch.increment(key)
+        try:
+            rows = await asyncio.to_thread(tier_get_many_sync, keys)
+        except sqlite3.Error as e:
+            logger.warning(f"corpus remote tier read failed: {e}")
+            return {}, keys
+        fresh_after = time.time() - remote_tier_fresh_sec()
+        found: dict[str, Context] = {}
+        for key, (blob, fetched_at) in rows.items():
+            ctx = decode_context(blob)
+            if ctx is None:
+                continue
+            found[key] = ctx
+            if fetched_at < fresh_after:
+                _stats["stale_hits"] += 1
+                self._schedule_revalidate(key)
+            else:
+                _stats["hits"] += 1
+        missing = [k for k in keys if k not in found]
+        _stats["misses"] += len(missing)
+        return found, missing
+
+    async def _admit(self, results: dict[str, Context | None]) -> None:
+        max_bytes = remote_tier_max_bytes()
+        for key, ctx in results.items():
+            if ctx is None or not ctx.answers:
+                continue
+            try:
+                await asyncio.to_thread(tier_put_sync, key, encode_context(ctx), max_bytes=max_bytes)
+            except sqlite3.Error as e:
+                logger.warning(f"corpus remote tier write failed: {e}")
+                return
+
+    def _schedule_revalidate(self, key: str) -> None:
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        task = asyncio.create_task(self._revalidate(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _revalidate(self, key: str) -> None:
+        try:
+            ctx = await self._inner.find_by_keywords(key)
+            await self._admit({key: ctx})
+        except Exception as e:
+            logger.debug("corpus remote tier revalidate failed keywords_len={}: {}", len(key), e)
+        finally:
+            self._revalidating.discard(key)
+
+    async def peek(self, keywords: str) -> Context | None:
+        """只查本地缓存层，不发远程请求（过期命中仍会后台刷新）。"""
+        if not keywords:
+            return None
+        found, _ = await self._lookup([keywords])
+        return found.get(keywords)
+
+    async def find_by_keywords(self, keywords: str) -> Context | None:
+        if not keywords:
+            return None
+        found, missing = await self._lookup([keywords])
+        if not missing:
+            return found.get(keywords)
+        ctx = await self._inner.find_by_keywords(keywords)
+        await self._admit({keywords: ctx})
+        return ctx
+
+    async def find_many_by_keywords(self, keywords: list[str], *, count: bool = True) -> dict[str, Context | None]:
+        keys = list(dict.fromkeys(k for k in keywords if k))
+        if not keys:
+            return {}
+        found, missing = await self._lookup(keys, count=count)
+        out: dict[str, Context | None] = dict(found)
+        if missing:
+            fetched = await self._inner.find_many_by_keywords(missing)
+            await self._admit(fetched)
+            out.update(fetched)
+        return out
+
+    async def save(self, context: Context) -> None:
+        await self._inner.save(context)
+
+    async def insert(self, context: Context) -> None:
+        await self._inner.insert(context)
+
+    async def delete_expired(self, expiration: int, threshold: int) -> None:
+        await self._inner.delete_expired(expiration, threshold)
+
+    async def find_for_cleanup(self, trigger_threshold: int, expiration: int) -> list[Context]:
+        return await self._inner.find_for_cleanup(trigger_threshold, expiration)
+
+    async def upsert_answer(
+        self,
+        keywords: str,
+        group_id: int,
+        answer_keywords: str,
+        answer_time: int,
+        message: str,
+        append_on_existing: bool,
+    ) -> None:
+        await self._inner.upsert_answer(
+            keywords=keywords,
+            group_id=group_id,
+            answer_keywords=answer_keywords,
+            answer_time=answer_time,
+            message=message,
+            append_on_existing=append_on_existing,
+        )
+
+    async def replace_answers(self, keywords: str, answers: list[Answer], clear_time: int) -> None:
+        await self._inner.replace_answers(keywords, answers, clear_time)
+
+    async def append_ban(self, keywords: str, ban: Ban) -> None:
+        await self._inner.append_ban(keywords, ban)
+
+    async def find_ban_reply_target(self, group_id: int, reply_message: str) -> tuple[str, str] | None:
+        return await self._inner.find_ban_reply_target(group_id, reply_message)
@@ -124,6 +124,10 @@ def bind_corpus_write_lifecycle() -> None:
     @driver.on_shutdown
     async def _on_shutdown() -> None:
         await stop_corpus_write_workers()
+        # 社区写回在传输层攒批，退出前把积压发掉
+        from src.features.corpus.remote_batch import drain_remote_contribute_batches
+
+        await drain_remote_contribute_batches()
 
 
 async def mirror_upsert_answer(
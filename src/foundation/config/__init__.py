@@ -1,6 +1,7 @@
 # type: ignore
 import asyncio
 import time
+from collections import OrderedDict
 from typing import Any
 
 from src.foundation.db import (
@@ -10,8 +11,12 @@ from src.foundation.db import (
     make_user_config_repository,
 )
 from src.foundation.db.repository import ConfigRepository
+from src.foundation.id_set import EMPTY_ID_SET, IdSet, IdSetCache
 
 KEY_JOINER = "."
+# 各群 blocked_user_ids 的 IdSet 快照；按配置行里的列表对象复用，行刷新后才重建
+_BLOCKED_ID_SETS_MAX = 4096
+_blocked_id_sets: OrderedDict[int, IdSetCache] = OrderedDict()
 
 
 class Config:
@@ -271,7 +276,9 @@ async def user_is_bot_admin(bot_id: int, user_id: int) -> bool:
     """
     根据 BotConfig 持久化字段 admins 判断 user_id 是否为该 bot 账号的管理员。
     """
-    return user_id in await get_bot_admins(bot_id)
+    from .bot_admins_cache import get_bot_admin_id_set
+
+    return user_id in await get_bot_admin_id_set(bot_id)
 
 
 async def user_is_admin_of_any_bot(user_id: int) -> bool:
@@ -350,8 +357,21 @@ class GroupConfig(Config):
         rm = {int(u) for u in uids}
         await self.set_blocked_user_ids([u for u in await self.blocked_user_ids() if u not in rm])
 
+    async def blocked_user_id_set(self) -> IdSet:
+        raw = await self._find("blocked_user_ids")
+        if not raw:
+            return EMPTY_ID_SET
+        cache = _blocked_id_sets.get(self.group_id)
+        if cache is None:
+            cache = _blocked_id_sets[self.group_id] = IdSetCache()
+            while len(_blocked_id_sets) > _BLOCKED_ID_SETS_MAX:
+                _blocked_id_sets.popitem(last=False)
+        else:
+            _blocked_id_sets.move_to_end(self.group_id)
+        return cache.get(raw, lambda: raw)
+
     async def is_user_blocked_in_group(self, user_id: int) -> bool:
-        return user_id in set(await self.blocked_user_ids())
+        return user_id in await self.blocked_user_id_set()
 
     async def is_cooldown(self, action_type: str) -> bool:
         """
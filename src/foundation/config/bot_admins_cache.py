@@ -7,6 +7,7 @@ import time
 from typing import TYPE_CHECKING
 
 from src.foundation.db import make_bot_config_repository
+from src.foundation.id_set import EMPTY_ID_SET, IdSet
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -14,16 +15,17 @@ if TYPE_CHECKING:
 _BOT_ADMINS_CACHE_TTL_SEC = 45.0
 _BOT_ADMINS_CACHE_MAX = 10_000
 _BOT_ADMINS_DB_FAIL_TTL_SEC = 2.0
-_admins_cache: dict[int, tuple[float, list[int]]] = {}
+# 值为 (过期时间, 原序列表, 成员判断用 IdSet)
+_admins_cache: dict[int, tuple[float, list[int], IdSet]] = {}
 _admins_db_fail_until: dict[int, float] = {}
 _admins_lock = asyncio.Lock()
 _admins_generation: dict[int, int] = {}
 _fetch_tasks: dict[int, asyncio.Task[list[int]]] = {}
 _fetch_tasks_lock = asyncio.Lock()
 
-_any_bot_admin_cache: tuple[float, frozenset[int]] | None = None
+_any_bot_admin_cache: tuple[float, IdSet] | None = None
 _any_bot_admin_generation = 0
-_any_bot_admin_fetch_task: asyncio.Task[frozenset[int]] | None = None
+_any_bot_admin_fetch_task: asyncio.Task[IdSet] | None = None
 _any_bot_admin_fetch_lock = asyncio.Lock()
 _any_bot_admin_db_fail_until: float = 0.0
 
@@ -128,23 +130,23 @@ async def _await_admins_deduped(bot_id: int) -> list[int]:
     return await task
 
 
-async def get_bot_admins_cached(bot_id: int) -> list[int]:
+async def _admins_entry(bot_id: int) -> tuple[list[int], IdSet]:
     if _pg_not_ready():
-        return []
+        return [], EMPTY_ID_SET
     bot_id = int(bot_id)
     if bot_admins_db_fail_active(bot_id):
-        return []
+        return [], EMPTY_ID_SET
     while True:
         now = time.monotonic()
         async with _admins_lock:
             hit = _admins_cache.get(bot_id)
             if hit is not None:
-                exp, val = hit
+                exp, val, ids = hit
                 if now < exp:
-                    return list(val)
+                    return val, ids
                 _admins_cache.pop(bot_id, None)
             if len(_admins_cache) > _BOT_ADMINS_CACHE_MAX:
-                stale = [k for k, (e, _) in _admins_cache.items() if now >= e]
+                stale = [k for k, (e, _, _) in _admins_cache.items() if now >= e]
                 for k in stale:
                     _admins_cache.pop(k, None)
                 if len(_admins_cache) > _BOT_ADMINS_CACHE_MAX:
@@ -154,35 +156,39 @@ async def get_bot_admins_cached(bot_id: int) -> list[int]:
         admins = await _await_admins_deduped(bot_id)
 
         expire_at = time.monotonic() + _BOT_ADMINS_CACHE_TTL_SEC
+        entry = (list(admins), IdSet(admins))
         async with _admins_lock:
             if _admins_generation.get(bot_id, 0) != gen_snapshot:
                 continue
-            _admins_cache[bot_id] = (expire_at, list(admins))
-        return list(admins)
+            _admins_cache[bot_id] = (expire_at, *entry)
+        return entry
+
 
+async def get_bot_admins_cached(bot_id: int) -> list[int]:
+    admins, _ids = await _admins_entry(bot_id)
+    return list(admins)
+
+
+async def get_bot_admin_id_set(bot_id: int) -> IdSet:
+    """权限判断用：返回缓存的不可变快照，不复制。"""
+    _admins, ids = await _admins_entry(bot_id)
+    return ids
 
-async def _load_any_bot_admin_user_ids() -> frozenset[int]:
+
+async def _load_any_bot_admin_user_ids() -> IdSet:
     from src.foundation.db.pallas_console_data import list_all_bot_configs_public
     from src.foundation.db.pool_budget import is_pg_pool_timeout_error, pg_pool_under_pressure
 
     if pg_pool_under_pressure(threshold=0.55):
-        return frozenset()
+        return EMPTY_ID_SET
     try:
         configs = await list_all_bot_configs_public()
     except Exception as exc:
         if is_pg_pool_timeout_error(exc):
             mark_any_bot_admin_db_fail()
-            return frozenset()
-        return frozenset()
-
-    uids: set[int] = set()
-    for cfg in configs:
-        for uid in cfg.get("admins") or []:
-            try:
-                uids.add(int(uid))
-            except (TypeError, ValueError):
-                continue
-    return frozenset(uids)
+            return EMPTY_ID_SET
+        return EMPTY_ID_SET
+    return IdSet(uid for cfg in configs for uid in cfg.get("admins") or [])
 
 
 def mark_any_bot_admin_db_fail() -> None:
@@ -200,7 +206,7 @@ def any_bot_admin_db_fail_active() -> bool:
     return False
 
 
-async def _await_any_bot_admin_user_ids_deduped() -> frozenset[int]:
+async def _await_any_bot_admin_user_ids_deduped() -> IdSet:
     global _any_bot_admin_fetch_task
     async with _any_bot_admin_fetch_lock:
         t = _any_bot_admin_fetch_task
@@ -208,7 +214,7 @@ async def _await_any_bot_admin_user_ids_deduped() -> frozenset[int]:
             task = t
         else:
 
-            async def _runner() -> frozenset[int]:
+            async def _runner() -> IdSet:
                 global _any_bot_admin_fetch_task
                 try:
                     return await _load_any_bot_admin_user_ids()
@@ -223,14 +229,14 @@ async def _await_any_bot_admin_user_ids_deduped() -> frozenset[int]:
     return await task
 
 
-async def any_bot_admin_user_ids_cached() -> frozenset[int]:
+async def any_bot_admin_user_ids_cached() -> IdSet:
     """跨 Bot 管理员判定用；列表变更后由 invalidate 整体失效。"""
     global _any_bot_admin_cache
 
     if _pg_not_ready():
-        return frozenset()
+        return EMPTY_ID_SET
     if any_bot_admin_db_fail_active():
-        return frozenset()
+        return EMPTY_ID_SET
 
     while True:
         now = time.monotonic()
@@ -291,6 +291,7 @@ async def init_postgresql_db() -> None:
     from sqlalchemy import text
     from sqlalchemy.ext.asyncio import create_async_engine
 
+    from .config_cache import start_config_invalidation_listener
     from .repository_pg import dispose_pg, init_pg
 
     pg_host_raw = _cfg("PG_HOST", "")
@@ -337,6 +338,7 @@ async def init_postgresql_db() -> None:
         connect_args={"server_settings": pg_session_server_settings()},
     )
     await init_pg(engine)
+    start_config_invalidation_listener(engine)
     logger.info(f"{db_name} 连接成功！(pool={pool_size}+{max_overflow}, recycle={pool_recycle}s)")
     try:
         from src.platform.shard.observability import log_pg_pool_warning_if_needed
@@ -348,14 +350,20 @@ async def init_postgresql_db() -> None:
     try:
         import nonebot
 
+        from src.foundation.db.message_partitions import (
+            start_message_partition_maintenance_task,
+            stop_message_partition_maintenance_task,
+        )
         from src.foundation.db.pool_diagnostics import bind_pg_pool_diagnostics, start_pg_pool_diagnostics_task
 
         bind_pg_pool_diagnostics()
         start_pg_pool_diagnostics_task()
+        start_message_partition_maintenance_task(engine)
         driver = nonebot.get_driver()
 
         @driver.on_shutdown
         async def _dispose_pg():
+            await stop_message_partition_maintenance_task()
             await dispose_pg()
 
     except Exception:
@@ -0,0 +1,271 @@
+"""配置表（bot/group/user_config）的读穿缓存：同 key 并发 miss 合并回源、批量预取，写入经 PG NOTIFY 跨进程失效。"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+# 写入方在同一事务内 pg_notify 到该频道，payload 为 "<origin>:<table>:<key>"
+CONFIG_INVALIDATE_CHANNEL = "pallas_config_invalidate"
+# 本进程标识：收到自己发出的通知时跳过（写入方已本地失效）
+PROCESS_ORIGIN = uuid.uuid4().hex[:12]
+# 监听连接断开后的重连间隔
+LISTENER_RETRY_SEC = 5.0
+
+
+def _cfg_env(key: str, default: str) -> str:
+    try:
+        import nonebot
+
+        val = getattr(nonebot.get_driver().config, key.lower(), None)
+        if val is not None:
+            return str(val)
+    except Exception:
+        pass
+    return os.getenv(key, default)
+
+
+_listener_online = False
+
+
+def config_cache_ttl() -> float:
+    """跨进程失效在线时用长 TTL（默认 10 分钟），否则退回短 TTL 兜底其它进程的写入。"""
+    if _listener_online:
+        return float(_cfg_env("PG_CONFIG_CACHE_TTL", "600"))
+    return float(_cfg_env("PG_CONFIG_CACHE_FALLBACK_TTL", "60"))
+
+
+def config_cache_capacity() -> int:
+    return int(_cfg_env("PG_CONFIG_CACHE_SIZE", "10000"))
+
+
+class ConfigCache:
+    """
+    容量 + TTL 缓存，对齐 Mongo Beanie 的 model-level cache 语义；None 也会被缓存。
+    每个 row_class 一个实例，key 是主键值。同 key 的并发 miss 共用一个回源 task；
+    回源期间被 invalidate 的结果只返回给已在等待的调用方，不写回缓存。
+    """
+
+    def __init__(self, capacity: int, ttl: float | None = None) -> None:
+        self._ttl = ttl
+        self._capacity = capacity
+        self._store: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
+        self._inflight: dict[Any, asyncio.Task[Any]] = {}
+
+    @property
+    def ttl(self) -> float:
+        return config_cache_ttl() if self._ttl is None else self._ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self._capacity > 0 and self.ttl > 0
+
+    def peek(self, key: Any) -> tuple[bool, Any]:
+        """返回 (hit, value)。miss 时 value 未定义。"""
+        if not self.enabled:
+            return False, None
+        item = self._store.get(key)
+        if item is None:
+            return False, None
+        value, expire_at = item
+        if expire_at <= time.monotonic():
+            self._store.pop(key, None)
+            return False, None
+        self._store.move_to_end(key)
+        return True, value
+
+    def put(self, key: Any, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._store[key] = (value, time.monotonic() + self.ttl)
+        self._store.move_to_end(key)
+        while len(self._store) > self._capacity:
+            self._store.popitem(last=False)
+
+    def invalidate(self, key: Any) -> None:
+        self._store.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._store.clear()
+        self._inflight.clear()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    async def _fill(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        if self._inflight.get(key) is asyncio.current_task():
+            self._inflight.pop(key, None)
+            self.put(key, value)
+        return value
+
+    def _start_fill(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task[Any]:
+        task = asyncio.create_task(self._fill(key, loader))
+
+        def _done(t: asyncio.Task[Any]) -> None:
+            if self._inflight.get(key) is t:
+                self._inflight.pop(key, None)
+
+        task.add_done_callback(_done)
+        self._inflight[key] = task
+        return task
+
+    async def load(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """读穿：命中直接返回；miss 时同 key 只回源一次，调用方被取消不影响其它等待者。"""
+        hit, value = self.peek(key)
+        if hit:
+            return value
+        if not self.enabled:
+            return await loader()
+        task = self._inflight.get(key) or self._start_fill(key, loader)
+        return await asyncio.shield(task)
+
+    async def load_many(
+        self,
+        keys: Iterable[Any],
+        loader: Callable[[list[Any]], Awaitable[dict[Any, Any]]],
+    ) -> dict[Any, Any]:
+        """批量读穿：未命中且无人在回源的 key 合并成一次 ``loader(missing)``，缺行记为 None。"""
+        out: dict[Any, Any] = {}
+        waits: dict[Any, asyncio.Task[Any]] = {}
+        missing: list[Any] = []
+        for key in dict.fromkeys(keys):
+            hit, value = self.peek(key)
+            if hit:
+                out[key] = value
+            elif (task := self._inflight.get(key)) is not None:
+                waits[key] = task
+            else:
+                missing.append(key)
+        if missing:
+            if not self.enabled:
+                rows = await loader(missing)
+                out.update({k: rows.get(k) for k in missing})
+            else:
+                batch = asyncio.ensure_future(loader(missing))
+
+                def _picker(k: Any) -> Callable[[], Awaitable[Any]]:
+                    async def _pick() -> Any:
+                        return (await asyncio.shield(batch)).get(k)
+
+                    return _pick
+
+                for key in missing:
+                    waits[key] = self._start_fill(key, _picker(key))
+        if waits:
+            results = await asyncio.gather(*(asyncio.shield(t) for t in waits.values()), return_exceptions=True)
+            for key, res in zip(waits, results, strict=True):
+                if isinstance(res, BaseException):
+                    raise res
+                out[key] = res
+        return out
+
+
+# ---------------------------------------------------------------------------
+# 跨进程失效：LISTEN 一条独立 asyncpg 连接（不占 SQLAlchemy 连接池）
+# ---------------------------------------------------------------------------
+
+_CACHES_BY_TABLE: dict[str, ConfigCache] = {}
+_listener_task: asyncio.Task[None] | None = None
+
+
+def register_config_cache(table: str, cache: ConfigCache) -> None:
+    _CACHES_BY_TABLE[table] = cache
+
+
+def invalidate_payload(table: str, key: Any) -> str:
+    return f"{PROCESS_ORIGIN}:{table}:{key}"
+
+
+def apply_invalidate_payload(payload: str) -> bool:
+    """处理一条失效通知；返回是否清理了本地缓存（自身发出的通知忽略）。"""
+    origin, _, rest = str(payload).partition(":")
+    table, _, raw_key = rest.partition(":")
+    cache = _CACHES_BY_TABLE.get(table)
+    if origin == PROCESS_ORIGIN or cache is None or not raw_key:
+        return False
+    try:
+        key: Any = int(raw_key)
+    except ValueError:
+        key = raw_key
+    cache.invalidate(key)
+    return True
+
+
+def _clear_all() -> None:
+    for cache in _CACHES_BY_TABLE.values():
+        cache.clear()
+
+
+def _set_listener_online(online: bool) -> None:
+    global _listener_online
+    if online != _listener_online:
+        # 断线期间可能漏掉通知，上下线切换都清空一次，避免用长 TTL 持有旧行
+        _clear_all()
+    _listener_online = online
+
+
+def _on_notify(_conn: object, _pid: int, _channel: str, payload: str) -> None:
+    apply_invalidate_payload(payload)
+
+
+async def _listen_forever(dsn: str, server_settings: dict[str, str]) -> None:
+    import asyncpg
+
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn, server_settings=server_settings)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _c, ev=lost: ev.set())
+            await conn.add_listener(CONFIG_INVALIDATE_CHANNEL, _on_notify)
+            _set_listener_online(True)
+            logger.debug("配置缓存失效监听已连接")
+            await lost.wait()
+            logger.warning("配置缓存失效监听连接断开，暂用短 TTL 并重连")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"配置缓存失效监听连接失败，暂用短 TTL：{e}")
+        finally:
+            _set_listener_online(False)
+            if conn is not None and not conn.is_closed():
+                with contextlib.suppress(Exception):
+                    await conn.close(timeout=2)
+        await asyncio.sleep(LISTENER_RETRY_SEC)
+
+
+def start_config_invalidation_listener(engine: AsyncEngine) -> None:
+    """随 PG 初始化启动；``PG_CONFIG_CACHE_LISTEN=false`` 时不监听，缓存只用短 TTL。"""
+    global _listener_task
+    if _cfg_env("PG_CONFIG_CACHE_LISTEN", "true").strip().lower() in {"0", "false", "no", "off"}:
+        return
+    if _listener_task is not None and not _listener_task.done():
+        return
+    url = engine.url.set(drivername="postgresql")
+    dsn = url.render_as_string(hide_password=False)
+    app = _cfg_env("PG_APPLICATION_NAME", "PallasBot")
+    _listener_task = asyncio.create_task(_listen_forever(dsn, {"application_name": f"{app}-cfg-listen"[:63]}))
+
+
+async def stop_config_invalidation_listener() -> None:
+    global _listener_task
+    task, _listener_task = _listener_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await task
+    _set_listener_online(False)
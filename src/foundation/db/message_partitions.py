@@ -0,0 +1,288 @@
+"""message 表按月 RANGE 分区（可选）：自动建/删分区、BRIN(time)、分区级群索引。
+
+``PG_MESSAGE_PARTITIONING=true`` 时新库直接建分区父表；已有的普通表用
+``tools/migrate_message_partitioned.py`` 在线转换。分区表存在时由本模块按
+``PG_MESSAGE_RETENTION_MONTHS`` 整月 DROP 过期分区，不再需要大批量 DELETE。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from nonebot import logger
+from sqlalchemy import text
+
+from src.foundation.config.repo_settings import repo_env_raw_value
+
+MESSAGE_TABLE = "message"
+# 子分区统一命名 message_pYYYYMM / message_pdefault，与父表当前名字无关（迁移换名后不变）
+PARTITION_PREFIX = "message_p"
+DEFAULT_PARTITION = "message_pdefault"
+# 早于此时间的行（time=0 等脏数据）落默认分区，不为其逐月建分区
+MIN_PARTITION_TS = int(datetime(2015, 1, 1, tzinfo=UTC).timestamp())
+_AHEAD_MONTHS = 2
+_MAINTENANCE_INTERVAL_SEC = 6 * 3600
+_ADVISORY_LOCK_KEY = "pallas:message_partitions"
+_PART_RE = re.compile(r"^message_p(\d{4})(\d{2})$")
+
+_maintenance_task: asyncio.Task[None] | None = None
+
+
+def _env_bool(key: str) -> bool:
+    raw = repo_env_raw_value(key)
+    return raw is not None and str(raw).strip().lower() in ("1", "true", "yes", "on")
+
+
+def message_partitioning_enabled() -> bool:
+    return _env_bool("PG_MESSAGE_PARTITIONING")
+
+
+def message_retention_months() -> int:
+    """保留最近 N 个整月；0 表示不自动删除。"""
+    raw = repo_env_raw_value("PG_MESSAGE_RETENTION_MONTHS")
+    try:
+        return max(0, int(str(raw).strip())) if raw is not None else 0
+    except ValueError:
+        return 0
+
+
+# ---------------------------------------------------------------------------
+# 月份工具
+# ---------------------------------------------------------------------------
+
+
+def month_of(ts: int) -> tuple[int, int]:
+    d = datetime.fromtimestamp(max(0, int(ts)), tz=UTC)
+    return d.year, d.month
+
+
+def shift_month(year: int, month: int, delta: int) -> tuple[int, int]:
+    idx = year * 12 + (month - 1) + delta
+    return idx // 12, idx % 12 + 1
+
+
+def month_start_ts(year: int, month: int) -> int:
+    return int(datetime(year, month, 1, tzinfo=UTC).timestamp())
+
+
+def partition_name(year: int, month: int) -> str:
+    return f"{PARTITION_PREFIX}{year:04d}{month:02d}"
+
+
+def parse_partition_name(name: str) -> tuple[int, int] | None:
+    m = _PART_RE.match(name)
+    if m is None:
+        return None
+    return int(m.group(1)), int(m.group(2))
+
+
+def months_between(first: tuple[int, int], last: tuple[int, int]) -> list[tuple[int, int]]:
+    out: list[tuple[int, int]] = []
+    cur = first
+    while cur <= last:
+        out.append(cur)
+        cur = shift_month(*cur, 1)
+    return out
+
+
+def expired_partitions(names: list[str], *, now: int, retention_months: int) -> list[str]:
+    """整月都早于保留窗口的分区；retention_months=0 时为空。"""
+    if retention_months <= 0:
+        return []
+    cutoff = shift_month(*month_of(now), -(retention_months - 1))
+    out = []
+    for name in names:
+        ym = parse_partition_name(name)
+        if ym is not None and ym < cutoff:
+            out.append(name)
+    return sorted(out)
+
+
+# ---------------------------------------------------------------------------
+# DDL（同步，供 run_sync / 迁移脚本使用）
+# ---------------------------------------------------------------------------
+
+
+def partitioned_parent_ddl(table: str, *, index_suffix: str = "") -> list[str]:
+    """分区父表与分区索引；PK 必须包含分区键，故为 (id, time)。id 沿用 message_id_seq。"""
+    s = index_suffix
+    return [
+        "CREATE SEQUENCE IF NOT EXISTS message_id_seq",
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id BIGINT NOT NULL DEFAULT nextval('message_id_seq'),
+            group_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            bot_id BIGINT NOT NULL,
+            raw_message TEXT NOT NULL,
+            is_plain_text BOOLEAN NOT NULL DEFAULT false,
+            plain_text TEXT NOT NULL DEFAULT '',
+            keywords TEXT NOT NULL DEFAULT '',
+            time BIGINT NOT NULL DEFAULT 0,
+            CONSTRAINT message_pkey{s} PRIMARY KEY (id, time)
+        ) PARTITION BY RANGE (time)
+        """,
+        # 按月追加写入，time 与物理顺序高度相关：BRIN 只有几页，维护成本远低于 btree
+        f"CREATE INDEX IF NOT EXISTS ix_message_time_brin{s} ON {table} USING brin (time)",
+        # 分区索引：每个子分区各有一份群索引，旧分区整月删除时随之消失
+        f"CREATE INDEX IF NOT EXISTS ix_message_group_time{s} ON {table} (group_id, time)",
+        f"CREATE INDEX IF NOT EXISTS ix_message_group_user_time{s} ON {table} (group_id, user_id, time)",
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {table} DEFAULT",
+    ]
+
+
+def table_relkind_sync(connection, table: str) -> str | None:
+    """'p' 为分区父表，'r' 为普通表，None 为不存在。"""
+    row = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": table},
+    ).first()
+    if row is None:
+        return None
+    kind = row[0]
+    return kind.decode() if isinstance(kind, bytes) else str(kind)
+
+
+def is_message_partitioned_sync(connection) -> bool:
+    return table_relkind_sync(connection, MESSAGE_TABLE) == "p"
+
+
+def list_month_partitions_sync(connection, table: str = MESSAGE_TABLE) -> list[str]:
+    rows = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:t)"
+        ),
+        {"t": table},
+    ).all()
+    return sorted(str(r[0]) for r in rows if parse_partition_name(str(r[0])) is not None)
+
+
+def create_month_partition_sync(connection, table: str, year: int, month: int) -> bool:
+    name = partition_name(year, month)
+    lo = month_start_ts(year, month)
+    hi = month_start_ts(*shift_month(year, month, 1))
+    if table_relkind_sync(connection, name) is not None:
+        return False
+    # 维护停摆期间写入的该月数据暂存在默认分区；不先挪走，建分区会因默认分区约束冲突失败
+    moved = 0
+    if table_relkind_sync(connection, DEFAULT_PARTITION) is not None:
+        rng = {"lo": lo, "hi": hi}
+        moved = connection.execute(
+            text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE time >= :lo AND time < :hi"), rng
+        ).scalar_one()
+        if moved:
+            connection.execute(text(f"CREATE TEMP TABLE _message_move (LIKE {DEFAULT_PARTITION}) ON COMMIT DROP"))
+            connection.execute(
+                text(f"INSERT INTO _message_move SELECT * FROM {DEFAULT_PARTITION} WHERE time >= :lo AND time < :hi"),
+                rng,
+            )
+            connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE time >= :lo AND time < :hi"), rng)
+    connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ({lo}) TO ({hi})"))
+    if moved:
+        connection.execute(text(f"INSERT INTO {table} SELECT * FROM _message_move"))
+        connection.execute(text("DROP TABLE _message_move"))
+    return True
+
+
+def ensure_month_partitions_sync(
+    connection,
+    table: str,
+    *,
+    first: tuple[int, int],
+    last: tuple[int, int],
+) -> list[str]:
+    created = []
+    for y, m in months_between(first, last):
+        if create_month_partition_sync(connection, table, y, m):
+            created.append(partition_name(y, m))
+    return created
+
+
+def maintain_message_partitions_sync(
+    connection,
+    *,
+    now: int | None = None,
+    retention_months: int | None = None,
+) -> dict[str, Any]:
+    """建当前月起往后若干月的分区，并整月删除超出保留期的分区；非分区表时什么也不做。"""
+    if connection.dialect.name != "postgresql" or not is_message_partitioned_sync(connection):
+        return {"partitioned": False}
+    now = int(time.time()) if now is None else int(now)
+    retention = message_retention_months() if retention_months is None else retention_months
+    # 多 worker 同时启动时串行化 DDL
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:k))"), {"k": _ADVISORY_LOCK_KEY})
+    cur = month_of(now)
+    created = ensure_month_partitions_sync(connection, MESSAGE_TABLE, first=cur, last=shift_month(*cur, _AHEAD_MONTHS))
+    dropped = expired_partitions(list_month_partitions_sync(connection), now=now, retention_months=retention)
+    for name in dropped:
+        connection.execute(text(f"ALTER TABLE {MESSAGE_TABLE} DETACH PARTITION {name}"))
+        connection.execute(text(f"DROP TABLE {name}"))
+    return {"partitioned": True, "created": created, "dropped": dropped}
+
+
+def ensure_pg_message_partitioned_table(connection) -> None:
+    """新库且开启分区时，在 create_all 之前建分区父表；已有普通表不动（需用迁移脚本转换）。"""
+    if connection.dialect.name != "postgresql" or not message_partitioning_enabled():
+        return
+    kind = table_relkind_sync(connection, MESSAGE_TABLE)
+    if kind == "r":
+        logger.warning(
+            "PG_MESSAGE_PARTITIONING 已开启但 message 仍是普通表；请运行 tools/migrate_message_partitioned.py 在线转换"
+        )
+        return
+    if kind is None:
+        for stmt in partitioned_parent_ddl(MESSAGE_TABLE):
+            connection.execute(text(stmt))
+        logger.info("message 表已按月分区创建")
+
+
+# ---------------------------------------------------------------------------
+# 运行期维护
+# ---------------------------------------------------------------------------
+
+
+async def run_message_partition_maintenance(engine) -> dict[str, Any]:
+    async with engine.begin() as conn:
+        result = await conn.run_sync(maintain_message_partitions_sync)
+    if result.get("created") or result.get("dropped"):
+        logger.info(
+            "message partitions: created={} dropped={}",
+            result.get("created"),
+            result.get("dropped"),
+        )
+    return result
+
+
+async def message_partition_maintenance_loop(engine) -> None:
+    while True:
+        await asyncio.sleep(_MAINTENANCE_INTERVAL_SEC)
+        try:
+            result = await run_message_partition_maintenance(engine)
+        except Exception as e:
+            logger.warning("message partition maintenance failed: {}", e)
+            continue
+        if not result.get("partitioned"):
+            return
+
+
+def start_message_partition_maintenance_task(engine) -> None:
+    global _maintenance_task
+    if _maintenance_task is not None and not _maintenance_task.done():
+        return
+    _maintenance_task = asyncio.create_task(
+        message_partition_maintenance_loop(engine), name="pg_message_partition_maintenance"
+    )
+
+
+async def stop_message_partition_maintenance_task() -> None:
+    global _maintenance_task
+    if _maintenance_task is None:
+        return
+    _maintenance_task.cancel()
+    await asyncio.gather(_maintenance_task, return_exceptions=True)
+    _maintenance_task = None
@@ -147,7 +147,10 @@ class BaseImageCache(Document):
 
 class ImageCache(BaseImageCache):
     cq_code: str = Field(...)
+    # 旧版内联图片；新数据写入磁盘 blob，仅留哈希与大小
     base64_data: str | None = None
+    blob_sha256: str | None = None
+    blob_size: int = 0
     ref_times: int = 1
 
     class Settings(BaseImageCache.Settings):
@@ -155,12 +155,13 @@ async def pg_idle_in_transaction_count() -> int | None:
 
 def learn_runtime_snapshot() -> dict[str, Any]:
     try:
-        from src.plugins.repeater.learn_queue import drain_learn_pause_stats, learn_concurrency, learn_queue
+        from src.plugins.repeater.learn_queue import drain_learn_pause_stats, learn_scheduler_snapshot
 
-        q = learn_queue()
+        snap = learn_scheduler_snapshot()
         return {
-            "learn_effective": learn_concurrency(),
-            "learn_queue_size": q.qsize(),
+            "learn_effective": snap["effective"],
+            "learn_queue_size": snap["queue"] + snap["lane_pending"],
+            "learn_spill_rows": snap["spill_rows"],
             "learn_pool_wait_spins": drain_learn_pause_stats(),
         }
     except Exception:
@@ -208,7 +209,7 @@ async def emit_pool_diagnostics_tick() -> None:
     diag_log(
         "pg pool diag: checked_out={}/{} util={} idle_in_tx={} pg_wait=[{}] "
         "remote_skip_pressure={} remote_skip_busy={} mirror_skip={} "
-        "slow_sessions={} slow_max_ms={:.0f} learn_q={} learn_pool_wait={} slow_top=[{}]",
+        "slow_sessions={} slow_max_ms={:.0f} learn_q={} learn_spill={} learn_pool_wait={} slow_top=[{}]",
         live.get("checked_out", "?"),
         live.get("capacity", budget.get("capacity", "?")),
         util_pct,
@@ -220,6 +221,7 @@ async def emit_pool_diagnostics_tick() -> None:
         _slow_session_total,
         _slow_hold_max_ms,
         learn.get("learn_queue_size", "?"),
+        learn.get("learn_spill_rows", "?"),
         learn_pool_wait,
         slow_top,
     )
@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Protocol, runtime_checkable
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from src.foundation.db.modules import Answer, Ban, BlackList, Context, ImageCache, Message
 
 
@@ -133,6 +135,10 @@ class ConfigRepository(Protocol):
         """根据主键 id 获取配置文档，返回 None 表示不存在。"""
         ...
 
+    async def get_many(self, key_ids: Iterable[int]) -> dict[int, Any | None]:
+        """批量获取配置文档，一次查询；不存在的 key 对应 None。"""
+        ...
+
     async def get_or_create(self, key_id: int, **defaults: Any) -> tuple[Any, bool]:
         """
         获取配置文档，若不存在则用 defaults 创建新文档。
@@ -167,6 +173,10 @@ class ImageCacheRepository(Protocol):
         """根据 CQ code 查找图片缓存"""
         ...
 
+    async def find_meta_by_cq_code(self, cq_code: str) -> ImageCache | None:
+        """只取元数据（哈希、大小、引用次数），不拉旧版 base64_data"""
+        ...
+
     async def insert(self, cache: ImageCache) -> None:
         """插入新的图片缓存"""
         ...
@@ -175,6 +185,10 @@ class ImageCacheRepository(Protocol):
         """保存/更新图片缓存"""
         ...
 
+    async def bump_ref_times(self, counts: dict[str, int], date: int) -> dict[str, tuple[int, bool]]:
+        """批量 upsert：不存在则以次数插入，存在则 ref_times 累加；返回 cq_code -> (ref_times, 是否已有图片)"""
+        ...
+
     async def delete_old(self, before_date: int) -> None:
         """按 date 删除早于指定日期的记录"""
         ...
@@ -182,3 +196,15 @@ class ImageCacheRepository(Protocol):
     async def delete_low_ref(self, ref_threshold: int) -> None:
         """删除 ref_times 低于阈值的记录"""
         ...
+
+    async def find_legacy_base64(self, limit: int) -> list[ImageCache]:
+        """取仍内联 base64_data、尚未迁到 blob 的记录"""
+        ...
+
+    async def set_blob(self, cq_code: str, blob_sha256: str, blob_size: int) -> None:
+        """写入 blob 哈希与大小，同时清空旧版 base64_data"""
+        ...
+
+    async def list_blob_hashes(self) -> set[str]:
+        """当前仍被引用的 blob 哈希，供磁盘 GC 标记"""
+        ...
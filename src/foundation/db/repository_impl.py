@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+from operator import itemgetter
 from typing import TYPE_CHECKING, Any
 
 from beanie.operators import Or
+from nonebot import logger
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
 
 from src.foundation.db.modules import (
     Answer,
@@ -17,12 +22,215 @@ from src.foundation.db.modules import (
 from src.shared.utils.invalidate_cache import clear_model_cache
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from beanie import Document
 
 
+# 醉酒时 answer 阈值降到 1，服务端只能安全地滤掉 count<1 或无消息的 answer；
+# 更高的阈值靠按 count 倒序截断到 ans_cap 实现，与 PG 接话路径一致
+_REPLY_MIN_ANSWER_COUNT = 1
+# None：未探测；False：服务端不支持 $sortArray（< 5.2），改为客户端排序截断
+_reply_sort_array_ready: bool | None = None
+
+_LEARN_BATCH_MAX = 128
+_LEARN_LINGER_SEC = 0.01
+# None：未探测；False：不支持管道更新 / bulk_write，逐条走三段 update_one
+_learn_bulk_ready: bool | None = None
+
+
+def reply_projection_pipeline(keywords: str, ans_cap: int, msg_cap: int, *, sort_on_server: bool = True) -> list[dict]:
+    """接话用聚合：只投影有用的 answer，每个 answer 只带最新 msg_cap 条消息。"""
+    usable: dict[str, Any] = {
+        "$filter": {
+            "input": {"$ifNull": ["$answers", []]},
+            "as": "a",
+            "cond": {
+                "$and": [
+                    {"$gte": ["$$a.count", _REPLY_MIN_ANSWER_COUNT]},
+                    {"$gt": [{"$size": {"$ifNull": ["$$a.messages", []]}}, 0]},
+                ]
+            },
+        }
+    }
+    if sort_on_server:
+        usable = {"$slice": [{"$sortArray": {"input": usable, "sortBy": {"count": -1, "time": -1}}}, int(ans_cap)]}
+    answers = {
+        "$map": {
+            "input": usable,
+            "as": "a",
+            "in": {
+                "keywords": "$$a.keywords",
+                "group_id": "$$a.group_id",
+                "count": "$$a.count",
+                "time": "$$a.time",
+                "messages": {"$slice": ["$$a.messages", -int(msg_cap)]},
+            },
+        }
+    }
+    return [
+        {"$match": {"keywords": keywords}},
+        {"$limit": 1},
+        {
+            "$project": {
+                "_id": 0,
+                "keywords": 1,
+                "time": {"$ifNull": ["$time", 0]},
+                "trigger_count": {"$ifNull": ["$count", 1]},
+                "clear_time": {"$ifNull": ["$clear_time", 0]},
+                "ban": {"$ifNull": ["$ban", []]},
+                "answers": answers,
+            }
+        },
+    ]
+
+
+def learn_update_pipeline(
+    group_id: int,
+    answer_keywords: str,
+    answer_time: int,
+    message: str,
+    append_on_existing: bool,
+) -> list[dict]:
+    """单条学习的管道更新：命中 (group_id, answer_keywords) 则累加，否则追加新 Answer，一次原子写完成。"""
+    answers = {"$ifNull": ["$answers", []]}
+    # 用户文本可能以 $ 开头，一律 $literal，避免被当成字段路径
+    hit = {
+        "$and": [
+            {"$eq": ["$$a.group_id", group_id]},
+            {"$eq": ["$$a.keywords", {"$literal": answer_keywords}]},
+        ]
+    }
+    messages: Any = {"$ifNull": ["$$a.messages", []]}
+    if append_on_existing:
+        messages = {"$concatArrays": [messages, [{"$literal": message}]]}
+    bumped = {
+        "$map": {
+            "input": answers,
+            "as": "a",
+            "in": {
+                "$cond": [
+                    hit,
+                    {
+                        "$mergeObjects": [
+                            "$$a",
+                            {"count": {"$add": ["$$a.count", 1]}, "time": answer_time, "messages": messages},
+                        ]
+                    },
+                    "$$a",
+                ]
+            },
+        }
+    }
+    new_answer = Answer(
+        keywords=answer_keywords,
+        group_id=group_id,
+        count=1,
+        time=answer_time,
+        messages=[message],
+    ).model_dump(by_alias=True)
+    matched = {"$anyElementTrue": [{"$map": {"input": answers, "as": "a", "in": hit}}]}
+    return [
+        {
+            "$set": {
+                "answers": {"$cond": [matched, bumped, {"$concatArrays": [answers, [{"$literal": new_answer}]]}]},
+                "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+                "time": answer_time,
+            }
+        }
+    ]
+
+
+class _LearnWriteBuffer:
+    """攒批学习写入：单个 flusher 串行地把缓冲按序 bulk_write，调用方等到自己那条落库再返回。"""
+
+    def __init__(self, repo: MongoContextRepository) -> None:
+        self._repo = repo
+        self._pending: list[tuple[dict[str, Any], asyncio.Future[None]]] = []
+        self._flusher: asyncio.Task[None] | None = None
+
+    async def submit(self, op: dict[str, Any]) -> None:
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._pending.append((op, fut))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop(), name="mongo_learn_flush")
+        await fut
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            if len(self._pending) < _LEARN_BATCH_MAX:
+                await asyncio.sleep(_LEARN_LINGER_SEC)
+            batch = self._pending[:_LEARN_BATCH_MAX]
+            del self._pending[: len(batch)]
+            await self._write(batch)
+
+    async def _write(self, batch: list[tuple[dict[str, Any], asyncio.Future[None]]]) -> None:
+        global _learn_bulk_ready
+        done = 0
+        if _learn_bulk_ready is not False:
+            requests = [
+                UpdateOne(
+                    {"keywords": op["keywords"]},
+                    learn_update_pipeline(
+                        op["group_id"],
+                        op["answer_keywords"],
+                        op["answer_time"],
+                        op["message"],
+                        op["append_on_existing"],
+                    ),
+                )
+                for op, _ in batch
+            ]
+            try:
+                await Context.get_pymongo_collection().bulk_write(requests, ordered=True)
+                done = len(batch)
+                _learn_bulk_ready = True
+            except BulkWriteError as e:
+                # ordered：出错位置之前已生效，出错那条报给调用方，之后的逐条补写
+                errors = e.details.get("writeErrors") or [{}]
+                done = int(errors[0].get("index", 0))
+                _, fut = batch[done]
+                if not fut.done():
+                    fut.set_exception(e)
+                for _, ok in batch[:done]:
+                    if not ok.done():
+                        ok.set_result(None)
+                batch = batch[done + 1 :]
+                done = 0
+            except (OperationFailure, NotImplementedError, TypeError) as e:
+                # 服务端 < 4.2 或 mongomock 等实现不支持管道更新；只在从未成功过时降级
+                if _learn_bulk_ready:
+                    for _, fut in batch:
+                        if not fut.done():
+                            fut.set_exception(e)
+                    return
+                _learn_bulk_ready = False
+                logger.warning("mongo learn bulk_write unavailable, using per-op upsert: {}", e)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                return
+        for op, fut in batch[done:]:
+            try:
+                await self._repo.upsert_answer_single(**op)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+                continue
+            if not fut.done():
+                fut.set_result(None)
+        for _, fut in batch[:done]:
+            if not fut.done():
+                fut.set_result(None)
+
+
 class MongoContextRepository:
     """MongoDB 版 ContextRepository 实现"""
 
+    def __init__(self) -> None:
+        self._learn_buffer = _LearnWriteBuffer(self)
+
     async def context_exists_by_keywords(self, keywords: str) -> bool:
         coll = Context.get_pymongo_collection()
         doc = await coll.find_one({"keywords": keywords}, projection={"_id": 1})
@@ -31,6 +239,38 @@ class MongoContextRepository:
     async def find_by_keywords(self, keywords: str) -> Context | None:
         return await Context.find_one(Context.keywords == keywords)
 
+    async def find_by_keywords_for_reply(self, keywords: str) -> Context | None:
+        """接话路径：聚合投影限量 answer / message，不拉整份热门文档。"""
+        global _reply_sort_array_ready
+        from src.features.corpus.reply_perf_config import reply_query_caps
+        from src.foundation.db.repository_pg import reply_context_from_json
+
+        msg_cap, ans_cap = reply_query_caps(keywords)
+        coll = Context.get_pymongo_collection()
+        sort_on_server = _reply_sort_array_ready is not False
+        try:
+            docs = await coll.aggregate(
+                reply_projection_pipeline(keywords, ans_cap, msg_cap, sort_on_server=sort_on_server)
+            ).to_list(length=1)
+        except OperationFailure as e:
+            if not sort_on_server or _reply_sort_array_ready:
+                raise
+            _reply_sort_array_ready = False
+            logger.info("mongo $sortArray unavailable, sorting reply answers client-side: {}", e)
+            sort_on_server = False
+            docs = await coll.aggregate(
+                reply_projection_pipeline(keywords, ans_cap, msg_cap, sort_on_server=False)
+            ).to_list(length=1)
+        if sort_on_server:
+            _reply_sort_array_ready = True
+        if not docs:
+            return None
+        doc = docs[0]
+        if not sort_on_server:
+            answers = sorted(doc.get("answers") or (), key=itemgetter("count", "time"), reverse=True)
+            doc["answers"] = answers[:ans_cap]
+        return reply_context_from_json(doc)
+
     async def save(self, context: Context) -> None:
         await context.save()
 
@@ -59,6 +299,25 @@ class MongoContextRepository:
         answer_time: int,
         message: str,
         append_on_existing: bool,
+    ) -> None:
+        """攒批后以一次有序 bulk_write 落库；语义同 upsert_answer_single。"""
+        await self._learn_buffer.submit({
+            "keywords": keywords,
+            "group_id": group_id,
+            "answer_keywords": answer_keywords,
+            "answer_time": answer_time,
+            "message": message,
+            "append_on_existing": append_on_existing,
+        })
+
+    async def upsert_answer_single(
+        self,
+        keywords: str,
+        group_id: int,
+        answer_keywords: str,
+        answer_time: int,
+        message: str,
+        append_on_existing: bool,
     ) -> None:
         """
         原子 upsert：
@@ -210,6 +469,15 @@ class MongoConfigRepository:
             ignore_cache=ignore_cache,
         )
 
+    async def get_many(self, key_ids: Iterable[int]) -> dict[int, Any | None]:
+        keys = list(dict.fromkeys(key_ids))
+        out: dict[int, Any | None] = dict.fromkeys(keys)
+        if not keys:
+            return out
+        async for doc in self._module_class.find({self._primary_key: {"$in": keys}}):
+            out[getattr(doc, self._primary_key)] = doc
+        return out
+
     async def get_or_create(self, key_id: int, **defaults: Any) -> tuple[Any, bool]:
         existing = await self._module_class.find_one({self._primary_key: key_id})
         if existing is not None:
@@ -253,14 +521,62 @@ class MongoImageCacheRepository:
     async def find_by_cq_code(self, cq_code: str) -> ImageCache | None:
         return await ImageCache.find_one(ImageCache.cq_code == cq_code)
 
+    async def find_meta_by_cq_code(self, cq_code: str) -> ImageCache | None:
+        # Mongo 需整文档才能 save()；迁移后文档已不含 base64_data
+        return await ImageCache.find_one(ImageCache.cq_code == cq_code)
+
     async def insert(self, cache: ImageCache) -> None:
         await cache.insert()
 
     async def save(self, cache: ImageCache) -> None:
         await cache.save()
 
+    async def bump_ref_times(self, counts: dict[str, int], date: int) -> dict[str, tuple[int, bool]]:
+        if not counts:
+            return {}
+        from pymongo import UpdateOne
+
+        collection = ImageCache.get_pymongo_collection()
+        await collection.bulk_write(
+            [
+                UpdateOne({"cq_code": cq_code}, {"$inc": {"ref_times": n}, "$set": {"date": date}}, upsert=True)
+                for cq_code, n in counts.items()
+            ],
+            ordered=False,
+        )
+        pipeline = [
+            {"$match": {"cq_code": {"$in": list(counts)}}},
+            {
+                "$project": {
+                    "_id": 0,
+                    "cq_code": 1,
+                    "ref_times": 1,
+                    "has_image": {
+                        "$or": [
+                            {"$ne": [{"$ifNull": ["$blob_sha256", ""]}, ""]},
+                            {"$ne": [{"$ifNull": ["$base64_data", None]}, None]},
+                        ]
+                    },
+                }
+            },
+        ]
+        docs = await collection.aggregate(pipeline).to_list(length=None)
+        return {str(d["cq_code"]): (int(d.get("ref_times") or 0), bool(d.get("has_image"))) for d in docs}
+
     async def delete_old(self, before_date: int) -> None:
         await ImageCache.find(ImageCache.date < before_date).delete()
 
     async def delete_low_ref(self, ref_threshold: int) -> None:
         await ImageCache.find(ImageCache.ref_times < ref_threshold).delete()
+
+    async def find_legacy_base64(self, limit: int) -> list[ImageCache]:
+        return await ImageCache.find({"base64_data": {"$ne": None}, "blob_sha256": None}).limit(limit).to_list()
+
+    async def set_blob(self, cq_code: str, blob_sha256: str, blob_size: int) -> None:
+        await ImageCache.find(ImageCache.cq_code == cq_code).update({
+            "$set": {"blob_sha256": blob_sha256, "blob_size": blob_size, "base64_data": None}
+        })
+
+    async def list_blob_hashes(self) -> set[str]:
+        hashes = await ImageCache.distinct("blob_sha256", {"blob_sha256": {"$ne": None}})
+        return {h for h in hashes if isinstance(h, str) and h}
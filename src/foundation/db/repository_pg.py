@@ -5,7 +5,7 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import hashlib
-import os
+import json
 import time
 from collections import OrderedDict
 from contextlib import asynccontextmanager
@@ -37,9 +37,19 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, selectinload
 
-from src.platform.observability import slow_path_threshold_ms
+from src.foundation.db.config_cache import (
+    CONFIG_INVALIDATE_CHANNEL,
+    ConfigCache,
+    config_cache_capacity,
+    invalidate_payload,
+    register_config_cache,
+    stop_config_invalidation_listener,
+)
+from src.platform.observability import charge_bot_db_ms, slow_path_threshold_ms
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from src.foundation.db.modules import Answer, Ban, Context, ImageCache, Message
 
 _JsonB = JSONB().with_variant(JSON(), "sqlite")
@@ -205,6 +215,8 @@ class ImageCacheRow(Base):
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     cq_code: Mapped[str] = mapped_column(Text, unique=True, nullable=False)
     base64_data: Mapped[str | None] = mapped_column(Text, nullable=True)
+    blob_sha256: Mapped[str | None] = mapped_column(Text, nullable=True)
+    blob_size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
     ref_times: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     date: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
 
@@ -258,6 +270,18 @@ def _ensure_pg_user_config_maa_devices(connection) -> None:
         connection.execute(text("ALTER TABLE user_config ADD COLUMN maa_stage_plan JSONB NOT NULL DEFAULT '[]'::jsonb"))
 
 
+def _ensure_pg_image_cache_blob_columns(connection) -> None:
+    """旧库 image_cache 补 blob_sha256 / blob_size 列（图片正文迁到磁盘 blob）。"""
+    insp = inspect(connection)
+    if not insp.has_table("image_cache"):
+        return
+    names = {c["name"] for c in insp.get_columns("image_cache")}
+    if "blob_sha256" not in names:
+        connection.execute(text("ALTER TABLE image_cache ADD COLUMN blob_sha256 TEXT"))
+    if "blob_size" not in names:
+        connection.execute(text("ALTER TABLE image_cache ADD COLUMN blob_size BIGINT NOT NULL DEFAULT 0"))
+
+
 def _ensure_pg_message_group_time_index(connection) -> None:
     """旧库 message 补 (group_id, time) 复合索引，加速 find_recent_in_group。"""
     insp = inspect(connection)
@@ -299,6 +323,69 @@ def _ensure_pg_context_answer_message_reply_index(connection) -> None:
     )
 
 
+# 接话快路径：一次调用返回限量后的整个 Context（JSON），经 asyncpg 预编译语句执行
+REPLY_LOOKUP_FUNCTION = "pallas_reply_lookup"
+_REPLY_LOOKUP_FUNCTION_DDL = f"""
+CREATE OR REPLACE FUNCTION {REPLY_LOOKUP_FUNCTION}(p_hash text, p_ans_cap integer, p_msg_cap integer)
+RETURNS jsonb LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+WITH c AS (
+    SELECT ctx.id, ctx.keywords, ctx.time, ctx.trigger_count, ctx.clear_time
+    FROM context ctx WHERE ctx.keywords_hash = p_hash LIMIT 1
+), a AS (
+    SELECT ans.id, ans.keywords, ans.group_id, ans.count, ans.time
+    FROM context_answer ans JOIN c ON ans.context_id = c.id
+    ORDER BY ans.count DESC, ans.time DESC
+    LIMIT p_ans_cap
+)
+SELECT jsonb_build_object(
+    'keywords', c.keywords,
+    'time', c.time,
+    'trigger_count', c.trigger_count,
+    'clear_time', c.clear_time,
+    'ban', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+            'keywords', b.keywords, 'group_id', b.group_id, 'reason', b.reason, 'time', b.time
+        ) ORDER BY b.id)
+        FROM context_ban b WHERE b.context_id = c.id
+    ), '[]'::jsonb),
+    'answers', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+            'keywords', a.keywords, 'group_id', a.group_id, 'count', a.count, 'time', a.time,
+            'messages', COALESCE((
+                SELECT jsonb_agg(m.message ORDER BY m.id)
+                FROM (
+                    SELECT cm.id, cm.message FROM context_answer_message cm
+                    WHERE cm.answer_id = a.id ORDER BY cm.id DESC LIMIT p_msg_cap
+                ) m
+            ), '[]'::jsonb)
+        ) ORDER BY a.count DESC, a.time DESC)
+        FROM a
+    ), '[]'::jsonb)
+)
+FROM c
+$fn$
+"""
+_REPLY_LOOKUP_SQL = f"SELECT {REPLY_LOOKUP_FUNCTION}($1, $2, $3)::text"
+# None：未探测；False：函数缺失或驱动不支持，走 ORM 多段查询
+_reply_lookup_fn_ready: bool | None = None
+
+
+def _ensure_pg_reply_lookup_function(connection) -> None:
+    """创建 / 更新接话查询函数。无权限等失败时不影响启动，接话回退 ORM 路径。"""
+    global _reply_lookup_fn_ready
+    if connection.dialect.name != "postgresql":
+        _reply_lookup_fn_ready = False
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(text(_REPLY_LOOKUP_FUNCTION_DDL))
+    except Exception as e:
+        _reply_lookup_fn_ready = False
+        logger.warning("reply lookup function unavailable, using ORM reply path: {}", e)
+        return
+    _reply_lookup_fn_ready = None
+
+
 def _ensure_pg_stat_statements_extension(connection) -> None:
     """启用 pg_stat_statements。失败时降级为仅无该视图的诊断。"""
     try:
@@ -357,6 +444,7 @@ async def get_session(*, read_only: bool = False):
         raise
     finally:
         held_ms = (time.monotonic() - t0) * 1000.0
+        charge_bot_db_ms(held_ms)
         if held_ms >= session_hold_warn_ms():
             note_slow_pg_session(held_ms, caller)
         try:
@@ -370,34 +458,45 @@ async def get_session(*, read_only: bool = False):
 
 
 async def init_pg(engine: AsyncEngine) -> None:
-    """创建表结构并注入 engine；对已有 PG 库补全 group_config.blocked_user_ids 等轻量迁移。"""
+    """创建表结构并注入 engine；对已有 PG 库补全 group_config.blocked_user_ids 等轻量迁移，并维护 message 分区。"""
     global _engine, _session_factory
     _engine = engine
     _session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    from src.foundation.db.message_partitions import (
+        ensure_pg_message_partitioned_table,
+        maintain_message_partitions_sync,
+    )
+
     async with engine.begin() as conn:
+        await conn.run_sync(ensure_pg_message_partitioned_table)
         await conn.run_sync(Base.metadata.create_all)
         await conn.run_sync(_ensure_pg_group_config_blocked_user_ids)
         await conn.run_sync(_ensure_pg_bot_config_community_roster_show_qq)
         await conn.run_sync(_ensure_pg_user_config_maa_devices)
+        await conn.run_sync(_ensure_pg_image_cache_blob_columns)
         await conn.run_sync(_ensure_pg_message_group_time_index)
         await conn.run_sync(_ensure_pg_message_group_user_time_index)
         await conn.run_sync(_ensure_pg_context_answer_reply_index)
         await conn.run_sync(_ensure_pg_context_answer_message_reply_index)
+        await conn.run_sync(_ensure_pg_reply_lookup_function)
         await conn.run_sync(_ensure_pg_stat_statements_extension)
+        await conn.run_sync(maintain_message_partitions_sync)
 
 
 async def dispose_pg() -> None:
     """关闭连接池并清空配置 TTL 缓存，bot 退出或测试 teardown 时调用。"""
-    global _engine, _session_factory
+    global _engine, _session_factory, _reply_lookup_fn_ready
     if _engine is not None:
         await _engine.dispose()
         _engine = None
+    _reply_lookup_fn_ready = None
     # 释放 engine 后清空 session factory
     _session_factory = None
     await clear_reply_query_snapshot_cache(None)
+    await stop_config_invalidation_listener()
     # schema 重建后清空 ORM 缓存
     for cache in _CONFIG_CACHES.values():
-        await cache.clear()
+        cache.clear()
 
 
 _LOAD_RELATED = [
@@ -574,6 +673,38 @@ def build_reply_context(
     )
 
 
+def reply_context_from_json(body: str | dict[str, Any]) -> Context:
+    """把接话查询函数返回的 JSON 还原为 Context（字段与 build_reply_context 一致）。"""
+    from src.foundation.db.modules import Answer, Ban, Context
+
+    doc = json.loads(body) if isinstance(body, str) else body
+    return Context.model_construct(
+        keywords=doc["keywords"],
+        time=doc["time"],
+        trigger_count=doc["trigger_count"],
+        answers=[
+            Answer.model_construct(
+                keywords=a["keywords"],
+                group_id=a["group_id"],
+                count=a["count"],
+                time=a["time"],
+                messages=list(a.get("messages") or ()),
+            )
+            for a in doc.get("answers") or ()
+        ],
+        ban=[
+            Ban.model_construct(
+                keywords=b["keywords"],
+                group_id=b["group_id"],
+                reason=b["reason"],
+                time=b["time"],
+            )
+            for b in doc.get("ban") or ()
+        ],
+        clear_time=doc["clear_time"],
+    )
+
+
 def build_reply_message_query(answer_ids: list[int], msg_cap: int):
     rn = (
         func
@@ -691,6 +822,8 @@ def row_to_image_cache(row: ImageCacheRow) -> ImageCache:
     return ImageCache.model_construct(
         cq_code=row.cq_code,
         base64_data=row.base64_data,
+        blob_sha256=row.blob_sha256,
+        blob_size=row.blob_size or 0,
         ref_times=row.ref_times,
         date=row.date,
     )
@@ -716,11 +849,15 @@ class PgContextRepository:
         return await cached_reply_query_snapshot(keywords, self._find_by_keywords_for_reply_uncached)
 
     async def _find_by_keywords_for_reply_uncached(self, keywords: str) -> Context | None:
-        """接话路径：轻量列查询 + 限量 Answer/Message，避免 ORM 关联热路径放大。"""
+        """接话路径：优先一次函数调用取回限量 Context；函数不可用时走多段轻量列查询。"""
         khash = keywords_hash(keywords)
         from src.features.corpus.reply_perf_config import reply_query_caps
 
         msg_cap, ans_cap = reply_query_caps(keywords)
+        if _reply_lookup_fn_ready is not False:
+            found, ctx = await self._find_for_reply_via_function(keywords, khash, ans_cap, msg_cap)
+            if found:
+                return ctx
         t_start = time.monotonic()
         t_context_ms = 0.0
         t_ban_ms = 0.0
@@ -832,6 +969,45 @@ class PgContextRepository:
                 reply_messages=reply_messages,
             )
 
+    async def _find_for_reply_via_function(
+        self, keywords: str, khash: str, ans_cap: int, msg_cap: int
+    ) -> tuple[bool, Context | None]:
+        """返回 (是否走通快路径, 结果)；函数缺失时记下并回退，之后不再尝试。"""
+        global _reply_lookup_fn_ready
+        t0 = time.monotonic()
+        async with get_session(read_only=True) as session:
+            conn = await session.connection()
+            raw = await conn.get_raw_connection()
+            driver_conn = getattr(raw, "driver_connection", None)
+            if driver_conn is None or not hasattr(driver_conn, "fetchval"):
+                _reply_lookup_fn_ready = False
+                return False, None
+            from asyncpg.exceptions import UndefinedFunctionError
+
+            try:
+                # asyncpg 按连接缓存预编译语句：同一 SQL 文本只在每条连接上 PREPARE 一次
+                body = await driver_conn.fetchval(_REPLY_LOOKUP_SQL, khash, int(ans_cap), int(msg_cap))
+            except UndefinedFunctionError:
+                _reply_lookup_fn_ready = False
+                logger.warning("reply lookup function missing, falling back to ORM reply path")
+                return False, None
+        _reply_lookup_fn_ready = True
+        ctx = reply_context_from_json(body) if body else None
+        elapsed_ms = (time.monotonic() - t0) * 1000.0
+        self._log_reply_query_slow(
+            keywords=keywords,
+            elapsed_ms=elapsed_ms,
+            context_ms=elapsed_ms,
+            ban_ms=0.0,
+            answer_ms=0.0,
+            message_ms=0.0,
+            ban_count=len(ctx.ban) if ctx else 0,
+            answer_count=len(ctx.answers) if ctx else 0,
+            message_count=sum(len(a.messages) for a in ctx.answers) if ctx else 0,
+            hit=ctx is not None,
+        )
+        return True, ctx
+
     @staticmethod
     def _log_reply_query_slow(
         *,
@@ -1291,78 +1467,19 @@ _CONFIG_TABLE_MAP: dict[str, tuple[type, str]] = {
 
 
 # ---------------------------------------------------------------------------
-# 配置 Repository 的 TTL 缓存
+# 配置 Repository 的读穿缓存（见 config_cache）
 # ---------------------------------------------------------------------------
 
 
-def _cfg_env(key: str, default: str) -> str:
-    try:
-        import nonebot
-
-        val = getattr(nonebot.get_driver().config, key.lower(), None)
-        if val is not None:
-            return str(val)
-    except Exception:
-        pass
-    return os.getenv(key, default)
-
-
-class _ConfigCache:
-    """
-    简单的容量 + TTL 缓存，对齐 Mongo Beanie 的 model-level cache 语义。
-    对每个 (row_class) 一个实例；key 是主键值，value 是 (row, expire_ts)
-    None 也会被缓存。
-    """
-
-    def __init__(self, ttl: float, capacity: int) -> None:
-        self._ttl = ttl
-        self._capacity = capacity
-        self._store: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
-        self._lock = asyncio.Lock()
-
-    async def get(self, key: Any) -> tuple[bool, Any]:
-        """返回 (hit, value)。miss 时 value 未定义。"""
-        if self._ttl <= 0 or self._capacity <= 0:
-            return False, None
-        async with self._lock:
-            item = self._store.get(key)
-            if item is None:
-                return False, None
-            value, expire_ts = item
-            if expire_ts <= time.time():
-                self._store.pop(key, None)
-                return False, None
-            self._store.move_to_end(key)
-            return True, value
-
-    async def put(self, key: Any, value: Any) -> None:
-        if self._ttl <= 0 or self._capacity <= 0:
-            return
-        async with self._lock:
-            self._store[key] = (value, time.time() + self._ttl)
-            self._store.move_to_end(key)
-            while len(self._store) > self._capacity:
-                self._store.popitem(last=False)
-
-    async def invalidate(self, key: Any) -> None:
-        async with self._lock:
-            self._store.pop(key, None)
-
-    async def clear(self) -> None:
-        async with self._lock:
-            self._store.clear()
+_CONFIG_CACHES: dict[type, ConfigCache] = {}
 
 
-_CONFIG_CACHES: dict[type, _ConfigCache] = {}
-
-
-def _get_config_cache(row_class: type) -> _ConfigCache:
+def _get_config_cache(row_class: type) -> ConfigCache:
     cache = _CONFIG_CACHES.get(row_class)
     if cache is None:
-        ttl = float(_cfg_env("PG_CONFIG_CACHE_TTL", "60"))
-        capacity = int(_cfg_env("PG_CONFIG_CACHE_SIZE", "10000"))
-        cache = _ConfigCache(ttl=ttl, capacity=capacity)
+        cache = ConfigCache(capacity=config_cache_capacity())
         _CONFIG_CACHES[row_class] = cache
+        register_config_cache(row_class.__tablename__, cache)
     return cache
 
 
@@ -1375,14 +1492,11 @@ class PgConfigRepository:
         # 这里做一致性断言，避免静默与 _CONFIG_TABLE_MAP 失同步。
         if primary_key != pk_field:
             raise ValueError(f"primary_key {primary_key!r} 与 {table} 登记的主键 {pk_field!r} 不一致")
+        self._table = table
         self._row_class, self._pk_field = row_class, pk_field
         self._cache = _get_config_cache(self._row_class)
 
-    async def get(self, key_id: int, *, ignore_cache: bool = False) -> Any | None:
-        if not ignore_cache:
-            hit, value = await self._cache.get(key_id)
-            if hit:
-                return value
+    async def _fetch(self, key_id: int) -> Any | None:
         async with get_session(read_only=True) as session:
             result = await session.execute(
                 select(self._row_class).where(getattr(self._row_class, self._pk_field) == key_id)
@@ -1390,9 +1504,35 @@ class PgConfigRepository:
             row = result.scalar_one_or_none()
             if row is not None:
                 session.expunge(row)
-        await self._cache.put(key_id, row)
         return row
 
+    async def _fetch_many(self, keys: list[int]) -> dict[int, Any]:
+        pk = getattr(self._row_class, self._pk_field)
+        async with get_session(read_only=True) as session:
+            result = await session.execute(select(self._row_class).where(pk.in_(keys)))
+            rows = list(result.scalars())
+            for row in rows:
+                session.expunge(row)
+        return {getattr(row, self._pk_field): row for row in rows}
+
+    async def get(self, key_id: int, *, ignore_cache: bool = False) -> Any | None:
+        if ignore_cache:
+            row = await self._fetch(key_id)
+            self._cache.put(key_id, row)
+            return row
+        return await self._cache.load(key_id, lambda: self._fetch(key_id))
+
+    async def get_many(self, key_ids: Iterable[int]) -> dict[int, Any | None]:
+        """批量读：缓存未命中的 key 合并为一次 ``pk IN (...)`` 查询；不存在的行值为 None。"""
+        return await self._cache.load_many(key_ids, self._fetch_many)
+
+    async def _notify_invalidate(self, session: AsyncSession, key_id: int) -> None:
+        # 与写入同事务：提交后其它进程才收到通知，不会读到提交前的旧行
+        await session.execute(
+            text("SELECT pg_notify(:ch, :payload)"),
+            {"ch": CONFIG_INVALIDATE_CHANNEL, "payload": invalidate_payload(self._table, key_id)},
+        )
+
     async def get_or_create(self, key_id: int, **defaults: Any) -> tuple[Any, bool]:
         async with get_session() as session:
             result = await session.execute(
@@ -1401,11 +1541,13 @@ class PgConfigRepository:
             row = result.scalar_one_or_none()
             if row is not None:
                 session.expunge(row)
-                await self._cache.put(key_id, row)
+                self._cache.put(key_id, row)
                 return row, False
             try:
                 new_row = self._row_class(**{self._pk_field: key_id, **_strip_null_deep(defaults)})
                 session.add(new_row)
+                await session.flush()
+                await self._notify_invalidate(session, key_id)
                 await session.commit()
             except IntegrityError:
                 # 并发下已被其他 writer 插入，回源拿最新行
@@ -1416,24 +1558,17 @@ class PgConfigRepository:
                 existing = result.scalar_one_or_none()
                 if existing is not None:
                     session.expunge(existing)
-                await self._cache.put(key_id, existing)
+                self._cache.invalidate(key_id)
+                self._cache.put(key_id, existing)
                 return existing, False
             session.expunge(new_row)
-            await self._cache.put(key_id, new_row)
+            self._cache.invalidate(key_id)
+            self._cache.put(key_id, new_row)
             return new_row, True
 
     async def upsert_field(self, key_id: int, field: str, value: Any) -> None:
         """字段级 upsert，基于主键 ON CONFLICT 原子化。"""
-        cleaned_value = _strip_null_deep(value)
-        async with get_session() as session:
-            stmt = pg_insert(self._row_class).values(**{self._pk_field: key_id, field: cleaned_value})
-            stmt = stmt.on_conflict_do_update(
-                index_elements=[self._pk_field],
-                set_={field: getattr(stmt.excluded, field)},
-            )
-            await session.execute(stmt)
-            await session.commit()
-        await self._cache.invalidate(key_id)
+        await self.upsert_fields(key_id, {field: value})
 
     async def upsert_fields(self, key_id: int, fields: dict[str, Any]) -> None:
         """批量字段级 upsert"""
@@ -1447,11 +1582,12 @@ class PgConfigRepository:
                 set_={k: getattr(stmt.excluded, k) for k in cleaned},
             )
             await session.execute(stmt)
+            await self._notify_invalidate(session, key_id)
             await session.commit()
-        await self._cache.invalidate(key_id)
+        self._cache.invalidate(key_id)
 
     async def invalidate_cache(self) -> None:
-        await self._cache.clear()
+        self._cache.clear()
 
 
 class PgImageCacheRepository:
@@ -1461,12 +1597,38 @@ class PgImageCacheRepository:
             row = result.scalar_one_or_none()
             return row_to_image_cache(row) if row else None
 
+    async def find_meta_by_cq_code(self, cq_code: str) -> ImageCache | None:
+        from src.foundation.db.modules import ImageCache
+
+        async with get_session(read_only=True) as session:
+            result = await session.execute(
+                select(
+                    ImageCacheRow.blob_sha256,
+                    ImageCacheRow.blob_size,
+                    ImageCacheRow.ref_times,
+                    ImageCacheRow.date,
+                ).where(ImageCacheRow.cq_code == cq_code)
+            )
+            row = result.one_or_none()
+        if row is None:
+            return None
+        return ImageCache.model_construct(
+            cq_code=cq_code,
+            base64_data=None,
+            blob_sha256=row.blob_sha256,
+            blob_size=row.blob_size or 0,
+            ref_times=row.ref_times,
+            date=row.date,
+        )
+
     async def insert(self, cache: ImageCache) -> None:
         """并发下相同 cq_code 的第二次 insert 等价为 no-op。"""
         async with get_session() as session:
             stmt = pg_insert(ImageCacheRow).values(
                 cq_code=_s(cache.cq_code) or "",
                 base64_data=_s(cache.base64_data),
+                blob_sha256=cache.blob_sha256,
+                blob_size=cache.blob_size or 0,
                 ref_times=cache.ref_times,
                 date=cache.date,
             )
@@ -1474,11 +1636,13 @@ class PgImageCacheRepository:
             await session.commit()
 
     async def save(self, cache: ImageCache) -> None:
-        """与 Mongo save() 语义一致：存在则更新，不存在则插入。"""
+        """与 Mongo save() 语义一致：存在则更新，不存在则插入；元数据读出的 None 不覆盖已有正文/blob。"""
         async with get_session() as session:
             stmt = pg_insert(ImageCacheRow).values(
                 cq_code=_s(cache.cq_code) or "",
                 base64_data=_s(cache.base64_data),
+                blob_sha256=cache.blob_sha256,
+                blob_size=cache.blob_size or 0,
                 ref_times=cache.ref_times,
                 date=cache.date,
             )
@@ -1487,12 +1651,41 @@ class PgImageCacheRepository:
                 set_={
                     "ref_times": stmt.excluded.ref_times,
                     "date": stmt.excluded.date,
-                    "base64_data": stmt.excluded.base64_data,
+                    "base64_data": func.coalesce(stmt.excluded.base64_data, ImageCacheRow.base64_data),
+                    "blob_sha256": func.coalesce(stmt.excluded.blob_sha256, ImageCacheRow.blob_sha256),
+                    "blob_size": func.greatest(stmt.excluded.blob_size, ImageCacheRow.blob_size),
                 },
             )
             await session.execute(stmt)
             await session.commit()
 
+    async def bump_ref_times(self, counts: dict[str, int], date: int) -> dict[str, tuple[int, bool]]:
+        """一条 INSERT ... ON CONFLICT 完成整批累加，RETURNING 带回阈值判断所需字段。"""
+        if not counts:
+            return {}
+        values = [
+            {"cq_code": _s(cq_code) or "", "ref_times": int(n), "date": date, "blob_size": 0}
+            for cq_code, n in sorted(counts.items())
+        ]
+        stmt = pg_insert(ImageCacheRow).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["cq_code"],
+            set_={
+                "ref_times": ImageCacheRow.ref_times + stmt.excluded.ref_times,
+                "date": stmt.excluded.date,
+            },
+        ).returning(
+            ImageCacheRow.cq_code,
+            ImageCacheRow.ref_times,
+            (ImageCacheRow.blob_sha256.is_not(None) & (ImageCacheRow.blob_sha256 != ""))
+            | ImageCacheRow.base64_data.is_not(None),
+        )
+        async with get_session() as session:
+            result = await session.execute(stmt)
+            rows = result.all()
+            await session.commit()
+        return {row[0]: (int(row[1]), bool(row[2])) for row in rows}
+
     async def delete_old(self, before_date: int) -> None:
         async with get_session() as session:
             await session.execute(delete(ImageCacheRow).where(ImageCacheRow.date < before_date))
@@ -1502,3 +1695,29 @@ class PgImageCacheRepository:
         async with get_session() as session:
             await session.execute(delete(ImageCacheRow).where(ImageCacheRow.ref_times < ref_threshold))
             await session.commit()
+
+    async def find_legacy_base64(self, limit: int) -> list[ImageCache]:
+        async with get_session(read_only=True) as session:
+            result = await session.execute(
+                select(ImageCacheRow)
+                .where(ImageCacheRow.base64_data.is_not(None), ImageCacheRow.blob_sha256.is_(None))
+                .order_by(ImageCacheRow.id)
+                .limit(limit)
+            )
+            return [row_to_image_cache(row) for row in result.scalars().all()]
+
+    async def set_blob(self, cq_code: str, blob_sha256: str, blob_size: int) -> None:
+        async with get_session() as session:
+            await session.execute(
+                update(ImageCacheRow)
+                .where(ImageCacheRow.cq_code == cq_code)
+                .values(blob_sha256=blob_sha256, blob_size=blob_size, base64_data=None)
+            )
+            await session.commit()
+
+    async def list_blob_hashes(self) -> set[str]:
+        async with get_session(read_only=True) as session:
+            result = await session.execute(
+                select(ImageCacheRow.blob_sha256).where(ImageCacheRow.blob_sha256.is_not(None)).distinct()
+            )
+            return {h for h in result.scalars().all() if h}
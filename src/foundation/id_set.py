@@ -0,0 +1,120 @@
+"""QQ 号集合的共享存储：不可变、带版本号，热路径成员判断不分配。
+
+小集合用 frozenset（O(1)）；大集合（如几万人的拉黑名单）改存排序的 ``array('q')``，
+每个号 8 字节，二分查找。来源数据不变时由 :class:`IdSetCache` 复用同一快照。
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+# 超过该大小改用排序数组：frozenset 每项约 60~90 字节（含 int 对象），数组 8 字节
+COMPACT_THRESHOLD = 2048
+
+
+class IdSet:
+    """不可变 QQ 号集合；``version`` 由构建方填写，用于判断快照是否更新过。"""
+
+    __slots__ = ("_hashed", "_sorted", "version")
+
+    def __init__(self, ids: Iterable[Any] = (), *, version: int = 0) -> None:
+        uniq: set[int] = set()
+        for x in ids:
+            try:
+                uniq.add(int(x))
+            except (TypeError, ValueError):
+                continue
+        self.version = version
+        if len(uniq) > COMPACT_THRESHOLD:
+            self._hashed: frozenset[int] | None = None
+            self._sorted: array[int] | None = array("q", sorted(uniq))
+        else:
+            self._hashed = frozenset(uniq)
+            self._sorted = None
+
+    def __contains__(self, uid: object) -> bool:
+        if self._hashed is not None:
+            return uid in self._hashed
+        if not isinstance(uid, int):
+            return False
+        arr = self._sorted
+        i = bisect_left(arr, uid)
+        return i < len(arr) and arr[i] == uid
+
+    def __len__(self) -> int:
+        return len(self._hashed) if self._hashed is not None else len(self._sorted)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._hashed) if self._hashed is not None else self._sorted)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IdSet):
+            return len(self) == len(other) and all(x in other for x in self)
+        if isinstance(other, (set, frozenset)):
+            return len(self) == len(other) and all(x in self for x in other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"IdSet(n={len(self)}, version={self.version})"
+
+    @property
+    def compact(self) -> bool:
+        return self._sorted is not None
+
+    def to_list(self) -> list[int]:
+        return list(self)
+
+    def to_frozenset(self) -> frozenset[int]:
+        return self._hashed if self._hashed is not None else frozenset(self._sorted)
+
+
+EMPTY_ID_SET = IdSet()
+
+
+class IdSetCache:
+    """按来源标记缓存一份 IdSet 快照：标记不变（同一对象或相等）时直接返回，变了才重建并递增版本。
+
+    ``token`` / ``extra`` 一般直接传来源对象本身（如缓存的 frozenset、配置列表），命中时不分配。
+    """
+
+    __slots__ = ("_extra", "_snapshot", "_token", "_version")
+
+    _UNSET: Any = object()
+
+    def __init__(self) -> None:
+        self._token: Any = self._UNSET
+        self._extra: Any = self._UNSET
+        self._snapshot = EMPTY_ID_SET
+        self._version = 0
+
+    @staticmethod
+    def _same(a: Any, b: Any) -> bool:
+        return a is b or (b is not IdSetCache._UNSET and a == b)
+
+    def get(self, token: Any, build: Callable[[], Iterable[Any]], *, extra: Any = None) -> IdSet:
+        if self._same(token, self._token) and self._same(extra, self._extra):
+            # 内容相等的新对象：记下它，之后按身份命中
+            self._token, self._extra = token, extra
+            return self._snapshot
+        self._version += 1
+        self._snapshot = IdSet(build(), version=self._version)
+        self._token = token
+        self._extra = extra
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._token = self._UNSET
+
+    @property
+    def version(self) -> int:
+        return self._version
@@ -0,0 +1,273 @@
+"""插件懒加载：启动时只按静态元数据登记触发词，首次命中再 import 插件本体。
+
+``PALLAS_LAZY_PLUGINS=draw,sing`` 指定的插件不在启动时 import；加载器静态解析其 ``__init__.py`` 里
+``__plugin_meta__`` 的 ``command_prefixes`` / ``exact_plaintexts``，注册一个占位 matcher 并写进路由索引。
+消息首次命中时加载插件、补跑其启动钩子，本条消息交给插件自己的 matcher 继续处理。
+``PALLAS_LAZY_PLUGIN_WARM_SEC`` > 0 时启动后隔这么久在后台把仍未命中的插件补齐。
+
+解析不出触发词（元数据非字面量、纯被动插件）的插件照常启动时加载。
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import nonebot
+from nonebot import get_driver, logger, on_message
+from nonebot.adapters import Bot, Event  # noqa: TC002 — handler 依赖注入按注解解析，须运行时可见
+from nonebot.exception import StopPropagation
+from nonebot.matcher import Matcher, matchers
+from nonebot.message import check_and_run_matcher
+from nonebot.rule import Rule
+
+from src.foundation.command_prefix import matches_command_prefix, strip_leading_command_marks
+from src.foundation.config.repo_settings import repo_env_raw_value
+from src.foundation.paths import PROJECT_ROOT
+from src.platform.bot_runtime.startup_profile import record_lazy_plugin, record_plugin_load
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from nonebot.plugin import Plugin
+
+# 元数据里没写 priority 时占位 matcher 的优先级
+_DEFAULT_STUB_PRIORITY = 5
+
+
+@dataclass(frozen=True, slots=True)
+class LazyRouteMeta:
+    command_prefixes: tuple[str, ...]
+    exact_plaintexts: tuple[str, ...]
+    # 插件内字面量 priority 的最小值；占位 matcher 排在它前面
+    min_priority: int | None = None
+
+
+@dataclass(slots=True)
+class _PendingPlugin:
+    module_path: str
+    meta: LazyRouteMeta
+    stub: type[Matcher]
+
+
+_pending: dict[str, _PendingPlugin] = {}
+_warm_hook_registered = False
+
+
+def lazy_plugin_names() -> frozenset[str]:
+    raw = repo_env_raw_value("PALLAS_LAZY_PLUGINS")
+    if not raw:
+        return frozenset()
+    return frozenset(p.strip() for p in str(raw).replace(";", ",").split(",") if p.strip())
+
+
+def lazy_plugin_warm_sec() -> float:
+    raw = repo_env_raw_value("PALLAS_LAZY_PLUGIN_WARM_SEC")
+    try:
+        return max(0.0, float(str(raw).strip())) if raw is not None else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _module_init_path(module_path: str) -> Path:
+    return PROJECT_ROOT.joinpath(*module_path.split(".")) / "__init__.py"
+
+
+def _literal_strings(node: ast.AST) -> tuple[str, ...]:
+    try:
+        value = ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return ()
+    if not isinstance(value, (list, tuple, set, frozenset)):
+        return ()
+    out: list[str] = []
+    for item in value:
+        text = str(item).strip()
+        if text and text not in out:
+            out.append(text)
+    return tuple(out)
+
+
+def read_static_route_meta(source: str) -> LazyRouteMeta | None:
+    """不执行代码，从插件源码里取 ``__plugin_meta__.extra`` 的字面量触发词。"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    prefixes: tuple[str, ...] = ()
+    exacts: tuple[str, ...] = ()
+    priorities: list[int] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "__plugin_meta__" for t in node.targets
+        ):
+            call = node.value
+            if not isinstance(call, ast.Call):
+                continue
+            for kw in call.keywords:
+                if kw.arg != "extra" or not isinstance(kw.value, ast.Dict):
+                    continue
+                for key, value in zip(kw.value.keys, kw.value.values, strict=False):
+                    if not isinstance(key, ast.Constant):
+                        continue
+                    if key.value == "command_prefixes":
+                        prefixes = _literal_strings(value)
+                    elif key.value == "exact_plaintexts":
+                        exacts = _literal_strings(value)
+        elif isinstance(node, ast.Call):
+            priorities.extend(
+                kw.value.value
+                for kw in node.keywords
+                if kw.arg == "priority" and isinstance(kw.value, ast.Constant) and isinstance(kw.value.value, int)
+            )
+    if not prefixes and not exacts:
+        return None
+    return LazyRouteMeta(prefixes, exacts, min(priorities) if priorities else None)
+
+
+def lazy_route_matches(meta: LazyRouteMeta, plain: str) -> bool:
+    text = strip_leading_command_marks((plain or "").strip())
+    if not text:
+        return False
+    if text in meta.exact_plaintexts:
+        return True
+    return any(matches_command_prefix(text, prefix) for prefix in meta.command_prefixes)
+
+
+def pending_lazy_routes() -> dict[str, LazyRouteMeta]:
+    """尚未加载的懒插件：短名 -> 触发词；供路由索引把命中归到占位 matcher。"""
+    return {short: entry.meta for short, entry in _pending.items()}
+
+
+def register_lazy_plugin(module_path: str, *, role_label: str) -> bool:
+    """能静态解析出触发词时登记为懒加载并返回 True；否则调用方照常加载。"""
+    short = module_path.rsplit(".", 1)[-1]
+    if short in _pending:
+        return True
+    try:
+        source = _module_init_path(module_path).read_text(encoding="utf-8")
+    except OSError:
+        return False
+    meta = read_static_route_meta(source)
+    if meta is None:
+        logger.info("bot_runtime: {} lazy plugin {} has no static triggers, loading eagerly", role_label, short)
+        return False
+
+    async def is_trigger(event: Event) -> bool:
+        try:
+            plain = event.get_plaintext()
+        except (NotImplementedError, ValueError):
+            return False
+        return lazy_route_matches(meta, plain)
+
+    priority = max(0, (meta.min_priority if meta.min_priority is not None else _DEFAULT_STUB_PRIORITY + 1) - 1)
+    stub = on_message(rule=Rule(is_trigger), priority=priority, block=False)
+    stub.lazy_module_key = short  # type: ignore[attr-defined]
+    stub.handle()(_materialize_on_first_match)
+    _pending[short] = _PendingPlugin(module_path, meta, stub)
+    record_lazy_plugin(short)
+    _ensure_warm_hook()
+    logger.debug(
+        "bot_runtime: {} lazy plugin {} prefixes={} exacts={}",
+        role_label,
+        short,
+        len(meta.command_prefixes),
+        len(meta.exact_plaintexts),
+    )
+    return True
+
+
+def _clear_route_caches() -> None:
+    from src.platform.ingress.plugin_command_plaintext import clear_plugin_command_plaintext_cache
+    from src.platform.ingress.route_index import clear_route_index_cache
+
+    clear_route_index_cache()
+    clear_plugin_command_plaintext_cache()
+
+
+async def _run_late_lifespan_hooks(startup_before: int, ready_before: int) -> None:
+    """插件在驱动启动后才加载：补跑它新注册的 on_startup / on_ready。"""
+    lifespan = getattr(get_driver(), "_lifespan", None)
+    if lifespan is None or getattr(lifespan, "_task_group", None) is None:
+        return
+    funcs = lifespan._startup_funcs[startup_before:] + lifespan._ready_funcs[ready_before:]
+    for func in funcs:
+        try:
+            result = func()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning("bot_runtime: lazy plugin startup hook {} failed: {}", getattr(func, "__name__", func), e)
+
+
+async def load_pending_plugin(short: str) -> Plugin | None:
+    """加载一个仍在等待的懒插件；已加载或不存在时返回 None。"""
+    entry = _pending.pop(short, None)
+    if entry is None:
+        return None
+    entry.stub.destroy()
+    lifespan = getattr(get_driver(), "_lifespan", None)
+    startup_before = len(getattr(lifespan, "_startup_funcs", ()))
+    ready_before = len(getattr(lifespan, "_ready_funcs", ()))
+    started = time.perf_counter()
+    try:
+        plugin = nonebot.load_plugin(entry.module_path)
+    except Exception as e:
+        logger.warning("bot_runtime: lazy load {} failed: {}", entry.module_path, e)
+        plugin = None
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    record_plugin_load(short, elapsed_ms)
+    _clear_route_caches()
+    if plugin is None:
+        return None
+    logger.info("bot_runtime: lazy plugin {} loaded in {:.0f}ms", short, elapsed_ms)
+    await _run_late_lifespan_hooks(startup_before, ready_before)
+    return plugin
+
+
+async def _materialize_on_first_match(bot: Bot, event: Event, matcher: Matcher) -> None:
+    short = getattr(type(matcher), "lazy_module_key", "")
+    priorities_before = set(matchers.keys())
+    plugin = await load_pending_plugin(short)
+    if plugin is None:
+        return
+    # 优先级已存在且排在占位之后的 matcher 会被本轮分发自然轮到；其余在这里补跑
+    stub_priority = type(matcher).priority
+    late = sorted(
+        (m for m in plugin.matcher if m.priority not in priorities_before or m.priority <= stub_priority),
+        key=lambda m: m.priority,
+    )
+    for real in late:
+        try:
+            await check_and_run_matcher(real, bot, event, {})
+        except StopPropagation:
+            matcher.stop_propagation()
+            return
+        except Exception as e:
+            logger.warning("bot_runtime: lazy plugin {} first dispatch failed: {}", short, e)
+
+
+def _ensure_warm_hook() -> None:
+    global _warm_hook_registered
+    if _warm_hook_registered or lazy_plugin_warm_sec() <= 0:
+        return
+    try:
+        driver = get_driver()
+    except ValueError:
+        return
+
+    @driver.on_startup
+    async def schedule_lazy_plugin_warm() -> None:
+        asyncio.create_task(_warm_pending_plugins(lazy_plugin_warm_sec()), name="lazy_plugin_warm")
+
+    _warm_hook_registered = True
+
+
+async def _warm_pending_plugins(delay_sec: float) -> None:
+    await asyncio.sleep(delay_sec)
+    for short in list(_pending):
+        await load_pending_plugin(short)
+        await asyncio.sleep(0)
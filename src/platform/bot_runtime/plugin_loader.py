@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import importlib.util
+import time
 
 import nonebot
 from nonebot import logger
@@ -10,6 +11,7 @@ from nonebot import logger
 from src.foundation.apscheduler_runtime import register_apscheduler_startup_hook
 from src.foundation.config.repo_settings import read_bootstrap_extra_plugin_dirs
 from src.foundation.paths import PROJECT_ROOT
+from src.platform.bot_runtime.lazy_plugins import lazy_plugin_names, register_lazy_plugin
 from src.platform.bot_runtime.load_policy import merge_startup_skip_plugins
 from src.platform.bot_runtime.pyproject_plugins import (
     extra_plugin_dirs_for_role,
@@ -22,6 +24,11 @@ from src.platform.bot_runtime.roles import (
     is_hub_role,
     is_unified_role,
 )
+from src.platform.bot_runtime.startup_profile import (
+    begin_plugin_load_phase,
+    finish_plugin_load_phase,
+    record_plugin_load,
+)
 
 _PLUGINS_ROOT = PROJECT_ROOT / "src" / "plugins"
 _PYPROJECT = PROJECT_ROOT / "pyproject.toml"
@@ -79,6 +86,7 @@ def _load_plugin_module(
             module_path,
         )
         return False
+    started = time.perf_counter()
     try:
         nonebot.load_plugin(module_path)
         loaded_short.add(short)
@@ -86,6 +94,8 @@ def _load_plugin_module(
     except Exception as e:
         logger.warning("bot_runtime: {} failed to load {}: {}", role_label, module_path, e)
         return False
+    finally:
+        record_plugin_load(short, (time.perf_counter() - started) * 1000.0)
 
 
 def _load_toml_module_plugins(
@@ -112,10 +122,15 @@ def _load_discovered_plugin_modules(
     skip_module_paths: frozenset[str] = frozenset(),
 ) -> int:
     count = 0
+    lazy = lazy_plugin_names()
     for mod in module_paths:
         short = _short_name(mod)
         if mod in skip_module_paths or short in skip_short or short in loaded_short:
             continue
+        # 懒加载：只登记触发词，首次命中再 import；解析不出触发词时照常加载
+        if short in lazy and mod.startswith("src.plugins.") and register_lazy_plugin(mod, role_label=role_label):
+            loaded_short.add(short)
+            continue
         if _load_plugin_module(mod, role_label=role_label, loaded_short=loaded_short):
             count += 1
     return count
@@ -142,6 +157,7 @@ def _load_toml_extra_plugin_dirs(
                 continue
             sub_rel = f"{rel_dir.rstrip('/')}/{entry.name}"
             pkg_path = PROJECT_ROOT / sub_rel
+            started = time.perf_counter()
             try:
                 plugin = nonebot.load_plugin(pkg_path)
                 found = [plugin] if plugin is not None else []
@@ -153,6 +169,8 @@ def _load_toml_extra_plugin_dirs(
                     e,
                 )
                 continue
+            finally:
+                record_plugin_load(entry.name, (time.perf_counter() - started) * 1000.0)
             for plugin in found:
                 mod = getattr(plugin, "module", None)
                 if mod is None:
@@ -219,6 +237,15 @@ def load_pyproject_extra_plugins(
 
 
 def load_plugins_for_role() -> None:
+    begin_plugin_load_phase()
+    role = "hub" if is_hub_role() else "unified" if is_unified_role() else "worker"
+    try:
+        _load_plugins_for_role()
+    finally:
+        finish_plugin_load_phase(role)
+
+
+def _load_plugins_for_role() -> None:
     from src.platform.bot_runtime.ingress_dispatch_runtime import register_ingress_dispatch_runtime
 
     if not is_hub_role():
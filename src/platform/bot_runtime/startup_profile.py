@@ -0,0 +1,178 @@
+"""启动耗时剖析：按插件记录加载耗时，可选按模块记录 import 自身耗时。
+
+``PALLAS_STARTUP_PROFILE=1`` 时在加载插件前挂上 import 计时，结束后把最慢的插件 / 模块写日志并落盘到
+``data/startup_profile/<role>.json``。插件级耗时与角色冷启动目标（``PALLAS_STARTUP_TARGET_MS`` 可覆盖）
+始终统计，超标时告警。
+"""
+
+from __future__ import annotations
+
+import importlib.abc
+import json
+import operator
+import sys
+import time
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+
+from src.foundation.config.repo_settings import repo_env_raw_value
+from src.foundation.paths import plugin_data_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from importlib.machinery import ModuleSpec
+    from types import ModuleType
+
+# 插件加载阶段的冷启动目标（毫秒）；懒加载插件不计入
+ROLE_COLD_START_TARGET_MS: dict[str, float] = {"hub": 3000.0, "worker": 5000.0, "unified": 8000.0}
+_REPORT_TOP_N = 15
+
+_phase_started: float | None = None
+_plugin_ms: dict[str, float] = {}
+_lazy_plugins: set[str] = set()
+_import_timer: _ImportTimer | None = None
+
+
+def _env_flag(key: str) -> bool:
+    raw = repo_env_raw_value(key)
+    return raw is not None and str(raw).strip().lower() in ("1", "true", "yes", "on")
+
+
+def startup_profile_enabled() -> bool:
+    return _env_flag("PALLAS_STARTUP_PROFILE")
+
+
+def cold_start_target_ms(role: str) -> float:
+    raw = repo_env_raw_value("PALLAS_STARTUP_TARGET_MS")
+    if raw is not None:
+        try:
+            return max(0.0, float(str(raw).strip()))
+        except ValueError:
+            pass
+    return ROLE_COLD_START_TARGET_MS.get(role, ROLE_COLD_START_TARGET_MS["worker"])
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """包一层 loader.exec_module，按栈扣掉子模块耗时得到自身耗时。"""
+
+    def __init__(self) -> None:
+        self.self_ms: dict[str, float] = {}
+        self.total_ms: dict[str, float] = {}
+        self._stack: list[list[float]] = []
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,
+        target: ModuleType | None = None,
+    ) -> ModuleSpec | None:
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find = getattr(finder, "find_spec", None)
+            if find is None:
+                continue
+            spec = find(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # 内置 / 冻结模块的 loader 是类本身，不能按实例打补丁
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        if "exec_module" in getattr(loader, "__dict__", {}):
+            return spec
+        inner = loader.exec_module
+
+        def exec_module(module: ModuleType) -> None:
+            frame = [time.perf_counter(), 0.0]
+            self._stack.append(frame)
+            try:
+                inner(module)
+            finally:
+                self._stack.pop()
+                total = (time.perf_counter() - frame[0]) * 1000.0
+                self.total_ms[fullname] = total
+                self.self_ms[fullname] = total - frame[1]
+                if self._stack:
+                    self._stack[-1][1] += total
+
+        try:
+            loader.exec_module = exec_module  # type: ignore[method-assign]
+        except (AttributeError, TypeError):
+            pass
+        return spec
+
+
+def begin_plugin_load_phase() -> None:
+    global _phase_started, _import_timer
+    _phase_started = time.perf_counter()
+    _plugin_ms.clear()
+    _lazy_plugins.clear()
+    if startup_profile_enabled() and _import_timer is None:
+        _import_timer = _ImportTimer()
+        sys.meta_path.insert(0, _import_timer)
+
+
+def record_plugin_load(name: str, elapsed_ms: float) -> None:
+    _plugin_ms[name] = _plugin_ms.get(name, 0.0) + elapsed_ms
+
+
+def record_lazy_plugin(name: str) -> None:
+    _lazy_plugins.add(name)
+
+
+def _top(items: dict[str, float], n: int) -> list[tuple[str, float]]:
+    return sorted(items.items(), key=operator.itemgetter(1), reverse=True)[:n]
+
+
+def startup_profile_report(role: str) -> dict[str, Any]:
+    phase_ms = (time.perf_counter() - _phase_started) * 1000.0 if _phase_started is not None else 0.0
+    target = cold_start_target_ms(role)
+    report: dict[str, Any] = {
+        "role": role,
+        "plugin_phase_ms": round(phase_ms, 1),
+        "target_ms": target,
+        "within_target": target <= 0 or phase_ms <= target,
+        "plugins": [{"name": k, "ms": round(v, 1)} for k, v in _top(_plugin_ms, len(_plugin_ms))],
+        "lazy_plugins": sorted(_lazy_plugins),
+    }
+    if _import_timer is not None:
+        report["modules_self_ms"] = [
+            {"module": k, "self_ms": round(v, 1), "total_ms": round(_import_timer.total_ms.get(k, v), 1)}
+            for k, v in _top(_import_timer.self_ms, _REPORT_TOP_N * 4)
+        ]
+    return report
+
+
+def finish_plugin_load_phase(role: str) -> dict[str, Any]:
+    """记录本角色插件阶段耗时；开启剖析时卸下 import 计时并写报告。"""
+    global _import_timer
+    report = startup_profile_report(role)
+    slow = ", ".join(f"{k}={v:.0f}ms" for k, v in _top(_plugin_ms, 5))
+    log = logger.info if report["within_target"] else logger.warning
+    log(
+        "bot_runtime: role={} plugin phase {:.0f}ms (target {:.0f}ms) lazy={} slowest: {}",
+        role,
+        report["plugin_phase_ms"],
+        report["target_ms"],
+        len(_lazy_plugins),
+        slow or "-",
+    )
+    if _import_timer is not None:
+        try:
+            sys.meta_path.remove(_import_timer)
+        except ValueError:
+            pass
+        for row in report["modules_self_ms"][:_REPORT_TOP_N]:
+            logger.info("startup_profile: {} self={}ms total={}ms", row["module"], row["self_ms"], row["total_ms"])
+        _import_timer = None
+        try:
+            path = plugin_data_dir("startup_profile") / f"{role}.json"
+            path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+            logger.info("startup_profile: report written to {}", path)
+        except OSError as e:
+            logger.warning("startup_profile: write report failed: {}", e)
+    return report
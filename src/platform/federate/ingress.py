@@ -18,6 +18,7 @@ from src.platform.shard import context as shard_ctx
 if TYPE_CHECKING:
     from nonebot.adapters.onebot.v11 import GroupMessageEvent
 from src.platform.federate.dedup import try_claim_cross_federate_message
+from src.platform.ingress.parsed_event import parsed_group_event
 from src.platform.multi_bot.dedup import cross_bot_message_signature
 
 FEDERATE_INGRESS_CLAIM_PLUGIN = "federate_ingress"
@@ -40,6 +41,28 @@ def bypass_federate_ingress_for_current_mode() -> bool:
     return federate_ingress_bypass_unified() and not shard_ctx.sharding_active()
 
 
+def _claim_body(event: GroupMessageEvent, plain: str | None, body: str | None) -> str:
+    if body is not None:
+        return body
+    if plain is not None:
+        return plain.strip() or event.raw_message
+    return parsed_group_event(event).body
+
+
+def _claim_signature(event: GroupMessageEvent, body: str, include_message_time: bool):
+    parsed = parsed_group_event(event)
+    if body == parsed.body:
+        return parsed.signature(include_message_time=include_message_time)
+    return cross_bot_message_signature(
+        int(event.group_id),
+        int(event.user_id),
+        body,
+        event.time,
+        use_plaintext=True,
+        include_message_time=include_message_time,
+    )
+
+
 def federate_ingress_cached_win(
     event: GroupMessageEvent,
     *,
@@ -53,19 +76,11 @@ def federate_ingress_cached_win(
         return True
     if not federate_ingress_active():
         return True
-    plain = (plain if plain is not None else event.get_plaintext() or "").strip()
-    body = body if body is not None else (plain or event.raw_message)
+    body = _claim_body(event, plain, body)
     deployment_id = load_or_create_deployment_id().strip().lower()
     if not deployment_id:
         return False
-    sig = cross_bot_message_signature(
-        int(event.group_id),
-        int(event.user_id),
-        body,
-        event.time,
-        use_plaintext=True,
-        include_message_time=include_message_time,
-    )
+    sig = _claim_signature(event, body, include_message_time)
     cache_key = (plugin, sig, deployment_id)
     now = time.monotonic()
     exp = _win_cache.get(cache_key)
@@ -92,20 +107,12 @@ async def claim_federate_group_message_ingress(
     if not federate_ingress_active():
         timer.finish(outcome="disabled")
         return True
-    plain = (plain if plain is not None else event.get_plaintext() or "").strip()
-    body = body if body is not None else (plain or event.raw_message)
+    body = _claim_body(event, plain, body)
     deployment_id = load_or_create_deployment_id().strip().lower()
     if not deployment_id:
         timer.finish(outcome="missing_deployment_id", group_id=int(event.group_id), user_id=int(event.user_id))
         return False
-    sig = cross_bot_message_signature(
-        int(event.group_id),
-        int(event.user_id),
-        body,
-        event.time,
-        use_plaintext=True,
-        include_message_time=include_message_time,
-    )
+    sig = _claim_signature(event, body, include_message_time)
     cache_key = (plugin, sig, deployment_id)
     now = time.monotonic()
     wait_for: asyncio.Future[bool] | None = None
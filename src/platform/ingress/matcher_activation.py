@@ -4,11 +4,13 @@ import re
 from functools import lru_cache
 from typing import TYPE_CHECKING
 
+from nonebot.adapters.onebot.v11 import GroupMessageEvent
 from nonebot.consts import CMD_KEY
 from nonebot.rule import TrieRule
 
 from src.foundation.command_prefix import strip_leading_command_marks
 from src.platform.ingress.matcher_rule_prefilter import apply_matcher_rule_prefilter
+from src.platform.ingress.parsed_event import parsed_group_event
 from src.platform.ingress.plugin_command_plaintext import is_plugin_command_plaintext
 from src.platform.ingress.route_index import (
     RouteIndexSnapshot,
@@ -69,6 +71,9 @@ def normalize_dispatch_plain_text(text: str) -> str:
 
 
 def event_dispatch_texts(event: Event) -> tuple[str, str]:
+    if isinstance(event, GroupMessageEvent):
+        # 每个优先级都会取一次，群消息走入站解析缓存
+        return parsed_group_event(event).dispatch_texts
     raw = getattr(event, "raw_message", None)
     raw_text = normalize_dispatch_plain_text(raw) if isinstance(raw, str) else ""
     plain = normalize_dispatch_plain_text((event.get_plaintext() or "").strip())
@@ -87,6 +92,8 @@ def resolve_route_for_event(event: Event) -> RouteResolution | None:
     if not route_index_enabled():
         return None
     plain, _ = event_dispatch_texts(event)
+    if isinstance(event, GroupMessageEvent):
+        return parsed_group_event(event).memo("route", resolve_message_route, plain)
     return resolve_message_route(plain)
 
 
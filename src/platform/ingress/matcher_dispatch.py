@@ -29,6 +29,7 @@ from src.platform.ingress.matcher_activation import (
 )
 from src.platform.ingress.message_load import mark_activity, signal_overload
 from src.platform.multi_bot.dedup import needs_group_host_bot_gate
+from src.platform.observability.bot_load import bot_load_scope, record_bot_group_message
 
 if TYPE_CHECKING:
     from nonebot.adapters import Bot, Event
@@ -75,6 +76,7 @@ async def patched_handle_event(bot: Bot, event: Event) -> None:
     dependency_cache: dict[Any, Any] = {}
 
     async with nb_message.AsyncExitStack() as stack:
+        stack.enter_context(bot_load_scope(bot.self_id))
         if not await nb_message._apply_event_preprocessors(
             bot=bot,
             event=event,
@@ -166,8 +168,10 @@ async def patched_handle_event(bot: Bot, event: Event) -> None:
             nb_message.logger.debug("Checking for matchers completed")
 
         if apply_dispatch:
+            ingress_ms = (time.perf_counter() - ingress_started) * 1000.0
+            record_bot_group_message(bot.self_id, matcher_ms=ingress_ms)
             record_group_message_ingress(
-                duration_ms=(time.perf_counter() - ingress_started) * 1000.0,
+                duration_ms=ingress_ms,
                 command_traffic=command_traffic,
                 matchers_considered=total_considered,
                 matchers_selected=total_selected,
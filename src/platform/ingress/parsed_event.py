@@ -0,0 +1,122 @@
+"""单条群消息的入站解析结果：预处理器建一次，网关 / matcher / 复读按需取用。
+
+明文、归一化 raw、CQ 段索引、@ 目标、抢占签名等都在首次访问时计算并缓存在对象上，
+同一事件后续各环节直接复用，不再各自 ``get_plaintext()`` / 跑正则。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from src.platform.multi_bot.at_targets import at_qq_ids_from
+from src.platform.multi_bot.dedup import cross_bot_message_signature, normalize_group_raw_message
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from nonebot.adapters.onebot.v11 import GroupMessageEvent, MessageSegment
+
+    from src.platform.multi_bot.dedup import CrossBotSig
+
+_T = TypeVar("_T")
+
+# 事件处理期间存活即可；按 id 索引并持有引用，避免 id 复用串号
+_PARSED_MAX = 4096
+_parsed: OrderedDict[int, ParsedGroupEvent] = OrderedDict()
+
+
+class ParsedGroupEvent:
+    def __init__(self, event: GroupMessageEvent) -> None:
+        self.event = event
+        self._memo: dict[str, Any] = {}
+
+    @cached_property
+    def plain_text(self) -> str:
+        """``get_plaintext()`` 原样（未 strip），与 ChatData.plain_text 一致。"""
+        return self.event.get_plaintext() or ""
+
+    @cached_property
+    def plain(self) -> str:
+        return self.plain_text.strip()
+
+    @cached_property
+    def raw_message(self) -> str:
+        return self.event.raw_message or ""
+
+    @cached_property
+    def body(self) -> str:
+        """抢占签名用正文：明文优先，纯 CQ 消息退回 raw。"""
+        return self.plain or self.raw_message
+
+    @cached_property
+    def norm_raw(self) -> str:
+        """去掉图片子类型字段的 raw，供去重与学习。"""
+        return normalize_group_raw_message(self.raw_message)
+
+    @cached_property
+    def segments(self) -> dict[str, tuple[MessageSegment, ...]]:
+        """按段类型索引的消息段。"""
+        index: dict[str, list[MessageSegment]] = {}
+        for seg in getattr(self.event, "message", None) or ():
+            index.setdefault(seg.type, []).append(seg)
+        return {k: tuple(v) for k, v in index.items()}
+
+    @cached_property
+    def image_segments(self) -> tuple[MessageSegment, ...]:
+        return self.segments.get("image", ())
+
+    @cached_property
+    def at_targets(self) -> frozenset[int]:
+        """被 @ 的 QQ（不含全体）。"""
+        return at_qq_ids_from(self.segments.get("at", ()), self.raw_message)
+
+    @cached_property
+    def dispatch_texts(self) -> tuple[str, str]:
+        from src.platform.ingress.matcher_activation import normalize_dispatch_plain_text
+
+        raw_text = normalize_dispatch_plain_text(self.raw_message)
+        plain = normalize_dispatch_plain_text(self.plain) or raw_text
+        return plain, raw_text
+
+    def signature(self, *, include_message_time: bool = True) -> CrossBotSig:
+        """以 body 计算的跨 Bot 抢占签名。"""
+        key = "sig_t" if include_message_time else "sig"
+        sig = self._memo.get(key)
+        if sig is None:
+            sig = cross_bot_message_signature(
+                int(self.event.group_id),
+                int(self.event.user_id),
+                self.body,
+                int(self.event.time),
+                use_plaintext=True,
+                include_message_time=include_message_time,
+            )
+            self._memo[key] = sig
+        return sig
+
+    def memo(self, key: str, fn: Callable[..., _T], *args: Any) -> _T:
+        """按 key 缓存任意派生值（关键词、fanout 判定等）；首次调用 ``fn(*args)``。"""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = fn(*args)
+            return value
+
+
+def parsed_group_event(event: GroupMessageEvent) -> ParsedGroupEvent:
+    """取同一事件对象的解析结果；没有则新建并登记。"""
+    key = id(event)
+    parsed = _parsed.get(key)
+    if parsed is not None and parsed.event is event:
+        return parsed
+    parsed = ParsedGroupEvent(event)
+    _parsed[key] = parsed
+    if len(_parsed) > _PARSED_MAX:
+        _parsed.popitem(last=False)
+    return parsed
+
+
+def reset_parsed_group_events_for_tests() -> None:
+    _parsed.clear()
@@ -75,6 +75,10 @@ def plugin_module_key_from_plugin(plugin: object) -> str:
 
 @lru_cache(maxsize=512)
 def matcher_module_key(matcher: type[Matcher]) -> str:
+    # 懒加载插件的占位 matcher 不属于任何插件，按它代理的插件短名归类
+    lazy_key = getattr(matcher, "lazy_module_key", None)
+    if lazy_key:
+        return str(lazy_key)
     module_name = getattr(matcher, "plugin_name", None)
     if not module_name:
         return "unknown"
@@ -183,6 +187,15 @@ def build_route_index() -> RouteIndexSnapshot:
                     _add_module_mapping(prefix_map, prefix, module_key)
                 regex_entries.extend((module_key, pattern) for pattern in entry.regexes)
 
+    from src.platform.bot_runtime.lazy_plugins import pending_lazy_routes
+
+    for module_key, meta in pending_lazy_routes().items():
+        for prefix in meta.command_prefixes:
+            _add_module_mapping(prefix_map, prefix, module_key)
+        for exact in meta.exact_plaintexts:
+            _add_module_mapping(exact_map, exact, module_key)
+        indexed.add(module_key)
+
     prefix_frozen = {key: frozenset(modules) for key, modules in prefix_map.items()}
     exact_frozen = {key: frozenset(modules) for key, modules in exact_map.items()}
     return RouteIndexSnapshot(
@@ -5,11 +5,14 @@ from __future__ import annotations
 from collections import deque
 from typing import TYPE_CHECKING
 
+from src.platform.ingress.parsed_event import parsed_group_event
 from src.platform.multi_bot.dedup import cross_bot_message_signature
 
 if TYPE_CHECKING:
     from nonebot.adapters.onebot.v11 import GroupMessageEvent
 
+    from src.platform.ingress.parsed_event import ParsedGroupEvent
+
 _PASS_MAX = 8000
 _pass_keys: set[tuple[int, int, str, int]] = set()
 _pass_order: deque[tuple[int, int, str, int]] = deque()
@@ -37,17 +40,21 @@ def unified_ingress_once_signature(
     return (int(group_id), int(user_id), str(sig[2]), int(sig[3]))
 
 
+def _once_signature_from_parsed(parsed: ParsedGroupEvent) -> tuple[int, int, str, int]:
+    sig = parsed.signature(include_message_time=True)
+    return (int(sig[0]), int(sig[1]), str(sig[2]), int(sig[3]))  # type: ignore[misc]
+
+
 def mark_unified_ingress_once_won(
     event: GroupMessageEvent,
     *,
     body: str,
 ) -> None:
-    sig = unified_ingress_once_signature(
-        int(event.group_id),
-        int(event.user_id),
-        body,
-        int(event.time),
-    )
+    parsed = parsed_group_event(event)
+    if body == parsed.body:
+        sig = _once_signature_from_parsed(parsed)
+    else:
+        sig = unified_ingress_once_signature(int(event.group_id), int(event.user_id), body, int(event.time))
     if sig in _pass_keys:
         return
     _pass_keys.add(sig)
@@ -63,14 +70,13 @@ def unified_ingress_once_won(
     plain: str | None = None,
     body: str | None = None,
 ) -> bool:
-    plain_body = (plain if plain is not None else event.get_plaintext() or "").strip()
-    msg_body = body if body is not None else (plain_body or event.raw_message)
-    sig = unified_ingress_once_signature(
-        int(event.group_id),
-        int(event.user_id),
-        msg_body,
-        int(event.time),
-    )
+    parsed = parsed_group_event(event)
+    if body is None:
+        body = parsed.body if plain is None else (plain.strip() or event.raw_message)
+    if body == parsed.body:
+        sig = _once_signature_from_parsed(parsed)
+    else:
+        sig = unified_ingress_once_signature(int(event.group_id), int(event.user_id), body, int(event.time))
     return sig in _pass_keys
 
 
@@ -9,23 +9,21 @@ from src.platform.multi_bot.fleet import get_fleet_bot_ids
 _AT_QQ_RE = re.compile(r"\[(?:CQ:)?at(?:,qq=|:qq=)(\d+)")
 
 
-def group_at_qq_ids(event) -> frozenset[int]:
+def at_qq_ids_from(segments, raw_message: str) -> frozenset[int]:
+    """消息段里的 at 优先；段缺失时（部分协议）从 raw 的 CQ/简写里解析。"""
     out: set[int] = set()
-    message = getattr(event, "message", None)
-    if message is not None:
-        for seg in message:
-            if seg.type != "at":
-                continue
-            qq = seg.data.get("qq")
-            if qq is None or str(qq) in ("all", "0"):
-                continue
-            try:
-                out.add(int(qq))
-            except (TypeError, ValueError):
-                continue
+    for seg in segments:
+        if seg.type != "at":
+            continue
+        qq = seg.data.get("qq")
+        if qq is None or str(qq) in ("all", "0"):
+            continue
+        try:
+            out.add(int(qq))
+        except (TypeError, ValueError):
+            continue
     if out:
         return frozenset(out)
-    raw_message = getattr(event, "raw_message", None) or ""
     for match in _AT_QQ_RE.finditer(raw_message):
         try:
             out.add(int(match.group(1)))
@@ -34,6 +32,11 @@ def group_at_qq_ids(event) -> frozenset[int]:
     return frozenset(out)
 
 
+def group_at_qq_ids(event) -> frozenset[int]:
+    message = getattr(event, "message", None)
+    return at_qq_ids_from(message if message is not None else (), getattr(event, "raw_message", None) or "")
+
+
 def message_at_fleet_bot(event) -> bool:
     fleet = get_fleet_bot_ids()
     if not fleet:
@@ -42,13 +42,19 @@ def needs_group_host_bot_gate() -> bool:
     return len(get_bots()) > 1
 
 
+_IMAGE_SUBTYPE_RE = re.compile(r"\.image,.+?\]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
 def normalize_group_raw_message(raw_message: str) -> str:
     # 与 ChatData / learn 侧一致，避免图片子类型差异导致去重失败
-    return re.sub(r"\.image,.+?\]", ".image]", raw_message)
+    if ".image," not in raw_message:
+        return raw_message
+    return _IMAGE_SUBTYPE_RE.sub(".image]", raw_message)
 
 
 def normalize_group_plaintext(plaintext: str) -> str:
-    return re.sub(r"\s+", " ", plaintext.strip())
+    return _WHITESPACE_RE.sub(" ", plaintext.strip())
 
 
 def normalize_message_time(message_time: int) -> int:
@@ -10,6 +10,9 @@ from src.platform.shard import context as shard_ctx
 
 _lock = threading.RLock()
 _cached: frozenset[int] | None = None
+# 单进程：block 维护的已连接集合的快照，上下线时递增版本后重建
+_local_roster_version = 0
+_local_catalog: tuple[int, object, frozenset[int]] = (-1, None, frozenset())
 # 本进程已连过 WS、但 accounts/registry 可能尚未刷新的 QQ
 _session_connected: set[int] = set()
 
@@ -31,23 +34,40 @@ def note_fleet_bot_session_connected(qq: int) -> None:
         _cached = None
 
 
+def note_local_bot_roster_changed() -> None:
+    """本进程牛牛上线/下线后调用，使单进程 catalog 快照重建。"""
+    global _local_roster_version
+    with _lock:
+        _local_roster_version += 1
+
+
 def get_process_session_connected_ids() -> frozenset[int]:
     with _lock:
         return frozenset(_session_connected)
 
 
 def get_catalog_bot_ids() -> frozenset[int]:
-    """分片：全集群 catalog；单进程：block 维护的本进程已连接集合。"""
+    """分片：全集群 catalog；单进程：block 维护的本进程已连接集合。
+
+    返回缓存的同一 frozenset 对象，名册不变时调用方可按对象身份复用派生快照。
+    """
+    global _local_catalog
     if shard_ctx.sharding_active():
         return get_fleet_bot_ids()
     try:
         from src.plugins.block import plugin_config
 
-        if plugin_config.bots:
-            return frozenset(plugin_config.bots)
+        source = plugin_config.bots
     except Exception:
-        pass
-    return frozenset()
+        return frozenset()
+    version, cached_source, cached = _local_catalog
+    current = _local_roster_version
+    if version == current and cached_source is source:
+        return cached
+    bots = frozenset(source)
+    with _lock:
+        _local_catalog = (current, source, bots)
+    return bots
 
 
 def get_fleet_bot_ids() -> frozenset[int]:
@@ -0,0 +1,297 @@
+"""群成员索引：fleet 牛各在哪些群。
+
+连接时用 ``get_group_list`` 全量建立，之后随进群/退群通知增量维护，不再按 TTL 回源 member API；
+分片时各 worker 把自己牛牛的群集合写入协调 Redis，并经频道广播变更，任一 worker 都能 O(1) 查询。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from typing import TYPE_CHECKING, Any
+
+from nonebot import get_bots, logger
+
+from src.platform.shard import context as shard_ctx
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_REDIS_CHANNEL = "pallas:coord:group_membership"
+_REDIS_KEY_PREFIX = "pallas:coord:group_membership:bot:"
+# 本进程标识：收到自己广播的变更时跳过（已本地应用）
+_ORIGIN = uuid.uuid4().hex[:12]
+_EMPTY: frozenset[int] = frozenset()
+
+# 已建索引的牛 -> 所在群；不在此表的牛视为未知，查询时回退 member API
+_groups_of_bot: dict[int, frozenset[int]] = {}
+# 反向索引：群 -> 在群内的已建索引牛；值整体替换，查询直接返回不分配
+_bots_in_group: dict[int, frozenset[int]] = {}
+_redis_listener_started = False
+
+
+def clear_group_membership_index() -> None:
+    _groups_of_bot.clear()
+    _bots_in_group.clear()
+
+
+def bot_membership_indexed(bot_id: int) -> bool:
+    return int(bot_id) in _groups_of_bot
+
+
+def group_member_bot_ids(group_id: int) -> frozenset[int]:
+    """已建索引的牛中在该群的 QQ。"""
+    return _bots_in_group.get(int(group_id), _EMPTY)
+
+
+def indexed_bots_in_group(group_id: int, candidates: Iterable[int]) -> list[int] | None:
+    """candidates 中在该群的牛；有候选尚未建索引（或无候选）时返回 None，由调用方回退 member API。"""
+    members = _bots_in_group.get(int(group_id), _EMPTY)
+    out: list[int] = []
+    seen = False
+    for bid in candidates:
+        if bid not in _groups_of_bot:
+            return None
+        seen = True
+        if bid in members:
+            out.append(bid)
+    return sorted(out) if seen else None
+
+
+def _link(group_id: int, bot_id: int) -> None:
+    cur = _bots_in_group.get(group_id, _EMPTY)
+    if bot_id not in cur:
+        _bots_in_group[group_id] = cur | {bot_id}
+
+
+def _unlink(group_id: int, bot_id: int) -> None:
+    cur = _bots_in_group.get(group_id, _EMPTY)
+    if bot_id not in cur:
+        return
+    rest = cur - {bot_id}
+    if rest:
+        _bots_in_group[group_id] = rest
+    else:
+        _bots_in_group.pop(group_id, None)
+
+
+def _set_bot_groups(bot_id: int, group_ids: frozenset[int]) -> None:
+    old = _groups_of_bot.get(bot_id, _EMPTY)
+    _groups_of_bot[bot_id] = group_ids
+    for gid in old - group_ids:
+        _unlink(gid, bot_id)
+    for gid in group_ids - old:
+        _link(gid, bot_id)
+
+
+def apply_membership_change(op: str, bot_id: int, group_ids: Iterable[int]) -> bool:
+    """应用一条变更；增减只作用于已建索引的牛，避免把局部信息当成全量。"""
+    bid = int(bot_id)
+    gids = frozenset(int(g) for g in group_ids)
+    if op == "replace":
+        _set_bot_groups(bid, gids)
+        return True
+    cur = _groups_of_bot.get(bid)
+    if cur is None:
+        return False
+    if op == "add":
+        _set_bot_groups(bid, cur | gids)
+    elif op == "remove":
+        _set_bot_groups(bid, cur - gids)
+    else:
+        return False
+    return True
+
+
+def group_ids_from_group_list(raw: Any) -> frozenset[int]:
+    """解析 get_group_list 返回值；不同实现可能返回 list 或包在 dict 里。"""
+    if hasattr(raw, "model_dump"):
+        raw = raw.model_dump()
+    if isinstance(raw, dict):
+        for key in ("group_list", "groups", "data"):
+            val = raw.get(key)
+            if isinstance(val, list):
+                raw = val
+                break
+    if not isinstance(raw, list):
+        return _EMPTY
+    out: set[int] = set()
+    for row in raw:
+        gid = row.get("group_id") if isinstance(row, dict) else getattr(row, "group_id", None)
+        try:
+            out.add(int(gid))
+        except (TypeError, ValueError):
+            continue
+    return frozenset(out)
+
+
+# ---------------------------------------------------------------------------
+# 分片共享：每只牛一个 Redis SET，变更同时 PUBLISH；监听端启动/重连时全量载入
+# ---------------------------------------------------------------------------
+
+
+def _share_change_sync(op: str, bot_id: int, group_ids: frozenset[int]) -> bool:
+    from src.platform.shard.coord.coord_redis_store import redis_client_or_none
+
+    client = redis_client_or_none()
+    if client is None:
+        return False
+    key = f"{_REDIS_KEY_PREFIX}{int(bot_id)}"
+    body = json.dumps(
+        {"origin": _ORIGIN, "op": op, "bot": int(bot_id), "gids": sorted(group_ids)},
+        separators=(",", ":"),
+    )
+    try:
+        pipe = client.pipeline(transaction=True)
+        if op == "replace":
+            pipe.delete(key)
+            if group_ids:
+                pipe.sadd(key, *group_ids)
+        elif op == "add":
+            pipe.sadd(key, *group_ids)
+        elif op == "remove":
+            pipe.srem(key, *group_ids)
+        pipe.publish(_REDIS_CHANNEL, body)
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.debug("group_membership share failed: {}", e)
+        return False
+
+
+def load_shared_membership_sync() -> dict[int, frozenset[int]] | None:
+    from src.platform.shard.coord.coord_redis_store import redis_client_or_none
+
+    client = redis_client_or_none()
+    if client is None:
+        return None
+    out: dict[int, frozenset[int]] = {}
+    try:
+        for raw_key in client.scan_iter(match=f"{_REDIS_KEY_PREFIX}*", count=200):
+            key = raw_key.decode() if isinstance(raw_key, bytes) else str(raw_key)
+            try:
+                bid = int(key.rsplit(":", 1)[-1])
+            except ValueError:
+                continue
+            out[bid] = frozenset(int(x) for x in client.smembers(key))
+    except Exception as e:
+        logger.debug("group_membership load failed: {}", e)
+        return None
+    return out
+
+
+async def _record(op: str, bot_id: int, group_ids: frozenset[int]) -> None:
+    if not apply_membership_change(op, bot_id, group_ids):
+        return
+    if shard_ctx.sharding_active():
+        await asyncio.to_thread(_share_change_sync, op, int(bot_id), group_ids)
+
+
+async def replace_bot_groups(bot_id: int, group_ids: Iterable[int]) -> None:
+    await _record("replace", int(bot_id), frozenset(int(g) for g in group_ids))
+
+
+async def note_bot_joined_group(bot_id: int, group_id: int) -> None:
+    await _record("add", int(bot_id), frozenset((int(group_id),)))
+
+
+async def note_bot_left_group(bot_id: int, group_id: int) -> None:
+    await _record("remove", int(bot_id), frozenset((int(group_id),)))
+
+
+async def refresh_bot_group_membership(bot: Any) -> bool:
+    """连接时全量拉取该牛的群列表；失败时该牛保持未建索引，查询回退 member API。"""
+    try:
+        bid = int(bot.self_id)
+        raw = await bot.call_api("get_group_list")
+    except Exception as e:
+        logger.debug("group_membership: get_group_list failed bot={}: {}", getattr(bot, "self_id", "?"), e)
+        return False
+    gids = group_ids_from_group_list(raw)
+    await replace_bot_groups(bid, gids)
+    logger.debug("group_membership indexed bot={} groups={}", bid, len(gids))
+    return True
+
+
+async def group_membership_redis_listen_loop() -> None:
+    from src.platform.coord.redis_claim import get_coord_redis_client
+    from src.platform.coord.redis_settings import coord_redis_enabled
+
+    while shard_ctx.sharding_active():
+        if not coord_redis_enabled():
+            await asyncio.sleep(5.0)
+            continue
+        client = get_coord_redis_client()
+        if client is None:
+            await asyncio.sleep(5.0)
+            continue
+        pubsub = None
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            await asyncio.to_thread(pubsub.subscribe, _REDIS_CHANNEL)
+            # 先订阅再全量载入：其间的变更会在之后重放，replace/增减都是目标状态
+            shared = await asyncio.to_thread(load_shared_membership_sync)
+            for bid, gids in (shared or {}).items():
+                apply_membership_change("replace", bid, gids)
+            while shard_ctx.sharding_active():
+                raw = await asyncio.to_thread(pubsub.get_message, timeout=1.0)
+                if not raw or raw.get("type") != "message":
+                    continue
+                body = raw.get("data")
+                if isinstance(body, bytes):
+                    body = body.decode("utf-8")
+                try:
+                    data = json.loads(body)
+                except (TypeError, json.JSONDecodeError):
+                    continue
+                if not isinstance(data, dict) or data.get("origin") == _ORIGIN:
+                    continue
+                try:
+                    apply_membership_change(str(data.get("op")), int(data["bot"]), data.get("gids") or [])
+                except (KeyError, TypeError, ValueError):
+                    continue
+        except Exception as err:
+            logger.debug(f"group_membership redis listen: {err}")
+            await asyncio.sleep(2.0)
+        finally:
+            if pubsub is not None:
+                try:
+                    await asyncio.to_thread(pubsub.close)
+                except Exception:
+                    pass
+
+
+def start_group_membership_redis_listener() -> None:
+    global _redis_listener_started
+    if _redis_listener_started or not shard_ctx.sharding_active():
+        return
+    from src.platform.coord.redis_settings import coord_redis_enabled
+
+    if not coord_redis_enabled():
+        return
+    _redis_listener_started = True
+    asyncio.create_task(group_membership_redis_listen_loop())
+
+
+async def resolve_local_connected_bots_in_group(group_id: int) -> list[int]:
+    """本进程已连接且在该群的牛牛 QQ；已建索引的牛直接查索引，其余逐个 get_group_member_info 确认。"""
+    gid = int(group_id)
+    members = group_member_bot_ids(gid)
+    bots = get_bots()
+    out: list[int] = []
+    for key in sorted(bots.keys(), key=lambda x: int(x) if str(x).isdigit() else 0):
+        try:
+            bid = int(key)
+        except ValueError:
+            continue
+        if bid in _groups_of_bot:
+            if bid in members:
+                out.append(bid)
+            continue
+        try:
+            await bots[key].get_group_member_info(group_id=gid, user_id=bid)
+        except Exception:
+            continue
+        out.append(bid)
+    return out
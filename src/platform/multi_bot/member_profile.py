@@ -0,0 +1,338 @@
+"""群成员资料缓存：(群, QQ) -> 群名片 / 昵称 / 禁言到期。
+
+回复里 @ 转昵称、发送失败后的禁言判断都走这里，稳态下不再逐个 ``get_group_member_info``。
+某群首次未命中时用一次 ``get_group_member_list`` 整群预热；之后随群名片 / 进退群 / 禁言通知就地更新，
+TTL 兜底。分片时预热结果写入协调 Redis（每群一个 HASH），同群其他 worker 首次查询直接载入。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any
+
+from nonebot import logger
+from nonebot.exception import ActionFailed
+
+from src.foundation.config.repo_settings import repo_env_raw_value
+from src.platform.shard import context as shard_ctx
+
+_DEFAULT_TTL_SEC = 1800
+# 成员列表拉取失败后，该群在此时间内只走单人查询
+_WARM_RETRY_SEC = 120.0
+_MAX_GROUPS = 512
+_REDIS_NAMESPACE = "member_profile"
+_REDIS_WARM_FIELD = "_warm"
+
+MEMBER_PROFILE_NOTICE_TYPES = frozenset({"group_card", "group_increase", "group_decrease", "group_ban"})
+
+
+@dataclass(frozen=True, slots=True)
+class MemberProfile:
+    card: str
+    nickname: str
+    shut_up_timestamp: int
+    fetched_at: float
+
+    @property
+    def display_name(self) -> str:
+        return self.card or self.nickname
+
+    def shut_up(self, now: float | None = None) -> bool:
+        return self.shut_up_timestamp > (time.time() if now is None else now)
+
+
+class _GroupProfiles:
+    __slots__ = ("absent", "lock", "members", "warm_failed_at", "warmed_at")
+
+    def __init__(self) -> None:
+        self.members: dict[int, MemberProfile] = {}
+        # 查过但不在群内的 QQ -> 查询时间
+        self.absent: dict[int, float] = {}
+        self.warmed_at = 0.0
+        self.warm_failed_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def needs_warm(self, now: float, ttl: float) -> bool:
+        return now - self.warmed_at >= ttl and now - self.warm_failed_at >= _WARM_RETRY_SEC
+
+    def fill(self, profiles: dict[int, MemberProfile], warmed_at: float) -> None:
+        self.members.update(profiles)
+        for uid in profiles:
+            self.absent.pop(uid, None)
+        self.warmed_at = warmed_at
+
+
+_MISS = object()
+_groups: OrderedDict[int, _GroupProfiles] = OrderedDict()
+
+
+@lru_cache(maxsize=1)
+def member_profile_ttl_sec() -> float:
+    raw = repo_env_raw_value("PALLAS_MEMBER_PROFILE_TTL_SEC")
+    try:
+        return float(max(10, int(str(raw).strip()))) if raw is not None else float(_DEFAULT_TTL_SEC)
+    except ValueError:
+        return float(_DEFAULT_TTL_SEC)
+
+
+def clear_member_profile_cache() -> None:
+    _groups.clear()
+    member_profile_ttl_sec.cache_clear()
+
+
+def _group(group_id: int) -> _GroupProfiles:
+    grp = _groups.get(group_id)
+    if grp is None:
+        grp = _groups[group_id] = _GroupProfiles()
+        while len(_groups) > _MAX_GROUPS:
+            _groups.popitem(last=False)
+    else:
+        _groups.move_to_end(group_id)
+    return grp
+
+
+def _lookup(grp: _GroupProfiles, user_id: int, now: float, max_age: float) -> Any:
+    profile = grp.members.get(user_id)
+    if profile is not None and now - profile.fetched_at < max_age:
+        return profile
+    absent_at = grp.absent.get(user_id)
+    if absent_at is not None and now - absent_at < max_age:
+        return None
+    return _MISS
+
+
+def profile_from_member_info(info: Any, fetched_at: float) -> MemberProfile:
+    if hasattr(info, "model_dump"):
+        info = info.model_dump()
+    data = info if isinstance(info, dict) else {}
+    try:
+        shut_up = int(data.get("shut_up_timestamp") or 0)
+    except (TypeError, ValueError):
+        shut_up = 0
+    return MemberProfile(
+        card=str(data.get("card") or ""),
+        nickname=str(data.get("nickname") or ""),
+        shut_up_timestamp=shut_up,
+        fetched_at=fetched_at,
+    )
+
+
+def profiles_from_member_list(raw: Any, fetched_at: float) -> dict[int, MemberProfile]:
+    """解析 get_group_member_list 返回值；不同实现可能返回 list 或包在 dict 里。"""
+    if isinstance(raw, dict):
+        for key in ("members", "member_list", "data"):
+            val = raw.get(key)
+            if isinstance(val, list):
+                raw = val
+                break
+    if not isinstance(raw, list):
+        return {}
+    out: dict[int, MemberProfile] = {}
+    for row in raw:
+        data = row.model_dump() if hasattr(row, "model_dump") else row
+        if not isinstance(data, dict):
+            continue
+        try:
+            uid = int(data.get("user_id"))
+        except (TypeError, ValueError):
+            continue
+        out[uid] = profile_from_member_info(data, fetched_at)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# 分片共享：每群一个 Redis HASH，字段为 QQ，外加预热时间字段；整键随 TTL 过期
+# ---------------------------------------------------------------------------
+
+
+def _redis_key(group_id: int) -> str:
+    from src.platform.shard.coord.coord_redis_store import coord_key
+
+    return coord_key(_REDIS_NAMESPACE, int(group_id))
+
+
+def _encode_profile(p: MemberProfile) -> str:
+    return json.dumps([p.card, p.nickname, p.shut_up_timestamp, p.fetched_at], ensure_ascii=False)
+
+
+def _decode_profile(raw: Any) -> MemberProfile | None:
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    try:
+        card, nickname, shut_up, fetched_at = json.loads(raw)
+        return MemberProfile(str(card), str(nickname), int(shut_up), float(fetched_at))
+    except (TypeError, ValueError):
+        return None
+
+
+def _share_profiles_sync(group_id: int, profiles: dict[int, MemberProfile], *, warmed_at: float | None) -> None:
+    from src.platform.shard.coord.coord_redis_store import redis_client_or_none
+
+    client = redis_client_or_none()
+    if client is None or not profiles:
+        return
+    mapping = {str(uid): _encode_profile(p) for uid, p in profiles.items()}
+    if warmed_at is not None:
+        mapping[_REDIS_WARM_FIELD] = str(warmed_at)
+    key = _redis_key(group_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, int(member_profile_ttl_sec()))
+        pipe.execute()
+    except Exception as e:
+        logger.debug("member_profile share failed group={}: {}", group_id, e)
+
+
+def _load_shared_group_sync(group_id: int, ttl: float) -> tuple[float, dict[int, MemberProfile]] | None:
+    from src.platform.shard.coord.coord_redis_store import redis_client_or_none
+
+    client = redis_client_or_none()
+    if client is None:
+        return None
+    try:
+        raw_map = client.hgetall(_redis_key(group_id))
+    except Exception as e:
+        logger.debug("member_profile load failed group={}: {}", group_id, e)
+        return None
+    warmed_at = 0.0
+    out: dict[int, MemberProfile] = {}
+    for k, v in (raw_map or {}).items():
+        field = k.decode("utf-8") if isinstance(k, bytes) else str(k)
+        if field == _REDIS_WARM_FIELD:
+            try:
+                warmed_at = float(v)
+            except (TypeError, ValueError):
+                pass
+            continue
+        profile = _decode_profile(v)
+        if profile is not None and field.isdigit():
+            out[int(field)] = profile
+    if time.time() - warmed_at >= ttl:
+        return None
+    return warmed_at, out
+
+
+def _drop_shared_sync(group_id: int, user_id: int) -> None:
+    from src.platform.shard.coord.coord_redis_store import redis_client_or_none
+
+    client = redis_client_or_none()
+    if client is None:
+        return
+    try:
+        client.hdel(_redis_key(group_id), str(int(user_id)))
+    except Exception as e:
+        logger.debug("member_profile drop failed group={}: {}", group_id, e)
+
+
+# ---------------------------------------------------------------------------
+# 查询
+# ---------------------------------------------------------------------------
+
+
+async def _warm_group(bot: Any, grp: _GroupProfiles, group_id: int, ttl: float) -> None:
+    async with grp.lock:
+        now = time.time()
+        if not grp.needs_warm(now, ttl):
+            return
+        sharded = shard_ctx.sharding_active()
+        if sharded:
+            shared = await asyncio.to_thread(_load_shared_group_sync, group_id, ttl)
+            if shared is not None:
+                grp.fill(shared[1], shared[0])
+                return
+        try:
+            raw = await bot.call_api("get_group_member_list", group_id=group_id)
+        except Exception as e:
+            grp.warm_failed_at = now
+            logger.debug("member_profile: get_group_member_list failed group={}: {}", group_id, e)
+            return
+        profiles = profiles_from_member_list(raw, now)
+        grp.fill(profiles, now)
+        if sharded:
+            await asyncio.to_thread(_share_profiles_sync, group_id, profiles, warmed_at=now)
+
+
+async def get_member_profile(
+    bot: Any,
+    group_id: int,
+    user_id: int,
+    *,
+    max_age_sec: float | None = None,
+) -> MemberProfile | None:
+    """群成员资料；不在群内返回 None。其他协议错误照常抛出。"""
+    gid, uid = int(group_id), int(user_id)
+    ttl = member_profile_ttl_sec()
+    max_age = ttl if max_age_sec is None else min(ttl, max_age_sec)
+    grp = _group(gid)
+    hit = _lookup(grp, uid, time.time(), max_age)
+    if hit is not _MISS:
+        return hit
+    if grp.needs_warm(time.time(), ttl):
+        await _warm_group(bot, grp, gid, ttl)
+        hit = _lookup(grp, uid, time.time(), max_age)
+        if hit is not _MISS:
+            return hit
+    try:
+        info = await bot.call_api("get_group_member_info", group_id=gid, user_id=uid)
+    except ActionFailed:
+        grp.absent[uid] = time.time()
+        grp.members.pop(uid, None)
+        return None
+    profile = profile_from_member_info(info, time.time())
+    grp.members[uid] = profile
+    grp.absent.pop(uid, None)
+    if shard_ctx.sharding_active():
+        await asyncio.to_thread(_share_profiles_sync, gid, {uid: profile}, warmed_at=None)
+    return profile
+
+
+# ---------------------------------------------------------------------------
+# 通知维护
+# ---------------------------------------------------------------------------
+
+
+def apply_member_profile_notice(event: Any) -> bool:
+    """按群名片 / 进退群 / 禁言通知就地更新；返回是否改动了缓存。"""
+    notice_type = getattr(event, "notice_type", None)
+    if notice_type not in MEMBER_PROFILE_NOTICE_TYPES:
+        return False
+    try:
+        gid = int(getattr(event, "group_id", 0) or 0)
+        uid = int(getattr(event, "user_id", 0) or 0)
+    except (TypeError, ValueError):
+        return False
+    # user_id=0 为全体禁言，不落在个人资料上
+    grp = _groups.get(gid)
+    if grp is None or not uid:
+        return False
+    now = time.time()
+    profile = grp.members.get(uid)
+    if notice_type == "group_decrease":
+        grp.members.pop(uid, None)
+        grp.absent[uid] = now
+    elif notice_type == "group_increase":
+        grp.members.pop(uid, None)
+        grp.absent.pop(uid, None)
+    elif profile is None:
+        return False
+    elif notice_type == "group_card":
+        grp.members[uid] = replace(profile, card=str(getattr(event, "card_new", "") or ""))
+    else:
+        duration = int(getattr(event, "duration", 0) or 0)
+        until = int(now) + duration if getattr(event, "sub_type", None) == "ban" and duration > 0 else 0
+        grp.members[uid] = replace(profile, shut_up_timestamp=until)
+    return True
+
+
+async def note_member_profile_notice(event: Any) -> None:
+    if not apply_member_profile_notice(event):
+        return
+    # 共享副本只删不改：其他 worker 的本地副本由各自收到的同一通知维护
+    if shard_ctx.sharding_active():
+        await asyncio.to_thread(_drop_shared_sync, int(event.group_id), int(event.user_id))
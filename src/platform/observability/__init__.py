@@ -1,7 +1,17 @@
+from .bot_load import (
+    bot_load_scope,
+    bot_load_snapshot,
+    charge_bot_db_ms,
+    record_bot_group_message,
+)
 from .slow_path import SlowPathTimer, clear_slow_path_threshold_cache, slow_path_threshold_ms
 
 __all__ = [
     "SlowPathTimer",
+    "bot_load_scope",
+    "bot_load_snapshot",
+    "charge_bot_db_ms",
     "clear_slow_path_threshold_cache",
+    "record_bot_group_message",
     "slow_path_threshold_ms",
 ]
@@ -0,0 +1,113 @@
+"""按牛牛计量进程内负载：群消息速率、matcher 耗时与 PG 会话耗时（指数衰减，供分片按负载调度）。"""
+
+from __future__ import annotations
+
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+# 衰减时间常数：约反映最近 10 分钟的负载
+BOT_LOAD_DECAY_TAU_SEC = 600.0
+# 每条群消息的固定开销（解析、预处理、路由），折算为 ms
+MSG_BASE_COST_MS = 2.0
+# PG 耗时多在等待 IO，只按一定比例计入 worker 负载
+DB_MS_WEIGHT = 0.5
+_PRUNE_BELOW_SCORE = 0.01
+
+_current_bot: ContextVar[str | None] = ContextVar("pallas_bot_load_bot", default=None)
+
+
+class _DecayedLoad:
+    __slots__ = ("at", "db_ms", "matcher_ms", "msgs")
+
+    def __init__(self, now: float) -> None:
+        self.msgs = 0.0
+        self.matcher_ms = 0.0
+        self.db_ms = 0.0
+        self.at = now
+
+    def decay(self, now: float) -> None:
+        dt = now - self.at
+        if dt <= 0:
+            return
+        f = math.exp(-dt / BOT_LOAD_DECAY_TAU_SEC)
+        self.msgs *= f
+        self.matcher_ms *= f
+        self.db_ms *= f
+        self.at = now
+
+
+_loads: dict[str, _DecayedLoad] = {}
+
+
+def _row(bot_id: str, now: float) -> _DecayedLoad:
+    row = _loads.get(bot_id)
+    if row is None:
+        row = _DecayedLoad(now)
+        _loads[bot_id] = row
+    else:
+        row.decay(now)
+    return row
+
+
+@contextmanager
+def bot_load_scope(bot_id: object) -> Generator[None]:
+    """在该上下文（含其中派生的 task）内发生的 PG 耗时记到该牛牛名下。"""
+    token = _current_bot.set(str(bot_id).strip() or None)
+    try:
+        yield
+    finally:
+        _current_bot.reset(token)
+
+
+def record_bot_group_message(bot_id: object, *, matcher_ms: float) -> None:
+    key = str(bot_id).strip()
+    if not key:
+        return
+    row = _row(key, time.monotonic())
+    row.msgs += 1.0
+    row.matcher_ms += max(0.0, float(matcher_ms))
+
+
+def charge_bot_db_ms(elapsed_ms: float) -> None:
+    key = _current_bot.get()
+    if not key or elapsed_ms <= 0:
+        return
+    _row(key, time.monotonic()).db_ms += float(elapsed_ms)
+
+
+def bot_load_score(row: dict[str, Any]) -> float:
+    """估算每分钟占用 worker 的毫秒数；matcher 耗时已含其中的 PG 等待，先扣除再按权重加回。"""
+    msgs = float(row.get("msg_per_min") or 0.0)
+    matcher = float(row.get("matcher_ms_per_min") or 0.0)
+    db = float(row.get("db_ms_per_min") or 0.0)
+    return msgs * MSG_BASE_COST_MS + max(0.0, matcher - db) + db * DB_MS_WEIGHT
+
+
+def bot_load_snapshot() -> dict[str, dict[str, float]]:
+    now = time.monotonic()
+    per_min = 60.0 / BOT_LOAD_DECAY_TAU_SEC
+    out: dict[str, dict[str, float]] = {}
+    for key in list(_loads):
+        row = _loads[key]
+        row.decay(now)
+        rec = {
+            "msg_per_min": round(row.msgs * per_min, 3),
+            "matcher_ms_per_min": round(row.matcher_ms * per_min, 1),
+            "db_ms_per_min": round(row.db_ms * per_min, 1),
+        }
+        rec["score"] = round(bot_load_score(rec), 1)
+        if rec["score"] < _PRUNE_BELOW_SCORE:
+            del _loads[key]
+            continue
+        out[key] = rec
+    return out
+
+
+def clear_bot_load_for_tests() -> None:
+    _loads.clear()
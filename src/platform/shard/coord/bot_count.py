@@ -11,7 +11,6 @@ from typing import Any
 from nonebot import logger
 
 from src.platform.ingress.policy_registry import normalize_ingress_trailing_punct
-from src.platform.multi_bot.dedup import cross_bot_group_message_key
 from src.platform.shard.coord.coord_redis_store import (
     coord_key,
     mutate_json_sync,
@@ -268,6 +267,19 @@ async def _wait_for_order(session_key: str, *, deadline: float, self_bot_id: int
     return None
 
 
+def _bot_count_claim_key(group_id: int, user_id: int, plaintext: str, message_time: int) -> str:
+    # 延迟导入：multi_bot/__init__ → dedup → shard → coord/bot_count 成环
+    from src.platform.multi_bot.dedup import cross_bot_group_message_key
+
+    return cross_bot_group_message_key(
+        group_id,
+        user_id,
+        bot_count_coord_plaintext(plaintext),
+        message_time,
+        use_plaintext=True,
+    )
+
+
 async def update_shard_bot_count_registration(
     *,
     group_id: int,
@@ -277,13 +289,7 @@ async def update_shard_bot_count_registration(
     bot_ids: list[int],
 ) -> None:
     """handler 在慢路径探测本群在线牛后补登记。"""
-    claim_key = cross_bot_group_message_key(
-        group_id,
-        user_id,
-        bot_count_coord_plaintext(plaintext),
-        message_time,
-        use_plaintext=True,
-    )
+    claim_key = _bot_count_claim_key(group_id, user_id, plaintext, message_time)
     session_key = _session_key(group_id, claim_key)
     shard_id = get_shard_registry_settings().shard_id
     await asyncio.to_thread(_register_shard_bots, session_key, shard_id, bot_ids)
@@ -304,13 +310,7 @@ async def run_shard_coordinated_bot_count(
     local_bot_ids 可仅含 self_bot_id：handler 应先 create_task 本协程，再探测本群在线牛并
     调用 update_shard_bot_count_registration 补全登记。
     """
-    claim_key = cross_bot_group_message_key(
-        group_id,
-        user_id,
-        bot_count_coord_plaintext(plaintext),
-        message_time,
-        use_plaintext=True,
-    )
+    claim_key = _bot_count_claim_key(group_id, user_id, plaintext, message_time)
     session_key = _session_key(group_id, claim_key)
     seed = f"{datetime.now().strftime('%Y-%m-%d')}:{group_id}"
     await asyncio.to_thread(
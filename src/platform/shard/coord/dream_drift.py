@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import hashlib
 import json
 import time
 import uuid
@@ -21,6 +22,13 @@ _seen_event_ids: deque[str] = deque(maxlen=8000)
 _seen_set: set[str] = set()
 _redis_listener_started = False
 _missing_redis_warned = False
+# 跨片漂流批量发布：攒满一批或到间隔即发，一条 Redis 消息带多条事件
+_PUBLISH_BATCH_MAX = 32
+_PUBLISH_FLUSH_SEC = 0.5
+_PUBLISH_PENDING_MAX = 512
+_pending_publish: list[dict[str, Any]] = []
+_publish_now: asyncio.Event | None = None
+_publish_task: asyncio.Task[None] | None = None
 
 
 def dream_active_key(bot_id: int) -> str:
@@ -215,35 +223,101 @@ def schedule_unregister_dream_active(bot_id: int, group_id: int) -> None:
     asyncio.create_task(job())
 
 
+def drift_batch_message(envelopes: list[dict[str, Any]]) -> dict[str, Any]:
+    """多条漂流打成一条 Redis 消息；同一张图只带一份 base64，事件里按 image_ref 引用。"""
+    images: dict[str, str] = {}
+    events: list[dict[str, Any]] = []
+    for env in envelopes:
+        payload = env.get("payload")
+        image_b64 = payload.get("image_b64") if isinstance(payload, dict) else None
+        if isinstance(image_b64, str) and image_b64:
+            ref = hashlib.sha256(image_b64.encode("ascii")).hexdigest()
+            images.setdefault(ref, image_b64)
+            payload = {k: v for k, v in payload.items() if k != "image_b64"}
+            payload["image_ref"] = ref
+            env = {**env, "payload": payload}
+        events.append(env)
+    return {"events": events, "images": images}
+
+
+def expand_drift_batch_message(data: dict[str, Any]) -> list[dict[str, Any]]:
+    """还原批量消息里的各条事件；旧格式单条事件原样返回。"""
+    events = data.get("events")
+    if not isinstance(events, list):
+        return [data]
+    images = data.get("images")
+    if not isinstance(images, dict):
+        images = {}
+    out: list[dict[str, Any]] = []
+    for env in events:
+        if not isinstance(env, dict):
+            continue
+        payload = env.get("payload")
+        if isinstance(payload, dict) and "image_ref" in payload:
+            payload = {k: v for k, v in payload.items() if k != "image_ref"}
+            image_b64 = images.get(env["payload"]["image_ref"])
+            if isinstance(image_b64, str):
+                payload["image_b64"] = image_b64
+            env = {**env, "payload": payload}
+        out.append(env)
+    return out
+
+
+def publish_dream_drift_batch_redis_sync(envelopes: list[dict[str, Any]]) -> bool:
+    if not envelopes:
+        return True
+    return publish_dream_drift_redis_sync(drift_batch_message(envelopes))
+
+
 def schedule_publish_dream_drift(
     bot_id: int,
     source_group_id: int,
     target_group_id: int,
     payload,
 ) -> None:
+    """跨片漂流先进本地缓冲，攒满一批或到刷新间隔后一次发布。"""
+    global _publish_now, _publish_task
     if not shard_ctx.sharding_active():
         return
     if get_shard_registry_settings().role != "worker":
         return
+    try:
+        envelope = drift_event_envelope(
+            bot_id=bot_id,
+            source_group_id=source_group_id,
+            target_group_id=target_group_id,
+            payload=payload,
+        )
+    except Exception as err:
+        logger.debug(f"dream_drift publish failed bot={bot_id} target={target_group_id}: {err}")
+        return
+    _pending_publish.append(envelope)
+    if len(_pending_publish) > _PUBLISH_PENDING_MAX:
+        del _pending_publish[: len(_pending_publish) - _PUBLISH_PENDING_MAX]
+    if _publish_task is None or _publish_task.done():
+        _publish_now = asyncio.Event()
+        _publish_task = asyncio.create_task(_flush_dream_drift_publish(_publish_now), name="dream_drift_publish")
+    elif _publish_now is not None and len(_pending_publish) >= _PUBLISH_BATCH_MAX:
+        _publish_now.set()
 
-    async def job() -> None:
+
+async def _flush_dream_drift_publish(full: asyncio.Event) -> None:
+    try:
+        await asyncio.wait_for(full.wait(), _PUBLISH_FLUSH_SEC)
+    except TimeoutError:
+        pass
+    while _pending_publish:
+        batch = _pending_publish[:_PUBLISH_BATCH_MAX]
+        del _pending_publish[:_PUBLISH_BATCH_MAX]
         try:
-            envelope = drift_event_envelope(
-                bot_id=bot_id,
-                source_group_id=source_group_id,
-                target_group_id=target_group_id,
-                payload=payload,
-            )
-            ok = await asyncio.to_thread(publish_dream_drift_redis_sync, envelope)
+            ok = await asyncio.to_thread(publish_dream_drift_batch_redis_sync, batch)
             if not ok:
                 from src.platform.coord.redis_settings import coord_redis_enabled
 
                 if not coord_redis_enabled():
                     _warn_missing_redis_once()
         except Exception as err:
-            logger.debug(f"dream_drift publish failed bot={bot_id} target={target_group_id}: {err}")
-
-    asyncio.create_task(job())
+            logger.debug(f"dream_drift publish batch failed size={len(batch)}: {err}")
 
 
 async def ingest_dream_drift_event(data: dict[str, Any]) -> None:
@@ -306,7 +380,8 @@ async def dream_drift_redis_listen_loop() -> None:
                 except json.JSONDecodeError:
                     continue
                 if isinstance(data, dict):
-                    await ingest_dream_drift_event(data)
+                    for event in expand_drift_batch_message(data):
+                        await ingest_dream_drift_event(event)
         except Exception as err:
             logger.debug(f"dream_drift redis listen: {err}")
             await asyncio.sleep(2.0)
@@ -14,6 +14,7 @@ _COORD_LISTENER_SPECS: tuple[tuple[str, str, str | None], ...] = (
     ("src.platform.shard.coord.dream_drift", "start_dream_drift_redis_listener", "dream"),
     ("src.platform.shard.coord.duel_qte_redis", "start_duel_qte_redis_listeners", "duel"),
     ("src.platform.shard.coord.bot_action", "start_bot_action_redis_listener", None),
+    ("src.platform.multi_bot.group_membership", "start_group_membership_redis_listener", None),
 )
 
 
@@ -6,15 +6,18 @@ import asyncio
 import json
 import uuid
 from collections import deque
-from typing import Any
+from itertools import islice
+from typing import TYPE_CHECKING, Any
 
 from nonebot import logger
 
 from src.platform.shard import context as shard_ctx
 from src.platform.shard.registry.config import get_shard_registry_settings
 
+if TYPE_CHECKING:
+    from src.plugins.repeater.reply_buffer import ReplyRecord, ReplyRing
+
 _REDIS_CHANNEL = "pallas:repeater_reply_buffer"
-_MAX_BOT_TAIL = 64
 _seen_event_ids: deque[str] = deque(maxlen=8000)
 _seen_set: set[str] = set()
 _redis_listener_started = False
@@ -113,36 +116,26 @@ def schedule_publish_repeater_reply_record(group_id: int, bot_id: int, record: d
     asyncio.create_task(job())
 
 
-def _record_tail_dup(records: list, record: dict[str, Any]) -> bool:
-    t = int(record.get("time") or 0)
-    reply = str(record.get("reply") or "")
-    keywords = str(record.get("reply_keywords") or "")
-    for item in records[-8:]:
-        if int(item.get("time") or 0) == t and str(item.get("reply") or "") == reply:
-            if str(item.get("reply_keywords") or "") == keywords:
-                return True
+def _record_tail_dup(records: ReplyRing, record: ReplyRecord) -> bool:
+    for item in islice(reversed(records), 8):
+        if item.time == record.time and item.reply == record.reply and item.reply_keywords == record.reply_keywords:
+            return True
     return False
 
 
 async def apply_repeater_reply_record(record: dict[str, Any]) -> bool:
     from src.plugins.repeater.model import Chat
+    from src.plugins.repeater.reply_buffer import ReplyRecord
 
     group_id = int(record["group_id"])
     bot_id = int(record["bot_id"])
-    entry = {
-        "time": int(record.get("time") or 0),
-        "pre_raw_message": str(record.get("pre_raw_message") or ""),
-        "pre_keywords": str(record.get("pre_keywords") or ""),
-        "reply": str(record.get("reply") or ""),
-        "reply_keywords": str(record.get("reply_keywords") or ""),
-    }
-    async with Chat._reply_lock:
-        bucket = Chat._reply_dict[group_id][bot_id]
+    entry = ReplyRecord.from_dict(record)
+    group_replies = Chat._reply_dict[group_id]
+    async with group_replies.lock:
+        bucket = group_replies[bot_id]
         if _record_tail_dup(bucket, entry):
             return False
         bucket.append(entry)
-        if len(bucket) > _MAX_BOT_TAIL:
-            del bucket[: len(bucket) - _MAX_BOT_TAIL]
     return True
 
 
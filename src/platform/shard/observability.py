@@ -63,6 +63,14 @@ def log_pg_pool_warning_if_needed() -> None:
         logger.debug(msg)
 
 
+def _help_render_process_snapshot() -> dict[str, Any]:
+    try:
+        from src.plugins.help.renderer import help_render_metrics_snapshot
+    except Exception:
+        return {}
+    return help_render_metrics_snapshot()
+
+
 def aggregate_shard_observability() -> dict[str, Any]:
     from src.platform.shard.ingress_metrics import ingress_metrics_snapshot
     from src.platform.shard.repeater_ingress_metrics import repeater_ingress_metrics_snapshot
@@ -77,6 +85,7 @@ def aggregate_shard_observability() -> dict[str, Any]:
             "repeater_ingress_cluster": repeater_snap,
             "repeater_ingress_process": repeater_snap,
             "coord_pending_live": coord_pending_snapshot_sync(),
+            "help_render_process": _help_render_process_snapshot(),
             "workers": [],
             "pg_pool": pg_pool_estimate(),
         }
@@ -101,6 +110,7 @@ def aggregate_shard_observability() -> dict[str, Any]:
             "repeater_ingress": repeater_ingress if isinstance(repeater_ingress, dict) else {},
             "coord_pending": blob.get("coord_pending") if isinstance(blob.get("coord_pending"), dict) else {},
             "process_memory": blob.get("process_memory") if isinstance(blob.get("process_memory"), dict) else {},
+            "help_render": blob.get("help_render") if isinstance(blob.get("help_render"), dict) else {},
         })
     coord_live = coord_pending_snapshot_sync()
     return {
@@ -0,0 +1,337 @@
+"""分片按实测负载调度：汇总各 worker 的牛牛负载，规划最少迁移，并逐个受控迁移重连。"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from src.platform.shard.registry.store import (
+    ShardRegistry,
+    get_shard_registry,
+    is_test_shard_record,
+    save_shard_registry,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from pathlib import Path
+
+# 单次规划最多迁移几个牛牛：每次迁移都要重连协议端
+REBALANCE_MAX_MOVES = 3
+# 一次迁移至少要把最热 worker 的负载降低这个比例，否则不值得重连
+REBALANCE_MIN_GAIN_RATIO = 0.1
+# 迁移后等待牛牛在目标 worker 上线的时长
+MIGRATION_ONLINE_WAIT_SEC = 60.0
+
+_last_run: dict[str, Any] = {}
+_run_task: asyncio.Task[None] | None = None
+
+
+@dataclass
+class RebalanceMove:
+    bot_id: str
+    from_shard: int
+    to_shard: int
+    load: float
+
+
+def collect_bot_loads() -> dict[str, dict[str, Any]]:
+    """合并各 worker 落盘的 bot_load；只取牛牛当前归属分片的快照，迁走后旧 worker 的残值忽略。"""
+    from src.platform.shard.console_stats import (
+        bot_authoritative_shard_map,
+        iter_worker_shard_ids,
+        read_worker_stats_file,
+    )
+
+    auth = bot_authoritative_shard_map()
+    out: dict[str, dict[str, Any]] = {}
+    for shard_id in iter_worker_shard_ids():
+        rows = read_worker_stats_file(shard_id).get("bot_load")
+        if not isinstance(rows, dict):
+            continue
+        for qq, row in rows.items():
+            key = str(qq).strip()
+            if not key or not isinstance(row, dict):
+                continue
+            if auth.get(key, shard_id) != shard_id:
+                continue
+            out[key] = row
+    return out
+
+
+def bot_load_scores(loads: dict[str, dict[str, Any]]) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for qq, row in loads.items():
+        try:
+            out[qq] = max(0.0, float(row.get("score") or 0.0))
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+def production_shard_ids(reg: ShardRegistry) -> list[int]:
+    return [int(s.id) for s in reg.shards if not is_test_shard_record(s, reg)]
+
+
+def shard_load_totals(reg: ShardRegistry, scores: dict[str, float]) -> dict[int, float]:
+    totals = dict.fromkeys(production_shard_ids(reg), 0.0)
+    for qq, sid in reg.assignments.items():
+        if int(sid) in totals:
+            totals[int(sid)] += scores.get(str(qq), 0.0)
+    return totals
+
+
+def measured_shard_loads(reg: ShardRegistry) -> dict[int, float]:
+    """各生产分片的实测负载；读不到 worker 快照时返回空，调用方退回按牛牛数分配。
+
+    已登记但还没有实测的牛牛（刚分配、下次采样前）按实测均值计入，避免一批新号都落到同一个最冷分片。
+    """
+    try:
+        scores = bot_load_scores(collect_bot_loads())
+    except Exception:  # noqa: BLE001
+        return {}
+    if not scores:
+        return {}
+    totals = shard_load_totals(reg, scores)
+    pending_load = sum(scores.values()) / len(scores)
+    for qq, sid in reg.assignments.items():
+        if int(sid) in totals and str(qq) not in scores:
+            totals[int(sid)] += pending_load
+    return totals
+
+
+def plan_rebalance(
+    assignments: dict[str, int],
+    scores: dict[str, float],
+    shard_ids: list[int],
+    *,
+    capacity: int,
+    max_moves: int = REBALANCE_MAX_MOVES,
+    min_gain_ratio: float = REBALANCE_MIN_GAIN_RATIO,
+) -> list[RebalanceMove]:
+    """贪心：每步从最热分片挑一个牛牛迁到有空位的较冷分片，使两者较大值降得最多；收益不足即停。"""
+    loads = dict.fromkeys(shard_ids, 0.0)
+    members: dict[int, list[str]] = {sid: [] for sid in shard_ids}
+    for qq, sid in assignments.items():
+        if int(sid) in loads:
+            loads[int(sid)] += scores.get(str(qq), 0.0)
+            members[int(sid)].append(str(qq))
+    moves: list[RebalanceMove] = []
+    for _ in range(max(0, max_moves)):
+        hot = max(loads, key=lambda s: (loads[s], -s), default=None)
+        if hot is None or loads[hot] <= 0:
+            break
+        peak = loads[hot]
+        best: tuple[float, str, int, float] | None = None
+        for cold in sorted(loads, key=lambda s: (loads[s], s)):
+            if cold == hot or len(members[cold]) >= capacity:
+                continue
+            for qq in members[hot]:
+                w = scores.get(qq, 0.0)
+                if w <= 0:
+                    continue
+                gain = peak - max(peak - w, loads[cold] + w)
+                if best is None or gain > best[0]:
+                    best = (gain, qq, cold, w)
+        if best is None or best[0] < peak * min_gain_ratio:
+            break
+        _gain, qq, cold, w = best
+        members[hot].remove(qq)
+        members[cold].append(qq)
+        loads[hot] -= w
+        loads[cold] += w
+        moves.append(RebalanceMove(bot_id=qq, from_shard=hot, to_shard=cold, load=round(w, 1)))
+    return moves
+
+
+def rebalance_preview(*, max_moves: int = REBALANCE_MAX_MOVES) -> dict[str, Any]:
+    """控制台用：当前各 worker 负载、建议迁移与迁移后的预估负载。"""
+    reg = get_shard_registry()
+    loads = collect_bot_loads()
+    scores = bot_load_scores(loads)
+    shard_ids = production_shard_ids(reg)
+    moves = plan_rebalance(
+        {k: int(v) for k, v in reg.assignments.items()},
+        scores,
+        shard_ids,
+        capacity=reg.bots_per_shard,
+        max_moves=max_moves,
+    )
+    before = shard_load_totals(reg, scores)
+    after = dict(before)
+    count_after = {sid: reg.count_on_shard(sid) for sid in shard_ids}
+    for mv in moves:
+        after[mv.from_shard] -= mv.load
+        after[mv.to_shard] += mv.load
+        count_after[mv.from_shard] -= 1
+        count_after[mv.to_shard] += 1
+    workers = [
+        {
+            "shard_id": s.id,
+            "port": s.port,
+            "count_before": reg.count_on_shard(s.id),
+            "count_after": count_after.get(int(s.id), 0),
+            "load_before": round(before.get(int(s.id), 0.0), 1),
+            "load_after": round(after.get(int(s.id), 0.0), 1),
+        }
+        for s in reg.shards
+        if int(s.id) in before
+    ]
+    return {
+        "unit": "ms/min",
+        "workers": workers,
+        "bots": {qq: {**loads[qq], "shard_id": reg.shard_for_bot(qq)} for qq in sorted(loads)},
+        "moves": [asdict(mv) for mv in moves],
+        "last_run": rebalance_run_snapshot(),
+    }
+
+
+async def _wait_bot_on_shard(bot_id: str, shard_id: int, timeout_sec: float) -> bool:
+    from src.platform.shard.presence import read_presence_bots
+
+    for _ in range(max(1, int(timeout_sec))):
+        rec = (await asyncio.to_thread(read_presence_bots)).get(bot_id)
+        if isinstance(rec, dict) and str(rec.get("shard_id")) == str(shard_id):
+            return True
+        await asyncio.sleep(1.0)
+    return False
+
+
+async def migrate_bot_to_shard(
+    bot_id: str,
+    to_shard: int,
+    *,
+    reconnect: Callable[[str], Awaitable[bool]] | None = None,
+    accounts_path: Path | None = None,
+    wait_online_sec: float = MIGRATION_ONLINE_WAIT_SEC,
+) -> dict[str, Any]:
+    """改注册表归属后重连协议端：hub 内有协议端时由 ``reconnect`` 改写 ws_url 并重启，否则走 accounts.json 同步。
+
+    重连要按注册表改写 ws_url，所以先落盘；重连失败或未在目标 worker 上线时恢复原归属并尽量连回原 worker。
+    """
+    key = str(bot_id).strip()
+    reg = get_shard_registry()
+    from_shard = reg.shard_for_bot(key)
+    if from_shard is None:
+        raise ValueError(f"账号 {key} 未登记分片")
+    target = int(to_shard)
+    if target not in production_shard_ids(reg):
+        raise ValueError(f"分片 {target} 不是生产分片")
+    if target == int(from_shard):
+        return {"bot_id": key, "from_shard": target, "to_shard": target, "changed": False, "online": True}
+    if reg.count_on_shard(target) >= reg.bots_per_shard:
+        raise ValueError(f"分片 {target} 已满（{reg.bots_per_shard}）")
+    reg.assignments[key] = target
+    save_shard_registry(reg)
+    if reconnect is not None:
+        reconnected = bool(await reconnect(key))
+    elif accounts_path is not None and await asyncio.to_thread(accounts_path.is_file):
+        from src.platform.shard.registry.sync_protocol_ports import sync_accounts_ws_urls
+
+        result = await asyncio.to_thread(sync_accounts_ws_urls, accounts_path)
+        reconnected = any(str(d.get("qq")) == key for d in result.details)
+    else:
+        reconnected = False
+    online = await _wait_bot_on_shard(key, target, wait_online_sec) if reconnected else False
+    if not online:
+        await _rollback_migration(key, int(from_shard), target, reconnect=reconnect, accounts_path=accounts_path)
+    return {
+        "bot_id": key,
+        "from_shard": int(from_shard),
+        "to_shard": target,
+        "changed": online,
+        "reconnected": reconnected,
+        "online": online,
+        "rolled_back": not online,
+    }
+
+
+async def _rollback_migration(
+    bot_id: str,
+    from_shard: int,
+    target: int,
+    *,
+    reconnect: Callable[[str], Awaitable[bool]] | None,
+    accounts_path: Path | None,
+) -> None:
+    from nonebot import logger
+
+    reg = get_shard_registry()
+    if reg.shard_for_bot(bot_id) != target:
+        # 期间已被别处改过归属，不覆盖
+        return
+    reg.assignments[bot_id] = from_shard
+    save_shard_registry(reg)
+    logger.warning("shard migrate {} -> {} not online, restored to shard {}", bot_id, target, from_shard)
+    try:
+        if reconnect is not None:
+            await reconnect(bot_id)
+        elif accounts_path is not None and await asyncio.to_thread(accounts_path.is_file):
+            from src.platform.shard.registry.sync_protocol_ports import sync_accounts_ws_urls
+
+            await asyncio.to_thread(sync_accounts_ws_urls, accounts_path)
+    except Exception as e:
+        logger.warning("shard migrate rollback reconnect {} failed: {}", bot_id, e)
+
+
+async def execute_rebalance(
+    moves: list[RebalanceMove],
+    *,
+    reconnect: Callable[[str], Awaitable[bool]] | None = None,
+    accounts_path: Path | None = None,
+    wait_online_sec: float = MIGRATION_ONLINE_WAIT_SEC,
+) -> list[dict[str, Any]]:
+    """逐个迁移；上一个未在目标 worker 上线（已回滚）就停下，避免连锁掉线。"""
+    results: list[dict[str, Any]] = []
+    for mv in moves:
+        try:
+            row = await migrate_bot_to_shard(
+                mv.bot_id,
+                mv.to_shard,
+                reconnect=reconnect,
+                accounts_path=accounts_path,
+                wait_online_sec=wait_online_sec,
+            )
+        except ValueError as e:
+            results.append({"bot_id": mv.bot_id, "to_shard": mv.to_shard, "error": str(e)})
+            break
+        results.append(row)
+        if not row.get("online"):
+            break
+    return results
+
+
+def rebalance_run_snapshot() -> dict[str, Any]:
+    return {**_last_run, "running": _run_task is not None and not _run_task.done()}
+
+
+def start_rebalance_run(
+    moves: list[RebalanceMove],
+    *,
+    reconnect: Callable[[str], Awaitable[bool]] | None = None,
+    accounts_path: Path | None = None,
+) -> bool:
+    """后台执行迁移并记录迁移前后各 worker 负载；已有任务在跑时返回 False。"""
+    global _run_task
+    if _run_task is not None and not _run_task.done():
+        return False
+    before = rebalance_preview(max_moves=0)["workers"]
+    _last_run.clear()
+    _last_run.update({
+        "started_at": time.time(),
+        "moves": [asdict(mv) for mv in moves],
+        "workers_before": before,
+        "results": [],
+    })
+
+    async def _run() -> None:
+        try:
+            _last_run["results"] = await execute_rebalance(moves, reconnect=reconnect, accounts_path=accounts_path)
+        finally:
+            _last_run["finished_at"] = time.time()
+            _last_run["workers_after"] = (await asyncio.to_thread(rebalance_preview, max_moves=0))["workers"]
+
+    _run_task = asyncio.create_task(_run())
+    return True
@@ -369,7 +369,7 @@ def clear_shard_registry_cache() -> None:
 
 
 def assign_bot_to_shard(bot_id: str, *, registry: ShardRegistry | None = None) -> int:
-    """将牛牛 QQ 登记到负载最轻的生产分片；返回 shard_id。"""
+    """将牛牛 QQ 登记到实测负载最轻（无实测时牛牛最少）且有空位的生产分片；返回 shard_id。"""
     reg = registry or get_shard_registry()
     key = str(bot_id).strip()
     if not key:
@@ -379,9 +379,13 @@ def assign_bot_to_shard(bot_id: str, *, registry: ShardRegistry | None = None) -
         return existing
     _ensure_shard_rows(reg)
     limit = reg.bots_per_shard
+    from src.platform.shard.rebalance import measured_shard_loads
+
+    loads = measured_shard_loads(reg)
+    all_candidates = _auto_assign_shard_candidates(reg)
     candidates = sorted(
-        _auto_assign_shard_candidates(reg),
-        key=lambda s: (reg.count_on_shard(s.id), s.id),
+        [s for s in all_candidates if reg.count_on_shard(s.id) < limit] or all_candidates,
+        key=lambda s: (loads.get(int(s.id), 0.0), reg.count_on_shard(s.id), s.id),
     )
     if not candidates:
         picked = 0
@@ -423,6 +427,9 @@ def rebalance_hint() -> dict[str, object]:
     reg = get_shard_registry()
     tc = get_test_config(reg)
     test_sid = get_test_shard_id(reg)
+    from src.platform.shard.rebalance import measured_shard_loads
+
+    loads = measured_shard_loads(reg)
     rows = [
         {
             "shard_id": s.id,
@@ -430,6 +437,7 @@ def rebalance_hint() -> dict[str, object]:
             "role": s.role,
             "bots": reg.bots_on_shard(s.id),
             "count": reg.count_on_shard(s.id),
+            "load": round(loads[int(s.id)], 1) if int(s.id) in loads else None,
         }
         for s in reg.shards
         if not is_test_shard_record(s, reg)
@@ -28,7 +28,6 @@ from src.features.ban_gate.snapshot import (
     patch_group_banned,
     patch_group_blocked_users,
     patch_user_banned,
-    schedule_ban_gate_snapshot_refresh,
 )
 from src.features.cmd_perm import permission_for_command, satisfies_command_permission
 from src.features.cmd_perm.metadata_defaults import (
@@ -38,6 +37,7 @@ from src.features.cmd_perm.metadata_defaults import (
 )
 from src.features.cmd_perm.metadata_text import SCENE_BOTH, join_usage, usage_line
 from src.foundation.config import GroupConfig, UserConfig
+from src.foundation.id_set import EMPTY_ID_SET, IdSet
 
 _IS_BANNED_DB_TIMEOUT_SEC = fallback_db_timeout_sec()
 _BAN_GATE_CACHE_TTL_SEC = 45.0
@@ -50,10 +50,10 @@ _user_fetch_tasks: dict[int, asyncio.Task[bool]] = {}
 _user_fetch_tasks_lock = asyncio.Lock()
 
 _GROUP_BAN_GATE_CACHE_TTL_SEC = 45.0
-_group_ban_gate_cache: dict[int, tuple[float, frozenset[int]]] = {}
+_group_ban_gate_cache: dict[int, tuple[float, IdSet]] = {}
 _group_ban_gate_lock = asyncio.Lock()
 _group_gate_generation: dict[int, int] = {}
-_group_fetch_tasks: dict[int, asyncio.Task[frozenset[int]]] = {}
+_group_fetch_tasks: dict[int, asyncio.Task[IdSet]] = {}
 _group_fetch_tasks_lock = asyncio.Lock()
 
 _GROUP_SELF_BAN_GATE_CACHE_TTL_SEC = 45.0
@@ -65,7 +65,7 @@ _group_self_fetch_tasks_lock = asyncio.Lock()
 
 
 async def apply_user_banned_change(user_id: int, banned: bool) -> None:
-    """WebUI / 命令写入 user_config.banned 后同步本进程快照与门禁。"""
+    """WebUI / 命令写入 user_config.banned 后同步快照与门禁；快照变更经增量日志传到其它进程。"""
     await patch_user_banned(user_id, banned)
     await invalidate_user_ban_gate_cache(user_id)
 
@@ -89,7 +89,6 @@ async def invalidate_user_ban_gate_cache(uids: int | Iterable[int]) -> None:
         for u in ids:
             _ban_gate_cache.pop(u, None)
             _user_gate_generation[u] = _user_gate_generation.get(u, 0) + 1
-    schedule_ban_gate_snapshot_refresh()
 
 
 async def reset_user_ban_gate_cache() -> None:
@@ -135,7 +134,6 @@ async def invalidate_group_ban_gate_cache(group_ids: int | Iterable[int] | None
             gid = int(g)
             _group_self_banned_cache.pop(gid, None)
             _group_self_gate_generation[gid] = _group_self_gate_generation.get(gid, 0) + 1
-    schedule_ban_gate_snapshot_refresh()
 
 
 async def reset_group_ban_gate_cache() -> None:
@@ -217,31 +215,30 @@ async def query_user_ban_status_for_gate(user_id: int) -> bool:
         return banned
 
 
-async def _fetch_group_blocked_ids_db(group_id: int) -> frozenset[int]:
+async def _fetch_group_blocked_ids_db(group_id: int) -> IdSet:
     try:
-        ids_list = await asyncio.wait_for(
-            GroupConfig(group_id).blocked_user_ids(),
+        return await asyncio.wait_for(
+            GroupConfig(group_id).blocked_user_id_set(),
             timeout=_IS_BANNED_DB_TIMEOUT_SEC,
         )
-        return frozenset(ids_list)
     except TimeoutError:
         logger.warning("group ban gate: blocked_user_ids timeout gid={}", group_id)
-        return frozenset()
+        return EMPTY_ID_SET
     except asyncio.CancelledError:
         raise
     except Exception:
         logger.exception("group ban gate: blocked_user_ids failed gid={}", group_id)
-        return frozenset()
+        return EMPTY_ID_SET
 
 
-async def _await_group_blocked_deduped(group_id: int) -> frozenset[int]:
+async def _await_group_blocked_deduped(group_id: int) -> IdSet:
     async with _group_fetch_tasks_lock:
         t = _group_fetch_tasks.get(group_id)
         if t is not None and not t.done():
             task = t
         else:
 
-            async def _runner() -> frozenset[int]:
+            async def _runner() -> IdSet:
                 try:
                     return await _fetch_group_blocked_ids_db(group_id)
                 finally:
@@ -2,7 +2,13 @@ import asyncio
 
 from nonebot import get_driver, logger, on_message, on_notice
 from nonebot.adapters import Bot
-from nonebot.adapters.onebot.v11 import GroupIncreaseNoticeEvent, GroupMessageEvent, PokeNotifyEvent, permission
+from nonebot.adapters.onebot.v11 import (
+    GroupDecreaseNoticeEvent,
+    GroupIncreaseNoticeEvent,
+    GroupMessageEvent,
+    PokeNotifyEvent,
+    permission,
+)
 from nonebot.plugin import PluginMetadata
 from nonebot.rule import Rule
 
@@ -14,7 +20,12 @@ from src.features.cmd_perm.metadata_defaults import (
 from src.features.cmd_perm.metadata_text import join_usage, usage_line
 from src.foundation.config import BotConfig
 from src.foundation.db import ensure_bot_config_row, ensure_runtime_storage_ready
-from src.platform.multi_bot.fleet import fleet_bot_ids_contains
+from src.platform.multi_bot.fleet import fleet_bot_ids_contains, note_local_bot_roster_changed
+from src.platform.multi_bot.group_membership import (
+    note_bot_joined_group,
+    note_bot_left_group,
+    refresh_bot_group_membership,
+)
 from src.platform.multi_bot.session_seen import note_bot_session_seen
 from src.platform.shard import context as shard_ctx
 from src.platform.shard.presence import (
@@ -64,6 +75,7 @@ async def bot_connect(bot: Bot) -> None:
         logger.info(f"Bot {bot.self_id} connected.")
         qq = int(bot.self_id)
         plugin_config.bots.add(qq)
+        note_local_bot_roster_changed()
         note_bot_session_seen(qq)
         await clear_protocol_bot_offline(qq)
         try:
@@ -80,6 +92,7 @@ async def bot_connect(bot: Bot) -> None:
             logger.warning("Bot {} bot_config ensure failed: {}", bot.self_id, err)
         if shard_ctx.sharding_active():
             await note_worker_bot_connected(bot)
+        asyncio.create_task(refresh_bot_group_membership(bot), name=f"group_membership_connect:{qq}")
         try:
             from src.platform.federate.peer_bots import sync_federate_peer_bot_roster
 
@@ -94,6 +107,7 @@ async def bot_disconnect(bot: Bot) -> None:
         qq = int(bot.self_id)
         was_present = qq in plugin_config.bots
         plugin_config.bots.discard(qq)
+        note_local_bot_roster_changed()
         if was_present:
             logger.info(f"Bot {bot.self_id} disconnected.")
         await clear_protocol_bot_offline(qq)
@@ -157,6 +171,26 @@ any_notice = on_notice(
 )
 
 
+async def is_fleet_membership_notice(event: GroupIncreaseNoticeEvent | GroupDecreaseNoticeEvent) -> bool:
+    return is_fleet_bot_qq(int(event.user_id))
+
+
+# 不阻断：只把 fleet 牛的进群 / 退群同步到群成员索引
+membership_notice = on_notice(
+    priority=1,
+    block=False,
+    rule=Rule(is_fleet_membership_notice),
+)
+
+
+@membership_notice.handle()
+async def _(event: GroupIncreaseNoticeEvent | GroupDecreaseNoticeEvent):
+    if isinstance(event, GroupIncreaseNoticeEvent):
+        await note_bot_joined_group(event.user_id, event.group_id)
+    else:
+        await note_bot_left_group(event.user_id, event.group_id)
+
+
 @other_bot_msg.handle()
 async def _():
     return
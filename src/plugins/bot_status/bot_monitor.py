@@ -154,7 +154,7 @@ async def check_bot_still_offline(bot_id: int, nickname: str) -> None:
 
 async def list_connected_bots_in_group(group_id: int) -> list[int]:
     """本进程已连接且能查到该群成员资料的牛牛 QQ。"""
-    from src.platform.multi_bot.group_online_cache import resolve_local_connected_bots_in_group
+    from src.platform.multi_bot.group_membership import resolve_local_connected_bots_in_group
 
     return await resolve_local_connected_bots_in_group(group_id)
 
@@ -195,6 +195,12 @@ class Config(BaseModel, extra="ignore"):
         le=64,
         description="进程内同时进行中的画画任务上限（含已回复「欢呼吧」尚未结束的）；0 不限制。",
     )
+    pallas_image_inflight_budget_mb: int = Field(
+        default=256,
+        ge=0,
+        le=4096,
+        description="所有画画任务在途图片数据（参考图、正文、解码图）合计上限（MB），超出时新任务排队；0 不限制。",
+    )
 
     @classmethod
     def from_env(cls) -> Self:
@@ -453,12 +459,17 @@ class ImageGenSettings:
     def draw_max_pending(self) -> int:
         return self._c.pallas_image_draw_max_pending
 
+    @property
+    def inflight_budget_bytes(self) -> int:
+        return self._c.pallas_image_inflight_budget_mb * 1024 * 1024
+
 
 def on_draw_config_reload(cfg: Config) -> None:
     image_gen_config.reload(cfg)
-    from .runtime_state import sync_image_gen_semaphore
+    from .runtime_state import sync_draw_byte_budget, sync_image_gen_semaphore
 
     sync_image_gen_semaphore(cfg.pallas_image_max_concurrency)
+    sync_draw_byte_budget(cfg.pallas_image_inflight_budget_mb)
 
 
 plugin_webui = install_hot_reload_config(
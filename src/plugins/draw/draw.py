@@ -45,7 +45,7 @@ from .image_api import (
 )
 from .image_request_options import ImageGenRequestOptions
 from .replies import DRAW_VAGUE_REPLY
-from .runtime_state import acquire_draw_pending_slot, release_draw_pending_slot
+from .runtime_state import acquire_draw_pending_slot, draw_byte_budget, release_draw_pending_slot
 
 PALLAS_DRAW_COOLDOWN_KEY = "pallas_draw_command"
 
@@ -391,7 +391,20 @@ async def pallas_draw_execute(
     limits = httpx.Limits(max_connections=max(4, cfg.max_concurrency * 2))
 
     try:
-        async with httpx.AsyncClient(timeout=client_timeout, trust_env=True, limits=limits) as http_client:
+        async with asyncio.timeout(max(1.0, deadline.remaining_seconds())):
+            await draw_byte_budget.admit()
+    except TimeoutError:
+        logger.warning(
+            f"bot [{bot_id}] draw byte budget busy in group [{group_id}] "
+            f"used={draw_byte_budget.used} limit={draw_byte_budget.limit}",
+        )
+        raise DrawTotalTimeoutError from None
+
+    try:
+        async with (
+            draw_byte_budget.lease(),
+            httpx.AsyncClient(timeout=client_timeout, trust_env=True, limits=limits) as http_client,
+        ):
             if ref_urls and cfg.use_edits_for_reference_images:
                 ref_dl_timeout = min(
                     cfg.ref_download_timeout,
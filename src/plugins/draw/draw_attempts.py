@@ -30,6 +30,8 @@ from .image_request_options import ImageGenRequestOptions, capped_param_attempts
 from .replies import DRAW_VAGUE_REPLY
 from .runtime_state import image_gen_semaphore
 
+LAST_BODY_KEEP_CHARS = 64 * 1024
+
 
 class DrawDeadline:
     def __init__(self, total_seconds: float) -> None:
@@ -157,7 +159,8 @@ async def run_backend_param_attempts(
                         f"backend={backend.label} group=[{group_id}]: {err_text}",
                     )
                 break
-            last_body_holder[:] = [body_text]
+            # 只留错误文案所需的前缀，避免失败兜底时仍攥着几十 MB 的 base64 正文
+            last_body_holder[:] = [body_text[:LAST_BODY_KEEP_CHARS]]
             last_status_holder[:] = [status]
             logger.info(
                 f"bot [{bot_id}] draw {op} response in group [{group_id}]: "
@@ -3,6 +3,7 @@ import base64
 import json
 import shutil
 import tempfile
+from itertools import starmap
 from pathlib import Path
 from urllib.parse import urljoin
 
@@ -17,11 +18,23 @@ from src.shared.utils.http_msg import user_failure_reply
 
 from .config import ImageApiBackend, image_gen_config
 from .image_request_options import ImageGenRequestOptions
+from .image_stream import (
+    B64_SPAN_PLACEHOLDER,
+    GENERATION_BODY_MAX_BYTES,
+    IMAGE_DOWNLOAD_MAX_BYTES,
+    charge_draw_bytes,
+    decode_b64_span,
+    image_header_ok,
+    loads_generation_body,
+    looks_like_markup,
+    read_response_capped,
+    stream_image_bytes,
+)
 from .replies import DRAW_VAGUE_REPLY
 
 
 def schedule_persist_generated_draw(data: bytes, group_id: int, user_id: int) -> None:
-    """后台归档，避免阻塞发图。"""
+    """后台归档，避免阻塞发图；与发图共用同一份 bytes，不再复制。"""
 
     async def job() -> None:
         try:
@@ -121,6 +134,17 @@ def image_gen_auth_headers_multipart(backend: ImageApiBackend) -> dict[str, str]
     return h
 
 
+async def read_body_text(r: httpx.Response) -> str:
+    """分块读取正文并计入在途字节预算；解码成 str 后立即丢弃原始块。"""
+    raw = await read_response_capped(r, max_bytes=GENERATION_BODY_MAX_BYTES, slot="body") or b""
+    return raw.decode(r.charset_encoding or "utf-8", errors="replace")
+
+
+def charged_body(ret: tuple[int, str]) -> tuple[int, str]:
+    charge_draw_bytes("body", len(ret[1]))
+    return ret
+
+
 async def httpx_post_generations(
     client: httpx.AsyncClient,
     url: str,
@@ -130,13 +154,14 @@ async def httpx_post_generations(
     req_timeout_cap: float | None = None,
 ) -> tuple[int, str]:
     req_timeout = effective_request_timeout(req_timeout_cap)
-    r = await client.post(
+    async with client.stream(
+        "POST",
         url,
         headers=headers,
         json=payload,
         timeout=httpx.Timeout(req_timeout, connect=min(30.0, req_timeout)),
-    )
-    return r.status_code, r.text
+    ) as r:
+        return r.status_code, await read_body_text(r)
 
 
 async def curl_cffi_post_generations(
@@ -231,15 +256,15 @@ async def post_generations_with_transport(
     mode = effective_http_transport()
     cfg = image_gen_config
     if mode == "curl":
-        return await curl_post_generations(url, headers, payload, req_timeout_cap=req_timeout_cap)
+        return charged_body(await curl_post_generations(url, headers, payload, req_timeout_cap=req_timeout_cap))
     if mode == "httpx":
         return await httpx_post_generations(client, url, headers, payload, req_timeout_cap=req_timeout_cap)
     if mode == "cffi":
-        return await curl_cffi_post_generations(url, headers, payload, req_timeout_cap=req_timeout_cap)
+        return charged_body(await curl_cffi_post_generations(url, headers, payload, req_timeout_cap=req_timeout_cap))
     tcap = req_timeout_cap
     if (cfg.tls_impersonate or "").strip():
         try:
-            return await curl_cffi_post_generations(url, headers, payload, req_timeout_cap=tcap)
+            return charged_body(await curl_cffi_post_generations(url, headers, payload, req_timeout_cap=tcap))
         except (CffiRequestsError, OSError, ValueError) as e:
             ret = await try_httpx_after_cffi_timeout(
                 e,
@@ -255,7 +280,7 @@ async def post_generations_with_transport(
         return await httpx_post_generations(client, url, headers, payload, req_timeout_cap=tcap)
     except httpx.ConnectError as e:
         logger.warning(f"draw generations httpx connect failed, fallback curl: {e}")
-        return await curl_post_generations(url, headers, payload, req_timeout_cap=req_timeout_cap)
+        return charged_body(await curl_post_generations(url, headers, payload, req_timeout_cap=req_timeout_cap))
 
 
 def should_send_response_format(backend: ImageApiBackend, opts: ImageGenRequestOptions) -> bool:
@@ -299,14 +324,15 @@ async def httpx_post_edits(
         files.append(("image", (f"ref_{i}.png", blob, "image/png")))
     data = edit_request_fields(prompt, backend, options=options)
     req_timeout = effective_request_timeout(req_timeout_cap)
-    r = await client.post(
+    async with client.stream(
+        "POST",
         endpoint,
         headers=headers,
         files=files,
         data=data,
         timeout=httpx.Timeout(req_timeout, connect=min(30.0, req_timeout)),
-    )
-    return r.status_code, r.text
+    ) as r:
+        return r.status_code, await read_body_text(r)
 
 
 async def curl_cffi_post_edits(
@@ -408,14 +434,18 @@ async def post_edits_with_transport(
     cfg = image_gen_config
     tcap = req_timeout_cap
     if mode == "curl":
-        return await curl_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
+        return charged_body(await curl_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap))
     if mode == "httpx":
         return await httpx_post_edits(client, image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
     if mode == "cffi":
-        return await curl_cffi_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
+        return charged_body(
+            await curl_cffi_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
+        )
     if (cfg.tls_impersonate or "").strip():
         try:
-            return await curl_cffi_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
+            return charged_body(
+                await curl_cffi_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
+            )
         except (CffiRequestsError, OSError, ValueError) as e:
             ret = await try_httpx_after_cffi_timeout(
                 e,
@@ -433,7 +463,7 @@ async def post_edits_with_transport(
         return await httpx_post_edits(client, image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
     except httpx.ConnectError as e:
         logger.warning(f"draw edits httpx connect failed, fallback curl: {e}")
-        return await curl_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap)
+        return charged_body(await curl_post_edits(image_blobs, prompt, backend, options=options, req_timeout_cap=tcap))
 
 
 MIN_GENERATED_IMAGE_BYTES = 64
@@ -443,15 +473,7 @@ def is_valid_generated_image(data: bytes) -> bool:
     """校验上游返回的图片字节：magic + 最小长度，过滤 HTML/空包等伪 200。"""
     if not data or len(data) < MIN_GENERATED_IMAGE_BYTES:
         return False
-    if data.startswith(b"\x89PNG\r\n\x1a\n"):
-        return True
-    if data.startswith(b"\xff\xd8\xff"):
-        return True
-    if data.startswith((b"GIF87a", b"GIF89a")):
-        return True
-    if len(data) >= 12 and data.startswith(b"RIFF") and data[8:12] == b"WEBP":
-        return True
-    return False
+    return image_header_ok(data[:12])
 
 
 def strip_data_url_base64(value: str) -> str:
@@ -475,7 +497,14 @@ def decode_inline_image_reference(value: str) -> bytes | None:
     return None
 
 
-def image_bytes_from_payload_field(url: str | None, b64: str | None) -> tuple[str | None, bytes | None]:
+def image_bytes_from_payload_field(
+    url: str | None,
+    b64: str | None,
+    body_text: str | None = None,
+    b64_span: tuple[int, int] | None = None,
+) -> tuple[str | None, bytes | None]:
+    if b64 == B64_SPAN_PLACEHOLDER and body_text is not None and b64_span is not None:
+        return None, decode_b64_span(body_text, *b64_span)
     if isinstance(b64, str) and b64.strip():
         try:
             return None, base64.b64decode(strip_data_url_base64(b64))
@@ -490,24 +519,31 @@ def image_bytes_from_payload_field(url: str | None, b64: str | None) -> tuple[st
     return None, None
 
 
-def extract_image_from_generation_payload(data: object) -> tuple[str | None, bytes | None]:
+def extract_image_from_generation_payload(
+    data: object,
+    body_text: str | None = None,
+    b64_span: tuple[int, int] | None = None,
+) -> tuple[str | None, bytes | None]:
+    """body_text/b64_span 来自 loads_generation_body：占位的 b64_json 直接从原文切片解码。"""
     if not isinstance(data, dict):
         return None, None
     items = data.get("data")
     if isinstance(items, list) and items:
         first = items[0]
         if isinstance(first, dict):
-            remote, raw = image_bytes_from_payload_field(first.get("url"), first.get("b64_json"))
+            remote, raw = image_bytes_from_payload_field(first.get("url"), first.get("b64_json"), body_text, b64_span)
             if raw or remote:
                 return remote, raw
     inner = data.get("data")
     if isinstance(inner, dict):
-        remote, raw = image_bytes_from_payload_field(inner.get("url"), inner.get("b64_json"))
+        remote, raw = image_bytes_from_payload_field(inner.get("url"), inner.get("b64_json"), body_text, b64_span)
         if raw or remote:
             return remote, raw
     return image_bytes_from_payload_field(
         data.get("url") if isinstance(data.get("url"), str) else None,
         data.get("b64_json") if isinstance(data.get("b64_json"), str) else None,
+        body_text,
+        b64_span,
     )
 
 
@@ -516,6 +552,7 @@ async def bytes_from_image_reference(
     url: str,
     *,
     download_timeout: float | None = None,
+    slot: str = "ref",
 ) -> bytes | None:
     u = (url or "").strip()
     if u.startswith("base64://"):
@@ -526,15 +563,20 @@ async def bytes_from_image_reference(
     if not u.startswith(("http://", "https://")):
         return None
     try:
-        r = await client.get(u, timeout=download_timeout)
-        if r.status_code == 200:
-            return r.content
-        logger.debug(
-            "download ref image non-200: url={}, status={}",
-            u[:160],
-            r.status_code,
-        )
-        return None
+        async with client.stream("GET", u, timeout=download_timeout) as r:
+            if r.status_code != 200:
+                logger.debug(
+                    "download ref image non-200: url={}, status={}",
+                    u[:160],
+                    r.status_code,
+                )
+                return None
+            data = await read_response_capped(r, max_bytes=IMAGE_DOWNLOAD_MAX_BYTES, slot=slot)
+        if data is not None and looks_like_markup(data[:16]):
+            logger.debug("download ref image got markup: url={}", u[:160])
+            charge_draw_bytes(slot, 0)
+            return None
+        return data
     except Exception as exc:
         logger.debug(f"draw download ref image error url={u[:160]!r} exc={exc!r}")
         return None
@@ -550,10 +592,10 @@ async def download_reference_images(
         return []
     ref_timeout = download_timeout if download_timeout is not None else image_gen_config.ref_download_timeout
 
-    async def one(url: str) -> bytes | None:
-        return await bytes_from_image_reference(client, url, download_timeout=ref_timeout)
+    async def one(i: int, url: str) -> bytes | None:
+        return await bytes_from_image_reference(client, url, download_timeout=ref_timeout, slot=f"ref:{i}")
 
-    results = await asyncio.gather(*(one(u) for u in ref_urls))
+    results = await asyncio.gather(*starmap(one, enumerate(ref_urls)))
     return [b for b in results if b]
 
 
@@ -606,14 +648,14 @@ def optional_message_at_user(
 def image_api_body_issue_label(body_text: str) -> str | None:
     """HTTP 200 时正文是否可发图；不可用时返回简短原因。"""
     try:
-        data = json.loads(body_text)
+        data, b64_span = loads_generation_body(body_text)
     except Exception:
         return "invalid_json"
     if not isinstance(data, dict):
         return "invalid_shape"
     if data.get("error") is not None:
         return "upstream_error"
-    remote_url, raw = extract_image_from_generation_payload(data)
+    remote_url, raw = extract_image_from_generation_payload(data, body_text, b64_span)
     if raw:
         return None if is_valid_generated_image(raw) else "invalid_image"
     if remote_url:
@@ -631,7 +673,7 @@ async def reply_from_image_api_json(
     finish_on_error: bool = True,
 ) -> bool:
     try:
-        data = json.loads(body_text)
+        data, b64_span = loads_generation_body(body_text)
     except Exception:
         logger.error(f"draw api invalid json body_prefix={body_text[:500]!r}")
         if finish_on_error:
@@ -650,7 +692,9 @@ async def reply_from_image_api_json(
             )
         return False
 
-    remote_url, raw = extract_image_from_generation_payload(data)
+    remote_url, raw = extract_image_from_generation_payload(data, body_text, b64_span)
+    if raw:
+        charge_draw_bytes("image", len(raw))
 
     async def send_validated_image(image_bytes: bytes) -> bool:
         if not is_valid_generated_image(image_bytes):
@@ -678,8 +722,8 @@ async def reply_from_image_api_json(
                 await matcher.finish(optional_message_at_user(at_user_id, DRAW_VAGUE_REPLY))
             return False
         try:
-            img_resp = await client.get(remote_url)
-            if img_resp.status_code == 200 and await send_validated_image(img_resp.content):
+            status, fetched = await stream_image_bytes(client, remote_url, slot="image")
+            if status == 200 and fetched is not None and await send_validated_image(fetched):
                 return True
         except httpx.HTTPError:
             pass
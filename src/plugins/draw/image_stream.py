@@ -0,0 +1,243 @@
+"""画画图片 I/O：流式读取、首块校验图片头、增量 base64 解码与全局在途字节预算。"""
+
+import asyncio
+import binascii
+import json
+import re
+from collections import deque
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import httpx
+
+IMAGE_HEADER_PROBE_BYTES = 12
+# 生成接口 JSON 正文上限（4K PNG 的 base64 约 30MB）；超出直接中断读流
+GENERATION_BODY_MAX_BYTES = 96 * 1024 * 1024
+# 单张参考图 / 远端生成图下载上限
+IMAGE_DOWNLOAD_MAX_BYTES = 48 * 1024 * 1024
+# b64_json 字段超过该长度才走切片增量解码，小包仍用 json.loads
+INLINE_B64_SPLIT_MIN_CHARS = 64 * 1024
+# 每次解码的 base64 字符数，须为 4 的倍数
+B64_DECODE_CHUNK_CHARS = 256 * 1024
+B64_SPAN_PLACEHOLDER = "pallas:b64-span"
+
+_B64_FIELD_RE = re.compile(r'"b64_json"\s*:\s*"')
+
+
+class ImageStreamLimitError(RuntimeError):
+    """流式读取超出单次上限。"""
+
+
+def image_header_ok(head: bytes) -> bool:
+    """仅凭前若干字节判断是否为 PNG/JPEG/GIF/WEBP。"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return True
+    if head.startswith(b"\xff\xd8\xff"):
+        return True
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return True
+    return len(head) >= 12 and head.startswith(b"RIFF") and head[8:12] == b"WEBP"
+
+
+def looks_like_markup(head: bytes) -> bool:
+    """网关错误页常以 HTML/JSON 伪装 200 返回。"""
+    t = head.lstrip()[:1]
+    return t in (b"<", b"{", b"[")
+
+
+class DrawByteLease:
+    """单次画画任务的在途字节记账；按槽位覆盖，重试时旧正文不重复计数。"""
+
+    __slots__ = ("_budget", "_slots")
+
+    def __init__(self, budget: "DrawByteBudget") -> None:
+        self._budget = budget
+        self._slots: dict[str, int] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self._slots.values())
+
+    def set(self, slot: str, nbytes: int) -> None:
+        old = self._slots.get(slot, 0)
+        new = max(0, int(nbytes))
+        if new:
+            self._slots[slot] = new
+        else:
+            self._slots.pop(slot, None)
+        self._budget._adjust(new - old)
+
+    def close(self) -> None:
+        total = self.total
+        self._slots.clear()
+        self._budget._adjust(-total)
+
+
+class DrawByteBudget:
+    """跨画画任务共享的在途字节上限：超限时新任务排队，已准入任务不阻塞（避免互等死锁）。"""
+
+    def __init__(self, limit_bytes: int) -> None:
+        self._limit = max(0, int(limit_bytes))
+        self._used = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    def set_limit(self, limit_bytes: int) -> None:
+        self._limit = max(0, int(limit_bytes))
+        self._wake()
+
+    def has_room(self) -> bool:
+        return self._limit <= 0 or self._used < self._limit
+
+    def _adjust(self, delta: int) -> None:
+        self._used = max(0, self._used + delta)
+        if delta < 0:
+            self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.has_room():
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+
+    async def admit(self) -> None:
+        while not self.has_room():
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+                raise
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncGenerator[DrawByteLease]:
+        await self.admit()
+        lease = DrawByteLease(self)
+        token = _current_lease.set(lease)
+        try:
+            yield lease
+        finally:
+            _current_lease.reset(token)
+            lease.close()
+
+
+_current_lease: ContextVar[DrawByteLease | None] = ContextVar("pallas_draw_byte_lease", default=None)
+
+
+def charge_draw_bytes(slot: str, nbytes: int) -> None:
+    """记入当前画画任务的在途字节；不在任务上下文中时忽略。"""
+    lease = _current_lease.get()
+    if lease is not None:
+        lease.set(slot, nbytes)
+
+
+async def read_response_capped(
+    resp: httpx.Response,
+    *,
+    max_bytes: int,
+    slot: str,
+    require_image: bool = False,
+) -> bytes | None:
+    """分块读取响应；首块即校验图片头，不是图片时立刻断流返回 None。"""
+    chunks: list[bytes] = []
+    total = 0
+    checked = not require_image
+    async for chunk in resp.aiter_bytes():
+        if not chunk:
+            continue
+        chunks.append(chunk)
+        total += len(chunk)
+        if total > max_bytes:
+            charge_draw_bytes(slot, 0)
+            raise ImageStreamLimitError(f"response body exceeds {max_bytes} bytes")
+        charge_draw_bytes(slot, total)
+        if not checked and total >= IMAGE_HEADER_PROBE_BYTES:
+            head = b"".join(chunks)[:IMAGE_HEADER_PROBE_BYTES]
+            if not image_header_ok(head):
+                charge_draw_bytes(slot, 0)
+                return None
+            checked = True
+    if not checked:
+        charge_draw_bytes(slot, 0)
+        return None
+    data = b"".join(chunks)
+    chunks.clear()
+    return data
+
+
+async def stream_image_bytes(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    download_timeout: float | None = None,
+    max_bytes: int = IMAGE_DOWNLOAD_MAX_BYTES,
+    slot: str = "download",
+    require_image: bool = True,
+) -> tuple[int, bytes | None]:
+    """流式 GET 图片；返回 (status, data)，非 200 / 非图片 / 超限时 data 为 None。"""
+    async with client.stream("GET", url, timeout=download_timeout) as resp:
+        if resp.status_code != 200:
+            return resp.status_code, None
+        declared = resp.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            return resp.status_code, None
+        try:
+            data = await read_response_capped(resp, max_bytes=max_bytes, slot=slot, require_image=require_image)
+        except ImageStreamLimitError:
+            return resp.status_code, None
+        return resp.status_code, data
+
+
+def find_large_b64_span(body_text: str) -> tuple[int, int] | None:
+    """定位首个足够大的 b64_json 字符串值（不含引号）；含转义时放弃。"""
+    m = _B64_FIELD_RE.search(body_text)
+    if m is None:
+        return None
+    start = m.end()
+    end = body_text.find('"', start)
+    if end < 0 or end - start < INLINE_B64_SPLIT_MIN_CHARS:
+        return None
+    if body_text.find("\\", start, end) >= 0:
+        return None
+    return start, end
+
+
+def loads_generation_body(body_text: str) -> tuple[object, tuple[int, int] | None]:
+    """解析生成接口 JSON；大 b64_json 以占位符代替，避免再复制一份几十 MB 的字符串。"""
+    span = find_large_b64_span(body_text)
+    if span is None:
+        return json.loads(body_text), None
+    start, end = span
+    skeleton = body_text[:start] + B64_SPAN_PLACEHOLDER + body_text[end:]
+    return json.loads(skeleton), span
+
+
+def decode_b64_span(text: str, start: int, end: int) -> bytes | None:
+    """按块解码 text[start:end] 的 base64；首块不是图片头时只返回该块供上层判定失败。"""
+    probe = text[start : min(end, start + 256)]
+    if probe.startswith("data:") and ";base64," in probe:
+        start += probe.index(";base64,") + len(";base64,")
+    parts: list[bytes] = []
+    pos = start
+    try:
+        while pos < end:
+            stop = min(end, pos + B64_DECODE_CHUNK_CHARS)
+            parts.append(binascii.a2b_base64(text[pos:stop]))
+            if pos == start and not image_header_ok(parts[0][:IMAGE_HEADER_PROBE_BYTES]):
+                return parts[0]
+            pos = stop
+    except binascii.Error:
+        return None
+    data = b"".join(parts)
+    parts.clear()
+    return data
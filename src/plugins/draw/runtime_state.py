@@ -1,8 +1,10 @@
 import asyncio
 
 from .config import image_gen_config
+from .image_stream import DrawByteBudget
 
 image_gen_semaphore = asyncio.Semaphore(image_gen_config.max_concurrency)
+draw_byte_budget = DrawByteBudget(image_gen_config.inflight_budget_bytes)
 _semaphore_limit = image_gen_config.max_concurrency
 _draw_pending = 0
 _draw_pending_lock = asyncio.Lock()
@@ -38,3 +40,7 @@ def sync_image_gen_semaphore(max_concurrency: int) -> None:
         return
     image_gen_semaphore = asyncio.Semaphore(limit)
     _semaphore_limit = limit
+
+
+def sync_draw_byte_budget(budget_mb: int) -> None:
+    draw_byte_budget.set_limit(max(0, int(budget_mb)) * 1024 * 1024)
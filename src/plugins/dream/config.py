@@ -48,6 +48,12 @@ class Config(BaseModel, extra="ignore"):
         le=1200.0,
         description="每轮梦话后的最长休眠秒数，须不小于最小休眠。",
     )
+    dream_scheduler_workers: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description="所有做梦群共用的梦话发送 worker 数；群多时各群按定时排队轮流发，修改后重启生效。",
+    )
     dream_message_retention_days: int = Field(
         default=90,
         ge=7,
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import NamedTuple
+
+from .dedupe_keys import dream_image_dedupe_key
 
 
 @dataclass
@@ -8,3 +11,53 @@ class DriftPayload:
     nickname: str
     text: str | None = None
     image_bytes: bytes | None = None
+
+
+class QueuedDrift(NamedTuple):
+    """排在某群队列里的漂流；图片只存去重键，字节在 DriftBlobPool 里共享。"""
+
+    nickname: str
+    text: str | None
+    image_key: str | None
+
+
+class DriftBlobPool:
+    """漂流图片按内容只存一份，引用计数归零即释放。"""
+
+    __slots__ = ("_blobs", "_refs")
+
+    def __init__(self) -> None:
+        self._blobs: dict[str, bytes] = {}
+        self._refs: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def hold(self, payload: DriftPayload) -> QueuedDrift:
+        key = None
+        if payload.image_bytes:
+            key = dream_image_dedupe_key(payload.image_bytes)
+            if key in self._refs:
+                self._refs[key] += 1
+            else:
+                self._blobs[key] = payload.image_bytes
+                self._refs[key] = 1
+        return QueuedDrift(payload.nickname, payload.text, key)
+
+    def image(self, item: QueuedDrift) -> bytes | None:
+        return self._blobs.get(item.image_key) if item.image_key else None
+
+    def release(self, item: QueuedDrift) -> None:
+        key = item.image_key
+        if key is None or key not in self._refs:
+            return
+        left = self._refs[key] - 1
+        if left > 0:
+            self._refs[key] = left
+        else:
+            del self._refs[key]
+            del self._blobs[key]
+
+    def clear(self) -> None:
+        self._blobs.clear()
+        self._refs.clear()
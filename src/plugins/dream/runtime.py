@@ -3,7 +3,8 @@ from __future__ import annotations
 import asyncio
 import random
 import time
-from typing import TYPE_CHECKING
+from collections import deque
+from dataclasses import dataclass, field
 
 from nonebot import get_bot, logger
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, Message, MessageSegment
@@ -19,9 +20,8 @@ from .dream_labels import pick_pseudo_sender_at
 from .drunk_synergy import send_one_random_history_line, try_drunk_dream_take_name
 from .echo_sample import random_echo_nickname, sample_learned_echo_line
 from .history_bottle import dream_keywords_for_insert, register_recent_drift_dedupe_key, sample_historical_drift
-
-if TYPE_CHECKING:
-    from .payload import DriftPayload
+from .payload import DriftBlobPool, DriftPayload, QueuedDrift
+from .scheduler import DreamTimerPool
 
 message_repo = make_message_repository()
 
@@ -34,51 +34,56 @@ _ARCHIVE_RESAMPLE_ATTEMPTS = 6
 DREAM_WAKE_TEXT = "……梦醒了。"
 
 
-_dream_lock = asyncio.Lock()
-_dream_active: set[tuple[int, int]] = set()
-_dream_tasks: dict[tuple[int, int], asyncio.Task] = {}
-_drift_queues: dict[tuple[int, int], asyncio.Queue[DriftPayload]] = {}
+@dataclass(slots=True, eq=False)
+class _DreamSession:
+    """一个 (牛, 群) 的做梦状态；定时由 _timers 统一调度，不再各占一个任务。"""
+
+    bot_id: int
+    group_id: int
+    drift: deque[QueuedDrift] = field(default_factory=deque)
+    sent_text_keys: set[str] = field(default_factory=set)
+    sent_image_keys: set[str] = field(default_factory=set)
+    sent_images: int = 0
+    image_cap: int = _DEFAULT_IMAGE_CAP
+    drunk_synergy_used: bool = False
+    drunk_synergy_next: bool = False
 
 
-def get_drift_queue(key: tuple[int, int]) -> asyncio.Queue[DriftPayload]:
-    if key not in _drift_queues:
-        _drift_queues[key] = asyncio.Queue(maxsize=_MAX_QUEUE)
-    return _drift_queues[key]
+_sessions: dict[tuple[int, int], _DreamSession] = {}
+# 漂流图片字节按内容共享，各群队列只持引用
+_drift_blobs = DriftBlobPool()
 
 
 def enqueue_drift_payload(key: tuple[int, int], payload: DriftPayload) -> None:
-    q = get_drift_queue(key)
-    if q.full():
-        try:
-            q.get_nowait()
-        except asyncio.QueueEmpty:
-            pass
-    try:
-        q.put_nowait(payload)
-    except asyncio.QueueFull:
-        pass
+    session = _sessions.get(key)
+    if session is None:
+        return
+    if len(session.drift) >= _MAX_QUEUE:
+        _drift_blobs.release(session.drift.popleft())
+    session.drift.append(_drift_blobs.hold(payload))
+
+
+def _pop_drift(session: _DreamSession) -> QueuedDrift | None:
+    if not session.drift:
+        return None
+    return session.drift.popleft()
 
 
 async def deliver_drift_payload(bot_id: int, group_id: int, payload: DriftPayload) -> bool:
     key = (bot_id, group_id)
-    async with _dream_lock:
-        if key not in _dream_active:
-            return False
+    if key not in _sessions:
+        return False
     enqueue_drift_payload(key, payload)
     return True
 
 
-async def stop_dream_worker(bot_id: int, group_id: int) -> None:
-    key = (bot_id, group_id)
-    t = _dream_tasks.pop(key, None)
-    if t and not t.done():
-        t.cancel()
-        try:
-            await t
-        except asyncio.CancelledError:
-            pass
-    async with _dream_lock:
-        _dream_active.discard(key)
+def _release_session(bot_id: int, group_id: int) -> None:
+    """丢弃会话与其队列引用，撤销跨片登记与群门控。"""
+    session = _sessions.pop((bot_id, group_id), None)
+    if session is not None:
+        for item in session.drift:
+            _drift_blobs.release(item)
+        session.drift.clear()
     from src.platform.ingress.dream_host_gate import DREAM_HOST_GATE_PLUGIN
     from src.platform.multi_bot.dedup import needs_group_host_bot_gate, release_group_owned_gate_sync
     from src.platform.shard.coord.dream_drift import schedule_unregister_dream_active
@@ -86,13 +91,11 @@ async def stop_dream_worker(bot_id: int, group_id: int) -> None:
     schedule_unregister_dream_active(bot_id, group_id)
     if needs_group_host_bot_gate():
         release_group_owned_gate_sync(DREAM_HOST_GATE_PLUGIN, group_id)
-    q = _drift_queues.pop(key, None)
-    if q is not None:
-        while not q.empty():
-            try:
-                q.get_nowait()
-            except asyncio.QueueEmpty:
-                break
+
+
+async def stop_dream_worker(bot_id: int, group_id: int) -> None:
+    await _timers.cancel_and_wait((bot_id, group_id))
+    _release_session(bot_id, group_id)
 
 
 async def broadcast_drift(bot_id: int, source_group_id: int, payload: DriftPayload) -> None:
@@ -100,16 +103,13 @@ async def broadcast_drift(bot_id: int, source_group_id: int, payload: DriftPaylo
     from src.platform.shard.coord.dream_drift import schedule_publish_dream_drift
     from src.plugins.dream.shard_fleet import collect_drift_peer_group_ids
 
-    async with _dream_lock:
-        local_targets = [gid for bid, gid in _dream_active if bid == bot_id and gid != source_group_id]
+    local_targets = [gid for bid, gid in _sessions if bid == bot_id and gid != source_group_id]
     targets = await collect_drift_peer_group_ids(bot_id, source_group_id, local_targets)
     if not targets:
         return
     gid = random.choice(sorted(targets))
     key = (bot_id, gid)
-    async with _dream_lock:
-        local_hit = key in _dream_active
-    if local_hit:
+    if key in _sessions:
         enqueue_drift_payload(key, payload)
         return
     schedule_publish_dream_drift(bot_id, source_group_id, gid, payload)
@@ -143,111 +143,76 @@ async def launch_dream_worker(bot_id: int, group_id: int, duration_sec: int) ->
     schedule_register_dream_active(bot_id, group_id, until_ts)
     if needs_group_host_bot_gate():
         bind_group_owned_gate_sync(DREAM_HOST_GATE_PLUGIN, group_id, bot_id, gate_sec=float(duration_sec))
-    async with _dream_lock:
-        _dream_active.add(key)
-    q = get_drift_queue(key)
-    sent_text_keys: set[str] = set()
-    sent_image_keys: set[str] = set()
-    sent_images = 0
-    image_cap = _DEFAULT_IMAGE_CAP
+    session = _DreamSession(bot_id, group_id)
+    _sessions[key] = session
     try:
         bot0 = get_bot(str(bot_id))
         if await cfg.is_dreaming():
-            sent_images = await _dream_worker_content_tick_once(
-                bot0,
-                bot_id=bot_id,
-                group_id=group_id,
-                q=q,
-                sent_text_keys=sent_text_keys,
-                sent_image_keys=sent_image_keys,
-                sent_images=sent_images,
-                image_cap=image_cap,
-            )
+            await _dream_worker_content_tick_once(bot0, session)
     except ActionFailed as e:
         logger.debug(f"bot [{bot_id}] dream send failed (immediate tick) in group [{group_id}]: {e}")
     except Exception as e:
         logger.warning(f"bot [{bot_id}] dream worker immediate tick error in group [{group_id}]: {e}")
-    _dream_tasks[key] = asyncio.create_task(
-        _dream_worker_loop(
-            bot_id,
-            group_id,
-            sent_text_keys=sent_text_keys,
-            sent_image_keys=sent_image_keys,
-            sent_images=sent_images,
-        )
-    )
-
-
-async def _dream_worker_content_tick_once(
-    bot: Bot,
-    *,
-    bot_id: int,
-    group_id: int,
-    q: asyncio.Queue[DriftPayload],
-    sent_text_keys: set[str],
-    sent_image_keys: set[str],
-    sent_images: int,
-    image_cap: int,
-) -> int:
-    """发一轮梦话，与循环体内逻辑一致。返回更新后的 sent_images。"""
-    item: DriftPayload | None = None
+    if _sessions.get(key) is session:
+        _timers.schedule(key, await _next_dream_delay(session, cfg))
+
+
+async def _next_dream_delay(session: _DreamSession, cfg: BotConfig) -> float:
+    """下一轮间隔；醉酒时更密，且本场首次醉酒的下一轮改为抢名字。"""
+    drunk_now = (await cfg.drunkenness()) > 0
+    session.drunk_synergy_next = drunk_now and not session.drunk_synergy_used
+    if drunk_now:
+        return random.uniform(_DRUNK_DREAM_FAST_SLEEP_MIN, _DRUNK_DREAM_FAST_SLEEP_MAX)
+    lo = float(dream_plugin_config.dream_worker_sleep_min_sec)
+    hi = float(dream_plugin_config.dream_worker_sleep_max_sec)
+    return random.uniform(lo, hi)
+
+
+async def _dream_worker_content_tick_once(bot: Bot, session: _DreamSession) -> None:
+    """发一轮梦话：先漂流队列，再已学句 / 历史梦，最后归档画图。"""
+    bot_id, group_id = session.bot_id, session.group_id
+    sent_text_keys, sent_image_keys = session.sent_text_keys, session.sent_image_keys
+    item: QueuedDrift | None = None
     if random.random() < dream_plugin_config.dream_drift_queue_tick_probability:
-        try:
-            item = q.get_nowait()
-        except asyncio.QueueEmpty:
-            item = None
-    sent_queue_text = False
-    sent_queue_image = False
-    if item and item.image_bytes and sent_images < image_cap:
-        ik = dream_image_dedupe_key(item.image_bytes)
-        if ik not in sent_image_keys:
-            await _send_group_drift_image(bot, group_id, item.nickname, item.image_bytes)
-            sent_image_keys.add(ik)
-            sent_images += 1
-            sent_queue_image = True
-    elif item and item.text:
-        tk = dream_text_dedupe_key(item.text)
-        if tk not in sent_text_keys:
-            await _send_group_drift_text(bot, group_id, item.nickname, item.text)
-            sent_text_keys.add(tk)
-            sent_queue_text = True
-
-    if sent_queue_text or sent_queue_image:
-        return sent_images
+        item = _pop_drift(session)
+    if item is not None:
+        image = _drift_blobs.image(item)
+        _drift_blobs.release(item)
+        if image and item.image_key and session.sent_images < session.image_cap:
+            if item.image_key not in sent_image_keys:
+                await _send_group_drift_image(bot, group_id, item.nickname, image)
+                sent_image_keys.add(item.image_key)
+                session.sent_images += 1
+                return
+        elif item.text:
+            tk = dream_text_dedupe_key(item.text)
+            if tk not in sent_text_keys:
+                await _send_group_drift_text(bot, group_id, item.nickname, item.text)
+                sent_text_keys.add(tk)
+                return
 
     prefer_echo = random.random() < dream_plugin_config.dream_prefer_learned_echo_probability
-    if prefer_echo:
-        if await _dream_tick_try_learned_echo(bot, group_id=group_id, sent_text_keys=sent_text_keys):
-            return sent_images
-        sent_h, inc = await _dream_tick_try_historical(
-            bot,
-            bot_id=bot_id,
-            group_id=group_id,
-            sent_text_keys=sent_text_keys,
-            sent_image_keys=sent_image_keys,
-            sent_images=sent_images,
-            image_cap=image_cap,
-        )
-        sent_images += inc
-        if sent_h:
-            return sent_images
-    else:
-        sent_h, inc = await _dream_tick_try_historical(
-            bot,
-            bot_id=bot_id,
-            group_id=group_id,
-            sent_text_keys=sent_text_keys,
-            sent_image_keys=sent_image_keys,
-            sent_images=sent_images,
-            image_cap=image_cap,
-        )
-        sent_images += inc
-        if sent_h:
-            return sent_images
-        if await _dream_tick_try_learned_echo(bot, group_id=group_id, sent_text_keys=sent_text_keys):
-            return sent_images
+    if prefer_echo and await _dream_tick_try_learned_echo(bot, group_id=group_id, sent_text_keys=sent_text_keys):
+        return
+    sent_h, inc = await _dream_tick_try_historical(
+        bot,
+        bot_id=bot_id,
+        group_id=group_id,
+        sent_text_keys=sent_text_keys,
+        sent_image_keys=sent_image_keys,
+        sent_images=session.sent_images,
+        image_cap=session.image_cap,
+    )
+    session.sent_images += inc
+    if sent_h:
+        return
+    if not prefer_echo and await _dream_tick_try_learned_echo(bot, group_id=group_id, sent_text_keys=sent_text_keys):
+        return
 
-    if sent_images < image_cap and random.random() < dream_plugin_config.dream_archive_image_probability:
+    if (
+        session.sent_images < session.image_cap
+        and random.random() < dream_plugin_config.dream_archive_image_probability
+    ):
         from src.plugins.draw.draw_archive import random_archived_png_bytes
 
         for _ in range(_ARCHIVE_RESAMPLE_ATTEMPTS):
@@ -258,91 +223,90 @@ async def _dream_worker_content_tick_once(
             if ik not in sent_image_keys:
                 await _send_group_archived_draw_image(bot, group_id, data)
                 sent_image_keys.add(ik)
-                sent_images += 1
+                session.sent_images += 1
                 break
 
-    return sent_images
 
+async def _dream_drunk_synergy_tick(bot: Bot, session: _DreamSession, cfg: BotConfig) -> None:
+    bot_id, group_id = session.bot_id, session.group_id
+    session.drunk_synergy_used = True
+    session.image_cap = _DRUNK_DREAM_IMAGE_CAP
+    try:
+        taken = await try_drunk_dream_take_name(bot=bot, bot_id=bot_id, group_id=group_id, cfg=cfg)
+        if taken is not None:
+            victim_id, victim_display = taken
+            await send_one_random_history_line(
+                bot,
+                bot_id=bot_id,
+                group_id=group_id,
+                user_id=victim_id,
+                display_name=victim_display,
+            )
+    except ActionFailed as e:
+        logger.debug(f"bot [{bot_id}] dream drunk synergy send failed in group [{group_id}]: {e}")
+    except Exception as e:
+        logger.warning(f"bot [{bot_id}] dream drunk synergy error in group [{group_id}]: {e}")
 
-async def _dream_worker_loop(
-    bot_id: int,
-    group_id: int,
-    *,
-    sent_text_keys: set[str],
-    sent_image_keys: set[str],
-    sent_images: int,
-) -> None:
-    key = (bot_id, group_id)
+
+async def _run_dream_tick(key: tuple[int, int]) -> float | None:
+    """调度器到点回调：发一轮，返回下次间隔；梦醒或出错返回 None 并收尾。"""
+    session = _sessions.get(key)
+    if session is None:
+        return None
+    bot_id, group_id = key
     cfg = BotConfig(bot_id, group_id)
-    q = get_drift_queue(key)
-    image_cap = _DEFAULT_IMAGE_CAP
-    drunk_synergy_used = False
     try:
-        while await cfg.is_dreaming():
-            drunk_now = (await cfg.drunkenness()) > 0
-            do_drunk_synergy = drunk_now and not drunk_synergy_used
-            if drunk_now:
-                await asyncio.sleep(random.uniform(_DRUNK_DREAM_FAST_SLEEP_MIN, _DRUNK_DREAM_FAST_SLEEP_MAX))
-            else:
-                lo = float(dream_plugin_config.dream_worker_sleep_min_sec)
-                hi = float(dream_plugin_config.dream_worker_sleep_max_sec)
-                await asyncio.sleep(random.uniform(lo, hi))
-            if not await cfg.is_dreaming():
-                break
-            try:
-                bot = get_bot(str(bot_id))
-            except Exception as e:
-                logger.debug(f"bot [{bot_id}] dream worker get_bot failed in group [{group_id}]: {e}")
-                continue
-            if do_drunk_synergy:
-                drunk_synergy_used = True
-                image_cap = _DRUNK_DREAM_IMAGE_CAP
-                try:
-                    taken = await try_drunk_dream_take_name(bot=bot, bot_id=bot_id, group_id=group_id, cfg=cfg)
-                    if taken is not None:
-                        victim_id, victim_display = taken
-                        await send_one_random_history_line(
-                            bot,
-                            bot_id=bot_id,
-                            group_id=group_id,
-                            user_id=victim_id,
-                            display_name=victim_display,
-                        )
-                except ActionFailed as e:
-                    logger.debug(f"bot [{bot_id}] dream drunk synergy send failed in group [{group_id}]: {e}")
-                except Exception as e:
-                    logger.warning(f"bot [{bot_id}] dream drunk synergy error in group [{group_id}]: {e}")
-                continue
+        if not await cfg.is_dreaming():
+            return await _finish_dream(session, cfg)
+        try:
+            bot = get_bot(str(bot_id))
+        except Exception as e:
+            logger.debug(f"bot [{bot_id}] dream worker get_bot failed in group [{group_id}]: {e}")
+            bot = None
+        if bot is not None and session.drunk_synergy_next:
+            await _dream_drunk_synergy_tick(bot, session, cfg)
+        elif bot is not None:
             try:
-                sent_images = await _dream_worker_content_tick_once(
-                    bot,
-                    bot_id=bot_id,
-                    group_id=group_id,
-                    q=q,
-                    sent_text_keys=sent_text_keys,
-                    sent_image_keys=sent_image_keys,
-                    sent_images=sent_images,
-                    image_cap=image_cap,
-                )
+                await _dream_worker_content_tick_once(bot, session)
             except ActionFailed as e:
                 logger.debug(f"bot [{bot_id}] dream send failed in group [{group_id}]: {e}")
             except Exception as e:
                 logger.warning(f"bot [{bot_id}] dream worker tick error in group [{group_id}]: {e}")
-        await cfg.stop_dream()
-        await send_dream_wake_text(bot_id, group_id)
+        if not await cfg.is_dreaming():
+            return await _finish_dream(session, cfg)
+        return await _next_dream_delay(session, cfg)
     except asyncio.CancelledError:
         raise
+    except Exception as e:
+        logger.warning(f"bot [{bot_id}] dream session aborted in group [{group_id}]: {e}")
+        if _sessions.get(key) is session:
+            _release_session(bot_id, group_id)
+        return None
+
+
+async def _finish_dream(session: _DreamSession, cfg: BotConfig) -> None:
+    try:
+        await cfg.stop_dream()
+        await send_dream_wake_text(session.bot_id, session.group_id)
     finally:
-        async with _dream_lock:
-            _dream_active.discard(key)
-        from src.platform.ingress.dream_host_gate import DREAM_HOST_GATE_PLUGIN
-        from src.platform.multi_bot.dedup import needs_group_host_bot_gate, release_group_owned_gate_sync
-        from src.platform.shard.coord.dream_drift import schedule_unregister_dream_active
-
-        schedule_unregister_dream_active(bot_id, group_id)
-        if needs_group_host_bot_gate():
-            release_group_owned_gate_sync(DREAM_HOST_GATE_PLUGIN, group_id)
-        _dream_tasks.pop(key, None)
+        if _sessions.get((session.bot_id, session.group_id)) is session:
+            _release_session(session.bot_id, session.group_id)
+
+
+_timers: DreamTimerPool[tuple[int, int]] = DreamTimerPool(
+    _run_dream_tick,
+    workers=dream_plugin_config.dream_scheduler_workers,
+)
+
+
+def dream_scheduler_stats() -> dict[str, int]:
+    """做梦群数 / 排期数 / 调度任务数 / 共享图片数，群数增长时后三者不应随之线性增长。"""
+    return {
+        "sessions": len(_sessions),
+        "scheduled": len(_timers),
+        "tasks": _timers.task_count,
+        "drift_blobs": len(_drift_blobs),
+    }
 
 
 def drift_at_nickname(nickname: str) -> str:
@@ -0,0 +1,156 @@
+"""做梦定时调度：所有做梦群共用一个最小堆 + 固定数量的 worker。
+
+每个 (牛, 群) 在堆里至多一个有效定时；到点后交给 worker 执行一轮，handler 返回下次间隔秒数
+（``None`` 表示结束）。群再多也只有 1 个派发任务 + N 个 worker，不再每群常驻一个 sleep 任务。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import TYPE_CHECKING
+
+from nonebot import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+
+class DreamTimerPool[K: Hashable]:
+    """堆里放 (到期时间, 序号, key, 代号)；重新排期 / 取消只换代号，旧条目出堆时丢弃。"""
+
+    def __init__(self, handler: Callable[[K], Awaitable[float | None]], *, workers: int, name: str = "dream") -> None:
+        self._handler = handler
+        self._workers = max(1, int(workers))
+        self._name = name
+        self._heap: list[tuple[float, int, K, int]] = []
+        self._seq = itertools.count()
+        # key -> 当前有效代号；不在表里即未排期
+        self._gen: dict[K, int] = {}
+        self._inflight: dict[K, asyncio.Task[float | None]] = {}
+        self._ready: asyncio.Queue[tuple[K, int]] | None = None
+        self._wake: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __len__(self) -> int:
+        return len(self._gen)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._gen
+
+    @property
+    def task_count(self) -> int:
+        return sum(1 for t in self._tasks if not t.done())
+
+    def schedule(self, key: K, delay_sec: float) -> None:
+        """(重新) 排期 key；已有的定时作废。"""
+        self._ensure_started()
+        gen = next(self._seq)
+        self._gen[key] = gen
+        due = time.monotonic() + max(0.0, float(delay_sec))
+        heapq.heappush(self._heap, (due, gen, key, gen))
+        if self._heap[0][2] == key and self._heap[0][3] == gen and self._wake is not None:
+            self._wake.set()
+
+    def cancel(self, key: K) -> asyncio.Task[float | None] | None:
+        """取消定时并打断正在执行的一轮；返回被打断的任务（可能为 None）。"""
+        self._gen.pop(key, None)
+        run = self._inflight.pop(key, None)
+        # handler 内部自己收尾时不打断自身
+        if run is None or run.done() or run is asyncio.current_task():
+            return None
+        run.cancel()
+        return run
+
+    async def cancel_and_wait(self, key: K) -> None:
+        run = self.cancel(key)
+        if run is not None:
+            await asyncio.wait((run,))
+
+    async def shutdown(self) -> None:
+        for key in list(self._inflight):
+            self.cancel(key)
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._gen.clear()
+        self._heap.clear()
+        self._ready = None
+        self._wake = None
+        self._loop = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks and all(not t.done() for t in self._tasks):
+            return
+        if self._loop is loop:
+            for t in self._tasks:
+                t.cancel()
+        else:
+            # 换了事件循环（测试 / 重启驱动）：旧循环上的定时一并作废
+            self._gen.clear()
+            self._heap.clear()
+            self._inflight.clear()
+        self._loop = loop
+        self._ready = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._dispatch_loop(), name=f"{self._name}_timer_dispatch")]
+        self._tasks.extend(
+            asyncio.create_task(self._worker_loop(), name=f"{self._name}_timer_worker_{i}")
+            for i in range(self._workers)
+        )
+
+    async def _dispatch_loop(self) -> None:
+        ready, wake, heap = self._ready, self._wake, self._heap
+        assert ready is not None
+        assert wake is not None
+        while True:
+            now = time.monotonic()
+            while heap and heap[0][0] <= now:
+                _, _, key, gen = heapq.heappop(heap)
+                if self._gen.get(key) == gen:
+                    ready.put_nowait((key, gen))
+            timeout = heap[0][0] - now if heap else None
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except TimeoutError:
+                pass
+
+    async def _worker_loop(self) -> None:
+        ready = self._ready
+        assert ready is not None
+        while True:
+            key, gen = await ready.get()
+            if self._gen.get(key) != gen:
+                continue
+            run = asyncio.create_task(self._handler(key))
+            self._inflight[key] = run
+            try:
+                await asyncio.wait((run,))
+            except asyncio.CancelledError:
+                run.cancel()
+                raise
+            finally:
+                if self._inflight.get(key) is run:
+                    del self._inflight[key]
+            if run.cancelled():
+                continue
+            exc = run.exception()
+            if self._gen.get(key) != gen:
+                # 执行期间被取消或重新排期
+                continue
+            if exc is not None:
+                logger.warning(f"{self._name} timer handler failed for {key}: {exc!r}")
+                self._gen.pop(key, None)
+                continue
+            delay = run.result()
+            if delay is None:
+                self._gen.pop(key, None)
+            else:
+                self.schedule(key, delay)
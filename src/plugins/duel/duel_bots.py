@@ -10,15 +10,7 @@ from typing import TYPE_CHECKING, Any
 from nonebot import get_bots, logger
 
 from src.platform.multi_bot.dedup import normalize_message_time
-from src.platform.multi_bot.group_online_cache import (
-    GROUP_ONLINE_TTL_SEC,
-    NS_FLEET,
-    NS_LOCAL_CONNECTED,
-    clear_group_online_cache,
-    get_cached_group_bot_ids,
-    resolve_local_connected_bots_in_group,
-    store_cached_group_bot_ids,
-)
+from src.platform.multi_bot.group_membership import indexed_bots_in_group, resolve_local_connected_bots_in_group
 from src.platform.shard import context as shard_ctx
 from src.plugins.block import is_fleet_bot_qq
 
@@ -28,14 +20,6 @@ if TYPE_CHECKING:
 _AT_CQ_RE = re.compile(r"\[CQ:at,qq=(\d+)")
 _ROUND_COUNT_RE = re.compile(r"(\d{1,2})\s*(?:幕|回合)")
 
-# 复读 fanout / 决斗等高频路径：按群缓存在线 fleet 牛，避免 member API 异常时反复全舰队 probe
-_GROUP_ONLINE_BOTS_TTL_SEC = GROUP_ONLINE_TTL_SEC
-
-
-def clear_group_online_bot_ids_cache() -> None:
-    clear_group_online_cache(NS_FLEET)
-    clear_group_online_cache(NS_LOCAL_CONNECTED)
-
 
 def normalize_onebot_api_payload(raw: Any) -> Any:
     if hasattr(raw, "model_dump"):
@@ -114,16 +98,27 @@ async def probe_fleet_bots_in_group(caller: Any, group_id: int, catalog: frozens
     return sorted(x for x in results if x is not None)
 
 
+def online_fleet_bot_ids() -> frozenset[int]:
+    """在线 fleet 牛：分片时取集群 presence，否则取本进程已连接。"""
+    from src.platform.multi_bot.fleet import get_catalog_bot_ids
+
+    if shard_ctx.sharding_active():
+        from src.platform.shard.presence import get_cluster_online_bot_ids
+
+        return get_cluster_online_bot_ids() & get_catalog_bot_ids()
+    return frozenset(int(k) for k in get_bots() if str(k).isdigit()) & get_catalog_bot_ids()
+
+
 async def list_group_online_bot_ids(group_id: int) -> list[int]:
-    """已连接且能查到本群资料的牛牛 QQ；分片时含其它 worker 上在线的 fleet 牛。"""
-    gid = int(group_id)
-    cached = get_cached_group_bot_ids(gid, namespace=NS_FLEET)
-    if cached is not None:
-        return cached
+    """已连接且在本群的牛牛 QQ；分片时含其它 worker 上在线的 fleet 牛。
 
-    result = await resolve_shard_group_online_bot_ids(gid)
-    await store_cached_group_bot_ids(gid, result, namespace=NS_FLEET)
-    return result
+    在线牛都已建群成员索引时直接查索引；否则回退 member API 探测。
+    """
+    gid = int(group_id)
+    indexed = indexed_bots_in_group(gid, online_fleet_bot_ids())
+    if indexed is not None:
+        return indexed
+    return await resolve_shard_group_online_bot_ids(gid)
 
 
 async def resolve_unified_group_online_bot_ids(group_id: int) -> list[int]:
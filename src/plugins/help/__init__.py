@@ -1,4 +1,4 @@
-from nonebot import on_message
+from nonebot import get_driver, on_message
 from nonebot.adapters import Event
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, PrivateMessageEvent
 from nonebot.plugin import PluginMetadata
@@ -33,6 +33,7 @@ from .help_args import (
     parse_plugin_toggle_args,
 )
 from .plugin_manager import get_help_menu_plugins
+from .renderer import schedule_help_prerender, shutdown_help_render_pool
 from .styles import get_default_style, load_config, load_custom_styles
 
 __plugin_meta__ = PluginMetadata(
@@ -138,6 +139,18 @@ def refresh_style_cache(cfg: Config | None = None) -> None:
 
 refresh_style_cache()
 
+driver = get_driver()
+
+
+@driver.on_startup
+async def _schedule_help_prerender() -> None:
+    schedule_help_prerender(AVAILABLE_STYLES, DEFAULT_STYLE_NAME)
+
+
+@driver.on_shutdown
+async def _shutdown_help_render_pool() -> None:
+    shutdown_help_render_pool()
+
 
 def prefix_command_rule(command: str, *, exclude_prefixes: tuple[str, ...] = ()) -> Rule:
     async def match_prefix_command(event: Event, state: T_State) -> bool:
@@ -79,6 +79,22 @@ class Config(BaseModel, extra="ignore"):
             "开启后按版式比例拆成多页，适合立绘模式下的长说明",
         ),
     )
+    prerender_enabled: bool = Field(
+        default=True,
+        description=field_help(
+            "启动及样式变更后是否在后台预渲染全部帮助页",
+            "开启后「牛牛帮助」直接发送已编码好的成图，不再在命令处理中现场渲染",
+        ),
+    )
+    prerender_workers: int = Field(
+        default=1,
+        ge=0,
+        le=8,
+        description=field_help(
+            "帮助图渲染子进程数",
+            "渲染在独立进程中进行，不阻塞消息处理；填 0 则改用线程渲染",
+        ),
+    )
     ignored_plugins: list[str] = Field(
         default=[
             "nonebot-plugin-alconna",
@@ -99,11 +115,12 @@ class Config(BaseModel, extra="ignore"):
 def on_help_config_reload(cfg: Config) -> None:
     import src.plugins.help as help_pkg
     from src.plugins.help.plugin_availability import invalidate_plugin_help_availability_cache
-    from src.plugins.help.renderer import invalidate_help_image_cache_suffix
+    from src.plugins.help.renderer import invalidate_help_image_cache_suffix, schedule_help_prerender
 
     invalidate_plugin_help_availability_cache()
     invalidate_help_image_cache_suffix()
     help_pkg.refresh_style_cache(cfg)
+    schedule_help_prerender(help_pkg.AVAILABLE_STYLES, help_pkg.DEFAULT_STYLE_NAME)
 
 
 plugin_webui = install_hot_reload_config(
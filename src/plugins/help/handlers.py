@@ -68,7 +68,7 @@ async def handle_help_command(
             filtered_plugins=menu_plugins,
         )
         markdown_content = await fill_plugin_status(markdown_content, bot_id, group_id, show_ignored)
-        await send_markdown_as_image(markdown_content, style_name, available_styles, matcher, group_id)
+        await send_markdown_as_image(markdown_content, style_name, available_styles, matcher)
         return
 
     plugin_identifier = args[0]
@@ -97,7 +97,7 @@ async def handle_help_command(
         if issue is HelpMarkdownIssue.PLUGIN_NOT_FOUND:
             await matcher.finish(f"博士，你说的'{resolved_plugin_display(plugin_name)}'是什么呀？")
             return
-        await send_markdown_as_image(markdown_content, style_name, available_styles, matcher, group_id)
+        await send_markdown_as_image(markdown_content, style_name, available_styles, matcher)
         return
 
     if len(args) == 2:
@@ -114,7 +114,7 @@ async def handle_help_command(
             await matcher.finish(f"博士，'{resolved_plugin_display(plugin_name)}'只有这么多信息了")
             return
 
-        await send_markdown_as_image(markdown_content, style_name, available_styles, matcher, group_id)
+        await send_markdown_as_image(markdown_content, style_name, available_styles, matcher)
         return
 
     await matcher.finish("博士，你说的太多了，我跟不上了...")
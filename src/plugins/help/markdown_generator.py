@@ -1,5 +1,6 @@
 import re
 import textwrap
+from collections.abc import Iterator
 from enum import StrEnum
 
 from src.features.cmd_perm import (
@@ -363,3 +364,32 @@ def generate_function_detail_markdown(plugin_name: str, function_name: str) -> t
         markdown_content += f"## MAA 对接地址\n\n{maa_http}\n\n"
 
     return markdown_content, HelpMarkdownIssue.OK
+
+
+def iter_help_prerender_pages(plugin_config: Config) -> Iterator[str]:
+    """枚举可预渲染的帮助页：全启用总览、各插件启停两态功能表、各功能详情。"""
+    from .help_constants import HELP_STATUS_PLACEHOLDER
+    from .plugin_manager import apply_status_marks_to_plugin_table
+
+    ignored = plugin_config.ignored_plugins if plugin_config else []
+    menu_plugins = get_help_menu_plugins(show_ignored=False, ignored_plugins=ignored)
+    overview = generate_plugins_markdown(
+        plugin_config,
+        show_ignored=False,
+        ignored_plugins=ignored,
+        filtered_plugins=menu_plugins,
+    )
+    marks = [help_list_status_mark(True)] * len(menu_plugins)
+    yield apply_status_marks_to_plugin_table(overview, marks).replace(HELP_STATUS_PLACEHOLDER, "？")
+
+    for plugin in menu_plugins:
+        name = plugin.name or ""
+        for enabled in (True, False):
+            markdown_content, issue = generate_plugin_functions_markdown(name, plugin_enabled=enabled)
+            if issue is HelpMarkdownIssue.OK:
+                yield markdown_content
+        menu_data = plugin.metadata.extra.get("menu_data", []) if plugin.metadata and plugin.metadata.extra else []
+        for index in range(1, len(list(iter_user_help_menu(menu_data))) + 1):
+            markdown_content, issue = generate_function_detail_markdown(name, str(index))
+            if issue is HelpMarkdownIssue.OK:
+                yield markdown_content
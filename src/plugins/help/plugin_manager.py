@@ -438,7 +438,6 @@ async def update_bot_config(bot_id: int, disabled_plugins: list[str]) -> BotConf
     更新Bot配置中的禁用插件列表
     """
     await bot_config_repo.upsert_field(bot_id, "disabled_plugins", disabled_plugins.copy())
-    await bot_config_repo.invalidate_cache()
     await invalidate_disabled_plugin_gate_cache(bot_id=bot_id)
 
     bot_config = await bot_config_repo.get(bot_id, ignore_cache=True)
@@ -454,7 +453,6 @@ async def update_group_config(group_id: int, disabled_plugins: list[str]) -> Gro
     更新群配置中的禁用插件列表
     """
     await group_config_repo.upsert_field(group_id, "disabled_plugins", disabled_plugins.copy())
-    await group_config_repo.invalidate_cache()
     await invalidate_disabled_plugin_gate_cache(group_id=group_id)
 
     group_config = await group_config_repo.get(group_id, ignore_cache=True)
@@ -1,7 +1,14 @@
+import asyncio
 import hashlib
 import io
+import multiprocessing
+import shutil
 import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Any
 
 import pillowmd
 from nonebot import logger
@@ -10,28 +17,75 @@ from nonebot.matcher import Matcher
 from PIL import Image
 
 from src.foundation.paths import plugin_data_dir, project_path
-
-from .pillowmd_bold import apply_help_light_bold_patch
-from .styles import get_default_style
+from src.shared.utils.help_render_worker import (
+    HELP_IMAGE_MAX_SEND_BYTES,
+    HelpPaintSpec,
+    HelpStyleSpec,
+    encode_help_image_for_send,
+    render_help_markdown,
+    render_help_markdown_in_worker,
+)
+from src.shared.utils.pillowmd_bold import apply_help_light_bold_patch
+
+from .styles import get_default_style, help_style_specs
 
 apply_help_light_bold_patch()
 
 _STYLE_SUFFIX_TTL_SEC = 60.0
 _style_suffix_cache: tuple[float, str] = (0.0, "")
-_HELP_CACHE_FILES_PER_DIR_MAX = 20
+# 内容寻址：同一 Markdown + 样式修订只存一份，与群无关
+_HELP_RENDER_STORE_DIR = "rendered"
+_HELP_CACHE_FILES_MAX = 2000
+_HELP_CACHE_PRUNE_EVERY_SAVES = 64
+_HELP_RENDER_MEM_MAX_BYTES = 48 * 1024 * 1024
+
+_render_mem: OrderedDict[str, bytes] = OrderedDict()
+_render_mem_bytes = 0
+_render_inflight: dict[str, asyncio.Future[bytes]] = {}
+_saves_since_prune = 0
+
+_render_pool: Executor | None = None
+# 进程池对应的样式对象（判断是否重载过）与传给子进程的样式描述
+_render_pool_styles: dict[str, Any] = {}
+_render_pool_specs: dict[str, HelpStyleSpec] = {}
+
+_prerender_task: asyncio.Task | None = None
+# 预渲染进行中又收到的请求（样式重载等）；当前一轮结束后再跑一轮
+_prerender_rerun: tuple[dict, str] | None = None
+_prerendered_revision = ""
+_legacy_dirs_cleaned = False
+
+_RENDER_COUNTERS = (
+    "mem_hits",
+    "disk_hits",
+    "renders",
+    "render_errors",
+    "render_ms_sum",
+    "render_ms_max",
+    "warm_runs",
+    "warm_pages",
+    "warm_rendered",
+    "pool_rebuilds",
+)
+_render_stats: dict[str, int] = dict.fromkeys(_RENDER_COUNTERS, 0)
+_last_warm_at = 0.0
+_last_warm_ms = 0
 
 
 def invalidate_help_image_cache_suffix() -> None:
-    global _style_suffix_cache
+    global _style_suffix_cache, _render_mem_bytes
     _style_suffix_cache = (0.0, "")
+    _render_mem.clear()
+    _render_mem_bytes = 0
 
 
 def _help_style_files_revision() -> str:
-    """样式目录内 setting/elements 变更时使帮助图缓存失效。"""
+    """样式目录内 setting/elements 内容变更时使帮助图缓存失效（按内容摘要，不看 mtime）。"""
     from .config import get_help_config
 
     cfg = get_help_config()
-    parts: list[str] = []
+    digest = hashlib.sha1()
+    seen = False
     for style_cfg in cfg.default_styles or []:
         style_dir = project_path(style_cfg.path)
         for filename in (
@@ -44,11 +98,13 @@ def _help_style_files_revision() -> str:
             path = style_dir / filename
             if not path.is_file():
                 continue
+            seen = True
+            digest.update(filename.encode())
             try:
-                parts.append(f"{filename}:{int(path.stat().st_mtime)}")
+                digest.update(path.read_bytes())
             except OSError:
-                parts.append(f"{filename}:0")
-    return ";".join(parts) if parts else "none"
+                digest.update(b"\0")
+    return digest.hexdigest()[:16] if seen else "none"
 
 
 def _compute_help_image_cache_suffix() -> str:
@@ -69,10 +125,10 @@ def _compute_help_image_cache_suffix() -> str:
     if not paint_path.is_file():
         return base
     try:
-        paint_mtime = int(paint_path.stat().st_mtime)
+        paint_rev = hashlib.sha1(paint_path.read_bytes()).hexdigest()[:16]
     except OSError:
-        paint_mtime = 0
-    return f"{base}|pm={paint_mtime}"
+        paint_rev = "0"
+    return f"{base}|pm={paint_rev}"
 
 
 def _help_image_cache_suffix() -> str:
@@ -86,120 +142,53 @@ def _help_image_cache_suffix() -> str:
     return suffix
 
 
-def resize_image_if_needed(image, max_width=1200, max_height=2800):
-    """调整图像大小"""
-    if image.width > max_width or image.height > max_height:
-        ratio = min(max_width / image.width, max_height / image.height)
-        new_size = (int(image.width * ratio), int(image.height * ratio))
-        return image.resize(new_size, Image.Resampling.LANCZOS)
-    return image
-
-
-# NapCat 等协议端对超大 base64 图片经 WS 发送不稳定；控制原始体积
-_HELP_IMAGE_MAX_SEND_BYTES = 2_500_000
-_HELP_IMAGE_MIN_SIDE = 360
-
-
-def encode_help_image_for_send(image: Image.Image) -> bytes:
-    """将帮助图编码为可经 OneBot base64 发送的字节串；过大时缩小或转 JPEG。"""
-    work = image
-    png_bytes = _png_bytes(work)
-    if len(png_bytes) <= _HELP_IMAGE_MAX_SEND_BYTES:
-        return png_bytes
-
-    orig_w, orig_h = work.size
-    scale = 0.82
-    while len(png_bytes) > _HELP_IMAGE_MAX_SEND_BYTES:
-        w, h = work.size
-        if min(w, h) <= _HELP_IMAGE_MIN_SIDE:
-            break
-        nw = max(1, int(w * scale))
-        nh = max(1, int(h * scale))
-        work = work.resize((nw, nh), Image.Resampling.LANCZOS)
-        png_bytes = _png_bytes(work)
-
-    if len(png_bytes) <= _HELP_IMAGE_MAX_SEND_BYTES:
-        logger.warning(
-            "help image shrunk for upload orig={}x{} final={}x{} bytes={}",
-            orig_w,
-            orig_h,
-            work.width,
-            work.height,
-            len(png_bytes),
-        )
-        return png_bytes
-
-    rgba = work.convert("RGBA")
-    rgb = Image.new("RGB", rgba.size, (255, 255, 255))
-    rgb.paste(rgba, mask=rgba.split()[-1])
-
-    for quality in (85, 75, 65, 55):
-        buf = io.BytesIO()
-        rgb.save(buf, format="JPEG", quality=quality, optimize=True)
-        jpeg_bytes = buf.getvalue()
-        if len(jpeg_bytes) <= _HELP_IMAGE_MAX_SEND_BYTES:
-            logger.warning(
-                "help image encoded as JPEG q={} after shrink orig={}x{} final={}x{} bytes={}",
-                quality,
-                orig_w,
-                orig_h,
-                work.width,
-                work.height,
-                len(jpeg_bytes),
-            )
-            return jpeg_bytes
-
-    logger.warning(
-        "help image still large after JPEG fallback bytes={} (may fail on protocol)",
-        len(jpeg_bytes),
-    )
-    return jpeg_bytes
-
-
-def _png_bytes(image: Image.Image) -> bytes:
-    buf = io.BytesIO()
-    image.save(buf, format="PNG", optimize=True, compress_level=9)
-    return buf.getvalue()
-
+def help_render_key(markdown_content: str, style_name: str) -> str:
+    """Markdown 摘要 + 样式名 + 样式修订 → 内容寻址键。"""
+    raw = f"{style_name}\0{_help_image_cache_suffix()}\0{markdown_content}"
+    return hashlib.sha256(raw.encode()).hexdigest()
 
-def get_cache_path(markdown_content: str, style_name: str, group_id: int | None = None) -> Path:
-    """根据markdown内容和群id生成本地路径"""
-    help_data_dir = plugin_data_dir("help")
-    if group_id is not None:
-        cache_dir = help_data_dir / str(group_id)
-    else:
-        cache_dir = help_data_dir / "private"
 
+def get_cache_path(markdown_content: str, style_name: str) -> Path:
+    """根据 markdown 内容与样式修订生成内容寻址路径（按键前两位分桶）"""
+    key = help_render_key(markdown_content, style_name)
+    cache_dir = plugin_data_dir("help") / _HELP_RENDER_STORE_DIR / key[:2]
     cache_dir.mkdir(parents=True, exist_ok=True)
-
-    content_hash = hashlib.md5(f"{markdown_content}_{style_name}_{_help_image_cache_suffix()}".encode()).hexdigest()
-    return cache_dir / f"{content_hash}.png"
+    return cache_dir / f"{key}.img"
 
 
-def load_cached_image(markdown_content: str, style_name: str, group_id: int | None = None) -> bytes | None:
+def load_cached_image(markdown_content: str, style_name: str) -> bytes | None:
     """从本地加载图片"""
-    cache_path = get_cache_path(markdown_content, style_name, group_id)
-    if cache_path.exists():
+    cache_path = get_cache_path(markdown_content, style_name)
+    try:
         return cache_path.read_bytes()
-    return None
+    except OSError:
+        return None
 
 
-def save_image_to_cache(image_data: bytes, markdown_content: str, style_name: str, group_id: int | None = None) -> None:
-    """将图片保存到本地"""
-    cache_path = get_cache_path(markdown_content, style_name, group_id)
-    cache_path.write_bytes(image_data)
-    _prune_help_cache_dir(cache_path.parent, keep=_HELP_CACHE_FILES_PER_DIR_MAX, current=cache_path)
+def save_image_to_cache(image_data: bytes, markdown_content: str, style_name: str) -> None:
+    """将图片写入内容寻址存储；每累计若干次写入做一次全局淘汰"""
+    global _saves_since_prune
+    cache_path = get_cache_path(markdown_content, style_name)
+    tmp = cache_path.with_suffix(".tmp")
+    tmp.write_bytes(image_data)
+    tmp.replace(cache_path)
+    _saves_since_prune += 1
+    if _saves_since_prune >= _HELP_CACHE_PRUNE_EVERY_SAVES:
+        _saves_since_prune = 0
+        prune_help_render_store(keep=_HELP_CACHE_FILES_MAX)
 
 
-def _prune_help_cache_dir(cache_dir: Path, *, keep: int, current: Path) -> None:
+def prune_help_render_store(*, keep: int) -> int:
+    """按 mtime 保留最新 keep 个成图，返回删除数。"""
     if keep < 1:
         keep = 1
+    root = plugin_data_dir("help") / _HELP_RENDER_STORE_DIR
     try:
-        pngs = [p for p in cache_dir.glob("*.png") if p.is_file()]
+        files = [p for p in root.glob("*/*.img") if p.is_file()]
     except OSError:
-        return
-    if len(pngs) <= keep:
-        return
+        return 0
+    if len(files) <= keep:
+        return 0
 
     def _sort_key(path: Path) -> tuple[int, str]:
         try:
@@ -208,103 +197,296 @@ def _prune_help_cache_dir(cache_dir: Path, *, keep: int, current: Path) -> None:
             mtime_ns = 0
         return (mtime_ns, path.name)
 
-    try:
-        current_resolved = current.resolve()
-    except OSError:
-        current_resolved = current
-    survivors = {current_resolved}
-    remaining = keep - 1
-    if remaining > 0:
-        for path in sorted(pngs, key=_sort_key, reverse=True):
-            try:
-                resolved = path.resolve()
-            except OSError:
-                resolved = path
-            if resolved == current_resolved:
-                continue
-            survivors.add(resolved)
-            remaining -= 1
-            if remaining == 0:
-                break
-    for path in pngs:
+    removed = 0
+    for path in sorted(files, key=_sort_key, reverse=True)[keep:]:
         try:
-            if path.resolve() not in survivors:
-                path.unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+            removed += 1
         except OSError:
             continue
+    return removed
+
+
+def _mem_get(key: str) -> bytes | None:
+    data = _render_mem.get(key)
+    if data is not None:
+        _render_mem.move_to_end(key)
+    return data
 
 
-async def _render_markdown(
-    markdown_content: str, style_name: str, available_styles: dict
-) -> tuple[io.BytesIO, Image.Image]:
-    """核心渲染函数"""
-    default_style_name = get_default_style(None)
-    style = available_styles.get(style_name, available_styles.get(default_style_name, pillowmd.MdStyle()))
+def _mem_put(key: str, data: bytes) -> None:
+    global _render_mem_bytes
+    old = _render_mem.pop(key, None)
+    if old is not None:
+        _render_mem_bytes -= len(old)
+    _render_mem[key] = data
+    _render_mem_bytes += len(data)
+    while _render_mem_bytes > _HELP_RENDER_MEM_MAX_BYTES and len(_render_mem) > 1:
+        _, evicted = _render_mem.popitem(last=False)
+        _render_mem_bytes -= len(evicted)
+
+
+def _help_paint_spec() -> HelpPaintSpec | None:
     from .config import get_help_config
 
     help_cfg = get_help_config()
-
-    paint_arg = None
-    auto_page = False
-    if help_cfg.side_paint_enabled:
-        paint_dir = project_path("resource", "styles", "default", "imgs")
-        pillowmd.Setting.PAINT_PATH = paint_dir
-        paint_path = paint_dir / help_cfg.side_paint_filename
-        if paint_path.is_file():
-            with Image.open(paint_path) as opened:
-                pil = opened.convert("RGBA")
-            sc = help_cfg.side_paint_scale
-            if sc > 0 and sc != 1.0:
-                nw = max(1, int(pil.width * sc))
-                nh = max(1, int(pil.height * sc))
-                pil = pil.resize((nw, nh), Image.Resampling.LANCZOS)
-            # 传 Image 时库仍会在 tys>300 且 tys<txs*2.5 时按正文高度再缩放立绘
-            paint_arg = pil
-        else:
-            paint_arg = help_cfg.side_paint_filename
-        auto_page = help_cfg.side_paint_auto_page
-
-    render_result = await pillowmd.MdToImage(
-        markdown_content,
-        style=style,
-        paint=paint_arg,
-        autoPage=auto_page,
+    if not help_cfg.side_paint_enabled:
+        return None
+    return HelpPaintSpec(
+        paint_dir=str(project_path("resource", "styles", "default", "imgs")),
+        filename=help_cfg.side_paint_filename,
+        scale=help_cfg.side_paint_scale,
+        auto_page=help_cfg.side_paint_auto_page,
     )
-    image = render_result.image
 
-    image = resize_image_if_needed(image)
 
-    encoded = encode_help_image_for_send(image)
-    img_bytes = io.BytesIO(encoded)
+def _resolve_style_name(style_name: str, available: dict) -> str:
+    if style_name in available:
+        return style_name
+    return get_default_style(None)
 
-    return img_bytes, image
 
+def _render_markdown_bytes_sync(markdown_content: str, style_name: str, available_styles: dict) -> bytes:
+    """线程渲染入口（workers=0 或无进程池时）：独立事件循环内完成 PIL 成图与编码。"""
+    style = available_styles.get(_resolve_style_name(style_name, available_styles), pillowmd.MdStyle())
+    return asyncio.run(render_help_markdown(markdown_content, style, _help_paint_spec()))
 
-async def render_markdown_to_image(
-    markdown_content: str, style_name: str, available_styles: dict, group_id: int | None = None
-) -> bytes:
-    # 首先尝试从本地加载图片
-    cached_image = load_cached_image(markdown_content, style_name, group_id)
+
+def _render_pool_start_method() -> str | None:
+    # 事件循环进程里有多个线程，fork 可能把别的线程持有的锁带进子进程；用 forkserver / spawn
+    methods = multiprocessing.get_all_start_methods()
+    for method in ("forkserver", "spawn"):
+        if method in methods:
+            return method
+    return None
+
+
+def _get_render_pool(available_styles: dict) -> Executor | None:
+    """按配置懒建进程池；workers=0 时返回 None（退回线程渲染）。样式重载后重建。"""
+    global _render_pool, _render_pool_styles, _render_pool_specs
+    from .config import get_help_config
+
+    cfg = get_help_config()
+    workers = int(cfg.prerender_workers)
+    method = _render_pool_start_method()
+    if workers <= 0 or method is None:
+        return None
+    if _render_pool is None or _render_pool_styles is not available_styles:
+        shutdown_help_render_pool()
+        _render_pool_styles = available_styles
+        _render_pool_specs = help_style_specs(cfg)
+        _render_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+    return _render_pool
+
+
+def shutdown_help_render_pool() -> None:
+    """样式重载、子进程崩溃或进程退出时回收渲染子进程（子进程缓存了已加载的样式）。"""
+    global _render_pool
+    pool = _render_pool
+    _render_pool = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _render_in_pool(pool: Executor, markdown_content: str, style_name: str) -> bytes:
+    specs = _render_pool_specs
+    spec = specs.get(_resolve_style_name(style_name, specs), ("default", ""))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, render_help_markdown_in_worker, markdown_content, spec, _help_paint_spec())
+
+
+async def _render_off_loop(markdown_content: str, style_name: str, available_styles: dict) -> bytes:
+    started = time.perf_counter()
+    try:
+        pool = _get_render_pool(available_styles)
+        if pool is not None:
+            try:
+                data = await _render_in_pool(pool, markdown_content, style_name)
+            except BrokenProcessPool:
+                # 子进程崩溃后整个池不可用：丢弃重建，本次重试一次
+                logger.warning("help render pool broken, rebuilding")
+                _render_stats["pool_rebuilds"] += 1
+                shutdown_help_render_pool()
+                pool = _get_render_pool(available_styles)
+                if pool is None:
+                    raise
+                data = await _render_in_pool(pool, markdown_content, style_name)
+        else:
+            data = await asyncio.to_thread(_render_markdown_bytes_sync, markdown_content, style_name, available_styles)
+    except Exception:
+        _render_stats["render_errors"] += 1
+        raise
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    _render_stats["renders"] += 1
+    _render_stats["render_ms_sum"] += elapsed_ms
+    _render_stats["render_ms_max"] = max(_render_stats["render_ms_max"], elapsed_ms)
+    return data
+
+
+def _load_or_fix_cached_sync(markdown_content: str, style_name: str) -> bytes | None:
+    cached_image = load_cached_image(markdown_content, style_name)
+    if not cached_image:
+        return None
+    if len(cached_image) > HELP_IMAGE_MAX_SEND_BYTES:
+        with Image.open(io.BytesIO(cached_image)) as im:
+            fixed = encode_help_image_for_send(im.convert("RGBA"))
+        save_image_to_cache(fixed, markdown_content, style_name)
+        return fixed
+    return cached_image
+
+
+async def _render_and_store(markdown_content: str, style_name: str, available_styles: dict, key: str) -> bytes:
+    cached_image = await asyncio.to_thread(_load_or_fix_cached_sync, markdown_content, style_name)
     if cached_image:
-        if len(cached_image) > _HELP_IMAGE_MAX_SEND_BYTES:
-            with Image.open(io.BytesIO(cached_image)) as im:
-                fixed = encode_help_image_for_send(im.convert("RGBA"))
-            save_image_to_cache(fixed, markdown_content, style_name, group_id)
-            return fixed
+        _render_stats["disk_hits"] += 1
+        _mem_put(key, cached_image)
         return cached_image
 
-    # 如果缓存中没有，则渲染图片
-    img_bytes, _ = await _render_markdown(markdown_content, style_name, available_styles)
-    image_data = img_bytes.getvalue()
+    image_data = await _render_off_loop(markdown_content, style_name, available_styles)
+    await asyncio.to_thread(save_image_to_cache, image_data, markdown_content, style_name)
+    _mem_put(key, image_data)
+    return image_data
 
-    # 保存到缓存
-    save_image_to_cache(image_data, markdown_content, style_name, group_id)
 
-    return image_data
+async def render_markdown_to_image(markdown_content: str, style_name: str, available_styles: dict) -> bytes:
+    """内存 → 内容寻址磁盘 → 渲染池；同键并发请求共享一次渲染。"""
+    key = help_render_key(markdown_content, style_name)
+    cached = _mem_get(key)
+    if cached is not None:
+        _render_stats["mem_hits"] += 1
+        return cached
+    _maybe_schedule_prerender_on_revision_change(available_styles, style_name)
+
+    pending = _render_inflight.get(key)
+    if pending is not None:
+        _render_stats["mem_hits"] += 1
+        return await asyncio.shield(pending)
+
+    fut: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+    _render_inflight[key] = fut
+    try:
+        data = await _render_and_store(markdown_content, style_name, available_styles, key)
+    except BaseException as e:
+        if not fut.done():
+            fut.set_exception(e)
+            # 无并发等待者时避免 "exception was never retrieved"
+            fut.exception()
+        raise
+    else:
+        fut.set_result(data)
+        return data
+    finally:
+        _render_inflight.pop(key, None)
 
 
 async def send_markdown_as_image(
-    markdown_content: str, style_name: str, available_styles: dict, matcher: Matcher, group_id: int | None = None
+    markdown_content: str, style_name: str, available_styles: dict, matcher: Matcher
 ) -> None:
-    image_data = await render_markdown_to_image(markdown_content, style_name, available_styles, group_id)
+    image_data = await render_markdown_to_image(markdown_content, style_name, available_styles)
     await matcher.finish(MessageSegment.image(image_data))
+
+
+async def _run_help_prerender(available_styles: dict, style_name: str) -> None:
+    """后台枚举全部帮助页并补齐缺失成图；并发度与渲染池一致。"""
+    global _last_warm_at, _last_warm_ms, _prerendered_revision
+    from .config import get_help_config
+    from .markdown_generator import iter_help_prerender_pages
+
+    revision = _help_image_cache_suffix()
+    started = time.perf_counter()
+    pages = list(iter_help_prerender_pages(get_help_config()))
+    sem = asyncio.Semaphore(max(1, int(get_help_config().prerender_workers)))
+    renders_before = _render_stats["renders"]
+
+    async def _one(markdown_content: str) -> None:
+        async with sem:
+            try:
+                await render_markdown_to_image(markdown_content, style_name, available_styles)
+            except Exception as e:
+                logger.debug("help prerender page failed: {}", e)
+
+    await asyncio.gather(*(_one(md) for md in pages))
+    await asyncio.to_thread(prune_help_render_store, keep=_HELP_CACHE_FILES_MAX)
+    if not _legacy_dirs_cleaned:
+        await asyncio.to_thread(remove_legacy_help_cache_dirs)
+    _prerendered_revision = revision
+    _last_warm_at = time.time()
+    _last_warm_ms = int((time.perf_counter() - started) * 1000)
+    _render_stats["warm_runs"] += 1
+    _render_stats["warm_pages"] += len(pages)
+    rendered = _render_stats["renders"] - renders_before
+    _render_stats["warm_rendered"] += rendered
+    logger.info("help prerender done pages={} rendered={} elapsed_ms={}", len(pages), rendered, _last_warm_ms)
+
+
+def schedule_help_prerender(available_styles: dict, style_name: str) -> None:
+    """启动或样式/配置变更后后台预渲染；已有任务在跑则记下参数，结束后用最新样式再跑一轮。"""
+    global _prerender_task, _prerender_rerun
+    from .config import get_help_config
+
+    if not get_help_config().prerender_enabled:
+        return
+    if _prerender_task is not None and not _prerender_task.done():
+        _prerender_rerun = (available_styles, style_name)
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _prerender_rerun = None
+    _prerender_task = loop.create_task(_run_help_prerender(available_styles, style_name), name="help_prerender")
+    _prerender_task.add_done_callback(_on_prerender_done)
+
+
+def _on_prerender_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("help prerender failed: {}", task.exception())
+    rerun = _prerender_rerun
+    if rerun is not None and not task.cancelled():
+        schedule_help_prerender(*rerun)
+
+
+def remove_legacy_help_cache_dirs() -> int:
+    """清掉旧版按群分目录的成图（``<群号>/`` 与 ``private/`` 下的 png）；返回删除的目录数。"""
+    global _legacy_dirs_cleaned
+    _legacy_dirs_cleaned = True
+    root = plugin_data_dir("help")
+    removed = 0
+    try:
+        dirs = [p for p in root.iterdir() if p.is_dir() and (p.name.isdigit() or p.name == "private")]
+    except OSError:
+        return 0
+    for path in dirs:
+        try:
+            if any(not (f.is_file() and f.suffix == ".png") for f in path.iterdir()):
+                continue
+            shutil.rmtree(path)
+            removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info("help legacy per-group image cache removed dirs={}", removed)
+    return removed
+
+
+def _maybe_schedule_prerender_on_revision_change(available_styles: dict, style_name: str) -> None:
+    if _prerendered_revision and _prerendered_revision != _help_image_cache_suffix():
+        schedule_help_prerender(available_styles, style_name)
+
+
+def help_render_metrics_snapshot() -> dict[str, Any]:
+    hits = int(_render_stats["mem_hits"]) + int(_render_stats["disk_hits"])
+    lookups = hits + int(_render_stats["renders"]) + int(_render_stats["render_errors"])
+    renders = int(_render_stats["renders"])
+    return {
+        **{k: int(_render_stats[k]) for k in _RENDER_COUNTERS},
+        "lookups": lookups,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+        "render_ms_avg": round(_render_stats["render_ms_sum"] / renders, 1) if renders else None,
+        "mem_entries": len(_render_mem),
+        "mem_bytes": _render_mem_bytes,
+        "pool": "process" if _render_pool is not None else "thread",
+        "prerender_running": bool(_prerender_task is not None and not _prerender_task.done()),
+        "last_warm_at": _last_warm_at or None,
+        "last_warm_ms": _last_warm_ms,
+    }
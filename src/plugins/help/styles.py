@@ -1,9 +1,9 @@
 from pathlib import Path
 
-import pillowmd
 from nonebot import logger
 
 from src.foundation.paths import project_path
+from src.shared.utils.help_render_worker import HelpStyleSpec, load_help_style
 
 from .config import Config, get_help_config
 
@@ -12,50 +12,49 @@ def load_config() -> Config:
     return get_help_config()
 
 
-def load_custom_styles(config) -> dict[str, object]:
-    """根据配置加载自定义样式"""
-
-    styles = {}
-
-    for i in range(1, 6):
-        styles[f"style{i}"] = getattr(pillowmd.SampleStyles, f"STYLE{i}")
-
-    named_styles = {
-        "unicorn_sugar": pillowmd.SampleStyles.STYLE1,  # 独角兽Sugar风格，可爱系
-        "unicorn_gif": pillowmd.SampleStyles.STYLE2,  # 独角兽Suagar-GIF风格，GIF示例
-        "function_bg": pillowmd.SampleStyles.STYLE3,  # 函数绘制背景示例
-        "simple_beige": pillowmd.SampleStyles.STYLE4,  # 朴素米黄风格
-        "retro": pillowmd.SampleStyles.STYLE5,  # 最朴素的复古风格
-        "default": pillowmd.MdStyle(),  # 默认样式
-    }
-    styles.update(named_styles)
+def help_style_specs(config) -> dict[str, HelpStyleSpec]:
+    """样式名 → 可 pickle 的样式描述；渲染子进程据此自行加载样式。"""
+    specs: dict[str, HelpStyleSpec] = {f"style{i}": ("sample", f"STYLE{i}") for i in range(1, 6)}
+    specs.update({
+        "unicorn_sugar": ("sample", "STYLE1"),  # 独角兽Sugar风格，可爱系
+        "unicorn_gif": ("sample", "STYLE2"),  # 独角兽Suagar-GIF风格，GIF示例
+        "function_bg": ("sample", "STYLE3"),  # 函数绘制背景示例
+        "simple_beige": ("sample", "STYLE4"),  # 朴素米黄风格
+        "retro": ("sample", "STYLE5"),  # 最朴素的复古风格
+        "default": ("default", ""),  # 默认样式
+    })
 
     # 加载内置默认样式
     if config.default_styles:
-        _load_user_defined_styles(config.default_styles, styles)
+        _add_user_defined_style_specs(config.default_styles, specs)
 
     # 如果启用自定义样式加载且有配置的自定义样式
     if config.enable_custom_style_loading and config.custom_styles:
-        _load_user_defined_styles(config.custom_styles, styles)
+        _add_user_defined_style_specs(config.custom_styles, specs)
 
-    return styles
+    return specs
 
 
-def _load_user_defined_styles(custom_styles, styles_dict):
-    """加载用户自定义样式"""
+def _add_user_defined_style_specs(custom_styles, specs: dict[str, HelpStyleSpec]) -> None:
     for style_config in custom_styles:
+        raw_path = Path(style_config.path)
+        style_path = raw_path if raw_path.is_absolute() else project_path(style_config.path)
+        style_path = style_path.resolve()
+        if not style_path.exists():
+            logger.warning(f"help style path not found: {style_path}")
+            continue
+        specs[style_config.name] = ("dir", str(style_path))
+
+
+def load_custom_styles(config) -> dict[str, object]:
+    """根据配置加载自定义样式"""
+    styles = {}
+    for name, spec in help_style_specs(config).items():
         try:
-            raw_path = Path(style_config.path)
-            style_path = raw_path if raw_path.is_absolute() else project_path(style_config.path)
-            style_path = style_path.resolve()
-            if not style_path.exists():
-                logger.warning(f"help style path not found: {style_path}")
-                continue
-
-            custom_style = pillowmd.LoadMarkdownStyles(style_path)
-            styles_dict[style_config.name] = custom_style
+            styles[name] = load_help_style(spec)
         except Exception as e:
-            logger.warning(f"help style load failed name={style_config.name!r} path={style_config.path!r}: {e}")
+            logger.warning(f"help style load failed name={name!r} path={spec[1]!r}: {e}")
+    return styles
 
 
 def get_default_style(config) -> str:
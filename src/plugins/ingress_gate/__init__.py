@@ -36,7 +36,7 @@ from src.platform.ingress.hosted_activity_gate import (
     hosted_activity_ingress_passes,
 )
 from src.platform.ingress.notice_gate import ingress_notice_gate
-from src.platform.multi_bot.at_targets import group_at_qq_ids, message_at_fleet_bot
+from src.platform.ingress.parsed_event import parsed_group_event
 from src.platform.multi_bot.fleet import fleet_bot_ids_contains, get_fleet_bot_ids
 from src.platform.observability import SlowPathTimer, slow_path_threshold_ms
 from src.platform.shard import context as shard_ctx
@@ -72,7 +72,7 @@ def ingress_gate_active() -> bool:
 
 
 def pallas_at_targets(event: GroupMessageEvent) -> frozenset[int]:
-    ats = group_at_qq_ids(event)
+    ats = parsed_group_event(event).at_targets
     if not ats:
         return frozenset()
     return ats & get_fleet_bot_ids()
@@ -130,11 +130,13 @@ async def ingress_group_message_gate(bot, event) -> None:
     fanout_bypass = False
 
     try:
-        plain = (event.get_plaintext() or "").strip()
-        body = plain or event.raw_message
+        # 本事件的解析结果在此建立，后续 matcher / 复读直接复用
+        parsed = parsed_group_event(event)
+        plain = parsed.plain
+        body = parsed.body
         known_bot_sender = _known_bot_sender(user_id=user_id, self_id=self_id)
         pallas_ats = pallas_at_targets(event)
-        fanout_bypass = ingress_fanout_bypasses_claim(plain)
+        fanout_bypass = parsed.memo("fanout_bypass", ingress_fanout_bypasses_claim, plain)
         if fanout_bypass:
             _ingress_fanout_early_exit(
                 self_id=self_id,
@@ -157,7 +159,8 @@ async def ingress_group_message_gate(bot, event) -> None:
                 record_ingress_early_discard("federate")
             raise IgnoredException("federate group owner mismatch")
 
-        at_fleet = message_at_fleet_bot(event)
+        # 名册查询顺带刷新分片数据缓存，保持每条消息都走一次
+        at_fleet = bool(parsed.at_targets & get_fleet_bot_ids())
         early_once_done = False
         if not sharding_active and ingress_once_claim_safe_before_host_gates(
             int(event.group_id),
@@ -131,6 +131,15 @@ class Config(BaseModel):
             "填 100～5000 的整数",
         ),
     )
+    pallas_protocol_startup_concurrency: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description=field_help(
+            "随 Bot 启动时同时拉起几个协议账号",
+            "账号多时调大可缩短冷启动；过大可能瞬间占满 CPU/磁盘",
+        ),
+    )
     pallas_protocol_webui_port_min: int = Field(
         default=6099,
         ge=1024,
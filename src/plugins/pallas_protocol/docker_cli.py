@@ -55,6 +55,59 @@ async def docker_inspect_running_async(name: str) -> bool:
     return b"true" in (out or b"").lower()
 
 
+PALLAS_PROTOCOL_CONTAINER_LABEL = "pallas.protocol"
+
+
+def _running_names_from_ps(out: str) -> set[str]:
+    return {line.strip() for line in (out or "").splitlines() if line.strip()}
+
+
+async def docker_running_names_by_label_async(label: str = PALLAS_PROTOCOL_CONTAINER_LABEL) -> set[str] | None:
+    """一次 docker ps 取出带该 label 的运行中容器名；docker 不可用或失败时返回 None，由调用方逐个探测。"""
+    if not shutil.which("docker"):
+        return None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "docker",
+            "ps",
+            "--filter",
+            f"label={label}",
+            "--format",
+            "{{.Names}}",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout=15)
+    except TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return None
+    if proc.returncode != 0:
+        return None
+    return _running_names_from_ps((out or b"").decode("utf-8", errors="replace"))
+
+
+def docker_running_names_by_label_sync(label: str = PALLAS_PROTOCOL_CONTAINER_LABEL) -> set[str] | None:
+    if not shutil.which("docker"):
+        return None
+    try:
+        r = subprocess.run(  # noqa: S603
+            ["docker", "ps", "--filter", f"label={label}", "--format", "{{.Names}}"],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=15,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if r.returncode != 0:
+        return None
+    return _running_names_from_ps(r.stdout)
+
+
 def docker_inspect_running_sync(name: str) -> bool:
     if not shutil.which("docker"):
         return False
@@ -6,6 +6,7 @@ import secrets
 import shutil
 import socket
 import sys
+import time
 from collections import deque
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
@@ -32,6 +33,8 @@ from .contract import (
 )
 from .docker_cli import (
     docker_repository_from_ref,
+    docker_running_names_by_label_async,
+    docker_running_names_by_label_sync,
 )
 from .docker_cli import (
     docker_stderr_suggests_container_name_conflict as _docker_stderr_suggests_container_name_conflict,
@@ -77,6 +80,8 @@ class PallasProtocolService:
         self._accounts_file = self._data_dir / "accounts.json"
         self._accounts: dict[str, dict] = {}
         self._runtimes: dict[str, NapCatRuntime] = {}
+        # 最近一次随 Bot 启动的各账号拉起耗时，供协议页展示
+        self._startup_timings: dict[str, dict] = {}
         self._runtime_store = NapCatRuntimeStore(data_dir, config)
         self._snowluma_store = SnowLumaRuntimeStore(data_dir, config)
         self._runtime_profile_path = self._data_dir / "runtime_profile.json"
@@ -715,24 +720,72 @@ class PallasProtocolService:
                     pass
 
     async def start_all_enabled_accounts(self) -> None:
+        """分阶段启动：串行补全默认值（自动端口一次分配完）→ 一次 docker ps 取运行快照 → 限并发拉起。"""
         from nonebot import logger
 
+        pending: list[str] = []
         for account_id, account in list(self._accounts.items()):
             if not bool(account.get("enabled", True)):
                 continue
             self._protocol_runtime_backend(account).apply_defaults(account, self._resolve_qq)
-            if account.get("napcat_linux_docker") or account.get("snowluma_linux_docker"):
-                if self._linux_docker_container_running_sync(account):
-                    await self.ensure_docker_logs_if_needed(account_id)
-                    continue
-            if self.is_running(account_id):
-                continue
+            pending.append(account_id)
+        if not pending:
+            return
+        self._save_accounts()
+        running_names: set[str] | None = None
+        if any(self._is_linux_docker_account(self._accounts[aid]) for aid in pending):
+            running_names = await docker_running_names_by_label_async()
+        limit = max(1, int(getattr(self._config, "pallas_protocol_startup_concurrency", 4) or 1))
+        sem = asyncio.Semaphore(limit)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(self._startup_launch_account(aid, running_names, sem) for aid in pending))
+        counts: dict[str, int] = {}
+        for aid in pending:
+            action = str((self._startup_timings.get(aid) or {}).get("action") or "skipped")
+            counts[action] = counts.get(action, 0) + 1
+        summary = "，".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        logger.info(
+            f"Pallas-Bot 协议端: 启动 {len(pending)} 个账号（并发 {limit}）耗时 "
+            f"{(time.perf_counter() - t0) * 1000:.0f}ms：{summary}"
+        )
+
+    async def _startup_launch_account(
+        self, account_id: str, running_names: set[str] | None, sem: asyncio.Semaphore
+    ) -> None:
+        from nonebot import logger
+
+        account = self._accounts.get(account_id)
+        if account is None:
+            return
+        async with sem:
+            t0 = time.perf_counter()
+            action = "started"
+            error = ""
             try:
-                await self.start_account(account_id)
+                if self._is_linux_docker_account(account):
+                    if running_names is None:
+                        container_up = await self._linux_docker_container_running(account)
+                    else:
+                        container_up = self._linux_docker_container_name(account) in running_names
+                    if container_up:
+                        await self.ensure_docker_logs_if_needed(account_id)
+                        action = "already_running"
+                elif self.is_running(account_id):
+                    action = "already_running"
+                if action == "started":
+                    await self.start_account(account_id)
             except ValueError as e:
+                action, error = "failed", str(e)
                 logger.warning(f"Pallas-Bot 协议端: 自动启动账号 {account_id} 失败：{e}")
-            except Exception:
+            except Exception as e:
+                action, error = "failed", f"{type(e).__name__}: {e}"
                 logger.exception(f"Pallas-Bot 协议端: 自动启动账号 {account_id} 出现未预期异常")
+            self._startup_timings[account_id] = {
+                "action": action,
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+                "error": error,
+                "at": datetime.now(UTC).isoformat(),
+            }
 
     async def stop_all_enabled_accounts(self) -> None:
         from nonebot import logger
@@ -979,8 +1032,24 @@ class PallasProtocolService:
 
         return docker_container_name(account)
 
+    @staticmethod
+    def _is_linux_docker_account(account: dict) -> bool:
+        return bool(account.get("napcat_linux_docker") or account.get("snowluma_linux_docker"))
+
+    async def _linux_docker_container_running(self, account: dict) -> bool:
+        if not self._is_linux_docker_account(account):
+            return False
+        name = self._linux_docker_container_name(account)
+        if account.get("snowluma_linux_docker"):
+            from .snowluma_docker import snowluma_docker_container_running
+
+            return await snowluma_docker_container_running(name)
+        from .linux_docker import docker_container_running
+
+        return await docker_container_running(name)
+
     def _linux_docker_container_running_sync(self, account: dict) -> bool:
-        if not (account.get("snowluma_linux_docker") or account.get("napcat_linux_docker")):
+        if not self._is_linux_docker_account(account):
             return False
         name = self._linux_docker_container_name(account)
         if account.get("snowluma_linux_docker"):
@@ -1068,10 +1137,25 @@ class PallasProtocolService:
 
     def list_accounts(self) -> list[dict]:
         out: list[dict] = []
+        running_names: set[str] | None = None
+        if any(self._is_linux_docker_account(a) for a in self._accounts.values()):
+            running_names = docker_running_names_by_label_sync()
         for account_id, account in self._accounts.items():
-            out.append(self._compose_account_state(account_id, account, brief=True))
+            out.append(self._compose_account_state(account_id, account, brief=True, running_names=running_names))
         return out
 
+    async def list_accounts_async(self) -> list[dict]:
+        """事件循环上用：一次异步 docker ps 取运行快照；取不到时整体放线程池逐个探测。"""
+        running_names: set[str] | None = None
+        if any(self._is_linux_docker_account(a) for a in self._accounts.values()):
+            running_names = await docker_running_names_by_label_async()
+            if running_names is None:
+                return await asyncio.to_thread(self.list_accounts)
+        return [
+            self._compose_account_state(account_id, account, brief=True, running_names=running_names)
+            for account_id, account in list(self._accounts.items())
+        ]
+
     def has_account(self, account_id: str) -> bool:
         return account_id in self._accounts
 
@@ -1236,7 +1320,7 @@ class PallasProtocolService:
             raise KeyError("账号不存在")
         old_backend = str(account.get(ACCOUNT_PROTOCOL_BACKEND_KEY) or DEFAULT_PROTOCOL_BACKEND).strip().lower()
         old_backend = old_backend or DEFAULT_PROTOCOL_BACKEND
-        need_restart = self._napcat_core_running(account_id, account)
+        need_restart = await self._napcat_core_running_async(account_id, account)
         editable_keys = (
             "display_name",
             "command",
@@ -1342,7 +1426,7 @@ class PallasProtocolService:
         if restarted:
             await self.restart_account(account_id)
         return {
-            "account": self._compose_account_state(account_id, account),
+            "account": await self._account_state(account_id, account),
             "restarted": restarted,
             "needs_restart": bool(need_restart),
         }
@@ -1406,14 +1490,14 @@ class PallasProtocolService:
         runtime = self._runtime(account_id)
         async with runtime.lock:
             if account.get("napcat_linux_docker"):
-                if self._linux_docker_container_running_sync(account):
+                if await self._linux_docker_container_running(account):
                     await self._ensure_docker_logs_follower_locked(account_id, account, runtime)
-                    return self._compose_account_state(account_id, account)
+                    return await self._account_state(account_id, account, running=True)
                 return await self._start_account_linux_docker(account_id, account, runtime)
             if account.get("snowluma_linux_docker"):
-                if self._linux_docker_container_running_sync(account):
+                if await self._linux_docker_container_running(account):
                     await self._ensure_docker_logs_if_needed(account_id)
-                    return self._compose_account_state(account_id, account)
+                    return await self._account_state(account_id, account, running=True)
                 return await self._start_account_snowluma_linux_docker(account_id, account, runtime)
             if runtime.process and runtime.process.returncode is None:
                 return self._compose_account_state(account_id, account)
@@ -1486,7 +1570,7 @@ class PallasProtocolService:
         from nonebot import logger
 
         name = self._linux_docker_container_name(account)
-        if not self._linux_docker_container_running_sync(account):
+        if not await self._linux_docker_container_running(account):
             return
 
         following_ok = (
@@ -1601,7 +1685,7 @@ class PallasProtocolService:
             raise ValueError(err)
         else:
             raise ValueError("docker run 启动失败")
-        if not self._linux_docker_container_running_sync(account):
+        if not await self._linux_docker_container_running(account):
             raise ValueError("容器已创建但未在运行，请检查: docker logs " + name)
         runtime.started_at = datetime.now(UTC)
         logp = await asyncio.create_subprocess_exec(
@@ -1616,16 +1700,13 @@ class PallasProtocolService:
         )
         runtime.process = logp
         runtime.drain_task = asyncio.create_task(self._drain_logs(account_id))
-        return self._compose_account_state(account_id, account)
+        return await self._account_state(account_id, account, running=True)
 
     async def _start_account_snowluma_linux_docker(
         self, account_id: str, account: dict, runtime: NapCatRuntime
     ) -> dict:
         be = self._protocol_runtime_backend(account)
-        from .snowluma_docker import (
-            build_snowluma_docker_run_argv,
-            snowluma_docker_container_running_sync,
-        )
+        from .snowluma_docker import build_snowluma_docker_run_argv
 
         await self._remove_both_linux_docker_container_names_for_account(account)
         if os.name == "nt":
@@ -1687,7 +1768,7 @@ class PallasProtocolService:
             raise ValueError(err)
         else:
             raise ValueError("docker run 启动失败")
-        if not snowluma_docker_container_running_sync(name):
+        if not await self._linux_docker_container_running(account):
             raise ValueError("容器已创建但未在运行，请检查: docker logs " + name)
         runtime.started_at = datetime.now(UTC)
         logp = await asyncio.create_subprocess_exec(
@@ -1702,7 +1783,7 @@ class PallasProtocolService:
         )
         runtime.process = logp
         runtime.drain_task = asyncio.create_task(self._drain_logs(account_id))
-        return self._compose_account_state(account_id, account)
+        return await self._account_state(account_id, account, running=True)
 
     async def _stop_account_linux_docker(self, account_id: str, account: dict) -> dict | None:
         name = self._linux_docker_container_name(account)
@@ -1734,7 +1815,7 @@ class PallasProtocolService:
 
                 await docker_stop(name)
             runtime.docker_container_name = None
-        return self._compose_account_state(account_id, account)
+        return await self._account_state(account_id, account)
 
     async def stop_account(self, account_id: str) -> dict | None:
         account = self._accounts.get(account_id)
@@ -1774,6 +1855,20 @@ class PallasProtocolService:
         await self.stop_account(account_id)
         return await self.start_account(account_id)
 
+    async def reconnect_account_for_shard(self, qq: str) -> bool:
+        """分片迁移后按注册表重写该 QQ 的 ws_url；运行中则重启使协议端连到新 worker。"""
+        key = str(qq).strip()
+        for account_id, account in list(self._accounts.items()):
+            if str(account.get("qq") or account.get("id") or account_id).strip() != key:
+                continue
+            self._merge_onebot_ws_from_env(account, force=True)
+            self._protocol_runtime_backend(account).sync_onebot(account, self._resolve_qq)
+            self._save_accounts()
+            if self.is_running(account_id):
+                await self.restart_account(account_id)
+            return True
+        return False
+
     def tail_logs(self, account_id: str, lines: int = 200) -> list[str]:
         if lines <= 0:
             return []
@@ -1813,7 +1908,7 @@ class PallasProtocolService:
         account = self._accounts.get(account_id)
         if not account:
             raise KeyError("账号不存在")
-        need_restart = self._napcat_core_running(account_id, account)
+        need_restart = await self._napcat_core_running_async(account_id, account)
         be = self._protocol_runtime_backend(account)
         be.apply_defaults(account, self._resolve_qq)
         merged = be.update_account_configs(account, payload, self._resolve_qq)
@@ -1928,15 +2023,34 @@ class PallasProtocolService:
             else:
                 runtime.process = None
 
-    def _compose_account_state(self, account_id: str, account: dict, *, brief: bool = False) -> dict:
+    async def _account_state(self, account_id: str, account: dict, *, running: bool | None = None) -> dict:
+        """异步路径用：容器状态走异步探测（或调用方已知的结果），不在事件循环上跑阻塞的 docker CLI。"""
+        running_names: set[str] | None = None
+        if self._is_linux_docker_account(account):
+            if running is None:
+                running = await self._linux_docker_container_running(account)
+            running_names = {self._linux_docker_container_name(account)} if running else set()
+        return self._compose_account_state(account_id, account, running_names=running_names)
+
+    async def _napcat_core_running_async(self, account_id: str, account: dict) -> bool:
+        if self._is_linux_docker_account(account):
+            return await self._linux_docker_container_running(account)
+        return self._napcat_core_running(account_id, account)
+
+    def _compose_account_state(
+        self, account_id: str, account: dict, *, brief: bool = False, running_names: set[str] | None = None
+    ) -> dict:
         be = self._protocol_runtime_backend(account)
         be.apply_defaults(account, self._resolve_qq)
         runtime = self._runtimes.get(account_id)
         process_running = False
         pid = None
         started_at = None
-        if account.get("napcat_linux_docker") or account.get("snowluma_linux_docker"):
-            process_running = self._linux_docker_container_running_sync(account)
+        if self._is_linux_docker_account(account):
+            if running_names is not None:
+                process_running = self._linux_docker_container_name(account) in running_names
+            else:
+                process_running = self._linux_docker_container_running_sync(account)
             started_at = runtime.started_at.isoformat() if runtime and runtime.started_at else None
         elif runtime and runtime.process and runtime.process.returncode is None:
             process_running = True
@@ -2045,6 +2159,7 @@ class PallasProtocolService:
             "launch_issues": launch_issues,
             "pid": pid,
             "started_at": started_at,
+            "startup_timing": self._startup_timings.get(account_id),
             "data_path_hints": be.describe_account_data_paths(account),
             "native_webui_url": native_webui,
             "native_webui_auth_note": native_webui_auth_note,
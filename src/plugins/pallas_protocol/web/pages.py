@@ -1532,6 +1532,14 @@ def render_dashboard(base_path: str, pallas_console_http_base: str = "/pallas")
         <div class="kpi"><div class="k">已连接</div><div class="v">${{connected}}</div></div>
         <div class="kpi"><div class="k">异常</div><div class="v">${{bad}}</div></div>`;
     }}
+    function startupTimingText(a) {{
+      const t = a && a.startup_timing;
+      if (!t) return "";
+      const label = {{ started: "已拉起", already_running: "已在运行", failed: "失败" }}[t.action] || t.action;
+      const ms = Number(t.elapsed_ms || 0);
+      const dur = ms >= 1000 ? `${{(ms / 1000).toFixed(1)}}s` : `${{Math.round(ms)}}ms`;
+      return `开机启动：${{label}} · ${{dur}}`;
+    }}
     function renderAccounts() {{
       const mode = viewMode || "card";
       const rows = getFilteredAccountRows();
@@ -1570,7 +1578,7 @@ def render_dashboard(base_path: str, pallas_console_http_base: str = "/pallas")
             <td data-label="实例名"><span class="acc-td-val">${{a.display_name || a.qq || a.id}}</span></td>
             <td data-label="QQ号"><span class="acc-td-val">${{a.qq || a.id}}</span></td>
             <td data-label="版本"><span class="acc-td-val">${{a.runtime_version || "未知"}}<div class="muted" style="font-size:0.75rem">${{a.runtime_source || "未知来源"}}</div></span></td>
-            <td data-label="状态"><span class="acc-td-val"><span class="tag ${{cls}}">${{st}}</span></span></td>
+            <td data-label="状态"><span class="acc-td-val"><span class="tag ${{cls}}">${{st}}</span>${{startupTimingText(a) ? `<div class="muted" style="font-size:0.75rem" title="${{escHtmlDash((a.startup_timing || {{}}).error || "")}}">${{startupTimingText(a)}}</div>` : ""}}</span></td>
             <td data-label="内置 WebUI"><span class="acc-td-val">${{webuiCell}}</span></td>
             <td data-label="操作" class="acc-td-actions">
               <div class="row">
@@ -1630,6 +1638,7 @@ def render_dashboard(base_path: str, pallas_console_http_base: str = "/pallas")
           <p class="acc-card-meta">QQ：${{a.qq || a.id}}</p>
           <p class="acc-card-meta">版本：${{a.runtime_version || "未知"}}</p>
           <p class="acc-card-meta">归属：${{a.runtime_source || "未知来源"}}</p>
+          ${{startupTimingText(a) ? `<p class="acc-card-meta" title="${{escHtmlDash((a.startup_timing || {{}}).error || "")}}">${{startupTimingText(a)}}</p>` : ""}}
           ${{webuiBlock}}
           <div class="row" style="margin-top:10px">
             ${{startStopBtn}}
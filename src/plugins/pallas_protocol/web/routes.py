@@ -332,7 +332,7 @@ def register_pallas_protocol_routes(
         ws_token = str(payload.get("ws_token", "") or "")
         ws_name = str(payload.get("ws_name", "") or "pallas").strip() or "pallas"
 
-        existing = {acc["id"]: acc for acc in manager.list_accounts()}
+        existing = {acc["id"]: acc for acc in await manager.list_accounts_async()}
         result, new_accounts = run_import(
             source_dir,
             existing,
@@ -745,7 +745,7 @@ def register_pallas_protocol_routes(
         x_pallas_protocol_token: str | None = Header(default=None, alias="X-Pallas-Protocol-Token"),
     ):
         _auth(x_pallas_protocol_token, token)
-        accounts = await asyncio.to_thread(manager.list_accounts)
+        accounts = await manager.list_accounts_async()
         return {"accounts": accounts}
 
     @app.get(f"{base}/api/accounts/{{account_id}}")
@@ -340,49 +340,23 @@ def _is_onebot_v11_bot(bot: object) -> bool:
 
 
 def _read_pending_friend_requests_disk() -> dict[str, dict[str, str]]:
-    """与 request_handler 插件写入的 JSON 结构一致：{ bot_id: { user_id: flag } }。"""
+    """request_handler 落盘的待处理好友申请：{ bot_id: { user_id: flag } }。"""
+    from src.plugins.request_handler import state_store
 
-    from src.foundation.paths import plugin_data_dir
-
-    path = plugin_data_dir("request_handler", create=False) / "pending_friend_requests.json"
-    if not path.exists():
-        return {}
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
+        return state_store.all_pending_friends()
     except Exception:  # noqa: BLE001
         return {}
-    if not isinstance(raw, dict):
-        return {}
-    out: dict[str, dict[str, str]] = {}
-    for bot_key, mp in raw.items():
-        if not isinstance(mp, dict):
-            continue
-        bk = str(bot_key)
-        out[bk] = {str(u): str(f) for u, f in mp.items()}
-    return out
-
-
-def _save_pending_friend_requests_disk(data: dict[str, dict[str, str]]) -> None:
-    from src.foundation.paths import plugin_data_dir
-
-    path = plugin_data_dir("request_handler") / "pending_friend_requests.json"
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
 def _read_pending_group_requests_disk() -> dict[str, dict[str, dict[str, Any]]]:
-    """与 request_handler 插件写入的 JSON 结构一致：{ bot_id: { group_id: request } }。"""
-
-    from src.foundation.paths import plugin_data_dir
+    """request_handler 落盘的待处理入群申请：{ bot_id: { group_id: request } }。"""
+    from src.plugins.request_handler import state_store
 
-    path = plugin_data_dir("request_handler", create=False) / "pending_group_requests.json"
-    if not path.exists():
-        return {}
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
+        raw = state_store.all_pending_groups()
     except Exception:  # noqa: BLE001
         return {}
-    if not isinstance(raw, dict):
-        return {}
     out: dict[str, dict[str, dict[str, Any]]] = {}
     for bot_key, mp in raw.items():
         if not isinstance(mp, dict):
@@ -412,13 +386,6 @@ def _read_pending_group_requests_disk() -> dict[str, dict[str, dict[str, Any]]]:
     return out
 
 
-def _save_pending_group_requests_disk(data: dict[str, dict[str, dict[str, Any]]]) -> None:
-    from src.foundation.paths import plugin_data_dir
-
-    path = plugin_data_dir("request_handler") / "pending_group_requests.json"
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
 def _ai_extension_config_path():
     from src.foundation.paths import plugin_data_dir
 
@@ -1446,8 +1413,17 @@ async def flush_unified_console_live_stats_async(*, include_hist: bool = False)
     await asyncio.to_thread(flush_unified_console_live_stats_sync, include_hist=include_hist)
 
 
+def _help_render_metrics() -> dict[str, Any]:
+    try:
+        from src.plugins.help.renderer import help_render_metrics_snapshot
+    except Exception:
+        return {}
+    return help_render_metrics_snapshot()
+
+
 def flush_worker_shard_console_stats_sync(*, include_hist: bool = False) -> None:
     from src.platform.ingress.dispatch_metrics import dispatch_metrics_snapshot as ingress_dispatch_metrics_snapshot
+    from src.platform.observability.bot_load import bot_load_snapshot
     from src.platform.shard.console_stats import process_memory_snapshot, write_worker_stats_sync
     from src.platform.shard.coord_pending import coord_pending_snapshot_sync
     from src.platform.shard.ingress_metrics import ingress_metrics_snapshot
@@ -1476,6 +1452,8 @@ def flush_worker_shard_console_stats_sync(*, include_hist: bool = False) -> None
             "repeater_ingress": repeater_ingress_metrics_snapshot(),
             "coord_pending": coord_pending_snapshot_sync(),
             "process_memory": process_memory_snapshot(),
+            "help_render": _help_render_metrics(),
+            "bot_load": bot_load_snapshot(),
         },
     )
 
@@ -3329,7 +3307,7 @@ async def _collect_online_bot_profiles() -> dict[str, dict[str, Any]]:
             }
         from src.foundation.db.pallas_console_data import pallas_protocol_snapshot
 
-        snap = pallas_protocol_snapshot()
+        snap = await asyncio.to_thread(pallas_protocol_snapshot)
         if snap and isinstance(snap.get("accounts"), list):
             for acc in snap["accounts"]:
                 if not isinstance(acc, dict):
@@ -3390,7 +3368,7 @@ async def _friend_requests_overview(
     self_id: str | None,
     include_doubt: bool,
 ) -> dict[str, Any]:
-    disk = _read_pending_friend_requests_disk()
+    disk = await asyncio.to_thread(_read_pending_friend_requests_disk)
     online_by_self: dict[str, tuple[str, object]] = {}
 
     if _shard_hub_console():
@@ -3677,6 +3655,14 @@ class _DbBackupBody(BaseModel):
     )
 
 
+class _ShardRebalanceBody(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    bot_id: str | None = Field(default=None, max_length=20, description="手动迁移的 QQ；空则按实测负载规划")
+    to_shard: int | None = Field(default=None, ge=0, le=255, description="手动迁移的目标分片")
+    max_moves: int = Field(default=3, ge=1, le=10, description="自动规划时最多迁移几个牛牛")
+
+
 class _DbBackupDeleteBody(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -4244,6 +4230,55 @@ def register_extended_api(
             },
         })
 
+    @router.get(f"{x}/shard-load", include_in_schema=True)
+    async def _shard_load(max_moves: int = Query(default=3, ge=0, le=10)) -> JSONResponse:
+        from src.platform.shard.rebalance import rebalance_preview
+
+        data = await asyncio.to_thread(rebalance_preview, max_moves=max_moves)
+        return JSONResponse({"ok": True, "data": data})
+
+    @router.post(f"{x}/shard-rebalance", include_in_schema=True)
+    async def _shard_rebalance(
+        body: _ShardRebalanceBody,
+        token: str | None = Query(default=None),
+        x_pallas_token: str | None = Header(default=None, alias="X-Pallas-Token"),
+    ) -> JSONResponse:
+        """后台逐个迁移牛牛并重连协议端；进度与迁移前后负载见 GET /shard-load 的 last_run。"""
+        _check_pallas_write_token(plugin_config, x_pallas_token=x_pallas_token, token=token)
+        from dataclasses import asdict
+
+        from src.foundation.paths import plugin_data_dir
+        from src.platform.shard.rebalance import RebalanceMove, rebalance_preview, start_rebalance_run
+        from src.platform.shard.registry import get_shard_registry
+
+        if body.bot_id:
+            if body.to_shard is None:
+                raise HTTPException(status_code=400, detail="手动迁移需指定 to_shard")
+            from_shard = get_shard_registry().shard_for_bot(body.bot_id.strip())
+            if from_shard is None:
+                raise HTTPException(status_code=404, detail="账号未登记分片")
+            moves = [RebalanceMove(bot_id=body.bot_id.strip(), from_shard=from_shard, to_shard=body.to_shard, load=0.0)]
+        else:
+            preview = await asyncio.to_thread(rebalance_preview, max_moves=body.max_moves)
+            moves = [RebalanceMove(**mv) for mv in preview["moves"]]
+        if not moves:
+            return JSONResponse({"ok": True, "data": {"started": False, "moves": []}})
+        reconnect = None
+        try:
+            from src.plugins.pallas_protocol import manager as protocol_manager
+
+            reconnect = protocol_manager.reconnect_account_for_shard
+        except Exception:  # noqa: BLE001
+            pass
+        started = start_rebalance_run(
+            moves,
+            reconnect=reconnect,
+            accounts_path=plugin_data_dir("pallas_protocol", create=False) / "accounts.json",
+        )
+        if not started:
+            raise HTTPException(status_code=409, detail="已有迁移任务在执行")
+        return JSONResponse({"ok": True, "data": {"started": True, "moves": [asdict(m) for m in moves]}})
+
     @router.get(f"{x}/shard-observability", include_in_schema=True)
     async def _shard_observability() -> JSONResponse:
         from src.platform.shard.observability import aggregate_shard_observability
@@ -4971,7 +5006,7 @@ def register_extended_api(
 
         async def _load() -> dict[str, Any]:
             db_bots = await list_all_bot_configs_public()
-            snap = pallas_protocol_snapshot()
+            snap = await asyncio.to_thread(pallas_protocol_snapshot)
             bot_profiles = await _collect_online_bot_profiles()
             payload: dict[str, Any] = {
                 "nonebot_bots": _list_bots_dict(),
@@ -5514,7 +5549,7 @@ def register_extended_api(
 
         async def _load() -> dict[str, Any]:
             friend = await _friend_requests_overview(self_id=filter_sid, include_doubt=bool(doubt))
-            group = _read_pending_group_requests_disk()
+            group = await asyncio.to_thread(_read_pending_group_requests_disk)
             by_self: dict[str, dict[str, Any]] = {}
             for row in friend.get("bots", []):
                 row_sid = str(row.get("self_id") or "")
@@ -5568,6 +5603,8 @@ def register_extended_api(
         token: str | None = Query(default=None),
         x_pallas_token: str | None = Header(default=None, alias="X-Pallas-Token"),
     ) -> JSONResponse:
+        from src.plugins.request_handler import state_store
+
         _check_pallas_write_token(plugin_config, x_pallas_token=x_pallas_token, token=token)
         sid_i = int(body.self_id)
         _console_bot_connection_meta(sid_i)
@@ -5584,21 +5621,19 @@ def register_extended_api(
                 await _console_set_doubt_friend_add_request(sid_i, flag=flag, approve=approve)
                 drop_read_cache(_CONSOLE_APPROVAL_RELATED_CACHE_PREFIXES)
                 return JSONResponse({"ok": True, "data": {"handled": True}})
-            pending = _read_pending_friend_requests_disk()
+            pending = await asyncio.to_thread(_read_pending_friend_requests_disk)
             by_bot = pending.get(str(body.self_id), {})
             flag = str(by_bot.get(uid) or "")
             if not flag:
                 raise HTTPException(status_code=404, detail="未找到待处理好友申请")
             await _console_set_friend_add_request(sid_i, flag=flag, approve=approve)
-            by_bot.pop(uid, None)
-            pending[str(body.self_id)] = by_bot
-            _save_pending_friend_requests_disk(pending)
+            await asyncio.to_thread(state_store.delete_pending_friends, str(body.self_id), [uid])
             drop_read_cache(_CONSOLE_APPROVAL_RELATED_CACHE_PREFIXES)
             return JSONResponse({"ok": True, "data": {"handled": True}})
 
         if body.group_id is None:
             raise HTTPException(status_code=400, detail="group 请求需要 group_id")
-        pending_g = _read_pending_group_requests_disk()
+        pending_g = await asyncio.to_thread(_read_pending_group_requests_disk)
         by_bot_g = pending_g.get(str(body.self_id), {})
         req = by_bot_g.get(str(int(body.group_id)))
         if not isinstance(req, dict):
@@ -5609,9 +5644,7 @@ def register_extended_api(
             sub_type=str(req.get("sub_type") or "invite"),
             approve=approve,
         )
-        by_bot_g.pop(str(int(body.group_id)), None)
-        pending_g[str(body.self_id)] = by_bot_g
-        _save_pending_group_requests_disk(pending_g)
+        await asyncio.to_thread(state_store.delete_pending_groups, str(body.self_id), [str(int(body.group_id))])
         drop_read_cache(_CONSOLE_APPROVAL_RELATED_CACHE_PREFIXES)
         return JSONResponse({"ok": True, "data": {"handled": True}})
 
@@ -5622,6 +5655,8 @@ def register_extended_api(
         x_pallas_token: str | None = Header(default=None, alias="X-Pallas-Token"),
     ) -> JSONResponse:
         """批量处理好友/入群审批；单次写盘与缓存失效，减少控制台往返。"""
+        from src.plugins.request_handler import state_store
+
         _check_pallas_write_token(plugin_config, x_pallas_token=x_pallas_token, token=token)
         if not body.friends and not body.groups:
             raise HTTPException(status_code=400, detail="friends 与 groups 不能均为空")
@@ -5636,7 +5671,7 @@ def register_extended_api(
 
         pending_friend: dict[str, dict[str, str]] = {}
         if body.friends:
-            pending_friend = _read_pending_friend_requests_disk()
+            pending_friend = await asyncio.to_thread(_read_pending_friend_requests_disk)
 
         friends_by_sid: dict[str, list[_RequestBatchFriendRow]] = defaultdict(list)
         for it in body.friends:
@@ -5662,6 +5697,7 @@ def register_extended_api(
                 pending_friend[sid_str] = {}
             bot_pending = pending_friend[sid_str]
             sid_i = int(sid_str)
+            handled_uids: list[str] = []
 
             for it in items:
                 uid = str(int(it.user_id))
@@ -5685,6 +5721,7 @@ def register_extended_api(
                             raise ValueError("未找到待处理好友申请")
                         await _console_set_friend_add_request(sid_i, flag=flag, approve=approve)
                         bot_pending.pop(uid, None)
+                        handled_uids.append(uid)
                     friends_ok += 1
                 except Exception as e:  # noqa: BLE001
                     friends_fail += 1
@@ -5695,14 +5732,11 @@ def register_extended_api(
                         "error": str(e),
                     })
 
-            pending_friend[sid_str] = bot_pending
-
-        if body.friends:
-            _save_pending_friend_requests_disk(pending_friend)
+            await asyncio.to_thread(state_store.delete_pending_friends, sid_str, handled_uids)
 
         pending_group: dict[str, dict[str, dict[str, Any]]] = {}
         if body.groups:
-            pending_group = _read_pending_group_requests_disk()
+            pending_group = await asyncio.to_thread(_read_pending_group_requests_disk)
 
         groups_by_sid: dict[str, list[_RequestBatchGroupRow]] = defaultdict(list)
         for it in body.groups:
@@ -5728,6 +5762,7 @@ def register_extended_api(
                 pending_group[sid_str] = {}
             bot_grp = pending_group[sid_str]
             sid_i = int(sid_str)
+            handled_gids: list[str] = []
 
             for it in items:
                 gkey = str(int(it.group_id))
@@ -5742,6 +5777,7 @@ def register_extended_api(
                         approve=approve,
                     )
                     bot_grp.pop(gkey, None)
+                    handled_gids.append(gkey)
                     groups_ok += 1
                 except Exception as e:  # noqa: BLE001
                     groups_fail += 1
@@ -5752,10 +5788,7 @@ def register_extended_api(
                         "error": str(e),
                     })
 
-            pending_group[sid_str] = bot_grp
-
-        if body.groups:
-            _save_pending_group_requests_disk(pending_group)
+            await asyncio.to_thread(state_store.delete_pending_groups, sid_str, handled_gids)
         drop_read_cache(_CONSOLE_APPROVAL_RELATED_CACHE_PREFIXES)
 
         return JSONResponse({
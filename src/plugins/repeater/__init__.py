@@ -5,7 +5,14 @@ import time
 
 from nonebot import get_bot, get_driver, logger, on_message, on_notice
 from nonebot.adapters import Bot
-from nonebot.adapters.onebot.v11 import GroupMessageEvent, GroupRecallNoticeEvent, Message, MessageSegment, permission
+from nonebot.adapters.onebot.v11 import (
+    GroupMessageEvent,
+    GroupRecallNoticeEvent,
+    Message,
+    MessageSegment,
+    NoticeEvent,
+    permission,
+)
 from nonebot.exception import ActionFailed
 from nonebot.plugin import PluginMetadata
 from nonebot.rule import Rule
@@ -24,6 +31,11 @@ from src.features.corpus.prefetch import bind_corpus_prefetch_lifecycle
 from src.features.message_scrub import is_message_scrub_blocked_async
 from src.features.message_scrub.log_preview import scrub_intercept_log_preview
 from src.foundation.config import BotConfig
+from src.platform.multi_bot.member_profile import (
+    MEMBER_PROFILE_NOTICE_TYPES,
+    get_member_profile,
+    note_member_profile_notice,
+)
 from src.platform.observability import SlowPathTimer, slow_path_threshold_ms
 from src.plugins.dream.ban_ack_state import DREAM_BAN_ACK_SENT_STATE_KEY
 from src.shared.reply_command_rule import event_has_reply_target, event_targets_self, extract_reply_id_from_raw_message
@@ -34,8 +46,9 @@ from .ban_state import REPEATER_BAN_ACK_SENT_STATE_KEY
 from .emoji_reaction import reaction_msg
 from .event_gate import build_repeater_event_context, message_id_dict, message_id_lock
 from .learn_queue import bind_repeater_learn_lifecycle, enqueue_repeater_learn
-from .model import Chat
+from .model import Chat, warm_keyword_tokenizer
 from .reply_gate import should_prepare_repeater_reply
+from .warm_snapshot import load_warm_snapshot, save_warm_snapshot, save_warm_snapshot_if_due
 
 bind_repeater_learn_lifecycle()
 bind_corpus_prefetch_lifecycle()
@@ -101,10 +114,22 @@ __plugin_meta__ = PluginMetadata(
 
 driver = get_driver()
 
+# 发送失败后判断禁言：缓存有禁言通知维护，但仍只信任较新的记录，避免误把内容拉黑
+_SHUTUP_PROFILE_MAX_AGE_SEC = 300.0
+
 
 @driver.on_startup
 async def startup():
+    load_warm_snapshot()
     await Chat.update_global_blacklist()
+    asyncio.create_task(_warm_keyword_tokenizer())
+
+
+async def _warm_keyword_tokenizer() -> None:
+    try:
+        await asyncio.to_thread(warm_keyword_tokenizer)
+    except Exception as e:
+        logger.warning(f"repeater keyword tokenizer warm-up failed: {e}")
 
 
 @driver.on_shutdown
@@ -113,17 +138,15 @@ async def shutdown():
         await Chat.sync()
     except Exception:
         pass
+    await save_warm_snapshot(graceful=True)
 
 
 async def is_shutup(self_id: int, group_id: int) -> bool:
-    info = await get_bot(str(self_id)).call_api(
-        "get_group_member_info",
-        **{
-            "user_id": self_id,
-            "group_id": group_id,
-        },
+    profile = await get_member_profile(
+        get_bot(str(self_id)), group_id, self_id, max_age_sec=_SHUTUP_PROFILE_MAX_AGE_SEC
     )
-    flag: bool = info["shut_up_timestamp"] > time.time()
+    # 牛牛已不在群内时同样发不出去，不算内容问题
+    flag = profile is None or profile.shut_up()
 
     logger.info(f"bot [{self_id}] in group [{group_id}] is shutup: {flag}")
 
@@ -135,17 +158,12 @@ async def post_proc(message: Message, self_id: int, group_id: int) -> Message:
     for seg in message:
         if seg.type == "at":
             try:
-                info = await get_bot(str(self_id)).call_api(
-                    "get_group_member_info",
-                    **{
-                        "user_id": seg.data["qq"],
-                        "group_id": group_id,
-                    },
-                )
-            except ActionFailed:  # 群员不存在
+                profile = await get_member_profile(get_bot(str(self_id)), group_id, int(seg.data["qq"]))
+            except (ActionFailed, ValueError):  # @全体 等
+                continue
+            if profile is None:  # 群员不存在
                 continue
-            nick_name = info["card"] or info["nickname"]
-            new_msg += f"@{nick_name}"
+            new_msg += f"@{profile.display_name}"
         elif seg.type == "image":
             cq_code = str(seg)
             base64_data = await get_image(cq_code)
@@ -164,6 +182,23 @@ async def post_proc(message: Message, self_id: int, group_id: int) -> Message:
     return new_msg
 
 
+async def is_member_profile_notice(event: NoticeEvent) -> bool:
+    return event.notice_type in MEMBER_PROFILE_NOTICE_TYPES
+
+
+# 不阻断：群名片 / 进退群 / 禁言变化同步到群成员资料缓存
+member_profile_notice = on_notice(
+    rule=Rule(is_member_profile_notice),
+    priority=1,
+    block=False,
+)
+
+
+@member_profile_notice.handle()
+async def _(event: NoticeEvent):
+    await note_member_profile_notice(event)
+
+
 any_msg = on_message(
     priority=15,
     block=False,
@@ -468,6 +503,11 @@ async def speak_up():
         await asyncio.sleep(random.randint(2, 5))
 
 
+@scheduler.scheduled_job("interval", seconds=30)
+async def write_warm_snapshot():
+    await save_warm_snapshot_if_due()
+
+
 @scheduler.scheduled_job("cron", hour=4)
 async def update_data():
     from .shard_opt import repeater_maintenance_runs_on_worker
@@ -8,6 +8,7 @@ from src.foundation.db import Ban, Context, make_blacklist_repository
 from src.foundation.db.context_repo_access import context_repo
 
 from .config import get_repeater_config
+from .reply_buffer import ReplyBook, ReplyRecord
 
 plugin_config = get_repeater_config()
 
@@ -27,35 +28,34 @@ class BanManager:
     _blacklist_answer_reserve = defaultdict(set)  # 候选黑名单
 
     @staticmethod
-    def find_ban_reply(group_id: int, bot_id: int, ban_raw_message: str, reply_dict: dict) -> dict | None:
-        if group_id not in reply_dict:
+    def find_ban_reply(group_id: int, bot_id: int, ban_raw_message: str, reply_dict: ReplyBook) -> ReplyRecord | None:
+        if group_id not in reply_dict or bot_id not in reply_dict[group_id]:
             return None
 
-        reply_data = reply_dict[group_id][bot_id][::-1]
-        ban_reply = None
+        replies = reply_dict[group_id][bot_id]
+        # 为空时就直接 ban 最后一条回复
+        if not ban_raw_message:
+            return replies.last()
+        ban_reply = replies.find_reply(ban_raw_message)
+        if ban_reply:
+            return ban_reply
 
-        for reply in reply_data:
-            cur_reply = reply["reply"]
-            # 为空时就直接 ban 最后一条回复
-            if not ban_raw_message or ban_raw_message in cur_reply:
-                ban_reply = reply
-                break
+        for reply in reversed(replies):
+            if ban_raw_message in reply.reply:
+                return reply
 
         # 这种情况一般是有些 CQ 码，牛牛发送的时候，和被回复的时候，里面的内容不一样
-        if not ban_reply:
-            search = re.search(r"(\[CQ:[a-zA-z0-9-_.]+)", ban_raw_message)
-            if search:
-                type_keyword = search.group(1)
-                for reply in reply_data:
-                    cur_reply = reply["reply"]
-                    if type_keyword in cur_reply:
-                        ban_reply = reply
-                        break
-
-        return ban_reply
+        search = re.search(r"(\[CQ:[a-zA-z0-9-_.]+)", ban_raw_message)
+        if search:
+            type_keyword = search.group(1)
+            for reply in reversed(replies):
+                if type_keyword in reply.reply:
+                    return reply
+
+        return None
 
     @staticmethod
-    def iter_ban_bot_ids(group_id: int, bot_id: int, reply_dict: dict) -> list[int]:
+    def iter_ban_bot_ids(group_id: int, bot_id: int, reply_dict: ReplyBook) -> list[int]:
         bot_ids = [bot_id]
         if group_id not in reply_dict:
             return bot_ids
@@ -65,7 +65,8 @@ class BanManager:
         return bot_ids
 
     @staticmethod
-    async def find_ban_reply_fallback(group_id: int, ban_raw_message: str) -> dict | None:
+    async def find_ban_reply_fallback(group_id: int, ban_raw_message: str) -> tuple[str, str] | None:
+        """回复缓存里找不到时按库里的回答反查；返回 (pre_keywords, reply_keywords)。"""
         if not ban_raw_message.strip():
             return None
         find_target = getattr(context_repo, "find_ban_reply_target", None)
@@ -79,13 +80,10 @@ class BanManager:
         if not found:
             return None
         pre_keywords, reply_keywords = found
-        return {
-            "pre_keywords": pre_keywords,
-            "reply_keywords": reply_keywords,
-        }
+        return pre_keywords, reply_keywords
 
     @staticmethod
-    async def ban(group_id: int, bot_id: int, ban_raw_message: str, reason: str, reply_dict: dict) -> bool:
+    async def ban(group_id: int, bot_id: int, ban_raw_message: str, reason: str, reply_dict: ReplyBook) -> bool:
         """
         禁止以后回复这句话，仅对该群有效果
         """
@@ -94,13 +92,14 @@ class BanManager:
             ban_reply = BanManager.find_ban_reply(group_id, candidate_bot_id, ban_raw_message, reply_dict)
             if ban_reply:
                 break
-        if not ban_reply:
-            ban_reply = await BanManager.find_ban_reply_fallback(group_id, ban_raw_message)
-        if not ban_reply:
+        if ban_reply:
+            target = ban_reply.pre_keywords, ban_reply.reply_keywords
+        else:
+            target = await BanManager.find_ban_reply_fallback(group_id, ban_raw_message)
+        if not target:
             return False
 
-        pre_keywords = ban_reply["pre_keywords"]
-        keywords = ban_reply["reply_keywords"]
+        pre_keywords, keywords = target
 
         # 通过 append_ban 原子追加
         # Context 不存在时为 no-op
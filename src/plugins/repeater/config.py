@@ -91,6 +91,18 @@ class Config(BaseModel, extra="ignore"):
         le=20000,
         description="待 learn 队列长度；WebUI 同段或 PALLAS_REPEATER_LEARN_QUEUE_SIZE，满则只丢 learn。",
     )
+    warm_snapshot_interval_sec: int = Field(
+        default=120,
+        ge=0,
+        le=3600,
+        description="定期把复读热状态（近期消息、话题、回复缓存等）写入本地快照的间隔；0 表示只在正常退出时写。",
+    )
+    warm_snapshot_max_age_sec: int = Field(
+        default=900,
+        ge=0,
+        le=86400,
+        description="重启时只加载不超过这么久的快照；0 表示关闭热启动快照。",
+    )
     fanout_enabled: bool = Field(
         default=False,
         description="多牛同群接话 fanout（分片/多牛部署可开）；默认关。环境变量 PALLAS_REPEATER_FANOUT_ENABLED。",
@@ -166,6 +178,7 @@ def sync_repeater_runtime_constants(cfg: Config) -> None:
     }
     for name, value in chat_attrs.items():
         setattr(model_mod.Chat, name, value)
+    model_mod.Chat._reply_dict.resize(cfg.save_reserved_size)
     for name, value in responder_attrs.items():
         setattr(resp_mod.Responder, name, value)
 
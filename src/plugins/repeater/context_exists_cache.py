@@ -56,6 +56,27 @@ async def note_context_exists(keywords: str) -> None:
         _exists_cache[keywords] = (expire_at, True)
 
 
+def export_context_exists_entries() -> list[tuple[str, float, bool]]:
+    """未过期条目 (keywords, 剩余秒数, 是否存在)，供热启动快照。"""
+    now = time.monotonic()
+    return [(k, exp - now, val) for k, (exp, val) in _exists_cache.items() if exp > now]
+
+
+def restore_context_exists_entries(entries: Iterable[tuple[str, float, bool]]) -> int:
+    """从快照回填；剩余秒数不超过本地 TTL，已有的新条目不覆盖。返回回填条数。"""
+    now = time.monotonic()
+    restored = 0
+    for keywords, ttl, exists in entries:
+        ttl = min(float(ttl), _CONTEXT_EXISTS_CACHE_TTL_SEC)
+        if not keywords or ttl <= 0 or keywords in _exists_cache:
+            continue
+        if len(_exists_cache) >= _CONTEXT_EXISTS_CACHE_MAX:
+            break
+        _exists_cache[keywords] = (now + ttl, bool(exists))
+        restored += 1
+    return restored
+
+
 async def _fetch_exists_db(keywords: str) -> bool:
     repo = context_repo
     local_exists = getattr(repo, "local_context_exists_by_keywords", None)
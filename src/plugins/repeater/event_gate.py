@@ -13,10 +13,10 @@ from src.platform.federate.ingress import (
     federate_ingress_cached_win,
 )
 from src.platform.ingress.fanout_bypass import ingress_fanout_bypasses_claim
+from src.platform.ingress.parsed_event import parsed_group_event
 from src.platform.ingress.plugin_command_plaintext import is_plugin_command_plaintext
 from src.platform.ingress.unified_pass import unified_ingress_once_won
 from src.platform.multi_bot.dedup import (
-    normalize_group_raw_message,
     should_skip_duplicate_group_event,
     try_claim_cross_bot_message,
     try_claim_group_message_once,
@@ -51,17 +51,18 @@ async def build_repeater_event_context(bot_id: int, event: GroupMessageEvent):
         record_repeater_ingress_early_discard("worker_gate")
         return None
 
-    plain_body = event.get_plaintext()
+    parsed = parsed_group_event(event)
+    plain_body = parsed.plain_text
     if plain_body and is_plugin_command_plaintext(plain_body):
         record_repeater_ingress_early_discard("plugin_command")
         return None
-    if ingress_fanout_bypasses_claim(plain_body):
+    if parsed.memo("fanout_bypass", ingress_fanout_bypasses_claim, parsed.plain):
         record_repeater_ingress_early_discard("fanout_bypass")
         return None
 
     from src.features.message_scrub import is_message_scrub_blocked_sync
 
-    if is_message_scrub_blocked_sync(plain_text=plain_body or "", raw_message=event.raw_message):
+    if is_message_scrub_blocked_sync(plain_text=plain_body, raw_message=parsed.raw_message):
         record_repeater_ingress_early_discard("message_scrub")
         return None
 
@@ -69,7 +70,7 @@ async def build_repeater_event_context(bot_id: int, event: GroupMessageEvent):
         record_repeater_ingress_early_discard("message_id_dup")
         return None
 
-    norm_raw = normalize_group_raw_message(event.raw_message)
+    norm_raw = parsed.norm_raw
     if await should_skip_duplicate_group_event(
         event.group_id,
         event.user_id,
@@ -79,7 +80,7 @@ async def build_repeater_event_context(bot_id: int, event: GroupMessageEvent):
         record_repeater_ingress_early_discard("group_event_dup")
         return None
 
-    body = plain_body or event.raw_message
+    body = parsed.body
     ingress_once_won = not shard_ctx.sharding_active() and unified_ingress_once_won(
         event,
         plain=plain_body,
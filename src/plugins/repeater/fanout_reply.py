@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import random
 import time
 from dataclasses import dataclass
@@ -18,7 +19,9 @@ if TYPE_CHECKING:
 from itertools import starmap
 
 from src.foundation.config import BotConfig
+from src.foundation.db import make_bot_config_repository
 from src.platform.bot_runtime.send_unavailable import BOT_SEND_UNAVAILABLE_ERRORS, log_bot_send_unavailable
+from src.platform.ingress.parsed_event import parsed_group_event
 from src.platform.multi_bot.dedup import try_claim_group_message_once
 from src.platform.shard import context as shard_ctx
 
@@ -29,6 +32,10 @@ from .responder import ReplyBundle, Responder
 _FANOUT_PLUGIN = "repeater_fanout"
 _FANOUT_BOT_IDS_CACHE_TTL = 2.0
 _FANOUT_BOT_IDS_CACHE: dict[int, tuple[float, list[int]]] = {}
+# 同一组牛的 bot_config 批量预热间隔：其间逐牛读取直接命中仓储缓存，不必每次 fanout 都批量回源
+_FANOUT_PREFETCH_TTL = 60.0
+_FANOUT_PREFETCH_MAX = 1024
+_FANOUT_PREFETCHED: dict[frozenset[int], float] = {}
 
 
 @dataclass(frozen=True, slots=True)
@@ -93,7 +100,7 @@ def fanout_payload_from_event(event: GroupMessageEvent, bundle: ReplyBundle) ->
         "group_id": int(event.group_id),
         "user_id": int(event.user_id),
         "raw_message": event.raw_message,
-        "plain_text": (event.get_plaintext() or "").strip(),
+        "plain_text": parsed_group_event(event).plain,
         "time": int(event.time),
         "reply_bundle": {
             "answer_list": list(bundle.answer_list),
@@ -148,6 +155,21 @@ async def bot_may_repeater_reply(bot_id: int, group_id: int) -> bool:
     return True
 
 
+async def _prefetch_bot_configs(ids: list[int], now: float) -> None:
+    """各牛 bot_config 合并为一次批量查询预热缓存，避免逐个回源；同一组牛在 TTL 内只预热一次。"""
+    key = frozenset(ids)
+    if _FANOUT_PREFETCHED.get(key, 0.0) > now:
+        return
+    if len(_FANOUT_PREFETCHED) >= _FANOUT_PREFETCH_MAX:
+        for stale in [k for k, exp in _FANOUT_PREFETCHED.items() if exp <= now]:
+            del _FANOUT_PREFETCHED[stale]
+        if len(_FANOUT_PREFETCHED) >= _FANOUT_PREFETCH_MAX:
+            _FANOUT_PREFETCHED.clear()
+    _FANOUT_PREFETCHED[key] = now + _FANOUT_PREFETCH_TTL
+    with contextlib.suppress(Exception):
+        await make_bot_config_repository().get_many(ids)
+
+
 async def list_fanout_bot_ids(group_id: int) -> list[int]:
     cached = _FANOUT_BOT_IDS_CACHE.get(group_id)
     now = time.monotonic()
@@ -169,6 +191,8 @@ async def list_fanout_bot_ids(group_id: int) -> list[int]:
     if not ids:
         return []
 
+    if len(ids) > 1:
+        await _prefetch_bot_configs(ids, now)
     allowed = await asyncio.gather(*(bot_may_repeater_reply(bid, group_id) for bid in ids))
 
     result = cap_fanout_bot_ids([bid for bid, ok in zip(ids, allowed, strict=True) if ok])
@@ -192,7 +216,7 @@ async def resolve_fanout_gate(event: GroupMessageEvent) -> FanoutGate:
         _FANOUT_PLUGIN,
         event.group_id,
         event.user_id,
-        event.get_plaintext(),
+        parsed_group_event(event).plain_text,
         event.time,
     ):
         return FanoutGate(lost=True)
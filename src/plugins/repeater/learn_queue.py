@@ -1,15 +1,23 @@
-"""复读学习异步队列：handler 先接话，learn 后台限并发执行。"""
+"""复读学习异步队列：handler 先接话，learn 后台由调度器执行。
+
+调度器成批取出队列，按群分道：同群严格按到达顺序学习，不同群并行；
+并发上限由 AIMD 按实测单条 learn 耗时自适应。DB 饱和或队列满时写入本地积压（``learn_spill``），
+空闲后按原顺序回放，而不是直接丢弃。回放的行学完才从积压删除，停止时在途与队列中的消息写回积压。
+"""
 
 from __future__ import annotations
 
 import asyncio
-from typing import TYPE_CHECKING
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
 
 from nonebot import get_driver, logger
 
 from src.platform.multi_bot.group import claim_group_message_event
 
 from .learn_runtime_config import get_repeater_learn_runtime_config
+from .learn_spill import SPILL_ID_MIN
 
 if TYPE_CHECKING:
     from nonebot.adapters.onebot.v11 import GroupMessageEvent
@@ -17,17 +25,73 @@ if TYPE_CHECKING:
     from .model import Chat
 
 _LEARN_PLUGIN = "repeater_learn"
+# 调度器单次最多取出 / 回放的条数
+LEARN_BATCH_MAX = 64
+# 无新消息时调度器的节拍：刷积压缓冲、尝试回放
+_TICK_SEC = 1.0
+# 落盘前的内存缓冲上限；超过时才真正丢弃
+_SPILL_BUFFER_MAX = 4096
+# AIMD：单条 learn 耗时低于目标则 +1/limit，高于 2 倍目标或池紧张时减半（每秒至多减一次）
+_AIMD_TARGET_MS = 250.0
+_AIMD_DECREASE_COOLDOWN_SEC = 1.0
+
 _queue: asyncio.Queue[Chat] | None = None
-_sem: asyncio.Semaphore | None = None
-_sem_limit: int | None = None
+_limiter: AimdLimiter | None = None
 _worker_tasks: list[asyncio.Task[None]] = []
+# 群号 -> (待学消息, 积压行 id 或 None)；每个非空分道有且只有一个 lane task 在消费
+_lanes: dict[int, deque[tuple[Chat, int | None]]] = {}
+_lane_tasks: dict[int, asyncio.Task[None]] = {}
+_lane_pending: int = 0
+_room: asyncio.Event | None = None
+_spill_buffer: list[dict[str, Any]] = []
+# 尚未回放的积压行数；回放游标之后的行
+_spill_rows: int = 0
+_spill_cursor: int = SPILL_ID_MIN
+# 已学完、待从积压删除的行 id
+_spill_acks: list[int] = []
+_spilled: int = 0
+_replayed: int = 0
 _dropped_full: int = 0
-_dropped_pressure: int = 0
 _completed: int = 0
 _learn_pool_wait_spins: int = 0
 _LIFECYCLE_BOUND = False
 
 
+class AimdLimiter:
+    """并发上限自适应的信号量：加性增、乘性减，范围 [1, ceiling]。"""
+
+    def __init__(self, start: int, ceiling: int) -> None:
+        self.ceiling = max(1, int(ceiling))
+        self.limit = float(max(1, min(int(start), self.ceiling)))
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    @property
+    def effective(self) -> int:
+        return max(1, int(self.limit))
+
+    def observe(self, latency_ms: float, *, pressured: bool = False, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        if pressured or latency_ms > _AIMD_TARGET_MS * 2:
+            if now - self._last_decrease >= _AIMD_DECREASE_COOLDOWN_SEC:
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = now
+        elif latency_ms <= _AIMD_TARGET_MS:
+            self.limit = min(float(self.ceiling), self.limit + 1.0 / self.limit)
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.effective)
+            self.in_flight += 1
+
+    async def release(self, latency_ms: float, *, pressured: bool = False) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self.observe(latency_ms, pressured=pressured)
+            self._cond.notify_all()
+
+
 def drain_learn_pause_stats() -> int:
     global _learn_pool_wait_spins
     spins = _learn_pool_wait_spins
@@ -36,22 +100,28 @@ def drain_learn_pause_stats() -> int:
 
 
 async def wait_pg_pool_headroom_for_learn() -> None:
+    """池紧张时先收紧并发再指数退避等待，而不是固定 0.2s 轮询。"""
     global _learn_pool_wait_spins
     from src.foundation.db.pool_budget import pg_pool_under_pressure
 
+    delay = 0.2
     while pg_pool_under_pressure(threshold=0.25):
         _learn_pool_wait_spins += 1
-        await asyncio.sleep(0.2)
+        if _limiter is not None:
+            _limiter.observe(0.0, pressured=True)
+        await asyncio.sleep(delay)
+        delay = min(2.0, delay * 2)
 
 
 def learn_queue_pressure_threshold() -> int:
-    """队列到达该水位时优先保护接话，跳过新增 learn。"""
+    """队列到达该水位时优先保护接话，新增 learn 转入落盘积压。"""
     # learn 队列一旦堆高，后续还会连带压住 image cache / corpus prefetch
     # 这里提前刹车，让主循环更快恢复，而不是把回填吞吐吃满。
     return max(64, learn_queue_max_size() // 16)
 
 
 def learn_concurrency() -> int:
+    """AIMD 的起始并发：保守取池容量的 3%，再按实测耗时增长。"""
     from src.foundation.db.pool_budget import pg_pool_capacity
 
     requested = get_repeater_learn_runtime_config().learn_concurrency
@@ -60,25 +130,30 @@ def learn_concurrency() -> int:
     return max(1, min(int(requested), ceiling))
 
 
+def learn_concurrency_ceiling() -> int:
+    """AIMD 的并发上限：配置值，且不超过池容量的一半。"""
+    from src.foundation.db.pool_budget import pg_pool_capacity
+
+    requested = get_repeater_learn_runtime_config().learn_concurrency
+    return max(1, min(int(requested), pg_pool_capacity() // 2))
+
+
 def learn_queue_max_size() -> int:
     return get_repeater_learn_runtime_config().learn_queue_max_size
 
 
 def clear_repeater_learn_runtime_state() -> None:
-    """清信号量/队列缓存；配合 WebUI 热重载或 worker 重启。"""
-    global _queue, _sem, _sem_limit
-    _sem = None
-    _sem_limit = None
+    """清限流器/队列缓存；配合 WebUI 热重载或 worker 重启。"""
+    global _queue, _limiter
+    _limiter = None
     _queue = None
 
 
-def learn_sem() -> asyncio.Semaphore:
-    global _sem, _sem_limit
-    limit = learn_concurrency()
-    if _sem is None or _sem_limit != limit:
-        _sem = asyncio.Semaphore(limit)
-        _sem_limit = limit
-    return _sem
+def learn_limiter() -> AimdLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = AimdLimiter(learn_concurrency(), learn_concurrency_ceiling())
+    return _limiter
 
 
 def learn_queue() -> asyncio.Queue[Chat]:
@@ -88,8 +163,13 @@ def learn_queue() -> asyncio.Queue[Chat]:
     return _queue
 
 
+def learn_backlog_size() -> int:
+    """内存中待学条数：队列 + 已分道未完成。"""
+    return learn_queue().qsize() + _lane_pending
+
+
 def learn_queue_under_pressure() -> bool:
-    return learn_queue().qsize() >= learn_queue_pressure_threshold()
+    return learn_backlog_size() >= learn_queue_pressure_threshold()
 
 
 def should_skip_repeater_learn_enqueue() -> bool:
@@ -100,22 +180,87 @@ def should_skip_repeater_learn_enqueue() -> bool:
     return learn_queue_under_pressure()
 
 
-async def run_learn_consumer() -> None:
-    while True:
-        chat = await learn_queue().get()
-        try:
+def learn_scheduler_snapshot() -> dict[str, int]:
+    return {
+        "effective": learn_limiter().effective,
+        "in_flight": learn_limiter().in_flight,
+        "queue": learn_queue().qsize(),
+        "lanes": len(_lanes),
+        "lane_pending": _lane_pending,
+        "spill_rows": _spill_rows + len(_spill_buffer),
+        "spilled": _spilled,
+        "replayed": _replayed,
+        "dropped": _dropped_full,
+        "completed": _completed,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 分道执行
+# ---------------------------------------------------------------------------
+
+
+def _room_event() -> asyncio.Event:
+    global _room
+    if _room is None:
+        _room = asyncio.Event()
+    return _room
+
+
+def _lane_budget() -> int:
+    """已分道未完成的上限；超过时调度器暂停取队列，让队列自身水位起作用。"""
+    return max(LEARN_BATCH_MAX, learn_concurrency_ceiling() * 4)
+
+
+def dispatch_learn_batch(batch: list[Chat], spill_ids: list[int] | None = None) -> None:
+    """把一批消息按群追加到分道；没有消费者的分道启动一个。spill_ids 为回放行的积压 id。"""
+    global _lane_pending
+    for i, chat in enumerate(batch):
+        gid = int(chat.chat_data.group_id)
+        lane = _lanes.get(gid)
+        if lane is None:
+            lane = _lanes[gid] = deque()
+        lane.append((chat, spill_ids[i] if spill_ids is not None else None))
+        _lane_pending += 1
+        if gid not in _lane_tasks:
+            _lane_tasks[gid] = asyncio.create_task(_run_group_lane(gid), name=f"repeater_learn_lane_{gid}")
+
+
+async def _run_group_lane(group_id: int) -> None:
+    global _lane_pending
+    lane = _lanes[group_id]
+    limiter = learn_limiter()
+    try:
+        while lane:
+            chat, spill_id = lane[0]
             await wait_pg_pool_headroom_for_learn()
-            await execute_repeater_learn(chat)
-        finally:
-            learn_queue().task_done()
-
-
-async def execute_repeater_learn(chat: Chat) -> None:
+            await limiter.acquire()
+            t0 = time.perf_counter()
+            try:
+                ok = await execute_repeater_learn(chat)
+            finally:
+                await limiter.release((time.perf_counter() - t0) * 1000.0)
+            # 被取消（停止）时在途这条留在分道里，由 _collect_pending_in_memory 写回积压
+            lane.popleft()
+            _lane_pending -= 1
+            if ok and spill_id is not None:
+                _spill_acks.append(spill_id)
+            _room_event().set()
+    finally:
+        # 检查 lane 为空与移除之间没有 await，不会漏掉新追加的消息
+        if not lane:
+            _lanes.pop(group_id, None)
+        _lane_tasks.pop(group_id, None)
+
+
+async def execute_repeater_learn(chat: Chat) -> bool:
+    """返回是否执行完毕（含按规则跳过）；抛错时回放行留在积压，下次启动重试。"""
     global _completed
     try:
         ok = await chat.learn()
         if ok:
             _completed += 1
+        return True
     except Exception as e:
         logger.warning(
             "repeater learn background failed bot={} group={}: {}",
@@ -123,34 +268,192 @@ async def execute_repeater_learn(chat: Chat) -> None:
             chat.chat_data.group_id,
             e,
         )
+        return False
 
 
-async def enqueue_repeater_learn(chat: Chat, event: GroupMessageEvent) -> bool:
-    """仅抢占成功的牛入队；队列满则丢弃本条 learn。"""
-    global _dropped_full, _dropped_pressure
-    if should_skip_repeater_learn_enqueue():
-        _dropped_pressure += 1
-        if _dropped_pressure == 1 or _dropped_pressure % 100 == 0:
-            logger.debug(
-                "repeater learn enqueue skipped under pressure (watermark={}, dropped={})",
-                learn_queue_pressure_threshold(),
-                _dropped_pressure,
-            )
-        return False
-    if not await claim_group_message_event(_LEARN_PLUGIN, event, int(event.self_id)):
-        return False
-    try:
-        learn_queue().put_nowait(chat)
-        return True
-    except asyncio.QueueFull:
+# ---------------------------------------------------------------------------
+# 落盘积压
+# ---------------------------------------------------------------------------
+
+
+def _spill_row(data: Any) -> dict[str, Any]:
+    return {
+        "group_id": int(data.group_id),
+        "user_id": int(data.user_id),
+        "bot_id": int(data.bot_id),
+        "time": int(data.time),
+        "raw_message": data.raw_message,
+        "plain_text": data.plain_text,
+    }
+
+
+def _spill_active() -> bool:
+    """已有积压时新消息也排到积压后面，保证回放与新消息整体有序。"""
+    return _spill_rows > 0 or bool(_spill_buffer)
+
+
+def spill_repeater_learn(chat: Chat) -> bool:
+    global _spilled, _dropped_full
+    if len(_spill_buffer) >= _SPILL_BUFFER_MAX:
         _dropped_full += 1
         if _dropped_full == 1 or _dropped_full % 100 == 0:
-            logger.debug(
-                "repeater learn queue full (max={}), dropped={} (learn only)",
-                learn_queue_max_size(),
-                _dropped_full,
-            )
+            logger.debug("repeater learn spill buffer full, dropped={} (learn only)", _dropped_full)
         return False
+    _spill_buffer.append(_spill_row(chat.chat_data))
+    _spilled += 1
+    if _spilled == 1 or _spilled % 500 == 0:
+        logger.debug(
+            "repeater learn spilled to disk backlog (watermark={}, spilled={})",
+            learn_queue_pressure_threshold(),
+            _spilled,
+        )
+    return True
+
+
+async def flush_learn_spill_buffer() -> None:
+    global _spill_buffer, _spill_rows, _dropped_full
+    if not _spill_buffer:
+        return
+    from .learn_spill import spill_append_sync
+
+    rows, _spill_buffer = _spill_buffer, []
+    try:
+        written, evicted = await asyncio.to_thread(spill_append_sync, rows)
+    except Exception as e:
+        _dropped_full += len(rows)
+        logger.warning("repeater learn spill write failed, dropped={}: {}", len(rows), e)
+        return
+    _spill_rows = max(0, _spill_rows + written - evicted)
+    if evicted:
+        _dropped_full += evicted
+        logger.warning("repeater learn disk backlog full, evicted oldest={}", evicted)
+
+
+async def flush_learn_spill_acks() -> None:
+    """把学完的回放行从积压删除；失败时留待下次重试。"""
+    global _spill_acks
+    if not _spill_acks:
+        return
+    from .learn_spill import spill_ack_sync
+
+    ids, _spill_acks = _spill_acks, []
+    try:
+        await asyncio.to_thread(spill_ack_sync, ids)
+    except Exception as e:
+        _spill_acks = ids + _spill_acks
+        logger.warning("repeater learn spill ack failed, pending={}: {}", len(_spill_acks), e)
+
+
+async def replay_learn_spill() -> int:
+    """池与队列都有余量时，按原顺序从落盘积压读一批重新分道；学完前不删除。"""
+    global _spill_rows, _spill_cursor, _replayed
+    from src.foundation.db.pool_budget import pg_pool_under_pressure
+
+    if _spill_rows <= 0 or pg_pool_under_pressure(threshold=0.25):
+        return 0
+    room = min(LEARN_BATCH_MAX, learn_queue_pressure_threshold() - 1 - learn_backlog_size())
+    if room <= 0:
+        return 0
+    from .learn_spill import spill_read_sync
+    from .model import Chat, ChatData
+
+    try:
+        rows = await asyncio.to_thread(spill_read_sync, _spill_cursor, room)
+    except Exception as e:
+        logger.warning("repeater learn spill read failed: {}", e)
+        return 0
+    if not rows:
+        _spill_rows = 0
+        return 0
+    _spill_cursor = rows[-1][0]
+    _spill_rows = max(0, _spill_rows - len(rows))
+    batch = [Chat(ChatData(**row)) for _, row in rows]
+    dispatch_learn_batch(batch, [sid for sid, _ in rows])
+    _replayed += len(batch)
+    return len(batch)
+
+
+def _collect_pending_in_memory() -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """停止时收集没学完的消息，返回 (早于积压的, 晚于积压的)。
+
+    分道与队列里的消息在积压开始前入队，比已落盘的更早，插到积压之前；缓冲里的排在积压之后。
+    分道中的回放行仍在积压里，不重复写。
+    """
+    global _lane_pending
+    head: list[dict[str, Any]] = []
+    for gid in list(_lanes):
+        head.extend(_spill_row(c.chat_data) for c, spill_id in _lanes.pop(gid) if spill_id is None)
+    _lane_pending = 0
+    if _queue is not None:
+        while True:
+            try:
+                head.append(_spill_row(_queue.get_nowait().chat_data))
+            except asyncio.QueueEmpty:
+                break
+    tail = list(_spill_buffer)
+    _spill_buffer.clear()
+    return head, tail
+
+
+# ---------------------------------------------------------------------------
+# 调度器
+# ---------------------------------------------------------------------------
+
+
+async def _drain_batch(q: asyncio.Queue[Chat], *, wait: bool) -> list[Chat]:
+    batch: list[Chat] = []
+    if wait:
+        try:
+            batch.append(await asyncio.wait_for(q.get(), timeout=_TICK_SEC))
+        except TimeoutError:
+            return batch
+    while len(batch) < LEARN_BATCH_MAX:
+        try:
+            batch.append(q.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    for _ in batch:
+        q.task_done()
+    return batch
+
+
+async def _wait_room(wait_sec: float | None = None) -> None:
+    room = _room_event()
+    room.clear()
+    try:
+        await asyncio.wait_for(room.wait(), timeout=wait_sec)
+    except TimeoutError:
+        pass
+
+
+async def run_learn_scheduler() -> None:
+    global _spill_rows, _spill_cursor
+    from .learn_spill import spill_count_sync
+
+    # 上次未确认的回放行也从头重放
+    _spill_cursor = SPILL_ID_MIN
+    try:
+        _spill_rows = await asyncio.to_thread(spill_count_sync)
+    except Exception as e:
+        logger.warning("repeater learn spill open failed: {}", e)
+    q = learn_queue()
+    while True:
+        while _lane_pending >= _lane_budget():
+            await _wait_room()
+        await flush_learn_spill_buffer()
+        await flush_learn_spill_acks()
+        if _spill_rows <= 0:
+            batch = await _drain_batch(q, wait=True)
+            if batch:
+                dispatch_learn_batch(batch)
+            continue
+        # 积压期间新消息都进积压，队列里只剩积压开始前入队的、比积压更早：先分道队列，排空后才回放
+        batch = await _drain_batch(q, wait=False)
+        if batch:
+            dispatch_learn_batch(batch)
+        replayed = await replay_learn_spill() if q.empty() else 0
+        if not replayed and not batch:
+            await _wait_room(_TICK_SEC)
 
 
 def _learn_workers_running() -> bool:
@@ -162,51 +465,72 @@ async def start_repeater_learn_worker() -> None:
     if _learn_workers_running():
         return
     await stop_repeater_learn_worker()
-    n = learn_concurrency()
-    configured = get_repeater_learn_runtime_config().learn_concurrency
-    if n < configured:
-        from src.foundation.db.pool_budget import pg_pool_capacity
-
-        logger.debug(
-            "repeater learn concurrency capped by PG pool: effective={} configured={} pool={}",
-            n,
-            configured,
-            pg_pool_capacity(),
-        )
-    _worker_tasks = [asyncio.create_task(run_learn_consumer(), name=f"repeater_learn_consumer_{i}") for i in range(n)]
+    limiter = learn_limiter()
+    _worker_tasks = [asyncio.create_task(run_learn_scheduler(), name="repeater_learn_scheduler")]
     logger.debug(
-        "repeater learn workers started: consumers={} queue_max={}",
-        n,
+        "repeater learn scheduler started: concurrency={}..{} queue_max={}",
+        limiter.effective,
+        limiter.ceiling,
         learn_queue_max_size(),
     )
 
 
 async def stop_repeater_learn_worker() -> None:
-    global _worker_tasks
-    if not _worker_tasks:
-        return
-    tasks = list(_worker_tasks)
+    global _worker_tasks, _spill_rows
+    tasks = [*_worker_tasks, *_lane_tasks.values()]
     _worker_tasks = []
+    _lane_tasks.clear()
+    if not tasks:
+        return
     for t in tasks:
         t.cancel()
     await asyncio.gather(*tasks, return_exceptions=True)
+    await flush_learn_spill_acks()
+    head, tail = _collect_pending_in_memory()
+    if not head and not tail:
+        return
+    from .learn_spill import spill_append_sync, spill_prepend_sync
+
+    try:
+        written = await asyncio.to_thread(spill_prepend_sync, head)
+        appended, evicted = await asyncio.to_thread(spill_append_sync, tail)
+    except Exception as e:
+        logger.warning("repeater learn spill on shutdown failed, dropped={}: {}", len(head) + len(tail), e)
+        return
+    written += appended
+    _spill_rows += written - evicted
+    logger.info("repeater learn: {} pending learns saved to disk backlog", written)
 
 
 async def reload_repeater_learn_worker_runtime() -> None:
-    """WebUI 保存 learn 配置后：失效缓存并重启 worker。"""
+    """WebUI 保存 learn 配置后：失效缓存并重启调度器。"""
     from .learn_runtime_config import clear_repeater_learn_runtime_config_cache
 
     clear_repeater_learn_runtime_config_cache()
-    clear_repeater_learn_runtime_state()
     await stop_repeater_learn_worker()
+    clear_repeater_learn_runtime_state()
     await start_repeater_learn_worker()
     logger.info(
-        "repeater learn runtime reloaded: consumers={} queue_max={}",
-        learn_concurrency(),
+        "repeater learn runtime reloaded: concurrency={}..{} queue_max={}",
+        learn_limiter().effective,
+        learn_limiter().ceiling,
         learn_queue_max_size(),
     )
 
 
+async def enqueue_repeater_learn(chat: Chat, event: GroupMessageEvent) -> bool:
+    """仅抢占成功的牛入队；DB 紧张、队列满或已有积压时写入落盘积压，稍后按序回放。"""
+    if not await claim_group_message_event(_LEARN_PLUGIN, event, int(event.self_id)):
+        return False
+    if _spill_active() or should_skip_repeater_learn_enqueue():
+        return spill_repeater_learn(chat)
+    try:
+        learn_queue().put_nowait(chat)
+        return True
+    except asyncio.QueueFull:
+        return spill_repeater_learn(chat)
+
+
 def bind_repeater_learn_lifecycle() -> None:
     global _LIFECYCLE_BOUND
     if _LIFECYCLE_BOUND:
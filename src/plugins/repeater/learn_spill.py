@@ -0,0 +1,168 @@
+"""learn 积压落盘：DB 饱和时把待学消息按到达顺序写入本地 SQLite（WAL），空闲后再回放学习。
+
+每个进程（分片时每个 worker）一个文件；超出行数上限时丢最旧的，保证占用有界。
+回放只读不删，学完后再按 id 确认删除；崩溃或停止时未确认的行下次启动重放（至少一次）。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any
+
+from src.foundation.paths import plugin_data_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+# 约 200 字节/行，上限约几十 MB
+SPILL_MAX_ROWS = 200_000
+# 停止时插到队头的行 id 可能 <= 0；回放游标从这里开始
+SPILL_ID_MIN = -(1 << 62)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS learn_backlog (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER NOT NULL, user_id INTEGER NOT NULL, bot_id INTEGER NOT NULL,
+    time INTEGER NOT NULL, raw_message TEXT NOT NULL, plain_text TEXT NOT NULL
+);
+"""
+
+_FIELDS = ("group_id", "user_id", "bot_id", "time", "raw_message", "plain_text")
+
+_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
+_path_override: Path | None = None
+
+
+def spill_db_path() -> Path:
+    if _path_override is not None:
+        return _path_override
+    from src.platform.shard import context as shard_ctx
+
+    name = "learn_backlog.sqlite3"
+    if shard_ctx.sharding_active():
+        name = f"learn_backlog.{shard_ctx.role()}{shard_ctx.shard_id()}.sqlite3"
+    return plugin_data_dir("repeater") / name
+
+
+def set_spill_db_path(path: Path | None) -> None:
+    """测试用：切换库文件并关闭旧连接。"""
+    global _path_override
+    close_learn_spill()
+    _path_override = path
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        path = spill_db_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _conn = conn
+    return _conn
+
+
+def close_learn_spill() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def spill_count_sync(after_id: int = SPILL_ID_MIN) -> int:
+    with _lock:
+        row = _db().execute("SELECT COUNT(*) FROM learn_backlog WHERE id > ?", (int(after_id),)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def spill_append_sync(rows: Iterable[dict[str, Any]], *, max_rows: int = SPILL_MAX_ROWS) -> tuple[int, int]:
+    """批量追加；返回 (写入条数, 因超限淘汰的最旧条数)。"""
+    values = [tuple(r[f] for f in _FIELDS) for r in rows]
+    if not values:
+        return 0, 0
+    with _lock:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO learn_backlog (group_id, user_id, bot_id, time, raw_message, plain_text) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            total = int(conn.execute("SELECT COUNT(*) FROM learn_backlog").fetchone()[0])
+            evicted = max(0, total - max_rows)
+            if evicted:
+                conn.execute(
+                    "DELETE FROM learn_backlog WHERE id IN (SELECT id FROM learn_backlog ORDER BY id LIMIT ?)",
+                    (evicted,),
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    return len(values), evicted
+
+
+def spill_prepend_sync(rows: Iterable[dict[str, Any]]) -> int:
+    """插到现有积压之前（停止时队列里的消息比已落盘的更早）；不做超限淘汰。返回写入条数。"""
+    values = [tuple(r[f] for f in _FIELDS) for r in rows]
+    if not values:
+        return 0
+    with _lock:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            head = int(conn.execute("SELECT COALESCE(MIN(id), 1) FROM learn_backlog").fetchone()[0])
+            start = min(head, 1) - len(values)
+            conn.executemany(
+                "INSERT INTO learn_backlog (id, group_id, user_id, bot_id, time, raw_message, plain_text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(start + i, *v) for i, v in enumerate(values)],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    return len(values)
+
+
+def spill_read_sync(after_id: int, limit: int) -> list[tuple[int, dict[str, Any]]]:
+    """按写入顺序读 id 大于 after_id 的至多 limit 条，不删除；返回 (id, 行)。"""
+    if limit <= 0:
+        return []
+    with _lock:
+        rows = (
+            _db()
+            .execute(
+                "SELECT id, group_id, user_id, bot_id, time, raw_message, plain_text "
+                "FROM learn_backlog WHERE id > ? ORDER BY id LIMIT ?",
+                (int(after_id), int(limit)),
+            )
+            .fetchall()
+        )
+    return [(int(row[0]), dict(zip(_FIELDS, row[1:], strict=True))) for row in rows]
+
+
+def spill_ack_sync(ids: Iterable[int]) -> int:
+    """确认已学完的行并删除；返回删除条数。"""
+    values = [(int(i),) for i in ids]
+    if not values:
+        return 0
+    with _lock:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany("DELETE FROM learn_backlog WHERE id = ?", values)
+            deleted = conn.total_changes - before
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    return deleted
@@ -1,36 +1,54 @@
 import asyncio
-import re
 import time
 from collections import defaultdict, deque
 from collections.abc import AsyncGenerator
 from dataclasses import dataclass
-from functools import cached_property
-from typing import cast
+from functools import cache, cached_property
+from typing import Any, cast
 
-import pypinyin
 from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message
 
 from src.foundation.config import BotConfig
 from src.foundation.db import Message as MessageModel
 from src.foundation.db.context_repo_access import context_repo
+from src.platform.ingress.parsed_event import parsed_group_event
 
 from .ban_manager import BanManager
 from .config import get_repeater_config
 from .learner import Learner
 from .message_store import MessageStore
+from .reply_buffer import ReplyBook
 from .responder import Responder
 from .topic_utils import filtered_recent_topics
 
-try:
-    import jieba_next.analyse as jieba_analyse
 
-    print("Using jieba_next for repeater")
-except ImportError:
-    import jieba
-    import jieba.analyse as jieba_analyse
+@cache
+def jieba_analyse() -> Any:
+    """分词 / IDF 词典首次取关键词时才加载；启动后由 warm_keyword_tokenizer 在后台预热。"""
+    try:
+        import jieba_next.analyse as analyse
 
-    jieba.disable_parallel()
-    print("Using jieba for repeater")
+        print("Using jieba_next for repeater")
+    except ImportError:
+        import jieba
+        import jieba.analyse as analyse
+
+        jieba.disable_parallel()
+        print("Using jieba for repeater")
+    return analyse
+
+
+@cache
+def _pypinyin() -> Any:
+    import pypinyin
+
+    return pypinyin
+
+
+def warm_keyword_tokenizer() -> None:
+    """在线程里预先加载 jieba 与 pypinyin 词典，首条消息不再承担冷启动。"""
+    jieba_analyse().extract_tags("牛牛预热", topK=1)
+    _pypinyin().lazy_pinyin("预热")
 
 
 plugin_config = get_repeater_config()
@@ -60,7 +78,7 @@ class ChatData:
         if not self.is_plain_text and len(self.plain_text) == 0:
             return []
 
-        result = jieba_analyse.extract_tags(self.plain_text, topK=ChatData._keywords_size)
+        result = jieba_analyse().extract_tags(self.plain_text, topK=ChatData._keywords_size)
         return cast("list[str]", result)  # type: ignore[return-value]
 
     @cached_property
@@ -79,6 +97,7 @@ class ChatData:
 
     @cached_property
     def keywords_pinyin(self) -> str:
+        pypinyin = _pypinyin()
         return "".join([
             item[0] for item in pypinyin.pinyin(self.keywords, style=pypinyin.NORMAL, errors="default")
         ]).lower()
@@ -88,6 +107,19 @@ class ChatData:
         return self.plain_text.startswith("牛牛")
 
 
+def _chat_data_from_event(event: GroupMessageEvent) -> ChatData:
+    parsed = parsed_group_event(event)
+    return ChatData(
+        group_id=event.group_id,
+        user_id=event.user_id,
+        # 删除图片子类型字段，同一张图子类型经常不一样，影响判断
+        raw_message=parsed.norm_raw,
+        plain_text=parsed.plain_text,
+        time=event.time,
+        bot_id=event.self_id,
+    )
+
+
 class Chat:
     # 可以试着改改的参数
 
@@ -121,9 +153,9 @@ class Chat:
 
     # 运行期变量
 
-    _reply_dict = defaultdict(lambda: defaultdict(list))  # 牛牛回复的消息缓存，暂未做持久化
+    # 牛牛回复的消息缓存（每群每牛定长环形缓冲，锁按群），暂未做持久化
+    _reply_dict = ReplyBook(SAVE_RESERVED_SIZE)
 
-    _reply_lock = asyncio.Lock()  # 回复消息缓存锁
     _topics_lock = asyncio.Lock()
 
     _recent_topics = defaultdict(lambda: deque(maxlen=Chat.TOPICS_SIZE))
@@ -135,15 +167,8 @@ class Chat:
             self.chat_data = data
             self.config = BotConfig(data.bot_id, data.group_id)
         elif isinstance(data, GroupMessageEvent):
-            self.chat_data = ChatData(
-                group_id=data.group_id,
-                user_id=data.user_id,
-                # 删除图片子类型字段，同一张图子类型经常不一样，影响判断
-                raw_message=re.sub(r"\.image,.+?\]", ".image]", data.raw_message),
-                plain_text=data.get_plaintext(),
-                time=data.time,
-                bot_id=data.self_id,
-            )
+            # 同一事件共用一份 ChatData，关键词抽取只做一次
+            self.chat_data = parsed_group_event(data).memo("repeater.chat_data", _chat_data_from_event, data)
             self.config = BotConfig(data.self_id, data.group_id)
 
     async def learn(self) -> bool:
@@ -157,7 +182,6 @@ class Chat:
             self.chat_data,
             self.config,
             Chat._reply_dict,
-            Chat._reply_lock,
             Chat._recent_topics,
             Chat._topics_lock,
         )
@@ -182,7 +206,6 @@ class Chat:
             self.chat_data,
             self.config,
             Chat._reply_dict,
-            Chat._reply_lock,
             Chat._recent_topics,
             Chat._topics_lock,
             plan=plan,
@@ -196,14 +219,13 @@ class Chat:
             bot_id,
             group_id,
             Chat._reply_dict,
-            Chat._reply_lock,
         )
 
     @staticmethod
     async def speak() -> tuple[int, int, list[Message], int | None] | None:
         from .speaker import Speaker
 
-        return await Speaker.speak(Chat._reply_dict, Chat._reply_lock, Chat._recent_topics, Chat._topics_lock)
+        return await Speaker.speak(Chat._reply_dict, Chat._recent_topics, Chat._topics_lock)
 
     @staticmethod
     async def ban(group_id: int, bot_id: int, ban_raw_message: str, reason: str) -> bool:
@@ -0,0 +1,154 @@
+"""牛牛回复缓存：每个 (群, 牛) 一个定长环形缓冲。
+
+追加 / 淘汰 O(1)，倒序遍历不复制；另按回复文本索引最近一条，供 post_proc 替换与「不可以」定位。
+锁按群划分，不同群的回复互不等待。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+
+@dataclass(slots=True)
+class ReplyRecord:
+    time: int
+    pre_raw_message: str
+    pre_keywords: str
+    reply: str
+    reply_keywords: str
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> ReplyRecord:
+        return cls(
+            time=int(data.get("time") or 0),
+            pre_raw_message=str(data.get("pre_raw_message") or ""),
+            pre_keywords=str(data.get("pre_keywords") or ""),
+            reply=str(data.get("reply") or ""),
+            reply_keywords=str(data.get("reply_keywords") or ""),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class ReplyRing:
+    __slots__ = ("_by_reply", "_records")
+
+    def __init__(self, capacity: int) -> None:
+        self._records: deque[ReplyRecord] = deque(maxlen=max(1, int(capacity)))
+        # 回复文本 -> 持有该文本的最近一条记录
+        self._by_reply: dict[str, ReplyRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[ReplyRecord]:
+        return iter(self._records)
+
+    def __reversed__(self) -> Iterator[ReplyRecord]:
+        return reversed(self._records)
+
+    def __getitem__(self, index: int) -> ReplyRecord:
+        return self._records[index]
+
+    @property
+    def capacity(self) -> int:
+        return self._records.maxlen or 0
+
+    def resize(self, capacity: int) -> None:
+        """改容量；缩小时丢最旧的记录。"""
+        capacity = max(1, int(capacity))
+        if capacity == self.capacity:
+            return
+        self._records = deque(self._records, maxlen=capacity)
+        self._by_reply = {rec.reply: rec for rec in self._records}
+
+    def append(self, record: ReplyRecord) -> ReplyRecord:
+        records = self._records
+        if len(records) == records.maxlen:
+            evicted = records[0]
+            if self._by_reply.get(evicted.reply) is evicted:
+                del self._by_reply[evicted.reply]
+        records.append(record)
+        self._by_reply[record.reply] = record
+        return record
+
+    def extend(self, records: Iterable[ReplyRecord | Mapping[str, Any]]) -> None:
+        """批量追加；接受跨片同步等场景的字典形式。"""
+        for rec in records:
+            self.append(rec if isinstance(rec, ReplyRecord) else ReplyRecord.from_dict(rec))
+
+    def last(self) -> ReplyRecord | None:
+        return self._records[-1] if self._records else None
+
+    def tail(self, n: int) -> list[ReplyRecord]:
+        """最近 n 条，按时间正序。"""
+        if n <= 0:
+            return []
+        out = list(islice(reversed(self._records), n))
+        out.reverse()
+        return out
+
+    def find_reply(self, reply: str) -> ReplyRecord | None:
+        """回复文本完全相同的最近一条。"""
+        return self._by_reply.get(reply)
+
+    def replace_reply(self, record: ReplyRecord, new_reply: str) -> None:
+        old = record.reply
+        record.reply = new_reply
+        if self._by_reply.get(old) is record:
+            del self._by_reply[old]
+            # 罕见：更早还有同文本记录，索引退回到它
+            for rec in reversed(self._records):
+                if rec.reply == old:
+                    self._by_reply[old] = rec
+                    break
+        cur = self._by_reply.get(new_reply)
+        if cur is None or self._newer(record, cur):
+            self._by_reply[new_reply] = record
+
+    def _newer(self, a: ReplyRecord, b: ReplyRecord) -> bool:
+        for rec in reversed(self._records):
+            if rec is a:
+                return True
+            if rec is b:
+                return False
+        return False
+
+
+class GroupReplies(defaultdict[int, ReplyRing]):
+    """单群内各牛的回复缓冲，附带本群的锁。"""
+
+    __slots__ = ("lock",)
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__(partial(ReplyRing, capacity))
+        self.lock = asyncio.Lock()
+
+    def resize(self, capacity: int) -> None:
+        self.default_factory = partial(ReplyRing, capacity)
+        for ring in self.values():
+            ring.resize(capacity)
+
+
+class ReplyBook(defaultdict[int, GroupReplies]):
+    """群 -> GroupReplies；按需创建。"""
+
+    __slots__ = ()
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__(partial(GroupReplies, capacity))
+
+    def resize(self, capacity: int) -> None:
+        """热更新保留条数：已有的环就地调整，之后新建的按新容量。"""
+        self.default_factory = partial(GroupReplies, capacity)
+        for group in self.values():
+            group.resize(capacity)
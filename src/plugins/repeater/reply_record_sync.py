@@ -6,6 +6,7 @@ from typing import Any
 
 from src.platform.shard import context as shard_ctx
 from src.plugins.repeater.model import Chat
+from src.plugins.repeater.reply_buffer import ReplyRecord
 
 
 def should_publish_reply_record(record: dict[str, Any]) -> bool:
@@ -16,11 +17,13 @@ def should_publish_reply_record(record: dict[str, Any]) -> bool:
     return reply not in {Chat.REPLY_FLAG, Chat.SPEAK_FLAG}
 
 
-def publish_reply_record(group_id: int, bot_id: int, record: dict[str, Any]) -> None:
-    if not should_publish_reply_record(record):
-        return
+def publish_reply_record(group_id: int, bot_id: int, record: ReplyRecord | dict[str, Any]) -> None:
+    # 非分片时直接返回：本地记录不必转成字典
     if not shard_ctx.sharding_active():
         return
+    payload = record.as_dict() if isinstance(record, ReplyRecord) else record
+    if not should_publish_reply_record(payload):
+        return
     from src.platform.shard.coord.repeater_reply_buffer import schedule_publish_repeater_reply_record
 
-    schedule_publish_repeater_reply_record(group_id, bot_id, record)
+    schedule_publish_repeater_reply_record(group_id, bot_id, payload)
@@ -5,24 +5,28 @@ from collections.abc import AsyncGenerator
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
-from nonebot import get_bots, logger
+from nonebot import logger
 from nonebot.adapters.onebot.v11 import Message
 
 from src.foundation.config import BotConfig
 from src.foundation.db import Answer
 from src.foundation.db.context_repo_access import context_repo
 from src.foundation.db.pool_budget import is_pg_pool_timeout_error, pg_pool_under_pressure
+from src.foundation.id_set import IdSet, IdSetCache
 from src.platform.shard import context as shard_ctx
 
 from .ban_manager import BanManager
 from .config import get_repeater_config
+from .reply_buffer import ReplyRecord
 from .topic_utils import filtered_recent_topics
 
 if TYPE_CHECKING:
     from .model import ChatData
+    from .reply_buffer import ReplyBook
 
 
 plugin_config = get_repeater_config()
+_repeat_ignore_ids = IdSetCache()
 
 
 @dataclass(frozen=True)
@@ -59,15 +63,13 @@ class Responder:
     REPLY_FLAG = "[PallasBot: Reply]"
 
     @staticmethod
-    def _repeat_ignore_user_ids() -> set[int]:
+    def _repeat_ignore_user_ids() -> IdSet:
+        """fleet 牛 + 配置的忽略号；名册快照不变时复用同一 IdSet，学习/回复热路径不再重建集合。"""
         from src.platform.multi_bot.fleet import get_catalog_bot_ids
 
-        if shard_ctx.sharding_active():
-            ids = set(get_catalog_bot_ids())
-        else:
-            ids = {int(b.self_id) for b in get_bots().values()}
-        ids.update(plugin_config.repeat_ignore_user_ids)
-        return ids
+        catalog = get_catalog_bot_ids()
+        extra = plugin_config.repeat_ignore_user_ids
+        return _repeat_ignore_ids.get(catalog, lambda: (*catalog, *extra), extra=extra)
 
     @staticmethod
     def _human_messages_for_repeat(group_msgs: list) -> list:
@@ -100,8 +102,7 @@ class Responder:
     async def answer(
         chat_data: "ChatData",
         config: BotConfig,
-        reply_dict,
-        reply_lock,
+        reply_dict: "ReplyBook",
         recent_topics,
         topics_lock,
     ) -> AsyncGenerator[Message, None] | None:
@@ -126,7 +127,6 @@ class Responder:
             chat_data,
             config,
             reply_dict,
-            reply_lock,
             recent_topics,
             topics_lock,
         )
@@ -136,8 +136,7 @@ class Responder:
         bundle: ReplyBundle,
         chat_data: "ChatData",
         config: BotConfig,
-        reply_dict,
-        reply_lock,
+        reply_dict: "ReplyBook",
         recent_topics,
         topics_lock,
         *,
@@ -149,44 +148,32 @@ class Responder:
 
         group_id = chat_data.group_id
         bot_id = chat_data.bot_id
-        group_bot_replies = reply_dict[group_id][bot_id]
+        group_replies = reply_dict[group_id]
+        group_bot_replies = group_replies[bot_id]
 
         raw_message = chat_data.raw_message
         keywords = chat_data.keywords
         from .reply_record_sync import publish_reply_record
 
-        async with reply_lock:
-            group_bot_replies.append({
-                "time": int(time.time()),
-                "pre_raw_message": raw_message,
-                "pre_keywords": keywords,
-                "reply": Responder.REPLY_FLAG,
-                "reply_keywords": Responder.REPLY_FLAG,
-            })
+        async with group_replies.lock:
+            group_bot_replies.append(
+                ReplyRecord(int(time.time()), raw_message, keywords, Responder.REPLY_FLAG, Responder.REPLY_FLAG)
+            )
 
         async def yield_results(results: tuple[list[str], str]) -> AsyncGenerator[Message, None]:
             answer_list, answer_keywords = results
-            group_bot_replies = reply_dict[group_id][bot_id]
-            try:
-                for item in answer_list:
-                    async with reply_lock:
-                        group_bot_replies.append({
-                            "time": int(time.time()),
-                            "pre_raw_message": raw_message,
-                            "pre_keywords": keywords,
-                            "reply": item,
-                            "reply_keywords": answer_keywords,
-                        })
-                        publish_reply_record(group_id, bot_id, group_bot_replies[-1])
-                    if "[CQ:" not in item:
-                        async with topics_lock:
-                            recent_topics[group_id] += filtered_recent_topics(answer_keywords.split(" "))
+            for item in answer_list:
+                async with group_replies.lock:
+                    record = group_bot_replies.append(
+                        ReplyRecord(int(time.time()), raw_message, keywords, item, answer_keywords)
+                    )
+                    publish_reply_record(group_id, bot_id, record)
+                if "[CQ:" not in item:
                     async with topics_lock:
-                        recent_topics[group_id] += filtered_recent_topics(chat_data._keywords_list)
-                    yield Message(item)
-            finally:
-                async with reply_lock:
-                    reply_dict[group_id][bot_id][:] = reply_dict[group_id][bot_id][-Responder.SAVE_RESERVED_SIZE :]
+                        recent_topics[group_id] += filtered_recent_topics(answer_keywords.split(" "))
+                async with topics_lock:
+                    recent_topics[group_id] += filtered_recent_topics(chat_data._keywords_list)
+                yield Message(item)
 
         return yield_results((answer_list, answer_keywords))
 
@@ -225,7 +212,7 @@ class Responder:
 
     @staticmethod
     async def reply_post_proc(
-        raw_message: str, new_msg: str, bot_id: int, group_id: int, reply_dict, reply_lock
+        raw_message: str, new_msg: str, bot_id: int, group_id: int, reply_dict: "ReplyBook"
     ) -> bool:
         """
         对 bot 回复的消息进行后处理，将缓存替换为处理后的消息
@@ -234,16 +221,17 @@ class Responder:
         if raw_message == new_msg:
             return True
 
-        async with reply_lock:
-            reply_data = reply_dict[group_id][bot_id][::-1]
-            for item in reply_data:
-                if item["reply"] == raw_message:
-                    item["reply"] = new_msg
-                    from .reply_record_sync import publish_reply_record
+        group_replies = reply_dict[group_id]
+        async with group_replies.lock:
+            replies = group_replies[bot_id]
+            item = replies.find_reply(raw_message)
+            if item is None:
+                return False
+            replies.replace_reply(item, new_msg)
+        from .reply_record_sync import publish_reply_record
 
-                    publish_reply_record(group_id, bot_id, item)
-                    return True
-        return False
+        publish_reply_record(group_id, bot_id, item)
+        return True
 
     @staticmethod
     async def _context_find_with_pool(
@@ -265,8 +253,8 @@ class Responder:
             tail = rt - 1
             if len(human_msgs) >= tail and all(item.raw_message == raw_message for item in human_msgs[-tail:]):
                 # 到这里说明当前群里是在复读
-                group_bot_replies = reply_dict[group_id][bot_id]
-                if len(group_bot_replies) and group_bot_replies[-1]["reply"] != raw_message:
+                last_reply = reply_dict[group_id][bot_id].last()
+                if last_reply is not None and last_reply.reply != raw_message:
                     keywords = chat_data.keywords
                     repeat_plan = ([raw_message], keywords)
                     return repeat_plan, list(repeat_plan[0])
@@ -343,7 +331,7 @@ class Responder:
         candidate_answers: dict[str, Answer] = {}
         other_group_cache = {}
         answers_count = defaultdict(int)
-        recent_replies = [r["reply_keywords"] for r in reply_dict[group_id][bot_id][-Responder.DUPLICATE_REPLY :]]
+        recent_replies = [r.reply_keywords for r in reply_dict[group_id][bot_id].tail(Responder.DUPLICATE_REPLY)]
         recent_message = [m.raw_message for m in message_dict[group_id][-Responder.DUPLICATE_REPLY :]]
 
         def candidate_append(dst: dict[str, Answer], answer: Answer):
@@ -14,6 +14,7 @@ from src.platform.shard import context as shard_ctx
 from .ban_manager import BanManager
 from .message_store import MessageStore
 from .model import Chat, ChatData
+from .reply_buffer import ReplyRecord
 from .responder import Responder
 
 if TYPE_CHECKING:
@@ -21,6 +22,8 @@ if TYPE_CHECKING:
 
     from src.foundation.db import Message as MessageModel
 
+    from .reply_buffer import ReplyBook
+
 
 class Speaker:
     """主动发言模块，根据群聊活跃度自动触发发言"""
@@ -37,8 +40,7 @@ class Speaker:
 
     @staticmethod
     async def speak(
-        reply_dict: defaultdict,
-        reply_lock: asyncio.Lock,
+        reply_dict: ReplyBook,
         recent_topics,
         topics_lock: asyncio.Lock,
     ) -> tuple[int, int, list[Message], int | None] | None:
@@ -79,8 +81,9 @@ class Speaker:
             if not len(group_replies) or len(group_msgs) < basic_msgs_len:
                 continue
 
-            group_replies_front = list(group_replies.values())[0]
-            if not len(group_replies_front) or group_replies_front[-1]["time"] > group_msgs[-1].time:
+            group_replies_front = next(iter(group_replies.values()))
+            front_last = group_replies_front.last()
+            if front_last is None or front_last.time > group_msgs[-1].time:
                 continue
 
             msgs_len = len(group_msgs)
@@ -91,14 +94,12 @@ class Speaker:
             if cur_time - latest_time < avg_interval * Speaker.SPEAK_THRESHOLD + basic_delay:
                 continue
 
-            async with reply_lock:
-                group_replies_front.append({
-                    "time": int(cur_time),
-                    "pre_raw_message": Speaker.SPEAK_FLAG,
-                    "pre_keywords": Speaker.SPEAK_FLAG,
-                    "reply": Speaker.SPEAK_FLAG,
-                    "reply_keywords": Speaker.SPEAK_FLAG,
-                })
+            async with group_replies.lock:
+                group_replies_front.append(
+                    ReplyRecord(
+                        int(cur_time), Speaker.SPEAK_FLAG, Speaker.SPEAK_FLAG, Speaker.SPEAK_FLAG, Speaker.SPEAK_FLAG
+                    )
+                )
 
             from .shard_opt import local_connected_bot_ids
 
@@ -145,17 +146,13 @@ class Speaker:
             speak = first_message.raw_message
             Speaker._recent_speak[group_id].append(speak)
 
-            async with reply_lock:
-                group_replies[bot_id].append({
-                    "time": int(cur_time),
-                    "pre_raw_message": Speaker.SPEAK_FLAG,
-                    "pre_keywords": Speaker.SPEAK_FLAG,
-                    "reply": speak,
-                    "reply_keywords": Speaker.SPEAK_FLAG,
-                })
+            async with group_replies.lock:
+                record = group_replies[bot_id].append(
+                    ReplyRecord(int(cur_time), Speaker.SPEAK_FLAG, Speaker.SPEAK_FLAG, speak, Speaker.SPEAK_FLAG)
+                )
                 from .reply_record_sync import publish_reply_record
 
-                publish_reply_record(group_id, bot_id, group_replies[bot_id][-1])
+                publish_reply_record(group_id, bot_id, record)
 
             speak_list = [
                 Message(speak),
@@ -171,7 +168,6 @@ class Speaker:
                     ChatData(group_id, 0, pre_msg, pre_msg, int(cur_time), 0),
                     BotConfig(0, group_id),
                     reply_dict,
-                    reply_lock,
                     recent_topics,
                     topics_lock,
                 )
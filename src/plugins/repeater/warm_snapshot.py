@@ -0,0 +1,220 @@
+"""复读热状态快照：worker 重启后立刻接上近期消息、话题、回复缓存与查询缓存。
+
+正常退出时（以及按 ``warm_snapshot_interval_sec`` 定期）把内存里的热状态压成一个 zlib 压缩的 JSON 写到
+``data/repeater/warm_snapshot/<role>_<shard>.bin``；启动时校验版本、角色分片与快照年龄后回填。
+缓存条目按写快照时的剩余 TTL 扣掉停机时长，过期的直接丢弃。
+
+非正常退出留下的定期快照里，写快照后才落库的消息无法区分，回填时一律视为已落库，宁可少存不重复写。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+from nonebot import logger
+
+from src.features.corpus.find_cache import export_find_cache_entries, restore_find_cache_entries
+from src.foundation.db import Message as MessageModel
+from src.foundation.paths import plugin_data_dir
+from src.platform.shard import context as shard_ctx
+
+from .config import get_repeater_config
+from .context_exists_cache import export_context_exists_entries, restore_context_exists_entries
+from .message_store import MessageStore
+from .model import Chat
+from .reply_buffer import ReplyRecord, ReplyRing
+from .speaker import Speaker
+
+_MAGIC = b"PWS"
+_VERSION = 1
+_MESSAGE_FIELDS = ("user_id", "bot_id", "raw_message", "is_plain_text", "plain_text", "keywords", "time")
+
+_last_saved_at = 0.0
+
+
+def warm_snapshot_path() -> Path:
+    return plugin_data_dir("repeater") / "warm_snapshot" / f"{shard_ctx.role()}_{shard_ctx.shard_id()}.bin"
+
+
+def encode_snapshot(state: dict[str, Any]) -> bytes:
+    body = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _MAGIC + bytes((_VERSION,)) + zlib.compress(body, 6)
+
+
+def decode_snapshot(blob: bytes) -> dict[str, Any] | None:
+    """版本不符或内容损坏时返回 None。"""
+    if len(blob) < 4 or blob[:3] != _MAGIC or blob[3] != _VERSION:
+        return None
+    try:
+        state = json.loads(zlib.decompress(blob[4:]))
+    except (zlib.error, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def _message_row(msg: MessageModel) -> list[Any]:
+    return [getattr(msg, f) for f in _MESSAGE_FIELDS]
+
+
+def _message_from_row(group_id: int, row: list[Any]) -> MessageModel:
+    data = dict(zip(_MESSAGE_FIELDS, row, strict=True))
+    return MessageModel.model_construct(group_id=group_id, **data)
+
+
+def capture_warm_state(*, graceful: bool) -> dict[str, Any]:
+    """同步收集当前热状态；全程不 await，拿到的是同一时刻的一致视图。"""
+    return {
+        "written_at": time.time(),
+        "role": str(shard_ctx.role()),
+        "shard_id": shard_ctx.shard_id(),
+        "graceful": graceful,
+        "late_save_time": MessageStore._late_save_time,
+        "messages": {
+            str(gid): [_message_row(m) for m in msgs] for gid, msgs in MessageStore._message_dict.items() if msgs
+        },
+        "topics": {str(gid): list(q) for gid, q in Chat._recent_topics.items() if q},
+        "replies": {
+            str(gid): {str(bot): [r.as_dict() for r in ring] for bot, ring in group.items() if len(ring)}
+            for gid, group in Chat._reply_dict.items()
+        },
+        "recent_speak": {str(gid): list(q) for gid, q in Speaker._recent_speak.items() if q},
+        "context_exists": export_context_exists_entries(),
+        "find": export_find_cache_entries(for_reply=False),
+        "reply_find": export_find_cache_entries(for_reply=True),
+    }
+
+
+def _shift_ttl(entries: list[Any], elapsed: float) -> list[Any]:
+    return [(e[0], float(e[1]) - elapsed, *e[2:]) for e in entries if isinstance(e, list) and len(e) >= 3]
+
+
+def apply_warm_state(state: dict[str, Any]) -> dict[str, int]:
+    """把快照回填到内存；只补不覆盖启动后已产生的新状态。返回各部分回填条数。"""
+    elapsed = max(0.0, time.time() - float(state.get("written_at") or 0))
+    counts: dict[str, int] = {}
+
+    restored_msgs: dict[int, list[MessageModel]] = {
+        int(gid): [_message_from_row(int(gid), row) for row in rows] for gid, rows in state["messages"].items()
+    }
+    latest = max((m.time for msgs in restored_msgs.values() for m in msgs), default=0)
+    late_save_time = int(state.get("late_save_time") or 0)
+    if not state.get("graceful"):
+        late_save_time = max(late_save_time, latest)
+    for gid, msgs in restored_msgs.items():
+        MessageStore._message_dict[gid][:0] = msgs
+    if restored_msgs:
+        MessageStore._late_save_time = max(MessageStore._late_save_time, late_save_time)
+    counts["messages"] = sum(len(v) for v in restored_msgs.values())
+
+    for gid, topics in state["topics"].items():
+        queue = Chat._recent_topics[int(gid)]
+        fresh = list(queue)
+        queue.clear()
+        queue.extend(topics)
+        queue.extend(fresh)
+    counts["topics"] = len(state["topics"])
+
+    replies = 0
+    for gid, bots in state["replies"].items():
+        group = Chat._reply_dict[int(gid)]
+        for bot, records in bots.items():
+            ring = group[int(bot)]
+            fresh = list(ring)
+            if fresh:
+                # 启动后已有新回复：旧记录排在前面重建环
+                ring = group[int(bot)] = ReplyRing(ring.capacity)
+            ring.extend(ReplyRecord.from_dict(r) for r in records)
+            ring.extend(fresh)
+            replies += len(records)
+    counts["replies"] = replies
+
+    for gid, speaks in state["recent_speak"].items():
+        queue = Speaker._recent_speak[int(gid)]
+        fresh = list(queue)
+        queue.clear()
+        queue.extend(speaks)
+        queue.extend(fresh)
+
+    counts["context_exists"] = restore_context_exists_entries(_shift_ttl(state["context_exists"], elapsed))
+    counts["find"] = restore_find_cache_entries(_shift_ttl(state["find"], elapsed), for_reply=False)
+    counts["reply_find"] = restore_find_cache_entries(_shift_ttl(state["reply_find"], elapsed), for_reply=True)
+    return counts
+
+
+def _write_atomic(path: Path, blob: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as fp:
+        fp.write(blob)
+        tmp = Path(fp.name)
+    try:
+        tmp.replace(path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+async def save_warm_snapshot(*, graceful: bool) -> Path | None:
+    """在事件循环上取一致视图，压缩与落盘放到线程里，不阻塞消息处理。"""
+    global _last_saved_at
+    if get_repeater_config().warm_snapshot_max_age_sec <= 0:
+        return None
+    _last_saved_at = time.monotonic()
+    path = warm_snapshot_path()
+    try:
+        state = capture_warm_state(graceful=graceful)
+        blob = await asyncio.to_thread(_encode_and_write, path, state)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"repeater warm snapshot write failed: {e}")
+        return None
+    logger.debug(f"repeater warm snapshot written: {path} ({len(blob)} bytes)")
+    return path
+
+
+def _encode_and_write(path: Path, state: dict[str, Any]) -> bytes:
+    blob = encode_snapshot(state)
+    _write_atomic(path, blob)
+    return blob
+
+
+async def save_warm_snapshot_if_due() -> Path | None:
+    """定期任务入口：距上次写入满 ``warm_snapshot_interval_sec`` 才写。"""
+    interval = get_repeater_config().warm_snapshot_interval_sec
+    if interval <= 0 or time.monotonic() - _last_saved_at < interval:
+        return None
+    return await save_warm_snapshot(graceful=False)
+
+
+def load_warm_snapshot() -> dict[str, int] | None:
+    """读取并回填快照；读后即删，避免下次启动重复回填。过期、分片不符或损坏时返回 None。"""
+    max_age = get_repeater_config().warm_snapshot_max_age_sec
+    if max_age <= 0:
+        return None
+    path = warm_snapshot_path()
+    try:
+        blob = path.read_bytes()
+    except OSError:
+        return None
+    path.unlink(missing_ok=True)
+    state = decode_snapshot(blob)
+    if state is None:
+        logger.warning(f"repeater warm snapshot {path} unreadable, ignored")
+        return None
+    age = time.time() - float(state.get("written_at") or 0)
+    if age < 0 or age > max_age:
+        logger.info(f"repeater warm snapshot is {age:.0f}s old (max {max_age}s), ignored")
+        return None
+    if state.get("role") != str(shard_ctx.role()) or state.get("shard_id") != shard_ctx.shard_id():
+        return None
+    try:
+        counts = apply_warm_state(state)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        logger.warning(f"repeater warm snapshot restore failed: {e}")
+        return None
+    logger.info(f"repeater warm snapshot restored ({age:.0f}s old): {counts}")
+    return counts
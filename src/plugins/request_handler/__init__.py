@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import tempfile
@@ -28,19 +29,13 @@ from src.features.cmd_perm.metadata_defaults import (
 )
 from src.features.cmd_perm.metadata_text import SCENE_PRIVATE, join_usage, usage_line
 from src.foundation.config import BotConfig, GroupConfig, UserConfig, get_bot_admins, user_is_bot_admin
-from src.foundation.paths import plugin_data_dir
+from src.plugins.request_handler import state_store
 from src.plugins.request_handler.approval_notice_text import parse_approval_notice_meta
 from src.plugins.request_handler.approval_reply_text import (
     classify_approval_reply_text,
     extract_approval_reply_text_from_body,
 )
 from src.plugins.request_handler.config import Config
-from src.plugins.request_handler.storage import (
-    load_json_file,
-    merge_write_bot_entry,
-    merge_write_bot_nested_entries,
-    save_json_file,
-)
 from src.plugins.request_handler.texts import (
     APPROVE_ALL_FRIENDS_COMMAND,
     APPROVE_ALL_GROUPS_ALIASES,
@@ -223,69 +218,12 @@ __plugin_meta__ = PluginMetadata(
     },
 )
 
-DATA_DIR = plugin_data_dir("request_handler")
-
-FRIEND_REQ_FILE = DATA_DIR / "pending_friend_requests.json"
-GROUP_REQ_FILE = DATA_DIR / "pending_group_requests.json"
-LAST_NOTIFIED_FILE = DATA_DIR / "last_notified_request.json"
-APPROVAL_NOTICE_FILE = DATA_DIR / "approval_notice_messages.json"
-DOUBT_POLL_STATE_FILE = DATA_DIR / "doubt_friend_poll_state.json"
+# 待处理申请、最近推送、审批提醒与可疑好友轮询状态均落在 state_store（单个 SQLite），旧 JSON 首次打开时自动导入
 
 # 审批提醒元数据：超过此时长视为过期，不再用于「同意/拒绝」与引用回复
 _NOTIFY_RECORD_MAX_AGE_SEC = 7 * 24 * 3600
 
 
-def load_json(path: Path) -> dict:
-    return load_json_file(path)
-
-
-def save_json(path: Path, data: dict) -> None:
-    save_json_file(path, data)
-
-
-def persist_pending_friend(bot_key: str) -> None:
-    merge_write_bot_nested_entries(FRIEND_REQ_FILE, pending_friend, bot_key)
-
-
-def persist_pending_group(bot_key: str) -> None:
-    merge_write_bot_nested_entries(GROUP_REQ_FILE, pending_group, bot_key)
-
-
-def persist_last_notified_bot(bot_key: str) -> None:
-    merge_write_bot_entry(LAST_NOTIFIED_FILE, last_notified_store, bot_key)
-
-
-def persist_approval_notice_bot(bot_key: str) -> None:
-    merge_write_bot_nested_entries(APPROVAL_NOTICE_FILE, approval_notice_map, bot_key)
-
-
-def load_doubt_poll_state() -> tuple[set[str], dict[str, set[str]]]:
-    raw = load_json(DOUBT_POLL_STATE_FILE)
-    if not isinstance(raw, dict):
-        return set(), {}
-    primed: set[str] = set()
-    for x in raw.get("primed_bots", []):
-        if x is not None:
-            primed.add(str(x))
-    notified: dict[str, set[str]] = {}
-    nr = raw.get("notified")
-    if isinstance(nr, dict):
-        for bk, uids in nr.items():
-            if not isinstance(uids, list):
-                continue
-            s = {str(u) for u in uids if u is not None and str(u).isdigit()}
-            notified[str(bk)] = s
-    return primed, notified
-
-
-def save_doubt_poll_state(primed: set[str], notified: dict[str, set[str]]) -> None:
-    payload = {
-        "primed_bots": sorted(primed),
-        "notified": {k: sorted(v) for k, v in sorted(notified.items())},
-    }
-    save_json(DOUBT_POLL_STATE_FILE, payload)
-
-
 def notify_ts_expired(ts: float, now: float | None = None) -> bool:
     now = time.time() if now is None else now
     return bool(ts > 0 and now - ts > _NOTIFY_RECORD_MAX_AGE_SEC)
@@ -305,25 +243,19 @@ def api_failure_is_request_gone(exc: BaseException) -> bool:
     return False
 
 
-def failure_cleanup_friend(bot_key: str, uid_str: str) -> None:
+async def failure_cleanup_friend(bot_key: str, uid_str: str) -> None:
     """协议调用失败后移除本地好友 pending，避免失效记录占位。"""
-    bot_pending = pending_friend.get(bot_key)
-    if bot_pending and uid_str in bot_pending:
-        bot_pending.pop(uid_str, None)
-        persist_pending_friend(bot_key)
+    await asyncio.to_thread(state_store.delete_pending_friends, bot_key, [uid_str])
     doubt_cache = cached_doubt_friend.get(bot_key)
     if doubt_cache and uid_str in doubt_cache:
         doubt_cache.pop(uid_str, None)
-    clear_quick_approve_state(bot_key, "friend", uid_str)
+    await clear_quick_approve_state(bot_key, "friend", uid_str)
 
 
-def failure_cleanup_group(bot_key: str, group_key: str) -> None:
+async def failure_cleanup_group(bot_key: str, group_key: str) -> None:
     """协议调用失败后移除本地入群 pending，避免失效记录占位。"""
-    bot_pending = pending_group.get(bot_key)
-    if bot_pending and group_key in bot_pending:
-        bot_pending.pop(group_key, None)
-        persist_pending_group(bot_key)
-    clear_quick_approve_state(bot_key, "group", group_key)
+    await asyncio.to_thread(state_store.delete_pending_groups, bot_key, [group_key])
+    await clear_quick_approve_state(bot_key, "group", group_key)
 
 
 def api_failure_user_message(exc: ActionFailed) -> str:
@@ -331,192 +263,33 @@ def api_failure_user_message(exc: ActionFailed) -> str:
     return f"失败：{exc}{suffix}"
 
 
-def load_last_notified_store() -> tuple[dict[str, dict[str, str | float]], bool]:
-    raw = load_json(LAST_NOTIFIED_FILE)
-    out: dict[str, dict[str, str | float]] = {}
-    dirty = False
-    now = time.time()
-    if not isinstance(raw, dict):
-        return {}, bool(raw)
-
-    dict_rows = sum(1 for v in raw.values() if isinstance(v, dict))
-    for bot_key, row in raw.items():
-        bk = str(bot_key)
-        if not isinstance(row, dict):
-            dirty = True
-            continue
-        kind = row.get("kind")
-        target_id = row.get("target_id")
-        if kind not in ("friend", "group") or not isinstance(target_id, str) or not target_id.isdigit():
-            dirty = True
-            continue
-        try:
-            ts = float(row["ts"])
-        except (KeyError, TypeError, ValueError):
-            ts = now
-            dirty = True
-        if notify_ts_expired(ts, now):
-            dirty = True
-            continue
-        out[bk] = {"kind": kind, "target_id": target_id, "ts": ts}
-
-    if len(out) != dict_rows:
-        dirty = True
-    return out, dirty
-
-
-def persist_last_notified_store(bot_key: str | None = None) -> None:
-    prune_stale_last_notified_entries()
-    if bot_key is not None:
-        persist_last_notified_bot(bot_key)
-        return
-
-    for current_bot_key in list(last_notified_store.keys()):
-        persist_last_notified_bot(current_bot_key)
-
-    disk_data = load_json(LAST_NOTIFIED_FILE)
-    stale_keys = [str(key) for key in disk_data.keys() if str(key) not in last_notified_store]
-    if stale_keys:
-        for stale_bot_key in stale_keys:
-            last_notified_store.pop(stale_bot_key, None)
-            persist_last_notified_bot(stale_bot_key)
-
+async def set_last_notified(bot_key: str, kind: str, target_id: str) -> None:
+    await asyncio.to_thread(state_store.set_last_notified, bot_key, kind, target_id, time.time())
 
-def prune_stale_last_notified_entries() -> bool:
-    changed = False
-    now = time.time()
-    for bk in list(last_notified_store.keys()):
-        row = last_notified_store.get(bk)
-        if not isinstance(row, dict):
-            last_notified_store.pop(bk, None)
-            changed = True
-            continue
-        ts = float(row.get("ts") or 0)
-        if notify_ts_expired(ts, now):
-            last_notified_store.pop(bk, None)
-            changed = True
-    return changed
 
-
-def set_last_notified(bot_key: str, kind: str, target_id: str) -> None:
-    last_notified_store[bot_key] = {"kind": kind, "target_id": target_id, "ts": time.time()}
-    persist_last_notified_store(bot_key)
-
-
-def get_last_notified(bot_key: str) -> tuple[str, str, float] | None:
-    row = last_notified_store.get(bot_key)
-    if not row:
-        return None
-    kind = row.get("kind")
-    target_id = row.get("target_id")
-    if kind not in ("friend", "group") or not isinstance(target_id, str):
+async def get_last_notified(bot_key: str) -> tuple[str, str, float] | None:
+    entry = await asyncio.to_thread(state_store.get_last_notified, bot_key)
+    if entry is None:
         return None
-    try:
-        ts = float(row.get("ts") or 0)
-    except (TypeError, ValueError):
-        ts = 0.0
-    if notify_ts_expired(ts):
-        last_notified_store.pop(bot_key, None)
-        persist_last_notified_store(bot_key)
+    if notify_ts_expired(entry[2]):
+        await asyncio.to_thread(state_store.delete_last_notified, bot_key)
         return None
-    return kind, target_id, ts
+    return entry
 
 
-def load_approval_notice_map() -> tuple[dict[str, dict[str, dict[str, str | float]]], bool]:
-    raw = load_json(APPROVAL_NOTICE_FILE)
-    out: dict[str, dict[str, dict[str, str | float]]] = {}
-    dirty = False
-    now = time.time()
-    if not isinstance(raw, dict):
-        return {}, bool(raw)
-
-    rows_seen = 0
-    rows_kept = 0
-    for bot_key, msgs in raw.items():
-        bk = str(bot_key)
-        if not isinstance(msgs, dict):
-            dirty = True
-            continue
-        inner: dict[str, dict[str, str | float]] = {}
-        for mid, row in msgs.items():
-            rows_seen += 1
-            if not isinstance(row, dict):
-                dirty = True
-                continue
-            kind = row.get("kind")
-            tid = row.get("target_id")
-            if kind not in ("friend", "group") or not isinstance(tid, str) or not tid.isdigit():
-                dirty = True
-                continue
-            try:
-                ts = float(row["ts"])
-            except (KeyError, TypeError, ValueError):
-                ts = now
-                dirty = True
-            if notify_ts_expired(ts, now):
-                dirty = True
-                continue
-            inner[str(mid)] = {"kind": kind, "target_id": tid, "ts": ts}
-            rows_kept += 1
-        if inner:
-            out[bk] = inner
-        elif msgs:
-            dirty = True
-
-    if rows_kept != rows_seen:
-        dirty = True
-    return out, dirty
+async def get_approval_notice(bot_key: str, message_id: str) -> dict[str, str | float] | None:
+    meta = await asyncio.to_thread(state_store.get_approval_notice, bot_key, message_id)
+    if meta is not None and notify_ts_expired(float(meta["ts"])):
+        await asyncio.to_thread(state_store.delete_approval_notice, bot_key, message_id)
+        return None
+    return meta
 
 
-def prune_stale_approval_notice_entries() -> bool:
-    changed = False
+async def register_approval_notices(bot_key: str, message_ids: list[int], kind: str, target_id: str) -> None:
     now = time.time()
-    for bk in list(approval_notice_map.keys()):
-        inner = approval_notice_map.get(bk)
-        if not inner:
-            approval_notice_map.pop(bk, None)
-            continue
-        for mid in list(inner.keys()):
-            meta = inner.get(mid)
-            if not isinstance(meta, dict):
-                inner.pop(mid, None)
-                changed = True
-                continue
-            ts = float(meta.get("ts") or 0)
-            if notify_ts_expired(ts, now):
-                inner.pop(mid)
-                changed = True
-        if not inner:
-            approval_notice_map.pop(bk, None)
-            changed = True
-    return changed
-
-
-def persist_approval_notice_map(bot_key: str | None = None) -> None:
-    prune_stale_approval_notice_entries()
-    if bot_key is not None:
-        persist_approval_notice_bot(bot_key)
-        return
-
-    for current_bot_key in list(approval_notice_map.keys()):
-        persist_approval_notice_bot(current_bot_key)
-
-    disk_data = load_json(APPROVAL_NOTICE_FILE)
-    stale_keys = [str(key) for key in disk_data.keys() if str(key) not in approval_notice_map]
-    if stale_keys:
-        for stale_bot_key in stale_keys:
-            approval_notice_map.pop(stale_bot_key, None)
-            persist_approval_notice_bot(stale_bot_key)
-
-
-def register_approval_notice(bot_key: str, message_id: int, kind: str, target_id: str, *, persist: bool = True) -> None:
-    approval_notice_map.setdefault(bot_key, {})[str(message_id)] = {
-        "kind": kind,
-        "target_id": target_id,
-        "ts": time.time(),
-    }
-    if persist:
-        persist_approval_notice_map(bot_key)
+    await asyncio.to_thread(
+        state_store.put_approval_notices, bot_key, [(str(mid), kind, target_id, now) for mid in message_ids]
+    )
 
 
 def extract_message_id(result: object) -> int | None:
@@ -531,44 +304,12 @@ def extract_message_id(result: object) -> int | None:
         return None
 
 
-def clear_quick_approve_state(bot_key: str, kind: str, target_id: str) -> None:
-    ln_changed = False
-    row = last_notified_store.get(bot_key)
-    if isinstance(row, dict) and row.get("kind") == kind and str(row.get("target_id")) == str(target_id):
-        last_notified_store.pop(bot_key, None)
-        ln_changed = True
-    notice_changed = False
-    bot_msgs = approval_notice_map.get(bot_key)
-    if bot_msgs:
-        for mid in list(bot_msgs.keys()):
-            meta = bot_msgs.get(mid)
-            if meta and meta.get("kind") == kind and meta.get("target_id") == target_id:
-                bot_msgs.pop(mid, None)
-                notice_changed = True
-        if not bot_msgs:
-            approval_notice_map.pop(bot_key, None)
-    if ln_changed:
-        persist_last_notified_store(bot_key)
-    if notice_changed:
-        persist_approval_notice_map(bot_key)
-
-
-# {bot_id: {user_id: flag}}
-pending_friend: dict[str, dict[str, str]] = load_json(FRIEND_REQ_FILE)
+async def clear_quick_approve_state(bot_key: str, kind: str, target_id: str) -> None:
+    await asyncio.to_thread(state_store.clear_notice_targets, bot_key, kind, [target_id])
+
+
 # 被过滤的好友申请 {bot_id: {user_id: flag}}
 cached_doubt_friend: dict[str, dict[str, str]] = {}
-# {bot_id: {group_id: {...}}}
-pending_group: dict[str, dict[str, dict]] = load_json(GROUP_REQ_FILE)
-# 最近一次推送：bot_id -> { kind, target_id, ts }，用于「同意」快捷审批
-_last_loaded_ln, _last_notified_dirty = load_last_notified_store()
-last_notified_store: dict[str, dict[str, str | float]] = _last_loaded_ln
-# 审批通知 message_id：bot_id -> { message_id_str -> { kind, target_id, ts } }，用于引用回复处理对应申请
-_last_loaded_an, _approval_notice_dirty = load_approval_notice_map()
-approval_notice_map: dict[str, dict[str, dict[str, str | float]]] = _last_loaded_an
-if _last_notified_dirty:
-    save_json(LAST_NOTIFIED_FILE, last_notified_store)
-if _approval_notice_dirty:
-    save_json(APPROVAL_NOTICE_FILE, approval_notice_map)
 
 
 def rows_from_doubt_friends_api(result: object) -> list[dict]:
@@ -644,18 +385,16 @@ async def get_group_name(bot: Bot, group_id: int) -> str:
 
 
 async def approve_friend_by_uid(bot: Bot, bot_key: str, uid_str: str) -> tuple[bool, str]:
-    bot_pending = pending_friend.get(bot_key, {})
-    flag = bot_pending.get(uid_str)
+    flag = await asyncio.to_thread(state_store.pending_friend_flag, bot_key, uid_str)
     if flag:
         try:
             await bot.set_friend_add_request(flag=flag, approve=True)
         except ActionFailed as e:
-            failure_cleanup_friend(bot_key, uid_str)
+            await failure_cleanup_friend(bot_key, uid_str)
             return False, api_failure_user_message(e)
         except Exception as e:
             return False, f"操作未成功：{e}（请稍后重试）"
-        bot_pending.pop(uid_str, None)
-        persist_pending_friend(bot_key)
+        await asyncio.to_thread(state_store.delete_pending_friends, bot_key, [uid_str])
         nickname = await get_nickname(bot, int(uid_str))
         return True, f"已同意好友：{nickname}（{uid_str}）"
 
@@ -669,7 +408,7 @@ async def approve_friend_by_uid(bot: Bot, bot_key: str, uid_str: str) -> tuple[b
     try:
         await bot.call_api("set_doubt_friends_add_request", flag=doubt_flag, approve=True)
     except ActionFailed as e:
-        failure_cleanup_friend(bot_key, uid_str)
+        await failure_cleanup_friend(bot_key, uid_str)
         return False, api_failure_user_message(e)
     except Exception as e:
         return False, f"操作未成功：{e}（请稍后重试）"
@@ -679,18 +418,16 @@ async def approve_friend_by_uid(bot: Bot, bot_key: str, uid_str: str) -> tuple[b
 
 
 async def reject_friend_by_uid(bot: Bot, bot_key: str, uid_str: str) -> tuple[bool, str]:
-    bot_pending = pending_friend.get(bot_key, {})
-    flag = bot_pending.get(uid_str)
+    flag = await asyncio.to_thread(state_store.pending_friend_flag, bot_key, uid_str)
     if flag:
         try:
             await bot.set_friend_add_request(flag=flag, approve=False)
         except ActionFailed as e:
-            failure_cleanup_friend(bot_key, uid_str)
+            await failure_cleanup_friend(bot_key, uid_str)
             return False, api_failure_user_message(e)
         except Exception as e:
             return False, f"操作未成功：{e}（请稍后重试）"
-        bot_pending.pop(uid_str, None)
-        persist_pending_friend(bot_key)
+        await asyncio.to_thread(state_store.delete_pending_friends, bot_key, [uid_str])
         nickname = await get_nickname(bot, int(uid_str))
         return True, f"已拒绝好友：{nickname}（{uid_str}）"
 
@@ -704,7 +441,7 @@ async def reject_friend_by_uid(bot: Bot, bot_key: str, uid_str: str) -> tuple[bo
     try:
         await bot.call_api("set_doubt_friends_add_request", flag=doubt_flag, approve=False)
     except ActionFailed as e:
-        failure_cleanup_friend(bot_key, uid_str)
+        await failure_cleanup_friend(bot_key, uid_str)
         return False, api_failure_user_message(e)
     except Exception as e:
         return False, f"操作未成功：{e}（请稍后重试）"
@@ -714,8 +451,7 @@ async def reject_friend_by_uid(bot: Bot, bot_key: str, uid_str: str) -> tuple[bo
 
 
 async def approve_group_invite_by_gid(bot: Bot, bot_key: str, group_key: str) -> tuple[bool, str]:
-    bot_pending = pending_group.get(bot_key, {})
-    req = bot_pending.get(group_key)
+    req = await asyncio.to_thread(state_store.pending_group, bot_key, group_key)
     group_id = int(group_key)
     if not req:
         group_name = await get_group_name(bot, group_id)
@@ -724,20 +460,18 @@ async def approve_group_invite_by_gid(bot: Bot, bot_key: str, group_key: str) ->
     try:
         await bot.set_group_add_request(flag=req["flag"], sub_type="invite", approve=True)
     except ActionFailed as e:
-        failure_cleanup_group(bot_key, group_key)
+        await failure_cleanup_group(bot_key, group_key)
         return False, api_failure_user_message(e)
     except Exception as e:
         return False, f"操作未成功：{e}（请稍后重试）"
-    bot_pending.pop(group_key, None)
-    persist_pending_group(bot_key)
+    await asyncio.to_thread(state_store.delete_pending_groups, bot_key, [group_key])
     nickname = await get_nickname(bot, req["user_id"])
     group_name = await get_group_name(bot, group_id)
     return True, f"已同意入群申请：{group_name}（{group_id}），邀请人 {nickname}（{req['user_id']}）"
 
 
 async def reject_group_invite_by_gid(bot: Bot, bot_key: str, group_key: str) -> tuple[bool, str]:
-    bot_pending = pending_group.get(bot_key, {})
-    req = bot_pending.get(group_key)
+    req = await asyncio.to_thread(state_store.pending_group, bot_key, group_key)
     group_id = int(group_key)
     if not req:
         group_name = await get_group_name(bot, group_id)
@@ -746,12 +480,11 @@ async def reject_group_invite_by_gid(bot: Bot, bot_key: str, group_key: str) ->
     try:
         await bot.set_group_add_request(flag=req["flag"], sub_type="invite", approve=False)
     except ActionFailed as e:
-        failure_cleanup_group(bot_key, group_key)
+        await failure_cleanup_group(bot_key, group_key)
         return False, api_failure_user_message(e)
     except Exception as e:
         return False, f"操作未成功：{e}（请稍后重试）"
-    bot_pending.pop(group_key, None)
-    persist_pending_group(bot_key)
+    await asyncio.to_thread(state_store.delete_pending_groups, bot_key, [group_key])
     nickname = await get_nickname(bot, req["user_id"])
     group_name = await get_group_name(bot, group_id)
     return True, f"已拒绝入群申请：{group_name}（{group_id}），邀请人 {nickname}（{req['user_id']}）"
@@ -885,7 +618,7 @@ async def notify_admins(bot: Bot, msg: str, *, kind: str, target_id: str) -> boo
     # Bot 未配置 admins 时仍通知 SUPERUSER，避免无人收件
     if not admins:
         admins = [int(uid) for uid in get_driver().config.superusers]
-    registered = False
+    message_ids: list[int] = []
     delivered_any = False
     for admin_id in admins:
         try:
@@ -893,12 +626,11 @@ async def notify_admins(bot: Bot, msg: str, *, kind: str, target_id: str) -> boo
             delivered_any = True
             mid = extract_message_id(ret)
             if mid is not None:
-                register_approval_notice(bot_key, mid, kind, target_id, persist=False)
-                registered = True
+                message_ids.append(mid)
         except Exception:
             pass
-    if registered:
-        persist_approval_notice_map(bot_key)
+    if message_ids:
+        await register_approval_notices(bot_key, message_ids, kind, target_id)
     return delivered_any
 
 
@@ -910,9 +642,10 @@ async def notify_admins(bot: Bot, msg: str, *, kind: str, target_id: str) -> boo
     max_instances=1,
 )
 async def poll_doubt_friends_job() -> None:
+    await asyncio.to_thread(state_store.prune_expired_notices, _NOTIFY_RECORD_MAX_AGE_SEC)
     if not plugin_config().request_handler_poll_doubt_friends:
         return
-    primed_bots, notified_map = load_doubt_poll_state()
+    primed_bots, notified_map = await asyncio.to_thread(state_store.load_doubt_poll_state)
     state_updated = False
     for bot in get_bots().values():
         if not isinstance(bot, Bot):
@@ -928,7 +661,7 @@ async def poll_doubt_friends_job() -> None:
             continue
         cached_doubt_friend[bot_key] = doubts
         current_uids = set(doubts.keys())
-        pending_keys = pending_friend.get(bot_key, {})
+        pending_keys = await asyncio.to_thread(state_store.pending_friends, bot_key)
 
         if bot_key not in primed_bots:
             notified_map[bot_key] = set(current_uids)
@@ -950,7 +683,7 @@ async def poll_doubt_friends_job() -> None:
             nickname = await get_nickname(bot, int(uid))
             msg = f"[好友申请]\n申请人：{nickname}（{uid}）\n{REQUEST_HANDLER_HELP_HINT}"
             if await notify_admins(bot, msg, kind="friend", target_id=uid):
-                set_last_notified(bot_key, "friend", uid)
+                await set_last_notified(bot_key, "friend", uid)
                 notified_set.add(uid)
                 state_updated = True
             else:
@@ -959,7 +692,7 @@ async def poll_doubt_friends_job() -> None:
         notified_map[bot_key] = notified_set
 
     if state_updated:
-        save_doubt_poll_state(primed_bots, notified_map)
+        await asyncio.to_thread(state_store.save_doubt_poll_state, primed_bots, notified_map)
 
 
 async def approval_reply_rule(bot: Bot, event: Event) -> bool:
@@ -979,17 +712,9 @@ async def approval_reply_rule(bot: Bot, event: Event) -> bool:
         quoted_body = event.reply.message.extract_plain_text()
     bot_key = str(bot.self_id)
     mid = str(event.reply.message_id)
-    bot_msgs = approval_notice_map.get(bot_key)
-    if bot_msgs and mid in bot_msgs:
-        meta = bot_msgs[mid]
-        ts = float(meta.get("ts") or 0)
-        if ts and notify_ts_expired(ts):
-            bot_msgs.pop(mid, None)
-            if not bot_msgs:
-                approval_notice_map.pop(bot_key, None)
-            persist_approval_notice_map(bot_key)
-            return False
-        return True
+    if await asyncio.to_thread(state_store.get_approval_notice, bot_key, mid) is not None:
+        # 过期记录在此删除且不再匹配
+        return await get_approval_notice(bot_key, mid) is not None
     return parse_approval_notice_meta(quoted_body) is not None
 
 
@@ -1003,7 +728,7 @@ async def handle_approval_reply(bot: Bot, event: PrivateMessageEvent):
     quoted_body = None
     if event.reply and event.reply.message is not None:
         quoted_body = event.reply.message.extract_plain_text()
-    meta = approval_notice_map.get(bot_key, {}).get(mid)
+    meta = await get_approval_notice(bot_key, mid)
     if not meta:
         meta = parse_approval_notice_meta(quoted_body)
     if not meta:
@@ -1030,7 +755,7 @@ async def handle_approval_reply(bot: Bot, event: PrivateMessageEvent):
         else:
             ok, msg = await reject_group_invite_by_gid(bot, bot_key, target_id)
     if ok:
-        clear_quick_approve_state(bot_key, kind, target_id)
+        await clear_quick_approve_state(bot_key, kind, target_id)
     await approval_reply_cmd.finish(msg)
 
 
@@ -1038,14 +763,12 @@ async def handle_approval_reply(bot: Bot, event: PrivateMessageEvent):
 async def handle_friend_request(bot: Bot, event: FriendRequestEvent):
     bot_id = int(bot.self_id)
     bot_key = str(bot_id)
-    pending_friend.setdefault(bot_key, {})[str(event.user_id)] = event.flag
-    persist_pending_friend(bot_key)
+    await asyncio.to_thread(state_store.put_pending_friend, bot_key, str(event.user_id), event.flag)
 
     bot_config = BotConfig(bot_id)
     if await bot_config.auto_accept_friend():
         await event.approve(bot)
-        pending_friend.get(bot_key, {}).pop(str(event.user_id), None)
-        persist_pending_friend(bot_key)
+        await asyncio.to_thread(state_store.delete_pending_friends, bot_key, [str(event.user_id)])
         return
 
     if not await request_handler_plugin_disabled(bot_id=bot_id):
@@ -1055,7 +778,7 @@ async def handle_friend_request(bot: Bot, event: FriendRequestEvent):
             f"验证：{event.comment or '-'}\n{REQUEST_HANDLER_HELP_HINT}"
         )
         if await notify_admins(bot, msg, kind="friend", target_id=str(event.user_id)):
-            set_last_notified(bot_key, "friend", str(event.user_id))
+            await set_last_notified(bot_key, "friend", str(event.user_id))
 
 
 @list_friends_cmd.handle()
@@ -1063,7 +786,7 @@ async def handle_list_friends(bot: Bot, event: MessageEvent):
     if not await satisfies_command_permission(bot, event, "request.list_friends"):
         return
     bot_key = str(bot.self_id)
-    bot_pending = pending_friend.get(bot_key, {})
+    bot_pending = await asyncio.to_thread(state_store.pending_friends, bot_key)
 
     # 获取被过滤的好友申请并缓存
     doubt_requests = await fetch_doubt_friends(bot)
@@ -1094,7 +817,7 @@ async def handle_approve_latest(bot: Bot, event: MessageEvent, args: Message = C
     if arg:
         await approve_latest_cmd.finish(build_quick_action_arg_hint(APPROVE_LATEST_COMMAND))
     bot_key = str(bot.self_id)
-    entry = get_last_notified(bot_key)
+    entry = await get_last_notified(bot_key)
     if not entry:
         await approve_latest_cmd.finish(build_quick_action_missing_hint(APPROVE_LATEST_COMMAND))
     kind, target_id, _ts = entry
@@ -1103,7 +826,7 @@ async def handle_approve_latest(bot: Bot, event: MessageEvent, args: Message = C
     else:
         ok, msg = await approve_group_invite_by_gid(bot, bot_key, target_id)
     if ok:
-        clear_quick_approve_state(bot_key, kind, target_id)
+        await clear_quick_approve_state(bot_key, kind, target_id)
     await approve_latest_cmd.finish(msg)
 
 
@@ -1115,7 +838,7 @@ async def handle_reject_latest(bot: Bot, event: MessageEvent, args: Message = Co
     if arg:
         await reject_latest_cmd.finish(build_quick_action_arg_hint(REJECT_LATEST_COMMAND))
     bot_key = str(bot.self_id)
-    entry = get_last_notified(bot_key)
+    entry = await get_last_notified(bot_key)
     if not entry:
         await reject_latest_cmd.finish(build_quick_action_missing_hint(REJECT_LATEST_COMMAND))
     kind, target_id, _ts = entry
@@ -1124,7 +847,7 @@ async def handle_reject_latest(bot: Bot, event: MessageEvent, args: Message = Co
     else:
         ok, msg = await reject_group_invite_by_gid(bot, bot_key, target_id)
     if ok:
-        clear_quick_approve_state(bot_key, kind, target_id)
+        await clear_quick_approve_state(bot_key, kind, target_id)
     await reject_latest_cmd.finish(msg)
 
 
@@ -1139,7 +862,7 @@ async def handle_approve_friend(bot: Bot, event: MessageEvent, args: Message = C
     bot_key = str(bot.self_id)
     ok, msg = await approve_friend_by_uid(bot, bot_key, arg)
     if ok:
-        clear_quick_approve_state(bot_key, "friend", arg)
+        await clear_quick_approve_state(bot_key, "friend", arg)
     await approve_friend_cmd.finish(msg)
 
 
@@ -1154,7 +877,7 @@ async def handle_reject_friend(bot: Bot, event: MessageEvent, args: Message = Co
     bot_key = str(bot.self_id)
     ok, msg = await reject_friend_by_uid(bot, bot_key, arg)
     if ok:
-        clear_quick_approve_state(bot_key, "friend", arg)
+        await clear_quick_approve_state(bot_key, "friend", arg)
     await reject_friend_cmd.finish(msg)
 
 
@@ -1163,7 +886,7 @@ async def handle_list_groups(bot: Bot, event: MessageEvent):
     if not await satisfies_command_permission(bot, event, "request.list_groups"):
         return
     bot_key = str(bot.self_id)
-    bot_pending = pending_group.get(bot_key, {})
+    bot_pending = await asyncio.to_thread(state_store.pending_groups, bot_key)
     if not bot_pending:
         await list_groups_cmd.finish("暂无待处理入群申请")
     lines = [f"待处理入群申请（共 {len(bot_pending)} 条）："]
@@ -1185,20 +908,23 @@ async def handle_group_request(bot: Bot, event: GroupRequestEvent):
         bot_id = int(bot.self_id)
         bot_key = str(bot_id)
         group_key = str(event.group_id)
-        pending_group.setdefault(bot_key, {})[group_key] = {
-            "flag": event.flag,
-            "sub_type": "invite",
-            "user_id": event.user_id,
-            "group_id": event.group_id,
-            "comment": event.comment or "",
-        }
-        persist_pending_group(bot_key)
+        await asyncio.to_thread(
+            state_store.put_pending_group,
+            bot_key,
+            group_key,
+            {
+                "flag": event.flag,
+                "sub_type": "invite",
+                "user_id": event.user_id,
+                "group_id": event.group_id,
+                "comment": event.comment or "",
+            },
+        )
 
         bot_config = BotConfig(bot_id)
         if await bot_config.auto_accept_group() or await user_is_bot_admin(bot_id, event.user_id):
             await event.approve(bot)
-            pending_group.get(bot_key, {}).pop(group_key, None)
-            persist_pending_group(bot_key)
+            await asyncio.to_thread(state_store.delete_pending_groups, bot_key, [group_key])
             return
 
         if not await request_handler_plugin_disabled(bot_id=bot_id):
@@ -1211,7 +937,7 @@ async def handle_group_request(bot: Bot, event: GroupRequestEvent):
                 f"{REQUEST_HANDLER_HELP_HINT}"
             )
             if await notify_admins(bot, msg, kind="group", target_id=group_key):
-                set_last_notified(bot_key, "group", group_key)
+                await set_last_notified(bot_key, "group", group_key)
 
 
 @approve_all_friends_cmd.handle()
@@ -1219,7 +945,7 @@ async def handle_approve_all_friends(bot: Bot, event: MessageEvent):
     if not await satisfies_command_permission(bot, event, "request.approve_all_friends"):
         return
     bot_key = str(bot.self_id)
-    bot_pending = pending_friend.get(bot_key, {})
+    bot_pending = await asyncio.to_thread(state_store.pending_friends, bot_key)
     doubt_requests = await fetch_doubt_friends(bot)
     cached_doubt_friend[bot_key] = doubt_requests
 
@@ -1228,35 +954,33 @@ async def handle_approve_all_friends(bot: Bot, event: MessageEvent):
 
     ok, fail = 0, 0
     cleared_friend_ids: set[str] = set()
-    for uid, flag in list(bot_pending.items()):
+    for uid, flag in bot_pending.items():
         try:
             await bot.set_friend_add_request(flag=flag, approve=True)
-            bot_pending.pop(uid, None)
             ok += 1
             cleared_friend_ids.add(uid)
         except ActionFailed:
             fail += 1
-            failure_cleanup_friend(bot_key, uid)
+            doubt_requests.pop(uid, None)
             cleared_friend_ids.add(uid)
         except Exception:
             fail += 1
-    persist_pending_friend(bot_key)
 
     for uid, flag in list(doubt_requests.items()):
         try:
             await bot.call_api("set_doubt_friends_add_request", flag=flag, approve=True)
-            cached_doubt_friend[bot_key].pop(uid, None)
             ok += 1
-            cleared_friend_ids.add(uid)
         except ActionFailed:
             fail += 1
-            failure_cleanup_friend(bot_key, uid)
-            cleared_friend_ids.add(uid)
         except Exception:
             fail += 1
+            continue
+        doubt_requests.pop(uid, None)
+        cleared_friend_ids.add(uid)
 
-    for uid in cleared_friend_ids:
-        clear_quick_approve_state(bot_key, "friend", uid)
+    # 已处理或已失效的申请一次事务落盘
+    await asyncio.to_thread(state_store.delete_pending_friends, bot_key, cleared_friend_ids)
+    await asyncio.to_thread(state_store.clear_notice_targets, bot_key, "friend", cleared_friend_ids)
 
     await approve_all_friends_cmd.finish(f"已同意 {ok} 条好友申请" + (f"，{fail} 条失败" if fail else ""))
 
@@ -1266,7 +990,7 @@ async def handle_reject_all_friends(bot: Bot, event: MessageEvent):
     if not await satisfies_command_permission(bot, event, "request.reject_all_friends"):
         return
     bot_key = str(bot.self_id)
-    bot_pending = pending_friend.get(bot_key, {})
+    bot_pending = await asyncio.to_thread(state_store.pending_friends, bot_key)
     doubt_requests = await fetch_doubt_friends(bot)
     cached_doubt_friend[bot_key] = doubt_requests
 
@@ -1275,35 +999,33 @@ async def handle_reject_all_friends(bot: Bot, event: MessageEvent):
 
     ok, fail = 0, 0
     cleared_friend_ids: set[str] = set()
-    for uid, flag in list(bot_pending.items()):
+    for uid, flag in bot_pending.items():
         try:
             await bot.set_friend_add_request(flag=flag, approve=False)
-            bot_pending.pop(uid, None)
             ok += 1
             cleared_friend_ids.add(uid)
         except ActionFailed:
             fail += 1
-            failure_cleanup_friend(bot_key, uid)
+            doubt_requests.pop(uid, None)
             cleared_friend_ids.add(uid)
         except Exception:
             fail += 1
-    persist_pending_friend(bot_key)
 
     for uid, flag in list(doubt_requests.items()):
         try:
             await bot.call_api("set_doubt_friends_add_request", flag=flag, approve=False)
-            cached_doubt_friend[bot_key].pop(uid, None)
             ok += 1
-            cleared_friend_ids.add(uid)
         except ActionFailed:
             fail += 1
-            failure_cleanup_friend(bot_key, uid)
-            cleared_friend_ids.add(uid)
         except Exception:
             fail += 1
+            continue
+        doubt_requests.pop(uid, None)
+        cleared_friend_ids.add(uid)
 
-    for uid in cleared_friend_ids:
-        clear_quick_approve_state(bot_key, "friend", uid)
+    # 已处理或已失效的申请一次事务落盘
+    await asyncio.to_thread(state_store.delete_pending_friends, bot_key, cleared_friend_ids)
+    await asyncio.to_thread(state_store.clear_notice_targets, bot_key, "friend", cleared_friend_ids)
 
     await reject_all_friends_cmd.finish(f"已拒绝 {ok} 条好友申请" + (f"，{fail} 条失败" if fail else ""))
 
@@ -1313,26 +1035,23 @@ async def handle_approve_all_groups(bot: Bot, event: MessageEvent):
     if not await satisfies_command_permission(bot, event, "request.approve_all_groups"):
         return
     bot_key = str(bot.self_id)
-    bot_pending = pending_group.get(bot_key, {})
+    bot_pending = await asyncio.to_thread(state_store.pending_groups, bot_key)
     if not bot_pending:
         await approve_all_groups_cmd.finish("暂无待处理入群申请")
     ok, fail = 0, 0
     cleared_group_keys: set[str] = set()
-    for key, req in list(bot_pending.items()):
+    for key, req in bot_pending.items():
         try:
             await bot.set_group_add_request(flag=req["flag"], sub_type="invite", approve=True)
-            bot_pending.pop(key, None)
             ok += 1
             cleared_group_keys.add(key)
         except ActionFailed:
             fail += 1
-            failure_cleanup_group(bot_key, key)
             cleared_group_keys.add(key)
         except Exception:
             fail += 1
-    persist_pending_group(bot_key)
-    for gkey in cleared_group_keys:
-        clear_quick_approve_state(bot_key, "group", gkey)
+    await asyncio.to_thread(state_store.delete_pending_groups, bot_key, cleared_group_keys)
+    await asyncio.to_thread(state_store.clear_notice_targets, bot_key, "group", cleared_group_keys)
     await approve_all_groups_cmd.finish(f"已同意 {ok} 条入群申请" + (f"，{fail} 条失败" if fail else ""))
 
 
@@ -1341,26 +1060,23 @@ async def handle_reject_all_groups(bot: Bot, event: MessageEvent):
     if not await satisfies_command_permission(bot, event, "request.reject_all_groups"):
         return
     bot_key = str(bot.self_id)
-    bot_pending = pending_group.get(bot_key, {})
+    bot_pending = await asyncio.to_thread(state_store.pending_groups, bot_key)
     if not bot_pending:
         await reject_all_groups_cmd.finish("暂无待处理入群申请")
     ok, fail = 0, 0
     cleared_group_keys: set[str] = set()
-    for key, req in list(bot_pending.items()):
+    for key, req in bot_pending.items():
         try:
             await bot.set_group_add_request(flag=req["flag"], sub_type="invite", approve=False)
-            bot_pending.pop(key, None)
             ok += 1
             cleared_group_keys.add(key)
         except ActionFailed:
             fail += 1
-            failure_cleanup_group(bot_key, key)
             cleared_group_keys.add(key)
         except Exception:
             fail += 1
-    persist_pending_group(bot_key)
-    for gkey in cleared_group_keys:
-        clear_quick_approve_state(bot_key, "group", gkey)
+    await asyncio.to_thread(state_store.delete_pending_groups, bot_key, cleared_group_keys)
+    await asyncio.to_thread(state_store.clear_notice_targets, bot_key, "group", cleared_group_keys)
     await reject_all_groups_cmd.finish(f"已拒绝 {ok} 条入群申请" + (f"，{fail} 条失败" if fail else ""))
 
 
@@ -1376,7 +1092,7 @@ async def handle_approve_group(bot: Bot, event: MessageEvent, args: Message = Co
     group_key = str(int(arg))
     ok, msg = await approve_group_invite_by_gid(bot, bot_key, group_key)
     if ok:
-        clear_quick_approve_state(bot_key, "group", group_key)
+        await clear_quick_approve_state(bot_key, "group", group_key)
     await approve_group_cmd.finish(msg)
 
 
@@ -1440,5 +1156,5 @@ async def handle_reject_group(bot: Bot, event: MessageEvent, args: Message = Com
     group_key = str(int(arg))
     ok, msg = await reject_group_invite_by_gid(bot, bot_key, group_key)
     if ok:
-        clear_quick_approve_state(bot_key, "group", group_key)
+        await clear_quick_approve_state(bot_key, "group", group_key)
     await reject_group_cmd.finish(msg)
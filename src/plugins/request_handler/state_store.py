@@ -0,0 +1,356 @@
+"""申请管理的落盘状态：单个 SQLite（WAL）文件，按牛牛分命名空间，行级读写；控制台与各 worker 共用。"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from src.foundation.paths import plugin_data_dir
+from src.plugins.request_handler.storage import load_json_file
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+STATE_DB_NAME = "request_state.sqlite3"
+# 旧版五个 JSON：首次打开库时导入，随后改名为 *.migrated
+LEGACY_FRIEND_FILE = "pending_friend_requests.json"
+LEGACY_GROUP_FILE = "pending_group_requests.json"
+LEGACY_LAST_NOTIFIED_FILE = "last_notified_request.json"
+LEGACY_APPROVAL_NOTICE_FILE = "approval_notice_messages.json"
+LEGACY_DOUBT_POLL_FILE = "doubt_friend_poll_state.json"
+_LEGACY_ORDER_STEP = 1e-3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_friend (
+    bot TEXT NOT NULL, user_id TEXT NOT NULL, flag TEXT NOT NULL, ts REAL NOT NULL,
+    PRIMARY KEY (bot, user_id)
+);
+CREATE TABLE IF NOT EXISTS pending_group (
+    bot TEXT NOT NULL, group_id TEXT NOT NULL, req TEXT NOT NULL, ts REAL NOT NULL,
+    PRIMARY KEY (bot, group_id)
+);
+CREATE TABLE IF NOT EXISTS last_notified (
+    bot TEXT PRIMARY KEY, kind TEXT NOT NULL, target_id TEXT NOT NULL, ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_last_notified_ts ON last_notified (ts);
+CREATE TABLE IF NOT EXISTS approval_notice (
+    bot TEXT NOT NULL, message_id TEXT NOT NULL, kind TEXT NOT NULL, target_id TEXT NOT NULL, ts REAL NOT NULL,
+    PRIMARY KEY (bot, message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_approval_notice_target ON approval_notice (bot, kind, target_id);
+CREATE INDEX IF NOT EXISTS idx_approval_notice_ts ON approval_notice (ts);
+CREATE TABLE IF NOT EXISTS doubt_poll_primed (bot TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS doubt_poll_notified (
+    bot TEXT NOT NULL, user_id TEXT NOT NULL,
+    PRIMARY KEY (bot, user_id)
+);
+"""
+
+_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
+
+
+def state_dir() -> Path:
+    return plugin_data_dir("request_handler")
+
+
+def _open(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.executescript(_SCHEMA)
+    _migrate_legacy_json(conn, path.parent)
+    return conn
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = _open(state_dir() / STATE_DB_NAME)
+    return _conn
+
+
+def close_state_store() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+@contextlib.contextmanager
+def _tx():
+    """一次 IMMEDIATE 事务：批量写只提交一次。"""
+    with _lock:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _query(sql: str, params: tuple[Any, ...] = ()) -> list[tuple[Any, ...]]:
+    with _lock:
+        return _db().execute(sql, params).fetchall()
+
+
+# ---------------------------------------------------------------------------
+# 旧 JSON 导入
+# ---------------------------------------------------------------------------
+
+
+def _legacy_rows(raw: dict[str, Any]) -> Iterable[tuple[str, str, Any]]:
+    for bot_key, inner in raw.items():
+        if isinstance(inner, dict):
+            for key, val in inner.items():
+                yield str(bot_key), str(key), val
+
+
+def _migrate_legacy_json(conn: sqlite3.Connection, root: Path) -> None:
+    files = [
+        LEGACY_FRIEND_FILE,
+        LEGACY_GROUP_FILE,
+        LEGACY_LAST_NOTIFIED_FILE,
+        LEGACY_APPROVAL_NOTICE_FILE,
+        LEGACY_DOUBT_POLL_FILE,
+    ]
+    present = [name for name in files if (root / name).is_file()]
+    if not present:
+        return
+    now = time.time()
+    # 旧 JSON 没有申请时间，按文件内顺序（即到达顺序）排 ts，保持列表顺序不变
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for i, (bk, uid, flag) in enumerate(_legacy_rows(load_json_file(root / LEGACY_FRIEND_FILE))):
+            conn.execute(
+                "INSERT OR IGNORE INTO pending_friend VALUES (?, ?, ?, ?)",
+                (bk, uid, str(flag), now + i * _LEGACY_ORDER_STEP),
+            )
+        for i, (bk, gid, req) in enumerate(_legacy_rows(load_json_file(root / LEGACY_GROUP_FILE))):
+            if isinstance(req, dict):
+                conn.execute(
+                    "INSERT OR IGNORE INTO pending_group VALUES (?, ?, ?, ?)",
+                    (bk, gid, json.dumps(req, ensure_ascii=False), now + i * _LEGACY_ORDER_STEP),
+                )
+        for bk, row in load_json_file(root / LEGACY_LAST_NOTIFIED_FILE).items():
+            if isinstance(row, dict) and row.get("kind") in ("friend", "group") and row.get("target_id"):
+                conn.execute(
+                    "INSERT OR IGNORE INTO last_notified VALUES (?, ?, ?, ?)",
+                    (str(bk), row["kind"], str(row["target_id"]), _as_ts(row.get("ts"), now)),
+                )
+        for bk, mid, row in _legacy_rows(load_json_file(root / LEGACY_APPROVAL_NOTICE_FILE)):
+            if isinstance(row, dict) and row.get("kind") in ("friend", "group") and row.get("target_id"):
+                conn.execute(
+                    "INSERT OR IGNORE INTO approval_notice VALUES (?, ?, ?, ?, ?)",
+                    (bk, mid, row["kind"], str(row["target_id"]), _as_ts(row.get("ts"), now)),
+                )
+        doubt = load_json_file(root / LEGACY_DOUBT_POLL_FILE)
+        for bk in doubt.get("primed_bots") or []:
+            if bk is not None:
+                conn.execute("INSERT OR IGNORE INTO doubt_poll_primed VALUES (?)", (str(bk),))
+        notified = doubt.get("notified")
+        for bk, uids in (notified if isinstance(notified, dict) else {}).items():
+            for uid in uids if isinstance(uids, list) else []:
+                if uid is not None and str(uid).isdigit():
+                    conn.execute("INSERT OR IGNORE INTO doubt_poll_notified VALUES (?, ?)", (str(bk), str(uid)))
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    for name in present:
+        with contextlib.suppress(OSError):
+            (root / name).replace(root / f"{name}.migrated")
+
+
+def _as_ts(raw: Any, default: float) -> float:
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return default
+
+
+# ---------------------------------------------------------------------------
+# 待处理好友 / 入群申请
+# ---------------------------------------------------------------------------
+
+
+def pending_friends(bot_key: str) -> dict[str, str]:
+    rows = _query("SELECT user_id, flag FROM pending_friend WHERE bot = ? ORDER BY ts", (bot_key,))
+    return dict(rows)
+
+
+def pending_friend_flag(bot_key: str, user_id: str) -> str | None:
+    rows = _query("SELECT flag FROM pending_friend WHERE bot = ? AND user_id = ?", (bot_key, user_id))
+    return rows[0][0] if rows else None
+
+
+def put_pending_friend(bot_key: str, user_id: str, flag: str) -> None:
+    with _tx() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO pending_friend VALUES (?, ?, ?, ?)",
+            (bot_key, user_id, flag, time.time()),
+        )
+
+
+def delete_pending_friends(bot_key: str, user_ids: Iterable[str]) -> None:
+    with _tx() as conn:
+        conn.executemany(
+            "DELETE FROM pending_friend WHERE bot = ? AND user_id = ?",
+            [(bot_key, uid) for uid in user_ids],
+        )
+
+
+def all_pending_friends() -> dict[str, dict[str, str]]:
+    out: dict[str, dict[str, str]] = {}
+    for bot, uid, flag in _query("SELECT bot, user_id, flag FROM pending_friend ORDER BY ts"):
+        out.setdefault(bot, {})[uid] = flag
+    return out
+
+
+def _req(raw: str) -> dict[str, Any] | None:
+    try:
+        req = json.loads(raw)
+    except ValueError:
+        return None
+    return req if isinstance(req, dict) else None
+
+
+def pending_groups(bot_key: str) -> dict[str, dict[str, Any]]:
+    rows = _query("SELECT group_id, req FROM pending_group WHERE bot = ? ORDER BY ts", (bot_key,))
+    return {gid: req for gid, raw in rows if (req := _req(raw)) is not None}
+
+
+def pending_group(bot_key: str, group_id: str) -> dict[str, Any] | None:
+    rows = _query("SELECT req FROM pending_group WHERE bot = ? AND group_id = ?", (bot_key, group_id))
+    return _req(rows[0][0]) if rows else None
+
+
+def put_pending_group(bot_key: str, group_id: str, req: dict[str, Any]) -> None:
+    with _tx() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO pending_group VALUES (?, ?, ?, ?)",
+            (bot_key, group_id, json.dumps(req, ensure_ascii=False), time.time()),
+        )
+
+
+def delete_pending_groups(bot_key: str, group_ids: Iterable[str]) -> None:
+    with _tx() as conn:
+        conn.executemany(
+            "DELETE FROM pending_group WHERE bot = ? AND group_id = ?",
+            [(bot_key, gid) for gid in group_ids],
+        )
+
+
+def all_pending_groups() -> dict[str, dict[str, dict[str, Any]]]:
+    out: dict[str, dict[str, dict[str, Any]]] = {}
+    for bot, gid, raw in _query("SELECT bot, group_id, req FROM pending_group ORDER BY ts"):
+        req = _req(raw)
+        if req is not None:
+            out.setdefault(bot, {})[gid] = req
+    return out
+
+
+# ---------------------------------------------------------------------------
+# 最近一次推送与审批提醒 message_id
+# ---------------------------------------------------------------------------
+
+
+def set_last_notified(bot_key: str, kind: str, target_id: str, ts: float) -> None:
+    with _tx() as conn:
+        conn.execute("INSERT OR REPLACE INTO last_notified VALUES (?, ?, ?, ?)", (bot_key, kind, target_id, ts))
+
+
+def get_last_notified(bot_key: str) -> tuple[str, str, float] | None:
+    rows = _query("SELECT kind, target_id, ts FROM last_notified WHERE bot = ?", (bot_key,))
+    return (rows[0][0], rows[0][1], float(rows[0][2])) if rows else None
+
+
+def delete_last_notified(bot_key: str, kind: str | None = None, target_id: str | None = None) -> bool:
+    """删除该牛牛的最近推送；给出 kind/target_id 时仅在指向同一申请时删除。"""
+    with _tx() as conn:
+        if kind is None:
+            cur = conn.execute("DELETE FROM last_notified WHERE bot = ?", (bot_key,))
+        else:
+            cur = conn.execute(
+                "DELETE FROM last_notified WHERE bot = ? AND kind = ? AND target_id = ?",
+                (bot_key, kind, target_id),
+            )
+        return cur.rowcount > 0
+
+
+def put_approval_notices(bot_key: str, rows: Iterable[tuple[str, str, str, float]]) -> None:
+    """批量登记审批提醒：rows 为 (message_id, kind, target_id, ts)。"""
+    with _tx() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO approval_notice VALUES (?, ?, ?, ?, ?)",
+            [(bot_key, mid, kind, tid, ts) for mid, kind, tid, ts in rows],
+        )
+
+
+def get_approval_notice(bot_key: str, message_id: str) -> dict[str, str | float] | None:
+    rows = _query(
+        "SELECT kind, target_id, ts FROM approval_notice WHERE bot = ? AND message_id = ?",
+        (bot_key, message_id),
+    )
+    if not rows:
+        return None
+    kind, target_id, ts = rows[0]
+    return {"kind": kind, "target_id": target_id, "ts": float(ts)}
+
+
+def delete_approval_notice(bot_key: str, message_id: str) -> None:
+    with _tx() as conn:
+        conn.execute("DELETE FROM approval_notice WHERE bot = ? AND message_id = ?", (bot_key, message_id))
+
+
+def clear_notice_targets(bot_key: str, kind: str, target_ids: Iterable[str]) -> None:
+    """申请处理完后一次事务清掉指向这些目标的最近推送与审批提醒。"""
+    params = [(bot_key, kind, tid) for tid in target_ids]
+    if not params:
+        return
+    with _tx() as conn:
+        conn.executemany("DELETE FROM last_notified WHERE bot = ? AND kind = ? AND target_id = ?", params)
+        conn.executemany("DELETE FROM approval_notice WHERE bot = ? AND kind = ? AND target_id = ?", params)
+
+
+def prune_expired_notices(max_age_sec: float, now: float | None = None) -> int:
+    """按 ts 索引删除过期的最近推送与审批提醒；返回删除行数。"""
+    cutoff = (time.time() if now is None else now) - max_age_sec
+    with _tx() as conn:
+        a = conn.execute("DELETE FROM last_notified WHERE ts < ?", (cutoff,)).rowcount
+        b = conn.execute("DELETE FROM approval_notice WHERE ts < ?", (cutoff,)).rowcount
+    return a + b
+
+
+# ---------------------------------------------------------------------------
+# 可疑好友轮询状态
+# ---------------------------------------------------------------------------
+
+
+def load_doubt_poll_state() -> tuple[set[str], dict[str, set[str]]]:
+    primed = {bot for (bot,) in _query("SELECT bot FROM doubt_poll_primed")}
+    notified: dict[str, set[str]] = {}
+    for bot, uid in _query("SELECT bot, user_id FROM doubt_poll_notified"):
+        notified.setdefault(bot, set()).add(uid)
+    return primed, notified
+
+
+def save_doubt_poll_state(primed: set[str], notified: dict[str, set[str]]) -> None:
+    with _tx() as conn:
+        conn.execute("DELETE FROM doubt_poll_primed")
+        conn.execute("DELETE FROM doubt_poll_notified")
+        conn.executemany("INSERT INTO doubt_poll_primed VALUES (?)", [(bk,) for bk in primed])
+        conn.executemany(
+            "INSERT INTO doubt_poll_notified VALUES (?, ?)",
+            [(bk, uid) for bk, uids in notified.items() for uid in uids],
+        )
@@ -11,6 +11,12 @@ from .models import Game, Player
 PREP_PLAYERS_KEY = "prep_players"
 GAME_SNAPSHOT_KEY = "game_snapshot"
 
+# 无字段变化时跳过协调层写入，但会话续期不能拖太久
+_SNAPSHOT_SESSION_REFRESH_SEC = 600.0
+
+# group_id -> (已写入的快照, 写入时刻)；仅记录本进程最近一次成功写入
+_written_snapshots: dict[int, tuple[dict[str, Any], float]] = {}
+
 
 def prep_players_from_game(game: Game) -> list[dict[str, Any]]:
     rows: list[dict[str, Any]] = []
@@ -157,17 +163,24 @@ def game_from_snapshot(raw: dict[str, Any]) -> Game | None:
 
 
 def write_game_snapshot(game: Game) -> None:
+    """协调层按整块 JSON 读改写，字段级增量省不下写入；只在快照与本进程上次写入相同时跳过。"""
     gid = int(game.group_id)
     payload = game_to_snapshot(game)
+    now = time.time()
+    written = _written_snapshots.get(gid)
+    if written is not None and written[0] == payload and now - written[1] < _SNAPSHOT_SESSION_REFRESH_SEC:
+        return
 
     def stamp(data: dict[str, Any]) -> None:
         data[GAME_SNAPSHOT_KEY] = payload
         if game.ready:
-            now = time.time()
             data["session_active"] = True
             data["session_until"] = now + SPY_GROUP_LOCK.busy_ttl_sec
 
-    SPY_GROUP_LOCK._mutate(gid, stamp)
+    if SPY_GROUP_LOCK._mutate(gid, stamp) is None:
+        _written_snapshots.pop(gid, None)
+        return
+    _written_snapshots[gid] = (payload, now)
 
 
 def read_game_snapshot(group_id: int) -> Game | None:
@@ -183,6 +196,8 @@ def read_game_snapshot(group_id: int) -> Game | None:
 def clear_game_snapshot(group_id: int) -> None:
     gid = int(group_id)
 
+    _written_snapshots.pop(gid, None)
+
     def stamp(data: dict[str, Any]) -> None:
         data.pop(GAME_SNAPSHOT_KEY, None)
 
@@ -133,7 +133,7 @@ async def enter_voting_phase(bot: Bot, game: Game, *, auto_triggered: bool) -> s
 def pick_words(group_id: int, *, avoid_recent: int) -> tuple[str, str]:
     if not WORD_BANK:
         raise RuntimeError("词库为空，请检查 data/who_is_spy/undercover_words.json")
-    recent = load_recent_word_keys(group_id, limit=avoid_recent) if avoid_recent > 0 else set()
+    recent = load_recent_word_keys(group_id, limit=avoid_recent)
     candidates = [pair for pair in WORD_BANK if word_pair_key(pair[0], pair[1]) not in recent]
     if not candidates:
         candidates = WORD_BANK
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import atexit
 import json
 import shutil
+import threading
+from itertools import starmap
 from pathlib import Path
 
 from nonebot import logger
@@ -15,6 +18,15 @@ RECENT_WORDS_FILE = DATA_DIR / "recent_word_pairs.json"
 
 WORD_BANK: list[tuple[str, str]] = []
 
+_RECENT_FLUSH_DELAY_SEC = 5.0
+_recent_lock = threading.Lock()
+_recent_pairs: dict[str, list[tuple[str, str]]] = {}
+_recent_keys_cache: dict[tuple[str, int], frozenset[tuple[str, str]]] = {}
+_recent_dirty_groups: set[str] = set()
+_recent_path: Path | None = None
+_recent_mtime_ns = 0
+_recent_flush_timer: threading.Timer | None = None
+
 
 def ensure_word_file() -> Path:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -84,46 +96,123 @@ def word_pair_key(a: str, b: str) -> tuple[str, str]:
     return tuple(sorted((a, b)))
 
 
-def load_recent_word_keys(group_id: int, *, limit: int) -> set[tuple[str, str]]:
-    if limit <= 0 or not RECENT_WORDS_FILE.is_file():
-        return set()
+def _load_recent_file() -> dict[str, list[tuple[str, str]]]:
+    if not RECENT_WORDS_FILE.is_file():
+        return {}
     try:
         raw = json.loads(RECENT_WORDS_FILE.read_text(encoding="utf-8"))
     except (OSError, json.JSONDecodeError):
-        return set()
+        return {}
     if not isinstance(raw, dict):
-        return set()
-    entries = raw.get(str(group_id))
-    if not isinstance(entries, list):
-        return set()
-    keys: set[tuple[str, str]] = set()
-    for item in entries[-limit:]:
-        if isinstance(item, (list, tuple)) and len(item) == 2:
-            keys.add(word_pair_key(str(item[0]), str(item[1])))
-    return keys
+        return {}
+    out: dict[str, list[tuple[str, str]]] = {}
+    for key, entries in raw.items():
+        if not isinstance(entries, list):
+            continue
+        out[str(key)] = [
+            (str(item[0]), str(item[1])) for item in entries if isinstance(item, (list, tuple)) and len(item) == 2
+        ]
+    return out
+
+
+def _recent_file_mtime_ns() -> int:
+    try:
+        return RECENT_WORDS_FILE.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _ensure_recent_loaded() -> dict[str, list[tuple[str, str]]]:
+    """首次访问、数据文件路径变化或文件被其它进程改写后整文件读入内存；本进程未落盘的群保留内存版本。"""
+    global _recent_path, _recent_mtime_ns
+    mtime = _recent_file_mtime_ns()
+    if _recent_path == RECENT_WORDS_FILE and mtime == _recent_mtime_ns:
+        return _recent_pairs
+    if _recent_path != RECENT_WORDS_FILE:
+        _recent_pairs.clear()
+        _recent_dirty_groups.clear()
+    pending = {key: _recent_pairs[key] for key in _recent_dirty_groups if key in _recent_pairs}
+    _recent_pairs.clear()
+    _recent_keys_cache.clear()
+    _recent_pairs.update(_load_recent_file())
+    _recent_pairs.update(pending)
+    _recent_path = RECENT_WORDS_FILE
+    _recent_mtime_ns = mtime
+    return _recent_pairs
+
+
+def load_recent_word_keys(group_id: int, *, limit: int) -> frozenset[tuple[str, str]]:
+    if limit <= 0:
+        return frozenset()
+    key = str(group_id)
+    with _recent_lock:
+        recent = _ensure_recent_loaded()
+        cached = _recent_keys_cache.get((key, limit))
+        if cached is not None:
+            return cached
+        entries = recent.get(key) or []
+        keys = frozenset(starmap(word_pair_key, entries[-limit:]))
+        _recent_keys_cache[(key, limit)] = keys
+        return keys
 
 
 def record_recent_word_pair(group_id: int, a: str, b: str, *, keep: int) -> None:
+    """内存内追加；落盘由定时器合并写入（write-behind）。"""
     if keep <= 0:
         return
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    raw: dict[str, list[list[str]]] = {}
-    if RECENT_WORDS_FILE.is_file():
-        try:
-            loaded = json.loads(RECENT_WORDS_FILE.read_text(encoding="utf-8"))
-            if isinstance(loaded, dict):
-                raw = {str(k): v for k, v in loaded.items() if isinstance(v, list)}
-        except (OSError, json.JSONDecodeError):
-            raw = {}
-
     key = str(group_id)
-    entries = raw.get(key, [])
-    pair = [a, b]
-    if entries and entries[-1] == pair:
+    pair = (a, b)
+    with _recent_lock:
+        entries = _ensure_recent_loaded().setdefault(key, [])
+        if entries and entries[-1] == pair:
+            return
+        entries.append(pair)
+        if len(entries) > keep:
+            del entries[:-keep]
+        for cache_key in [k for k in _recent_keys_cache if k[0] == key]:
+            del _recent_keys_cache[cache_key]
+        _recent_dirty_groups.add(key)
+        _start_recent_flush_timer()
+
+
+def _start_recent_flush_timer() -> None:
+    global _recent_flush_timer
+    if _recent_flush_timer is not None:
         return
-    entries.append(pair)
-    raw[key] = entries[-keep:]
-    RECENT_WORDS_FILE.write_text(json.dumps(raw, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    timer = threading.Timer(_RECENT_FLUSH_DELAY_SEC, flush_recent_word_pairs_sync)
+    timer.daemon = True
+    _recent_flush_timer = timer
+    timer.start()
+
+
+def flush_recent_word_pairs_sync() -> None:
+    """把本进程改过的群合并进磁盘文件（其余群以磁盘为准，兼容分片多进程）。"""
+    global _recent_flush_timer, _recent_mtime_ns
+    with _recent_lock:
+        timer = _recent_flush_timer
+        _recent_flush_timer = None
+        if timer is not None:
+            timer.cancel()
+        if not _recent_dirty_groups or _recent_path != RECENT_WORDS_FILE:
+            return
+        merged = _load_recent_file()
+        for key in _recent_dirty_groups:
+            merged[key] = list(_recent_pairs.get(key) or [])
+        payload = {key: [[a, b] for a, b in entries] for key, entries in merged.items()}
+        try:
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = RECENT_WORDS_FILE.with_suffix(RECENT_WORDS_FILE.suffix + ".tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(RECENT_WORDS_FILE)
+        except OSError as e:
+            logger.error("who_is_spy: persist recent word pairs failed: {}", e)
+            return
+        _recent_dirty_groups.clear()
+        # 顺带吃进其它进程已落盘的群
+        _recent_pairs.clear()
+        _recent_pairs.update(merged)
+        _recent_keys_cache.clear()
+        _recent_mtime_ns = _recent_file_mtime_ns()
 
 
 def init_store() -> None:
@@ -131,3 +220,6 @@ def init_store() -> None:
     loaded = load_words_from_json(WORD_FILE)
     if loaded:
         logger.info("who_is_spy: loaded {} word pairs from {}", loaded, WORD_FILE)
+
+
+atexit.register(flush_recent_word_pairs_sync)
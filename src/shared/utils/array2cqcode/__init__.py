@@ -1,23 +1,110 @@
+"""OneBot 消息段数组 <-> CQ 码字符串。
+
+单趟转换：转义用一张 ``str.translate`` 表，结果 ``join`` 拼接；表情、图片等反复出现的段
+按内容缓存序列化结果。已解码的 list 直接转换，不再绕一圈 JSON。
+"""
+
 import json
+import re
+from functools import lru_cache
 from typing import Any
 
-from .message_segment import BaseMessageSegment
+_ESCAPE = str.maketrans({"&": "&amp;", "[": "&#91;", "]": "&#93;", ",": "&#44;"})
+_UNESCAPE = {"&amp;": "&", "&#91;": "[", "&#93;": "]", "&#44;": ","}
+_UNESCAPE_RE = re.compile(r"&(?:amp|#91|#93|#44);")
+_CQ_RE = re.compile(r"\[CQ:([^,\]]+)((?:,[^\]]*)?)\]")
+# 这些段内容重复率高（表情 id、同一张图、@ 同一人），值得按内容缓存
+_CACHEABLE_TYPES = frozenset({"face", "image", "mface", "at", "reply", "record"})
+_SEGMENT_CACHE_MAX = 4096
+
+
+def escape(value: str) -> str:
+    return value.translate(_ESCAPE)
+
+
+def unescape(value: str) -> str:
+    if "&" not in value:
+        return value
+    return _UNESCAPE_RE.sub(lambda m: _UNESCAPE[m.group(0)], value)
+
+
+def _format_segment(seg_type: str, items: tuple[tuple[str, Any], ...]) -> str:
+    params = "".join(f",{k}={escape(str(v))}" for k, v in items if v is not None)
+    return f"[CQ:{seg_type}{params}]"
+
+
+@lru_cache(maxsize=_SEGMENT_CACHE_MAX)
+def _format_segment_cached(seg_type: str, items: tuple[tuple[str, Any], ...]) -> str:
+    return _format_segment(seg_type, items)
+
+
+def segment_to_cqcode(seg: dict[str, Any]) -> str:
+    seg_type = seg["type"]
+    data = seg.get("data") or {}
+    if seg_type == "text":
+        # 与历史行为一致：文本段原样输出，不做 CQ 转义
+        return str(data.get("text") or "")
+    items = tuple(data.items())
+    if seg_type in _CACHEABLE_TYPES:
+        try:
+            return _format_segment_cached(seg_type, items)
+        except TypeError:  # 含不可哈希的值
+            pass
+    return _format_segment(seg_type, items)
+
+
+def array_to_cqcode(segments: list[dict[str, Any]]) -> str:
+    return "".join([segment_to_cqcode(seg) for seg in segments])
 
 
 def try_convert_to_cqcode(data: Any) -> str | Any:
-    try:
-        msg = json.loads(data)
-        if not isinstance(msg, list):
-            return msg
-    except TypeError:
-        if not isinstance(data, list):
-            return data
+    """消息段数组（list 或其 JSON 文本）转 CQ 码；其他输入原样返回。"""
+    if isinstance(data, list):
         msg = data
-    except json.JSONDecodeError:
+    elif not isinstance(data, str):
         return data
-    except Exception:
+    else:
+        head = data.lstrip()
+        # 已是 CQ 码 / 纯文本：不必尝试 JSON 解析
+        if not head.startswith("[") or head.startswith("[CQ:"):
+            return data
+        try:
+            msg = json.loads(head)
+        except ValueError:
+            return data
+        if not isinstance(msg, list):
+            return data
+    try:
+        return array_to_cqcode(msg)
+    except (KeyError, TypeError, AttributeError):
         return data
-    cqmessage = ""
-    for seg in msg:
-        cqmessage += BaseMessageSegment(**seg).cqcode
-    return cqmessage
+
+
+@lru_cache(maxsize=_SEGMENT_CACHE_MAX)
+def _parse_cq_params(params: str) -> tuple[tuple[str, str], ...]:
+    out: list[tuple[str, str]] = []
+    for part in params.split(",")[1:]:
+        key, sep, value = part.partition("=")
+        if sep:
+            out.append((key, unescape(value)))
+    return tuple(out)
+
+
+def cqcode_to_array(message: str) -> list[dict[str, Any]]:
+    """CQ 码字符串转消息段数组；文本段按 CQ 规则反转义。"""
+    out: list[dict[str, Any]] = []
+    pos = 0
+    for m in _CQ_RE.finditer(message):
+        start = m.start()
+        if start > pos:
+            out.append({"type": "text", "data": {"text": unescape(message[pos:start])}})
+        out.append({"type": m.group(1), "data": dict(_parse_cq_params(m.group(2)))})
+        pos = m.end()
+    if pos < len(message):
+        out.append({"type": "text", "data": {"text": unescape(message[pos:])}})
+    return out
+
+
+def clear_cqcode_caches() -> None:
+    _format_segment_cached.cache_clear()
+    _parse_cq_params.cache_clear()
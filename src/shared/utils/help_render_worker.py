@@ -0,0 +1,161 @@
+"""帮助图渲染：Markdown → 可经 OneBot 发送的图片字节；同时是渲染子进程的入口。
+
+子进程用 forkserver / spawn 启动（不在多线程的事件循环进程里 fork）。本模块放在插件包外：
+子进程反序列化任务时会先 import 所在包，而 help 插件包的 ``__init__`` 依赖已初始化的 NoneBot。
+MdStyle 不保证可 pickle，父进程只传样式描述（``HelpStyleSpec``），子进程自行加载并缓存。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pillowmd
+from nonebot import logger
+from PIL import Image
+
+from .pillowmd_bold import apply_help_light_bold_patch
+
+# ("sample", "STYLE1") 内置样例；("dir", 绝对路径) 样式目录；("default", "") pillowmd 默认样式
+type HelpStyleSpec = tuple[str, str]
+
+# NapCat 等协议端对超大 base64 图片经 WS 发送不稳定；控制原始体积
+HELP_IMAGE_MAX_SEND_BYTES = 2_500_000
+_HELP_IMAGE_MIN_SIDE = 360
+
+_worker_styles: dict[HelpStyleSpec, Any] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class HelpPaintSpec:
+    """侧边立绘参数；paint_dir 为绝对路径。"""
+
+    paint_dir: str
+    filename: str
+    scale: float
+    auto_page: bool
+
+
+def load_help_style(spec: HelpStyleSpec) -> Any:
+    kind, value = spec
+    if kind == "sample":
+        return getattr(pillowmd.SampleStyles, value)
+    if kind == "dir":
+        return pillowmd.LoadMarkdownStyles(Path(value))
+    return pillowmd.MdStyle()
+
+
+def resize_image_if_needed(image, max_width=1200, max_height=2800):
+    """调整图像大小"""
+    if image.width > max_width or image.height > max_height:
+        ratio = min(max_width / image.width, max_height / image.height)
+        new_size = (int(image.width * ratio), int(image.height * ratio))
+        return image.resize(new_size, Image.Resampling.LANCZOS)
+    return image
+
+
+def encode_help_image_for_send(image: Image.Image) -> bytes:
+    """将帮助图编码为可经 OneBot base64 发送的字节串；过大时缩小或转 JPEG。"""
+    work = image
+    png_bytes = _png_bytes(work)
+    if len(png_bytes) <= HELP_IMAGE_MAX_SEND_BYTES:
+        return png_bytes
+
+    orig_w, orig_h = work.size
+    scale = 0.82
+    while len(png_bytes) > HELP_IMAGE_MAX_SEND_BYTES:
+        w, h = work.size
+        if min(w, h) <= _HELP_IMAGE_MIN_SIDE:
+            break
+        nw = max(1, int(w * scale))
+        nh = max(1, int(h * scale))
+        work = work.resize((nw, nh), Image.Resampling.LANCZOS)
+        png_bytes = _png_bytes(work)
+
+    if len(png_bytes) <= HELP_IMAGE_MAX_SEND_BYTES:
+        logger.warning(
+            "help image shrunk for upload orig={}x{} final={}x{} bytes={}",
+            orig_w,
+            orig_h,
+            work.width,
+            work.height,
+            len(png_bytes),
+        )
+        return png_bytes
+
+    rgba = work.convert("RGBA")
+    rgb = Image.new("RGB", rgba.size, (255, 255, 255))
+    rgb.paste(rgba, mask=rgba.split()[-1])
+
+    for quality in (85, 75, 65, 55):
+        buf = io.BytesIO()
+        rgb.save(buf, format="JPEG", quality=quality, optimize=True)
+        jpeg_bytes = buf.getvalue()
+        if len(jpeg_bytes) <= HELP_IMAGE_MAX_SEND_BYTES:
+            logger.warning(
+                "help image encoded as JPEG q={} after shrink orig={}x{} final={}x{} bytes={}",
+                quality,
+                orig_w,
+                orig_h,
+                work.width,
+                work.height,
+                len(jpeg_bytes),
+            )
+            return jpeg_bytes
+
+    logger.warning(
+        "help image still large after JPEG fallback bytes={} (may fail on protocol)",
+        len(jpeg_bytes),
+    )
+    return jpeg_bytes
+
+
+def _png_bytes(image: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", optimize=True, compress_level=9)
+    return buf.getvalue()
+
+
+async def render_help_markdown(markdown_content: str, style: Any, paint: HelpPaintSpec | None) -> bytes:
+    """核心渲染：pillowmd 成图 → 限尺寸 → 编码。"""
+    paint_arg = None
+    auto_page = False
+    if paint is not None:
+        paint_dir = Path(paint.paint_dir)
+        pillowmd.Setting.PAINT_PATH = paint_dir
+        paint_path = paint_dir / paint.filename
+        if paint_path.is_file():
+            with Image.open(paint_path) as opened:
+                pil = opened.convert("RGBA")
+            sc = paint.scale
+            if sc > 0 and sc != 1.0:
+                nw = max(1, int(pil.width * sc))
+                nh = max(1, int(pil.height * sc))
+                pil = pil.resize((nw, nh), Image.Resampling.LANCZOS)
+            # 传 Image 时库仍会在 tys>300 且 tys<txs*2.5 时按正文高度再缩放立绘
+            paint_arg = pil
+        else:
+            paint_arg = paint.filename
+        auto_page = paint.auto_page
+
+    render_result = await pillowmd.MdToImage(
+        markdown_content,
+        style=style,
+        paint=paint_arg,
+        autoPage=auto_page,
+    )
+    return encode_help_image_for_send(resize_image_if_needed(render_result.image))
+
+
+def render_help_markdown_in_worker(
+    markdown_content: str, style_spec: HelpStyleSpec, paint: HelpPaintSpec | None
+) -> bytes:
+    """渲染子进程入口：按描述加载样式（进程内缓存），独立事件循环内成图。"""
+    apply_help_light_bold_patch()
+    style = _worker_styles.get(style_spec)
+    if style is None:
+        style = _worker_styles[style_spec] = load_help_style(style_spec)
+    return asyncio.run(render_help_markdown(markdown_content, style, paint))
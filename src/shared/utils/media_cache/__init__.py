@@ -1,5 +1,6 @@
 import asyncio
 import base64
+import binascii
 import re
 from datetime import datetime, timedelta
 
@@ -10,18 +11,27 @@ from nonebot.adapters.onebot.v11 import MessageSegment
 from src.foundation.db import ImageCache, make_image_cache_repository
 from src.shared.utils import HTTPXClient
 
+from .blob_store import put_blob, read_blob, sweep_blobs
+
 image_cache_repo = make_image_cache_repository()
 _image_capture_queue: asyncio.Queue[MessageSegment] | None = None
 _image_capture_tasks: list[asyncio.Task[None]] = []
 _image_capture_dropped: int = 0
 _IMAGE_CAPTURE_QUEUE_MAX = 1024
 _IMAGE_CAPTURE_BOUND = False
-
-
-def image_capture_worker_count() -> int:
-    from src.foundation.db.pool_budget import cap_by_pg_pool
-
-    return max(1, min(3, cap_by_pg_pool(2, workload_fraction=0.06)))
+# 聚合窗口：窗口内同 cq_code 合并为一次累加，整批一条 upsert
+_IMAGE_CAPTURE_FLUSH_SECONDS = 0.5
+_IMAGE_CAPTURE_BATCH_MAX = 256
+# 达到引用阈值后的下载走独立有界池，不占捕获 flush
+_IMAGE_FETCH_REF_THRESHOLD = 2
+_IMAGE_FETCH_CONCURRENCY = 4
+_IMAGE_FETCH_PENDING_MAX = 64
+_image_fetch_semaphore: asyncio.Semaphore | None = None
+_image_fetch_tasks: dict[str, asyncio.Task[None]] = {}
+_LEGACY_MIGRATE_BATCH = 100
+# 旧版内联 base64 行是否已全部迁到 blob；未完成前 get_image 会回退读整行
+_legacy_migration_done = False
+_legacy_migration_task: asyncio.Task[int] | None = None
 
 
 def image_capture_under_load() -> bool:
@@ -43,35 +53,93 @@ def _image_capture_workers_running() -> bool:
     return bool(_image_capture_tasks) and any(not task.done() for task in _image_capture_tasks)
 
 
-async def _insert_image_io(image_seg: MessageSegment) -> None:
-    cq_code = re.sub(r"\.image,.+?\]", ".image]", str(image_seg))
-    cache = await image_cache_repo.find_by_cq_code(cq_code)
-    if not cache:
-        cache = ImageCache.model_construct(
-            cq_code=cq_code, base64_data=None, ref_times=1, date=int(str(datetime.now().date()).replace("-", ""))
-        )
-        await image_cache_repo.insert(cache)
-        return
-    cache.ref_times += 1
-    under_load = image_capture_under_load()
-    if cache.ref_times > 2 and cache.base64_data is None and not under_load:
-        url = image_seg.data.get("url")
+def image_cache_key(image_seg: MessageSegment) -> str:
+    return re.sub(r"\.image,.+?\]", ".image]", str(image_seg))
+
+
+def _image_fetch_pool() -> asyncio.Semaphore:
+    global _image_fetch_semaphore
+    if _image_fetch_semaphore is None:
+        _image_fetch_semaphore = asyncio.Semaphore(_IMAGE_FETCH_CONCURRENCY)
+    return _image_fetch_semaphore
+
+
+async def _fetch_image_blob(cq_code: str, url: str) -> None:
+    async with _image_fetch_pool():
+        rsp = await HTTPXClient.get(url)
+        if not rsp or rsp.status_code != httpx.codes.OK or not rsp.content:
+            return
+        digest, size = await asyncio.to_thread(put_blob, rsp.content)
+    await image_cache_repo.set_blob(cq_code, digest, size)
+
+
+async def _run_image_fetch(cq_code: str, url: str) -> None:
+    try:
+        await _fetch_image_blob(cq_code, url)
+    except Exception as e:
+        logger.warning("image cache fetch failed: {}", e)
+    finally:
+        _image_fetch_tasks.pop(cq_code, None)
+
+
+def schedule_image_fetch(cq_code: str, url: str) -> bool:
+    """同一 cq_code 在途只下载一次；池满时丢弃，下次达到阈值再补。"""
+    if cq_code in _image_fetch_tasks or len(_image_fetch_tasks) >= _IMAGE_FETCH_PENDING_MAX:
+        return False
+    _image_fetch_tasks[cq_code] = asyncio.create_task(_run_image_fetch(cq_code, url), name="image_cache_fetch")
+    return True
+
+
+async def _capture_image_batch(segs: list[MessageSegment]) -> None:
+    counts: dict[str, int] = {}
+    urls: dict[str, str] = {}
+    for seg in segs:
+        cq_code = image_cache_key(seg)
+        counts[cq_code] = counts.get(cq_code, 0) + 1
+        url = seg.data.get("url")
         if url:
-            rsp = await HTTPXClient.get(url)
-            if rsp and rsp.status_code == httpx.codes.OK:
-                cache.base64_data = base64.b64encode(rsp.content).decode()
-    await image_cache_repo.save(cache)
+            urls[cq_code] = url
+    date = int(str(datetime.now().date()).replace("-", ""))
+    refs = await image_cache_repo.bump_ref_times(counts, date)
+    if image_capture_under_load():
+        return
+    for cq_code, (ref_times, has_image) in refs.items():
+        url = urls.get(cq_code)
+        if url and not has_image and ref_times > _IMAGE_FETCH_REF_THRESHOLD:
+            schedule_image_fetch(cq_code, url)
+
+
+async def _drain_capture_window(queue: asyncio.Queue[MessageSegment]) -> list[MessageSegment]:
+    batch = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _IMAGE_CAPTURE_FLUSH_SECONDS
+    while len(batch) < _IMAGE_CAPTURE_BATCH_MAX:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except TimeoutError:
+            break
+    return batch
 
 
 async def run_image_capture_consumer() -> None:
+    queue = image_capture_queue()
     while True:
-        image_seg = await image_capture_queue().get()
+        batch = await _drain_capture_window(queue)
         try:
-            await _insert_image_io(image_seg)
+            await _capture_image_batch(batch)
         except Exception as e:
-            logger.warning("image cache capture failed: {}", e)
+            logger.warning("image cache capture failed: batch={} err={}", len(batch), e)
         finally:
-            image_capture_queue().task_done()
+            for _ in batch:
+                queue.task_done()
 
 
 async def start_image_capture_workers() -> None:
@@ -79,18 +147,17 @@ async def start_image_capture_workers() -> None:
     if _image_capture_workers_running():
         return
     await stop_image_capture_workers()
-    count = image_capture_worker_count()
-    _image_capture_tasks = [
-        asyncio.create_task(run_image_capture_consumer(), name=f"image_capture_consumer_{idx}") for idx in range(count)
-    ]
+    _image_capture_tasks = [asyncio.create_task(run_image_capture_consumer(), name="image_capture_consumer")]
 
 
 async def stop_image_capture_workers() -> None:
-    global _image_capture_tasks
-    if not _image_capture_tasks:
-        return
-    tasks = list(_image_capture_tasks)
+    global _image_capture_tasks, _image_fetch_semaphore
+    tasks = [*_image_capture_tasks, *_image_fetch_tasks.values()]
     _image_capture_tasks = []
+    _image_fetch_tasks.clear()
+    _image_fetch_semaphore = None
+    if not tasks:
+        return
     for task in tasks:
         task.cancel()
     await asyncio.gather(*tasks, return_exceptions=True)
@@ -98,6 +165,7 @@ async def stop_image_capture_workers() -> None:
 
 def ensure_image_capture_workers() -> None:
     bind_image_capture_lifecycle()
+    ensure_legacy_image_migration()
     if _image_capture_workers_running():
         return
     asyncio.create_task(start_image_capture_workers())
@@ -132,26 +200,99 @@ async def insert_image(image_seg: MessageSegment):
             )
 
 
+async def _migrate_legacy_row(cache: ImageCache) -> bytes | None:
+    """把旧版内联 base64_data 落到 blob 并回写哈希；解码失败的脏数据仅清空正文。"""
+    try:
+        data = base64.b64decode(cache.base64_data or "")
+    except (binascii.Error, ValueError):
+        data = b""
+    if not data:
+        await image_cache_repo.set_blob(cache.cq_code, "", 0)
+        return None
+    digest, size = await asyncio.to_thread(put_blob, data)
+    await image_cache_repo.set_blob(cache.cq_code, digest, size)
+    return data
+
+
+async def migrate_legacy_image_cache(batch: int = _LEGACY_MIGRATE_BATCH) -> int:
+    """分批把 image_cache 里的旧版 base64_data 迁到磁盘 blob；返回迁移行数。"""
+    global _legacy_migration_done
+    moved = 0
+    while True:
+        if image_capture_under_load():
+            await asyncio.sleep(5)
+            continue
+        rows = await image_cache_repo.find_legacy_base64(batch)
+        if not rows:
+            break
+        for cache in rows:
+            await _migrate_legacy_row(cache)
+            moved += 1
+        if len(rows) < batch:
+            break
+    _legacy_migration_done = True
+    if moved:
+        logger.info("image cache migrated {} legacy base64 rows to blob store", moved)
+    return moved
+
+
+async def _run_legacy_migration() -> int:
+    try:
+        return await migrate_legacy_image_cache()
+    except Exception as e:
+        logger.warning("image cache legacy migration failed: {}", e)
+        return 0
+
+
+def ensure_legacy_image_migration() -> None:
+    global _legacy_migration_task
+    if _legacy_migration_done or _legacy_migration_task is not None:
+        return
+    _legacy_migration_task = asyncio.create_task(_run_legacy_migration(), name="image_cache_legacy_migrate")
+
+
 async def get_image(cq_code) -> bytes | None:
-    cache = await image_cache_repo.find_by_cq_code(cq_code)
+    """只查元数据，图片正文从磁盘 blob 读取。"""
+    cache = await image_cache_repo.find_meta_by_cq_code(cq_code)
     if not cache:
         return None
-    if cache.base64_data is None:
+    if cache.blob_sha256:
+        return await asyncio.to_thread(read_blob, cache.blob_sha256)
+    if cache.base64_data is None and not _legacy_migration_done:
+        cache = await image_cache_repo.find_by_cq_code(cq_code)
+    if cache is None or cache.base64_data is None:
         return None
-    return base64.b64decode(cache.base64_data)
+    return await _migrate_legacy_row(cache)
+
+
+async def gc_image_blobs() -> int:
+    """标记仍被引用的哈希，清扫无主 blob 文件。"""
+    live = await image_cache_repo.list_blob_hashes()
+    return await asyncio.to_thread(sweep_blobs, live)
 
 
 async def clear_image_cache(days: int = 5, times: int = 3):
     idate = int(str((datetime.now() - timedelta(days=days)).date()).replace("-", ""))
     await image_cache_repo.delete_old(idate)
     await image_cache_repo.delete_low_ref(times)
+    await gc_image_blobs()
 
 
 async def reset_image_cache_runtime_state_for_tests() -> None:
-    global _image_capture_queue, _image_capture_dropped
+    global \
+        _image_capture_queue, \
+        _image_capture_dropped, \
+        _legacy_migration_done, \
+        _legacy_migration_task, \
+        _image_fetch_semaphore
     await stop_image_capture_workers()
+    if _legacy_migration_task is not None:
+        _legacy_migration_task.cancel()
+        await asyncio.gather(_legacy_migration_task, return_exceptions=True)
     _image_capture_queue = None
     _image_capture_dropped = 0
+    _legacy_migration_done = False
+    _legacy_migration_task = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+"""图片缓存的磁盘 blob：按 SHA-256 内容寻址，DB 行只存哈希与大小。"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from src.foundation.paths import plugin_data_dir
+
+# 新写入的 blob 在此时长内不被 GC，避免与「文件已落盘、行尚未保存」竞争
+BLOB_GC_GRACE_SECONDS = 3600
+
+
+def blob_root() -> Path:
+    return plugin_data_dir("media_cache", create=False) / "blobs"
+
+
+def blob_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(sha256: str) -> Path:
+    return blob_root() / sha256[:2] / sha256
+
+
+def put_blob(data: bytes) -> tuple[str, int]:
+    """写入 blob（已存在则只刷新 mtime）；返回 (sha256, size)。同步 IO，调用方放线程池。"""
+    digest = blob_sha256(data)
+    path = blob_path(digest)
+    try:
+        # 刷新 mtime：重新引用的旧 blob 进入宽限期，不会在新行落库前被 GC
+        os.utime(path)
+        return digest, len(data)
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{digest}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return digest, len(data)
+
+
+def read_blob(sha256: str) -> bytes | None:
+    try:
+        return blob_path(sha256).read_bytes()
+    except OSError:
+        return None
+
+
+def sweep_blobs(live: set[str], *, grace_seconds: float = BLOB_GC_GRACE_SECONDS) -> int:
+    """删除未被任何行引用、且超过宽限期的 blob；返回删除个数。
+
+    先改名再复查 mtime：改名前被 ``put_blob`` 刷新过的挪回原处，改名后到达的写入会重新落盘。
+    """
+    root = blob_root()
+    if not root.is_dir():
+        return 0
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for shard in root.iterdir():
+        if not shard.is_dir():
+            continue
+        for path in shard.iterdir():
+            if path.name in live:
+                continue
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+                if path.name.startswith("."):
+                    # 残留的临时文件 / 上次中断的待删文件
+                    path.unlink()
+                    removed += 1
+                    continue
+                doomed = path.with_name(f".{path.name}.gc")
+                path.replace(doomed)
+            except OSError:
+                continue
+            try:
+                if doomed.stat().st_mtime > cutoff and not path.exists():
+                    doomed.replace(path)
+                    continue
+                doomed.unlink()
+                removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+def blob_store_stats() -> dict[str, int]:
+    root = blob_root()
+    count = 0
+    size = 0
+    if root.is_dir():
+        for path in root.glob("*/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                size += path.stat().st_size
+            except OSError:
+                continue
+            count += 1
+    return {"blobs": count, "bytes": size}
@@ -0,0 +1,247 @@
+import asyncio
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from src.features.community_stats.endpoints import PRIMARY_CORPUS_API_BASE
+from src.features.corpus import remote_batch
+from src.features.corpus.community_source import RemoteCorpusRepository
+
+
+def _resp(status: int, payload=None) -> MagicMock:
+    mock = MagicMock()
+    mock.status_code = status
+    mock.json.return_value = payload
+    mock.text = ""
+    return mock
+
+
+def _ctx_payload(keywords: str) -> dict:
+    return {"keywords": keywords, "time": 1, "trigger_count": 2, "answers": [], "ban": [], "clear_time": 0}
+
+
+@pytest.fixture(autouse=True)
+def _clean_batch_state():
+    remote_batch.clear_remote_batch_state()
+    yield
+    remote_batch.clear_remote_batch_state()
+
+
+@pytest.fixture
+def _batch_endpoints(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("src.features.corpus.community_source.remote_batch_endpoints_enabled", lambda: True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_batch_endpoints")
+async def test_concurrent_finds_coalesce_into_one_batch_request():
+    posts: list[tuple[str, dict]] = []
+
+    async def fake_post(self, url, **kwargs):
+        posts.append((url, kwargs["json"]))
+        keys = kwargs["json"]["keywords"]
+        return _resp(200, {"contexts": {k: _ctx_payload(k) if k != "miss" else None for k in keys}})
+
+    repo = RemoteCorpusRepository(api_base=PRIMARY_CORPUS_API_BASE, token="pc_test")
+    with patch.object(httpx.AsyncClient, "post", fake_post):
+        a, b, again, miss = await asyncio.gather(
+            repo.find_by_keywords("a"),
+            repo.find_by_keywords("b"),
+            repo.find_by_keywords("a"),
+            repo.find_by_keywords("miss"),
+        )
+
+    assert len(posts) == 1
+    assert posts[0][0] == f"{PRIMARY_CORPUS_API_BASE}/context/batch"
+    assert sorted(posts[0][1]["keywords"]) == ["a", "b", "miss"]
+    assert a.keywords == "a"
+    assert again is a
+    assert b.trigger_count == 2
+    assert miss is None
+    assert remote_batch.remote_batch_stats()["find"]["items"] == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_batch_endpoints")
+async def test_batch_endpoint_missing_falls_back_to_per_key_get():
+    gets: list[str] = []
+    posts = 0
+
+    async def fake_post(self, url, **kwargs):
+        nonlocal posts
+        posts += 1
+        return _resp(404)
+
+    async def fake_get(self, url, **kwargs):
+        gets.append(kwargs["params"]["keywords"])
+        return _resp(200, _ctx_payload(kwargs["params"]["keywords"]))
+
+    repo = RemoteCorpusRepository(api_base=PRIMARY_CORPUS_API_BASE, token="pc_test")
+    with patch.object(httpx.AsyncClient, "post", fake_post), patch.object(httpx.AsyncClient, "get", fake_get):
+        found = await repo.find_many_by_keywords(["x", "y"])
+        assert sorted(gets) == ["x", "y"]
+        # 端点标记为不支持后不再探测
+        await repo.find_many_by_keywords(["p", "q"])
+
+    assert posts == 1
+    assert found["x"].keywords == "x"
+    assert found["y"].keywords == "y"
+
+
+async def _upsert(repo: RemoteCorpusRepository, i: int) -> None:
+    await repo.upsert_answer(
+        keywords=f"kw{i}",
+        group_id=0,
+        answer_keywords="ans",
+        answer_time=i,
+        message="hi",
+        append_on_existing=True,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_batch_endpoints")
+async def test_contributions_are_sent_as_one_gzip_batch():
+    sent: list[tuple[str, dict, dict]] = []
+
+    async def fake_post(self, url, **kwargs):
+        sent.append((url, kwargs["headers"], json.loads(gzip.decompress(kwargs["content"]))))
+        return _resp(202)
+
+    repo = RemoteCorpusRepository(api_base=PRIMARY_CORPUS_API_BASE, token="pc_test")
+    with patch.object(httpx.AsyncClient, "post", fake_post):
+        await asyncio.gather(*(_upsert(repo, i) for i in range(3)))
+
+    assert len(sent) == 1
+    url, headers, body = sent[0]
+    assert url == f"{PRIMARY_CORPUS_API_BASE}/contribute/batch"
+    assert headers["Content-Encoding"] == "gzip"
+    assert [op["keywords"] for op in body["ops"]] == ["kw0", "kw1", "kw2"]
+    assert remote_batch.remote_batch_stats()["contribute"]["batches"] == 1
+
+
+@pytest.fixture
+def _remote_limit_two(monkeypatch: pytest.MonkeyPatch):
+    from src.features.corpus import remote_budget
+
+    remote_budget.clear_remote_corpus_budget_state()
+    monkeypatch.setattr(remote_budget, "remote_corpus_concurrency_limit", lambda: 2)
+    monkeypatch.setattr(remote_budget, "pg_pool_under_pressure", lambda threshold=0.0: False)
+    yield
+    remote_budget.clear_remote_corpus_budget_state()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_remote_limit_two")
+async def test_batch_endpoints_off_by_default_caps_per_item_requests():
+    posts: list[str] = []
+    gets: list[str] = []
+    in_flight = 0
+    peak = 0
+
+    async def hold() -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    async def fake_post(self, url, **kwargs):
+        posts.append(url)
+        await hold()
+        return _resp(202)
+
+    async def fake_get(self, url, **kwargs):
+        gets.append(kwargs["params"]["keywords"])
+        await hold()
+        return _resp(200, _ctx_payload(kwargs["params"]["keywords"]))
+
+    repo = RemoteCorpusRepository(api_base=PRIMARY_CORPUS_API_BASE, token="pc_test")
+    with patch.object(httpx.AsyncClient, "post", fake_post), patch.object(httpx.AsyncClient, "get", fake_get):
+        found = await repo.find_many_by_keywords(["x", "y", "z"])
+        assert peak == 2
+        # 热路径 find 不等槽：超出上限的记为未命中
+        assert len(gets) == 2
+        assert sum(ctx is not None for ctx in found.values()) == 2
+
+        peak = 0
+        await asyncio.gather(*(_upsert(repo, i) for i in range(5)))
+
+    # 写回等槽，全部发出但在途不超过上限；不探测批量端点
+    assert posts == [f"{PRIMARY_CORPUS_API_BASE}/contribute"] * 5
+    assert peak == 2
+    # 不经合批窗口
+    assert remote_batch._find_coalescers == {}
+    assert remote_batch._contribute_batchers == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_batch_endpoints", "_remote_limit_two")
+async def test_batch_unsupported_fallback_caps_per_item_contributions():
+    per_item = 0
+    in_flight = 0
+    peak = 0
+
+    async def fake_post(self, url, **kwargs):
+        nonlocal per_item, in_flight, peak
+        if url.endswith("/batch"):
+            return _resp(404)
+        per_item += 1
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _resp(202)
+
+    repo = RemoteCorpusRepository(api_base=PRIMARY_CORPUS_API_BASE, token="pc_test")
+    with patch.object(httpx.AsyncClient, "post", fake_post):
+        await asyncio.gather(*(_upsert(repo, i) for i in range(6)))
+
+    assert per_item == 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_contribute_failure_reaches_caller():
+    async def fake_post(self, url, **kwargs):
+        raise httpx.ConnectError("down")
+
+    repo = RemoteCorpusRepository(api_base=PRIMARY_CORPUS_API_BASE, token="pc_test")
+    with patch.object(httpx.AsyncClient, "post", fake_post), pytest.raises(httpx.ConnectError):
+        await _upsert(repo, 0)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_find_batch_does_not_leave_waiters_hanging():
+    started = asyncio.Event()
+
+    async def slow_fetch(keys):
+        started.set()
+        await asyncio.sleep(10)
+        return {}
+
+    coalescer = remote_batch.RemoteFindCoalescer(slow_fetch)
+    waiter = asyncio.create_task(coalescer.find("k"))
+    await started.wait()
+    for run in list(coalescer._runs):
+        run.cancel()
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_budget_nowait_takes_free_slot(monkeypatch: pytest.MonkeyPatch):
+    from src.features.corpus import remote_budget
+
+    remote_budget.clear_remote_corpus_budget_state()
+    monkeypatch.setattr(remote_budget, "remote_corpus_concurrency_limit", lambda: 1)
+    monkeypatch.setattr(remote_budget, "pg_pool_under_pressure", lambda threshold=0.0: False)
+
+    async with remote_budget.RemoteCorpusBudget(wait=False) as first:
+        assert not first.skipped
+        async with remote_budget.RemoteCorpusBudget(wait=False) as second:
+            assert second.skipped
+    remote_budget.clear_remote_corpus_budget_state()
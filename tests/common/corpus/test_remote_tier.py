@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import pytest
+
+from src.features.corpus import remote_tier
+from src.foundation.db.modules import Answer, Context
+
+
+def _ctx(keywords: str, message: str = "hi") -> Context:
+    return Context.model_construct(
+        keywords=keywords,
+        time=1,
+        trigger_count=1,
+        answers=[Answer(keywords="ans", group_id=0, count=2, time=1, messages=[message])],
+        ban=[],
+        clear_time=0,
+    )
+
+
+class FakeRemote:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def find_by_keywords(self, keywords: str) -> Context | None:
+        self.calls.append(keywords)
+        return _ctx(keywords, message=f"fresh {keywords}")
+
+    async def find_many_by_keywords(self, keywords: list[str]) -> dict[str, Context | None]:
+        return {k: await self.find_by_keywords(k) for k in keywords}
+
+
+@pytest.fixture(autouse=True)
+def _tier_db(tmp_path):
+    remote_tier.set_remote_tier_path(tmp_path / "tier.sqlite3")
+    yield
+    remote_tier.set_remote_tier_path(None)
+
+
+@pytest.mark.asyncio
+async def test_remote_hits_are_served_locally_across_restarts():
+    remote = FakeRemote()
+    repo = remote_tier.TieredRemoteCorpusRepository(remote)
+
+    assert (await repo.find_by_keywords("牛牛")).answers[0].messages == ["fresh 牛牛"]
+    assert (await repo.find_by_keywords("牛牛")) is not None
+    assert remote.calls == ["牛牛"]
+
+    remote_tier.close_remote_tier()
+    again = remote_tier.TieredRemoteCorpusRepository(FakeRemote())
+    ctx = await again.peek("牛牛")
+    assert ctx is not None
+    assert ctx.answers[0].messages == ["fresh 牛牛"]
+    assert await again.peek("没见过") is None
+
+
+def test_cold_key_cannot_push_out_frequent_ones():
+    blob = remote_tier.encode_context(_ctx("x", message="m" * 64))
+    budget = len(blob) * 2
+    with remote_tier._lock:
+        remote_tier._db()
+    for key in ("hot1", "hot2"):
+        for _ in range(5):
+            remote_tier._sketch.increment(key)
+        assert remote_tier.tier_put_sync(key, blob, max_bytes=budget)
+
+    assert not remote_tier.tier_put_sync("cold", blob, max_bytes=budget)
+    assert remote_tier.remote_tier_stats()["rejected"] == 1
+
+    for _ in range(9):
+        remote_tier._sketch.increment("rising")
+    assert remote_tier.tier_put_sync("rising", blob, max_bytes=budget)
+    kept = remote_tier.tier_get_many_sync(["hot1", "hot2", "rising"])
+    assert len(kept) == 2
+    assert "rising" in kept
+    assert remote_tier.remote_tier_stats()["bytes"] <= budget
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_returned_and_revalidated_in_background():
+    remote = FakeRemote()
+    remote_tier.tier_put_sync("旧话题", remote_tier.encode_context(_ctx("旧话题", message="old")), max_bytes=1 << 20)
+    with remote_tier._lock:
+        remote_tier._db().execute(
+            "UPDATE remote_context SET fetched_at = ?", (time.time() - remote_tier.remote_tier_fresh_sec() - 5,)
+        )
+
+    repo = remote_tier.TieredRemoteCorpusRepository(remote)
+    ctx = await repo.find_by_keywords("旧话题")
+    assert ctx.answers[0].messages == ["old"]
+
+    await asyncio.gather(*repo._tasks)
+    assert remote.calls == ["旧话题"]
+    assert (await repo.peek("旧话题")).answers[0].messages == ["fresh 旧话题"]
+    assert remote_tier.remote_tier_stats()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_peek_then_prefetch_counts_once_and_reopen_reseeds():
+    remote = FakeRemote()
+    repo = remote_tier.TieredRemoteCorpusRepository(remote)
+    with remote_tier._lock:
+        remote_tier._db()
+
+    assert await repo.peek("话题") is None
+    await repo.find_many_by_keywords(["话题"], count=False)
+    assert remote_tier._sketch.estimate("话题") == 1
+
+    for _ in range(3):
+        await repo.peek("话题")
+    remote_tier.close_remote_tier()
+    with remote_tier._lock:
+        remote_tier._db()
+    # 重开只按库里的命中数重建，不叠加旧计数
+    assert remote_tier._sketch.estimate("话题") == 3
+
+
+def test_sketch_ages_counts():
+    sketch = remote_tier.FrequencySketch()
+    for _ in range(20):
+        sketch.increment("k")
+    assert sketch.estimate("k") == 15
+    sketch._additions = remote_tier._SKETCH_SAMPLE - 1
+    sketch.increment("other")
+    assert sketch.estimate("k") == 7
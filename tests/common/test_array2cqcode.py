@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+
+from src.shared.utils.array2cqcode import cqcode_to_array, try_convert_to_cqcode
+
+_SEGMENTS = [
+    {"type": "at", "data": {"qq": "123"}},
+    {"type": "text", "data": {"text": " 看图"}},
+    {"type": "image", "data": {"file": "a,b[1].image", "url": None}},
+    {"type": "face", "data": {"id": 14}},
+]
+
+
+def test_convert_list_and_json_text_escape_values() -> None:
+    expected = "[CQ:at,qq=123] 看图[CQ:image,file=a&#44;b&#91;1&#93;.image][CQ:face,id=14]"
+
+    assert try_convert_to_cqcode(_SEGMENTS) == expected
+    assert try_convert_to_cqcode(json.dumps(_SEGMENTS)) == expected
+    # 缓存命中后结果不变
+    assert try_convert_to_cqcode(_SEGMENTS) == expected
+
+
+def test_convert_passes_through_non_array_input() -> None:
+    assert try_convert_to_cqcode("[CQ:face,id=1]") == "[CQ:face,id=1]"
+    assert try_convert_to_cqcode("[不是 json") == "[不是 json"
+    assert try_convert_to_cqcode("hello") == "hello"
+    assert try_convert_to_cqcode(None) is None
+
+
+def test_cqcode_to_array_round_trip() -> None:
+    cq = "a&amp;b[CQ:at,qq=1]&#91;x&#93;[CQ:image,file=a&#44;b.image][CQ:shake]"
+
+    assert cqcode_to_array(cq) == [
+        {"type": "text", "data": {"text": "a&b"}},
+        {"type": "at", "data": {"qq": "1"}},
+        {"type": "text", "data": {"text": "[x]"}},
+        {"type": "image", "data": {"file": "a,b.image"}},
+        {"type": "shake", "data": {}},
+    ]
+    segs = [s for s in cqcode_to_array(cq) if s["type"] != "text"]
+    assert try_convert_to_cqcode(segs) == "[CQ:at,qq=1][CQ:image,file=a&#44;b.image][CQ:shake]"
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.foundation.db import config_cache
+from src.foundation.db.config_cache import ConfigCache
+
+
+@pytest.mark.asyncio
+async def test_load_single_flight_per_key() -> None:
+    cache = ConfigCache(capacity=10, ttl=60)
+    calls: list[int] = []
+
+    async def loader() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "row"
+
+    got = await asyncio.gather(*(cache.load(1, loader) for _ in range(5)))
+    assert got == ["row"] * 5
+    assert len(calls) == 1
+    assert cache.peek(1) == (True, "row")
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_load_does_not_cache_stale_row() -> None:
+    cache = ConfigCache(capacity=10, ttl=60)
+    gate = asyncio.Event()
+
+    async def loader() -> str:
+        await gate.wait()
+        return "old"
+
+    task = asyncio.create_task(cache.load(1, loader))
+    await asyncio.sleep(0)
+    cache.invalidate(1)
+    gate.set()
+    assert await task == "old"
+    assert cache.peek(1) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_load_many_batches_misses_and_caches_absent_rows() -> None:
+    cache = ConfigCache(capacity=10, ttl=60)
+    cache.put(1, "cached")
+    batches: list[list[int]] = []
+
+    async def loader(keys: list[int]) -> dict[int, str]:
+        batches.append(keys)
+        return {2: "two"}
+
+    got = await cache.load_many([1, 2, 3, 2], loader)
+    assert got == {1: "cached", 2: "two", 3: None}
+    assert batches == [[2, 3]]
+    assert cache.peek(3) == (True, None)
+
+
+def test_invalidate_payload_skips_own_process() -> None:
+    cache = ConfigCache(capacity=10, ttl=60)
+    config_cache.register_config_cache("test_config", cache)
+    cache.put(7, "row")
+    assert not config_cache.apply_invalidate_payload(config_cache.invalidate_payload("test_config", 7))
+    assert cache.peek(7) == (True, "row")
+    assert config_cache.apply_invalidate_payload("other:test_config:7")
+    assert cache.peek(7) == (False, None)
+    config_cache._CACHES_BY_TABLE.pop("test_config", None)
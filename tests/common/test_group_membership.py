@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pytest
+
+from src.platform.multi_bot import group_membership as mod
+
+
+@pytest.fixture(autouse=True)
+def clean_index():
+    mod.clear_group_membership_index()
+    yield
+    mod.clear_group_membership_index()
+
+
+class FakeBot:
+    def __init__(self, qq: int, groups: list[int] | None = None) -> None:
+        self.self_id = str(qq)
+        self.groups = groups or []
+        self.calls: list[tuple[int, int]] = []
+
+    async def call_api(self, api: str):
+        assert api == "get_group_list"
+        return {"data": [{"group_id": g, "group_name": "x"} for g in self.groups]}
+
+    async def get_group_member_info(self, *, group_id: int, user_id: int):
+        self.calls.append((group_id, user_id))
+        if group_id not in self.groups:
+            raise RuntimeError("not in group")
+
+
+async def test_index_built_at_connect_and_updated_by_notices() -> None:
+    assert await mod.refresh_bot_group_membership(FakeBot(111, [1, 2]))
+    assert await mod.refresh_bot_group_membership(FakeBot(222, [2]))
+    assert mod.group_member_bot_ids(2) == {111, 222}
+    assert mod.indexed_bots_in_group(1, [111, 222]) == [111]
+
+    await mod.note_bot_joined_group(222, 1)
+    await mod.note_bot_left_group(111, 2)
+    assert mod.indexed_bots_in_group(1, [111, 222]) == [111, 222]
+    assert mod.group_member_bot_ids(2) == {222}
+
+    # 未建索引的牛：增量通知不能把它当成全量
+    await mod.note_bot_joined_group(333, 1)
+    assert not mod.bot_membership_indexed(333)
+    assert mod.indexed_bots_in_group(1, [111, 333]) is None
+    assert mod.indexed_bots_in_group(1, []) is None
+
+
+async def test_local_connected_bots_use_index_without_member_api(monkeypatch) -> None:
+    a, b = FakeBot(111, [626266906]), FakeBot(222, [])
+    monkeypatch.setattr(mod, "get_bots", lambda: {"111": a, "222": b})
+
+    assert await mod.resolve_local_connected_bots_in_group(626266906) == [111]
+    assert len(a.calls) + len(b.calls) == 2
+
+    await mod.refresh_bot_group_membership(a)
+    await mod.refresh_bot_group_membership(b)
+    assert await mod.resolve_local_connected_bots_in_group(626266906) == [111]
+    assert len(a.calls) + len(b.calls) == 2
+
+
+def test_remote_changes_apply_from_shared_payload() -> None:
+    assert mod.apply_membership_change("replace", 444, [7, 8])
+    assert mod.apply_membership_change("remove", 444, [8])
+    assert not mod.apply_membership_change("add", 555, [7])
+    assert mod.group_member_bot_ids(7) == {444}
+    assert mod.group_member_bot_ids(8) == frozenset()
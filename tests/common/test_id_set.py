@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from src.foundation import id_set as mod
+from src.foundation.id_set import IdSet, IdSetCache
+
+
+def test_small_and_compact_sets_answer_membership(monkeypatch) -> None:
+    small = IdSet([3, "2", 1, 1, "x"])
+    assert not small.compact
+    assert 2 in small
+    assert 4 not in small
+    assert "2" not in small
+    assert list(small) == [1, 2, 3]
+    assert small == frozenset({1, 2, 3})
+
+    monkeypatch.setattr(mod, "COMPACT_THRESHOLD", 4)
+    big = IdSet(range(10, 100, 10))
+    assert big.compact
+    assert len(big) == 9
+    assert 50 in big
+    assert 55 not in big
+    assert 5 not in big
+    assert 1000 not in big
+    assert None not in big
+    assert big.to_frozenset() == frozenset(range(10, 100, 10))
+
+
+def test_cache_reuses_snapshot_until_source_changes() -> None:
+    cache = IdSetCache()
+    builds: list[int] = []
+    source = frozenset({1, 2})
+    extra = [9]
+
+    def build():
+        builds.append(1)
+        return (*source, *extra)
+
+    first = cache.get(source, build, extra=extra)
+    assert cache.get(source, build, extra=extra) is first
+    assert cache.get(frozenset({1, 2}), build, extra=[9]) is first
+    assert len(builds) == 1
+    assert first.version == 1
+
+    source = frozenset({1, 2, 3})
+    second = cache.get(source, build, extra=extra)
+    assert 3 in second
+    assert 9 in second
+    assert second.version == 2
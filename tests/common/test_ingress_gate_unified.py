@@ -149,7 +149,7 @@ async def test_unified_ingress_bypass_skips_federate_claim(monkeypatch: pytest.M
 
 
 def test_group_at_qq_ids_falls_back_to_raw_message_when_at_segment_missing() -> None:
-    from src.plugins.ingress_gate import group_at_qq_ids
+    from src.platform.ingress.parsed_event import parsed_group_event
 
     event = GroupMessageEvent.model_construct(
         time=100,
@@ -164,7 +164,7 @@ def test_group_at_qq_ids_falls_back_to_raw_message_when_at_segment_missing() ->
         raw_message="[reply:id=101092384][at:qq=2927116873] 不可以",
     )
 
-    assert group_at_qq_ids(event) == frozenset({2927116873})
+    assert parsed_group_event(event).at_targets == frozenset({2927116873})
 
 
 @pytest.mark.asyncio
@@ -15,11 +15,11 @@ async def test_insert_image_only_enqueues_capture(monkeypatch: pytest.MonkeyPatc
 
     called = False
 
-    async def fake_insert_image_io(image_seg):
+    async def fake_capture_batch(segs):
         nonlocal called
         called = True
 
-    monkeypatch.setattr(mod, "_insert_image_io", fake_insert_image_io)
+    monkeypatch.setattr(mod, "_capture_image_batch", fake_capture_batch)
 
     await mod.insert_image(seg)
 
@@ -37,11 +37,13 @@ async def test_image_capture_consumer_processes_queue(monkeypatch: pytest.Monkey
     seen: list[object] = []
     seg = SimpleNamespace(data={"url": "http://example.com/x.png"})
 
-    async def fake_insert_image_io(image_seg):
-        seen.append(image_seg)
+    async def fake_capture_batch(segs):
+        seen.append(list(segs))
 
-    monkeypatch.setattr(mod, "_insert_image_io", fake_insert_image_io)
+    monkeypatch.setattr(mod, "_capture_image_batch", fake_capture_batch)
+    monkeypatch.setattr(mod, "_IMAGE_CAPTURE_FLUSH_SECONDS", 0.0)
 
+    await mod.image_capture_queue().put(seg)
     await mod.image_capture_queue().put(seg)
     task = asyncio.create_task(mod.run_image_capture_consumer())
     try:
@@ -51,4 +53,39 @@ async def test_image_capture_consumer_processes_queue(monkeypatch: pytest.Monkey
         await asyncio.gather(task, return_exceptions=True)
         await mod.reset_image_cache_runtime_state_for_tests()
 
-    assert seen == [seg]
+    assert seen == [[seg, seg]]
+
+
+@pytest.mark.asyncio
+async def test_capture_batch_dedups_and_schedules_fetch_over_threshold(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.shared.utils import media_cache as mod
+
+    await mod.reset_image_cache_runtime_state_for_tests()
+    bumped: list[dict[str, int]] = []
+    fetched: list[tuple[str, str]] = []
+
+    class _Repo:
+        async def bump_ref_times(self, counts, date):
+            bumped.append(dict(counts))
+            return {
+                "[CQ:image,file=hot.image]": (3, False),
+                "[CQ:image,file=cold.image]": (1, False),
+                "[CQ:image,file=done.image]": (9, True),
+            }
+
+    monkeypatch.setattr(mod, "image_cache_repo", _Repo())
+    monkeypatch.setattr(mod, "image_capture_under_load", lambda: False)
+    monkeypatch.setattr(mod, "schedule_image_fetch", lambda cq, url: fetched.append((cq, url)))
+
+    segs = [
+        mod.MessageSegment("image", {"file": f"{name}.image", "url": f"http://img/{name}"})
+        for name in ("hot", "hot", "cold", "done")
+    ]
+
+    await mod._capture_image_batch(segs)
+
+    assert bumped == [
+        {"[CQ:image,file=hot.image]": 2, "[CQ:image,file=cold.image]": 1, "[CQ:image,file=done.image]": 1}
+    ]
+    assert fetched == [("[CQ:image,file=hot.image]", "http://img/hot")]
+    await mod.reset_image_cache_runtime_state_for_tests()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import base64
+import os
+
+import pytest
+
+from src.foundation.db.modules import ImageCache
+from src.shared.utils.media_cache import blob_store
+
+
+@pytest.fixture
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "blob_root", lambda: tmp_path / "blobs")
+    return tmp_path / "blobs"
+
+
+class _FakeImageCacheRepo:
+    def __init__(self, rows: list[ImageCache]) -> None:
+        self.rows = {r.cq_code: r for r in rows}
+        self.full_reads = 0
+
+    async def find_by_cq_code(self, cq_code):
+        self.full_reads += 1
+        return self.rows.get(cq_code)
+
+    async def find_meta_by_cq_code(self, cq_code):
+        row = self.rows.get(cq_code)
+        if row is None:
+            return None
+        return row.model_copy(update={"base64_data": None})
+
+    async def find_legacy_base64(self, limit):
+        legacy = [r for r in self.rows.values() if r.base64_data is not None and r.blob_sha256 is None]
+        return legacy[:limit]
+
+    async def set_blob(self, cq_code, blob_sha256, blob_size):
+        row = self.rows[cq_code]
+        row.blob_sha256, row.blob_size, row.base64_data = blob_sha256, blob_size, None
+
+    async def list_blob_hashes(self):
+        return {r.blob_sha256 for r in self.rows.values() if r.blob_sha256}
+
+
+def _row(cq_code: str, b64: str | None = None) -> ImageCache:
+    return ImageCache.model_construct(
+        cq_code=cq_code, base64_data=b64, blob_sha256=None, blob_size=0, ref_times=3, date=20260101
+    )
+
+
+def test_put_blob_is_content_addressed_and_sweep_keeps_live(blob_dir):
+    digest, size = blob_store.put_blob(b"png-bytes")
+    again, _ = blob_store.put_blob(b"png-bytes")
+    orphan, _ = blob_store.put_blob(b"orphan")
+    assert digest == again == blob_store.blob_sha256(b"png-bytes")
+    assert size == len(b"png-bytes")
+    assert blob_store.read_blob(digest) == b"png-bytes"
+    for sha in (digest, orphan):
+        os.utime(blob_store.blob_path(sha), (0, 0))
+
+    assert blob_store.sweep_blobs({digest}) == 1
+    assert blob_store.read_blob(orphan) is None
+    assert blob_store.blob_store_stats() == {"blobs": 1, "bytes": len(b"png-bytes")}
+
+
+def test_put_blob_hit_refreshes_mtime_so_sweep_keeps_it(blob_dir):
+    digest, _ = blob_store.put_blob(b"old")
+    os.utime(blob_store.blob_path(digest), (0, 0))
+    # 重新引用：行尚未落库，live 集合里还没有它
+    blob_store.put_blob(b"old")
+
+    assert blob_store.sweep_blobs(set()) == 0
+    assert blob_store.read_blob(digest) == b"old"
+
+
+@pytest.mark.asyncio
+async def test_migrate_legacy_rows_and_serve_from_blob(blob_dir, monkeypatch):
+    from src.shared.utils import media_cache as mod
+
+    await mod.reset_image_cache_runtime_state_for_tests()
+    repo = _FakeImageCacheRepo([
+        _row("[CQ:image,file=a.image]", base64.b64encode(b"img-a").decode()),
+        _row("[CQ:image,file=b.image]", "!!not-base64!!"),
+        _row("[CQ:image,file=c.image]"),
+    ])
+    monkeypatch.setattr(mod, "image_cache_repo", repo)
+    monkeypatch.setattr(mod, "image_capture_under_load", lambda: False)
+
+    assert await mod.migrate_legacy_image_cache(batch=1) == 2
+    a = repo.rows["[CQ:image,file=a.image]"]
+    assert a.base64_data is None
+    assert a.blob_sha256 == blob_store.blob_sha256(b"img-a")
+    assert repo.rows["[CQ:image,file=b.image]"].base64_data is None
+
+    assert await mod.get_image("[CQ:image,file=a.image]") == b"img-a"
+    assert await mod.get_image("[CQ:image,file=c.image]") is None
+    assert repo.full_reads == 0
+
+    await mod.reset_image_cache_runtime_state_for_tests()
+
+
+@pytest.mark.asyncio
+async def test_get_image_migrates_legacy_row_on_read(blob_dir, monkeypatch):
+    from src.shared.utils import media_cache as mod
+
+    await mod.reset_image_cache_runtime_state_for_tests()
+    repo = _FakeImageCacheRepo([_row("[CQ:image,file=a.image]", base64.b64encode(b"img-a").decode())])
+    monkeypatch.setattr(mod, "image_cache_repo", repo)
+
+    assert await mod.get_image("[CQ:image,file=a.image]") == b"img-a"
+    assert repo.rows["[CQ:image,file=a.image]"].blob_size == len(b"img-a")
+    assert await mod.gc_image_blobs() == 0
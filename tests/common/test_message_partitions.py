@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import importlib.util
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+from src.foundation.db import message_partitions as mp
+
+_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _ts(y: int, m: int, d: int = 1) -> int:
+    return int(datetime(y, m, d, tzinfo=UTC).timestamp())
+
+
+def test_month_helpers_roll_over_year():
+    assert mp.shift_month(2026, 12, 1) == (2027, 1)
+    assert mp.shift_month(2026, 1, -1) == (2025, 12)
+    assert mp.month_of(_ts(2026, 10, 19)) == (2026, 10)
+    assert mp.months_between((2026, 11), (2027, 2)) == [(2026, 11), (2026, 12), (2027, 1), (2027, 2)]
+    assert mp.partition_name(2026, 3) == "message_p202603"
+    assert mp.parse_partition_name("message_p202603") == (2026, 3)
+    assert mp.parse_partition_name(mp.DEFAULT_PARTITION) is None
+
+
+def test_expired_partitions_keeps_retention_window_and_default():
+    names = ["message_p202606", "message_p202607", "message_p202608", "message_p202610", mp.DEFAULT_PARTITION]
+    now = _ts(2026, 10, 19)
+
+    assert mp.expired_partitions(names, now=now, retention_months=3) == ["message_p202606", "message_p202607"]
+    assert mp.expired_partitions(names, now=now, retention_months=0) == []
+
+
+def test_partitioned_parent_ddl_uses_brin_and_composite_pk():
+    ddl = "\n".join(mp.partitioned_parent_ddl("message_partitioned", index_suffix="_new"))
+
+    assert "PARTITION BY RANGE (time)" in ddl
+    assert "PRIMARY KEY (id, time)" in ddl
+    assert "ix_message_time_brin_new ON message_partitioned USING brin (time)" in ddl
+    assert "ix_message_group_time_new ON message_partitioned (group_id, time)" in ddl
+    assert f"{mp.DEFAULT_PARTITION} PARTITION OF message_partitioned DEFAULT" in ddl
+
+
+def test_partition_ddl_skipped_on_non_postgres(monkeypatch):
+    monkeypatch.setattr(mp, "message_partitioning_enabled", lambda: True)
+    conn = type("Conn", (), {"dialect": type("D", (), {"name": "sqlite"})()})()
+
+    mp.ensure_pg_message_partitioned_table(conn)
+    assert mp.maintain_message_partitions_sync(conn) == {"partitioned": False}
+
+
+def test_migration_swap_renames_legacy_before_new():
+    spec = importlib.util.spec_from_file_location(
+        "_pallas_migrate_message_partitioned", _ROOT / "tools" / "migrate_message_partitioned.py"
+    )
+    assert spec is not None
+    assert spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+
+    stmts = mod.swap_statements()
+    legacy_pk = stmts.index("ALTER INDEX IF EXISTS message_pkey RENAME TO message_pkey_legacy")
+    new_pk = stmts.index("ALTER INDEX message_pkey_new RENAME TO message_pkey")
+    rename_new = stmts.index("ALTER TABLE message_partitioned RENAME TO message")
+
+    assert stmts[0].startswith("DROP TRIGGER")
+    assert legacy_pk < rename_new < new_pk
+    assert "ALTER SEQUENCE message_id_seq OWNED BY NONE" in stmts
+
+
+@pytest.mark.asyncio
+async def test_maintenance_creates_and_drops_month_partitions(pg_engine, monkeypatch):
+    from sqlalchemy import text
+
+    async with pg_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE message"))
+        for stmt in mp.partitioned_parent_ddl("message"):
+            await conn.exec_driver_sql(stmt)
+        await conn.run_sync(mp.ensure_month_partitions_sync, "message", first=(2026, 5), last=(2026, 6))
+        result = await conn.run_sync(mp.maintain_message_partitions_sync, now=_ts(2026, 10, 2), retention_months=3)
+        names = await conn.run_sync(mp.list_month_partitions_sync)
+
+    assert result["partitioned"] is True
+    assert result["dropped"] == ["message_p202605", "message_p202606"]
+    assert names == ["message_p202610", "message_p202611", "message_p202612"]
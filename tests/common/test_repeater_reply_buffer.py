@@ -3,11 +3,12 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.plugins.repeater.reply_buffer import ReplyBook
+
 
 def test_should_publish_reply_record_skips_placeholders():
     from src.plugins.repeater.model import Chat
@@ -52,7 +53,7 @@ async def test_apply_repeater_reply_record_merges_into_chat_reply_dict():
 
     try:
         assert await apply_repeater_reply_record(record) is True
-        assert Chat._reply_dict[group_id][bot_id][-1]["reply"] == "world"
+        assert Chat._reply_dict[group_id][bot_id][-1].reply == "world"
         assert await apply_repeater_reply_record(record) is False
     finally:
         Chat._reply_dict[group_id].pop(bot_id, None)
@@ -65,8 +66,8 @@ async def test_ban_searches_other_bot_reply_cache():
     group_id = 90002
     primary_bot = 80002
     other_bot = 80003
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_dict[group_id][other_bot] = [
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][other_bot].extend([
         {
             "time": 100,
             "pre_raw_message": "trigger",
@@ -74,7 +75,7 @@ async def test_ban_searches_other_bot_reply_cache():
             "reply": "bad line",
             "reply_keywords": "bad_kw",
         }
-    ]
+    ])
 
     BanManager._blacklist_answer.clear()
     BanManager._blacklist_answer_reserve.clear()
@@ -163,3 +164,32 @@ def test_publish_reply_record_sharding_without_redis_skips_publish(monkeypatch)
             "reply_keywords": "ak",
         },
     )
+
+
+def test_save_reserved_size_hot_reload_resizes_reply_rings():
+    from src.plugins.repeater import model as model_mod
+    from src.plugins.repeater.config import on_repeater_config_reload
+
+    original = model_mod.plugin_config
+    group_id = 90009
+    ring = model_mod.Chat._reply_dict[group_id][1]
+    ring.extend(
+        {"time": i, "pre_raw_message": "", "pre_keywords": "", "reply": f"r{i}", "reply_keywords": ""}
+        for i in range(10)
+    )
+    try:
+        on_repeater_config_reload(original.model_copy(update={"save_reserved_size": 3}))
+        assert len(ring) == 3
+        assert [r.reply for r in ring] == ["r7", "r8", "r9"]
+        assert ring.find_reply("r0") is None
+        assert model_mod.Chat._reply_dict[group_id][2].capacity == 3
+
+        on_repeater_config_reload(original.model_copy(update={"save_reserved_size": 5}))
+        ring.extend(
+            {"time": i, "pre_raw_message": "", "pre_keywords": "", "reply": f"n{i}", "reply_keywords": ""}
+            for i in range(4)
+        )
+        assert len(ring) == 5
+    finally:
+        on_repeater_config_reload(original)
+        model_mod.Chat._reply_dict.pop(group_id, None)
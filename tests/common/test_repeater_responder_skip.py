@@ -5,6 +5,7 @@ from types import SimpleNamespace
 
 import pytest
 
+from src.plugins.repeater.reply_buffer import ReplyBook
 from src.plugins.repeater.responder import Responder
 
 
@@ -97,14 +98,14 @@ async def test_context_find_pure_cq_skips_before_keywords(monkeypatch) -> None:
             return 0
 
     monkeypatch.setattr(
-        "src.plugins.repeater.responder.get_bots",
-        dict,
+        "src.platform.multi_bot.fleet.get_catalog_bot_ids",
+        frozenset,
     )
 
     result = await Responder._context_find(
         _ChatData(),
         _Config(),
-        defaultdict(lambda: defaultdict(list)),
+        ReplyBook(100),
         defaultdict(list),
         defaultdict(lambda: deque(maxlen=16)),
     )
@@ -131,8 +132,7 @@ async def test_answer_still_skips_one_char_plain_text_in_unified_mode(monkeypatc
     result = await Responder.answer(
         chat_data,
         SimpleNamespace(),
-        defaultdict(lambda: defaultdict(list)),
-        asyncio.Lock(),
+        ReplyBook(100),
         defaultdict(lambda: deque(maxlen=16)),
         asyncio.Lock(),
     )
@@ -170,8 +170,7 @@ async def test_answer_allows_one_char_plain_text_in_sharded_mode(monkeypatch) ->
     result = await Responder.answer(
         chat_data,
         SimpleNamespace(),
-        defaultdict(lambda: defaultdict(list)),
-        asyncio.Lock(),
+        ReplyBook(100),
         defaultdict(lambda: deque(maxlen=16)),
         asyncio.Lock(),
     )
@@ -216,7 +215,7 @@ async def test_context_find_skips_when_pg_pool_under_pressure(monkeypatch) -> No
     result = await Responder._context_find(
         _ChatData(),
         _Config(),
-        defaultdict(lambda: defaultdict(list)),
+        ReplyBook(100),
         defaultdict(list),
         defaultdict(lambda: deque(maxlen=16)),
     )
@@ -263,7 +262,7 @@ async def test_context_find_db_timeout_returns_none(monkeypatch) -> None:
     result = await Responder._context_find(
         _ChatData(),
         _Config(),
-        defaultdict(lambda: defaultdict(list)),
+        ReplyBook(100),
         defaultdict(list),
         defaultdict(lambda: deque(maxlen=16)),
     )
@@ -1,5 +1,6 @@
 """Integration tests for MongoDB Repository implementations."""
 
+import asyncio
 import time
 
 import pytest
@@ -381,3 +382,64 @@ async def test_blacklist_repo_crud(beanie_fixture):
     all_bl = await repo.find_all()
     assert len(all_bl) == 1
     assert "reserve_1" in all_bl[0].answers_reserve
+
+
+@pytest.mark.asyncio
+async def test_find_by_keywords_for_reply_caps_answers_and_messages(beanie_fixture, monkeypatch):
+    """接话投影：跳过无消息 answer，按 count 倒序截断，每个 answer 只留最新 msg_cap 条。"""
+    from src.foundation.db import repository_impl
+
+    monkeypatch.setattr(repository_impl, "_reply_sort_array_ready", None)
+    monkeypatch.setattr("src.features.corpus.reply_perf_config.reply_query_caps", lambda _kw: (2, 2))
+    repo = MongoContextRepository()
+    await repo.insert(
+        Context(
+            keywords="kw",
+            time=5,
+            trigger_count=3,  # type: ignore
+            answers=[
+                Answer(keywords="low", group_id=1, count=1, time=1, messages=["x"]),
+                Answer(keywords="empty", group_id=1, count=9, time=1, messages=[]),
+                Answer(keywords="top", group_id=1, count=5, time=1, messages=["a", "b", "c"]),
+                Answer(keywords="mid", group_id=2, count=3, time=2, messages=["d"]),
+            ],
+            ban=[Ban(keywords="b", group_id=1, reason="r", time=1)],
+        )
+    )
+
+    found = await repo.find_by_keywords_for_reply("kw")
+
+    assert found is not None
+    assert found.trigger_count == 3
+    assert [a.keywords for a in found.answers] == ["top", "mid"]
+    assert found.answers[0].messages == ["b", "c"]
+    assert [b.keywords for b in found.ban] == ["b"]
+    assert await repo.find_by_keywords_for_reply("ghost") is None
+
+
+@pytest.mark.asyncio
+async def test_upsert_answer_batches_into_one_ordered_bulk_write(monkeypatch):
+    """并发学习攒成一次有序 bulk_write，每条是一个管道更新。"""
+    from src.foundation.db import repository_impl
+
+    calls: list[tuple[list, bool]] = []
+
+    class _Coll:
+        async def bulk_write(self, requests, ordered=True):
+            calls.append((list(requests), ordered))
+
+    monkeypatch.setattr(repository_impl, "_learn_bulk_ready", None)
+    monkeypatch.setattr(Context, "get_pymongo_collection", classmethod(lambda cls: _Coll()))
+    repo = MongoContextRepository()
+
+    await asyncio.gather(*(repo.upsert_answer("kw", 1, "a", i, f"$m{i}", append_on_existing=True) for i in range(5)))
+
+    assert len(calls) == 1
+    requests, ordered = calls[0]
+    assert ordered is True
+    assert [r._filter for r in requests] == [{"keywords": "kw"}] * 5
+    pipeline = requests[0]._doc
+    assert isinstance(pipeline, list)
+    # 以 $ 开头的消息必须作为字面量，不能被当成字段路径
+    assert "{'$literal': '$m0'}" in str(pipeline)
+    assert repository_impl._learn_bulk_ready is True
@@ -226,6 +226,94 @@ def test_reply_message_query_limits_to_selected_answer_ids():
     assert "context_answer.context_id" not in sql
 
 
+def test_reply_context_from_json_matches_reply_shape():
+    from src.foundation.db.repository_pg import reply_context_from_json
+
+    ctx = reply_context_from_json(
+        '{"keywords": "kw", "time": 5, "trigger_count": 2, "clear_time": 1,'
+        ' "ban": [{"keywords": "b", "group_id": 7, "reason": "r", "time": 3}],'
+        ' "answers": [{"keywords": "a", "group_id": 7, "count": 4, "time": 9, "messages": ["m1", "m2"]}]}'
+    )
+
+    assert (ctx.keywords, ctx.time, ctx.trigger_count, ctx.clear_time) == ("kw", 5, 2, 1)
+    assert ctx.answers[0].messages == ["m1", "m2"]
+    assert ctx.answers[0].count == 4
+    assert ctx.ban[0].group_id == 7
+
+
+def test_ensure_reply_lookup_function_skips_non_postgres(monkeypatch):
+    from src.foundation.db import repository_pg as mod
+
+    monkeypatch.setattr(mod, "_reply_lookup_fn_ready", None)
+    conn = type("Conn", (), {"dialect": type("D", (), {"name": "sqlite"})()})()
+    mod._ensure_pg_reply_lookup_function(conn)
+
+    assert mod._reply_lookup_fn_ready is False
+
+
+@pytest.mark.asyncio
+async def test_find_by_keywords_for_reply_falls_back_when_function_missing(pg_engine, monkeypatch):
+    """函数被删后接话仍可用：首次调用回退 ORM，之后不再尝试快路径。"""
+    from sqlalchemy import text
+
+    from src.foundation.db import repository_pg as pg_mod
+    from src.foundation.db.modules import Answer, Context
+
+    async with pg_engine.begin() as conn:
+        await conn.execute(text(f"DROP FUNCTION IF EXISTS {pg_mod.REPLY_LOOKUP_FUNCTION}(text, integer, integer)"))
+    repo = pg_mod.PgContextRepository()
+    await repo.insert(
+        Context.model_construct(
+            keywords="kw-fallback",
+            time=1,
+            trigger_count=1,
+            answers=[Answer.model_construct(keywords="a", group_id=1, count=1, time=1, messages=["m"])],
+            ban=[],
+            clear_time=0,
+        )
+    )
+
+    found = await repo.find_by_keywords_for_reply("kw-fallback")
+
+    assert found is not None
+    assert found.answers[0].messages == ["m"]
+    assert pg_mod._reply_lookup_fn_ready is False
+
+
+@pytest.mark.asyncio
+async def test_reply_lookup_function_matches_orm_path(pg_engine, monkeypatch):
+    from src.foundation.db import repository_pg as pg_mod
+    from src.foundation.db.modules import Answer, Ban, Context
+
+    repo = pg_mod.PgContextRepository()
+    await repo.insert(
+        Context.model_construct(
+            keywords="kw-fn",
+            time=10,
+            trigger_count=4,
+            answers=[
+                Answer.model_construct(keywords="lo", group_id=1, count=1, time=5, messages=["x"]),
+                Answer.model_construct(
+                    keywords="hi", group_id=2, count=9, time=6, messages=[f"m{i}" for i in range(30)]
+                ),
+            ],
+            ban=[Ban.model_construct(keywords="lo", group_id=1, reason="r", time=3)],
+            clear_time=2,
+        )
+    )
+    khash = pg_mod.keywords_hash("kw-fn")
+
+    found, fast = await repo._find_for_reply_via_function("kw-fn", khash, 128, 8)
+    monkeypatch.setattr(pg_mod, "_reply_lookup_fn_ready", False)
+    slow = await repo._find_by_keywords_for_reply_uncached("kw-fn")
+
+    assert found is True
+    assert fast is not None
+    assert slow is not None
+    assert fast.model_dump() == slow.model_dump()
+    assert fast.answers[0].messages == [f"m{i}" for i in range(22, 30)]
+
+
 def test_message_row_has_group_user_time_index():
     from src.foundation.db.repository_pg import MessageRow
 
@@ -796,6 +884,52 @@ async def test_image_cache_insert_is_no_op_on_duplicate(pg_engine):
     assert got.date == 20250419
 
 
+@pytest.mark.asyncio
+async def test_image_cache_meta_lookup_and_blob_migration(pg_engine):
+    """元数据查询不带 base64_data；save 不得用 None 覆盖旧正文；set_blob 迁移后清空正文。"""
+    from src.foundation.db.modules import ImageCache
+    from src.foundation.db.repository_pg import PgImageCacheRepository
+
+    repo = PgImageCacheRepository()
+    cq = "[CQ:image,file=legacy.image]"
+    await repo.insert(ImageCache.model_construct(cq_code=cq, base64_data="b64", ref_times=3, date=20250419))
+
+    meta = await repo.find_meta_by_cq_code(cq)
+    assert meta is not None
+    assert meta.base64_data is None
+    meta.ref_times += 1
+    await repo.save(meta)
+    assert (await repo.find_by_cq_code(cq)).base64_data == "b64"
+    assert [c.cq_code for c in await repo.find_legacy_base64(10)] == [cq]
+
+    await repo.set_blob(cq, "ab" * 32, 3)
+    got = await repo.find_by_cq_code(cq)
+    assert got.base64_data is None
+    assert got.blob_sha256 == "ab" * 32
+    assert got.ref_times == 4
+    assert await repo.find_legacy_base64(10) == []
+    assert await repo.list_blob_hashes() == {"ab" * 32}
+
+
+@pytest.mark.asyncio
+async def test_image_cache_bump_ref_times_bulk_upsert(pg_engine):
+    """整批累加：新行以次数插入，旧行 ref_times 累加，返回是否已有图片。"""
+    from src.foundation.db.modules import ImageCache
+    from src.foundation.db.repository_pg import PgImageCacheRepository
+
+    repo = PgImageCacheRepository()
+    await repo.insert(
+        ImageCache.model_construct(
+            cq_code="[CQ:image,file=old.image]", blob_sha256="cd" * 32, blob_size=4, ref_times=2, date=20250101
+        )
+    )
+    got = await repo.bump_ref_times({"[CQ:image,file=old.image]": 2, "[CQ:image,file=new.image]": 3}, 20260101)
+
+    assert got == {"[CQ:image,file=old.image]": (4, True), "[CQ:image,file=new.image]": (3, False)}
+    row = await repo.find_meta_by_cq_code("[CQ:image,file=old.image]")
+    assert row.date == 20260101
+
+
 @pytest.mark.asyncio
 async def test_config_cache_hit_and_invalidate_on_write(pg_engine):
     """读后走 TTL 缓存；一旦 upsert_field 写入必须让缓存失效，下次读能拿到新值。"""
@@ -860,3 +994,18 @@ async def test_config_get_or_create_concurrent(pg_engine):
     assert created_count <= 1
     row = await repo.get(key, ignore_cache=True)
     assert row is not None
+
+
+@pytest.mark.asyncio
+async def test_config_get_many_batches_and_caches_missing(pg_engine):
+    """get_many 一次取回多行，不存在的 key 返回 None 且同样进缓存。"""
+    from src.foundation.db.repository_pg import PgConfigRepository
+
+    repo = PgConfigRepository("bot_config", "account")
+    await repo.upsert_field(4004, "security", True)
+    await repo.upsert_field(4005, "security", False)
+    got = await repo.get_many([4004, 4005, 4006])
+    assert got[4004].security is True
+    assert got[4005].security is False
+    assert got[4006] is None
+    assert await repo.get(4006) is None
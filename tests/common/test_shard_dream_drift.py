@@ -27,3 +27,22 @@ def test_drift_payload_roundtrip_mixed() -> None:
     assert out.nickname == "某位博士"
     assert out.text == "  hi  "
     assert out.image_bytes == raw
+
+
+def test_drift_batch_message_dedupes_images() -> None:
+    from src.platform.shard.coord.dream_drift import drift_batch_message, expand_drift_batch_message
+
+    raw = b"\x89PNG" + b"same"
+    envs = [
+        {"event_id": str(i), "payload": drift_payload_to_dict(DriftPayload(nickname=f"n{i}", image_bytes=raw))}
+        for i in range(3)
+    ]
+    envs.append({"event_id": "t", "payload": drift_payload_to_dict(DriftPayload(nickname="n", text="hi"))})
+
+    msg = drift_batch_message(envs)
+    assert len(msg["images"]) == 1
+    assert all("image_b64" not in e["payload"] for e in msg["events"])
+
+    out = expand_drift_batch_message(msg)
+    assert out == envs
+    assert expand_drift_batch_message(envs[0]) == [envs[0]]
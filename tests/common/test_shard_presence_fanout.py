@@ -161,3 +161,39 @@ def test_repeater_can_attempt_reply_rejects_when_no_fanout_bot_ready(monkeypatch
         assert await fanout_mod.repeater_can_attempt_reply(100, 1) is False
 
     asyncio.run(run())
+
+
+def test_list_fanout_bot_ids_prefetches_bot_configs_once_per_ttl(monkeypatch):
+    fanout_mod._FANOUT_BOT_IDS_CACHE.clear()
+    monkeypatch.setattr(fanout_mod, "_FANOUT_PREFETCHED", {})
+    now = 100.0
+    prefetched: list[list[int]] = []
+
+    class FakeRepo:
+        async def get_many(self, ids):
+            prefetched.append(list(ids))
+            return {}
+
+    async def fake_list(group_id: int) -> list[int]:
+        return [100, 200]
+
+    async def always_true(bid: int, gid: int) -> bool:
+        return True
+
+    monkeypatch.setattr(fanout_mod.shard_ctx, "sharding_active", lambda: False)
+    monkeypatch.setattr(fanout_mod.time, "monotonic", lambda: now)
+    monkeypatch.setattr(fanout_mod, "make_bot_config_repository", FakeRepo)
+    monkeypatch.setattr("src.plugins.duel.duel_bots.list_group_online_bot_ids", fake_list)
+    monkeypatch.setattr(fanout_mod, "bot_may_repeater_reply", always_true)
+
+    async def run() -> None:
+        nonlocal now
+        await fanout_mod.list_fanout_bot_ids(1)
+        # 名单缓存过期后重算，但同一组牛不再批量回源
+        now += fanout_mod._FANOUT_BOT_IDS_CACHE_TTL + 1
+        await fanout_mod.list_fanout_bot_ids(1)
+        now += fanout_mod._FANOUT_PREFETCH_TTL
+        await fanout_mod.list_fanout_bot_ids(1)
+
+    asyncio.run(run())
+    assert prefetched == [[100, 200], [100, 200]]
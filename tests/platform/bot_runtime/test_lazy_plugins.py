@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sys
+
+from src.foundation.paths import PROJECT_ROOT
+from src.platform.bot_runtime.lazy_plugins import lazy_route_matches, read_static_route_meta
+from src.platform.bot_runtime.startup_profile import _ImportTimer
+
+_SOURCE = """
+from nonebot import on_message
+__plugin_meta__ = PluginMetadata(
+    name="x",
+    usage=join_usage("a"),
+    extra={"command_prefixes": ["牛牛画画"], "exact_plaintexts": ["牛牛网关", "牛牛连通"], "menu_data": build()},
+)
+draw = on_message(rule=Rule(is_draw), priority=6, block=True)
+probe = on_message(priority=4)
+"""
+
+
+def test_read_static_route_meta_from_literal_extra() -> None:
+    meta = read_static_route_meta(_SOURCE)
+
+    assert meta is not None
+    assert meta.command_prefixes == ("牛牛画画",)
+    assert meta.exact_plaintexts == ("牛牛网关", "牛牛连通")
+    assert meta.min_priority == 4
+    assert lazy_route_matches(meta, "牛牛画画 一只猫")
+    assert lazy_route_matches(meta, "牛牛网关")
+    assert not lazy_route_matches(meta, "牛牛网关呢")
+    assert not lazy_route_matches(meta, "随便聊聊")
+
+
+def test_read_static_route_meta_none_without_literal_triggers() -> None:
+    assert read_static_route_meta('__plugin_meta__ = PluginMetadata(extra={"command_prefixes": list(X)})') is None
+    assert read_static_route_meta("def broken(:") is None
+
+
+def test_real_draw_plugin_meta_is_statically_readable() -> None:
+    source = (PROJECT_ROOT / "src" / "plugins" / "draw" / "__init__.py").read_text(encoding="utf-8")
+    meta = read_static_route_meta(source)
+    assert meta is not None
+    assert "牛牛画画" in meta.command_prefixes
+
+
+def test_import_timer_records_self_time(tmp_path, monkeypatch) -> None:
+    (tmp_path / "lazy_probe_outer.py").write_text("import lazy_probe_inner\n", encoding="utf-8")
+    (tmp_path / "lazy_probe_inner.py").write_text("X = 1\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    timer = _ImportTimer()
+    sys.meta_path.insert(0, timer)
+    try:
+        import lazy_probe_outer  # noqa: F401
+    finally:
+        sys.meta_path.remove(timer)
+        sys.modules.pop("lazy_probe_outer", None)
+        sys.modules.pop("lazy_probe_inner", None)
+
+    assert {"lazy_probe_outer", "lazy_probe_inner"} <= set(timer.total_ms)
+    assert timer.total_ms["lazy_probe_outer"] >= timer.total_ms["lazy_probe_inner"]
+    assert timer.self_ms["lazy_probe_outer"] <= timer.total_ms["lazy_probe_outer"]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message
+
+from src.platform.ingress.parsed_event import parsed_group_event, reset_parsed_group_events_for_tests
+from src.platform.multi_bot.dedup import cross_bot_message_signature
+
+
+def _event(raw: str, *, message_id: int = 1) -> GroupMessageEvent:
+    return GroupMessageEvent.model_construct(
+        time=100,
+        self_id=111,
+        post_type="message",
+        message_type="group",
+        sub_type="normal",
+        user_id=42,
+        group_id=7,
+        message_id=message_id,
+        message=Message(raw),
+        raw_message=raw,
+    )
+
+
+def test_parsed_event_is_shared_per_event_object() -> None:
+    reset_parsed_group_events_for_tests()
+    event = _event("  牛牛 早  ")
+
+    parsed = parsed_group_event(event)
+
+    assert parsed_group_event(event) is parsed
+    assert parsed_group_event(_event("  牛牛 早  ")) is not parsed
+    assert parsed.plain_text == "  牛牛 早  "
+    assert parsed.plain == "牛牛 早"
+    assert parsed.body == "牛牛 早"
+
+
+def test_parsed_event_segments_ats_and_norm_raw() -> None:
+    raw = "[CQ:at,qq=222] 看图[CQ:image,file=a.image,subType=1]"
+    parsed = parsed_group_event(_event(raw))
+
+    assert parsed.at_targets == frozenset({222})
+    assert len(parsed.image_segments) == 1
+    assert parsed.norm_raw == "[CQ:at,qq=222] 看图[CQ:image,file=a.image]"
+    # 纯 CQ 消息：body 回退 raw
+    assert parsed_group_event(_event("[CQ:face,id=1]")).body == "[CQ:face,id=1]"
+
+
+def test_parsed_event_signature_and_memo_computed_once() -> None:
+    parsed = parsed_group_event(_event("hello   world"))
+    calls: list[str] = []
+
+    def derive(text: str) -> str:
+        calls.append(text)
+        return text.upper()
+
+    assert parsed.memo("k", derive, "a") == "A"
+    assert parsed.memo("k", derive, "b") == "A"
+    assert calls == ["a"]
+    assert parsed.signature() == cross_bot_message_signature(
+        7, 42, "hello   world", 100, use_plaintext=True, include_message_time=True
+    )
+    assert parsed.signature(include_message_time=False) == (7, 42, "hello world")
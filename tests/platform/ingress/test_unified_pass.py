@@ -71,7 +71,6 @@ async def test_build_repeater_event_context_skips_claim_when_ingress_once_won(mo
         lambda **_: False,
     )
     monkeypatch.setattr(event_gate, "remember_group_message_id", fake_true)
-    monkeypatch.setattr(event_gate, "normalize_group_raw_message", lambda raw: raw)
 
     async def fake_not_dup(*_args, **_kwargs) -> bool:
         return False
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from nonebot.adapters.onebot.v11 import ActionFailed
+
+from src.platform.multi_bot import member_profile as mp
+
+
+class FakeBot:
+    def __init__(self, members: list[dict]) -> None:
+        self.members = members
+        self.calls: list[str] = []
+
+    async def call_api(self, api: str, **params):
+        self.calls.append(api)
+        if api == "get_group_member_list":
+            return self.members
+        if api == "get_group_member_info":
+            for m in self.members:
+                if m["user_id"] == params["user_id"]:
+                    return m
+            raise ActionFailed(retcode=100)
+        raise AssertionError(api)
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(mp.shard_ctx, "sharding_active", lambda: False)
+    mp.clear_member_profile_cache()
+    yield
+    mp.clear_member_profile_cache()
+
+
+@pytest.mark.asyncio
+async def test_first_miss_warms_whole_group_then_serves_from_cache() -> None:
+    bot = FakeBot([
+        {"user_id": 1, "card": "", "nickname": "甲"},
+        {"user_id": 2, "card": "乙卡", "nickname": "乙", "shut_up_timestamp": 0},
+    ])
+
+    assert (await mp.get_member_profile(bot, 10, 1)).display_name == "甲"
+    assert (await mp.get_member_profile(bot, 10, 2)).display_name == "乙卡"
+    assert bot.calls == ["get_group_member_list"]
+
+    # 不在群内：单查一次后负缓存
+    assert await mp.get_member_profile(bot, 10, 3) is None
+    assert await mp.get_member_profile(bot, 10, 3) is None
+    assert bot.calls == ["get_group_member_list", "get_group_member_info"]
+
+
+@pytest.mark.asyncio
+async def test_notices_update_cached_profiles_in_place() -> None:
+    bot = FakeBot([{"user_id": 1, "card": "旧", "nickname": "甲"}, {"user_id": 2, "card": "", "nickname": "乙"}])
+    await mp.get_member_profile(bot, 10, 1)
+
+    def notice(notice_type: str, user_id: int, **extra) -> SimpleNamespace:
+        return SimpleNamespace(notice_type=notice_type, group_id=10, user_id=user_id, **extra)
+
+    assert mp.apply_member_profile_notice(notice("group_card", 1, card_new="新"))
+    assert mp.apply_member_profile_notice(notice("group_ban", 2, sub_type="ban", duration=600))
+    assert mp.apply_member_profile_notice(notice("group_decrease", 1))
+    # 全体禁言不落在个人资料上
+    assert not mp.apply_member_profile_notice(notice("group_ban", 0, sub_type="ban", duration=600))
+
+    assert (await mp.get_member_profile(bot, 10, 2)).shut_up()
+    assert await mp.get_member_profile(bot, 10, 1) is None
+    assert bot.calls == ["get_group_member_list"]
+
+    assert mp.apply_member_profile_notice(notice("group_increase", 1))
+    assert (await mp.get_member_profile(bot, 10, 1)).display_name == "旧"
+    assert bot.calls[-1] == "get_group_member_info"
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import pytest
+
+from src.platform.observability import bot_load
+from src.platform.shard import rebalance
+from src.platform.shard.registry.config import get_shard_registry_settings
+from src.platform.shard.registry.store import (
+    ShardRegistry,
+    assign_bot_to_shard,
+    clear_shard_registry_cache,
+    get_shard_registry,
+    save_shard_registry,
+)
+
+
+@pytest.fixture
+def shard_registry(monkeypatch, tmp_path):
+    monkeypatch.setenv("PALLAS_SHARD_ENABLED", "true")
+    monkeypatch.setenv("PALLAS_BOT_ROLE", "hub")
+    monkeypatch.setenv("PALLAS_SHARD_BOTS_PER", "3")
+    monkeypatch.setenv("PALLAS_SHARD_WORKER_BASE_PORT", "8090")
+    monkeypatch.setenv("PALLAS_SHARD_AUTO_SCALE_WORKERS", "false")
+    monkeypatch.setattr(
+        "src.platform.shard.registry.store._registry_path",
+        lambda: tmp_path / "registry.json",
+    )
+    clear_shard_registry_cache()
+    get_shard_registry_settings.cache_clear()
+    reg = ShardRegistry(bots_per_shard=3, worker_base_port=8090, ws_host="127.0.0.1")
+    reg.assignments.update({"1": 0, "2": 0, "3": 1})
+    save_shard_registry(reg)
+    yield
+    clear_shard_registry_cache()
+    get_shard_registry_settings.cache_clear()
+
+
+def test_bot_load_snapshot_charges_db_time_in_scope() -> None:
+    bot_load.clear_bot_load_for_tests()
+    bot_load.record_bot_group_message(10001, matcher_ms=30.0)
+    with bot_load.bot_load_scope(10001):
+        bot_load.charge_bot_db_ms(20.0)
+    bot_load.charge_bot_db_ms(999.0)
+    row = bot_load.bot_load_snapshot()["10001"]
+    assert row["db_ms_per_min"] == pytest.approx(2.0, abs=0.1)
+    assert row["score"] == pytest.approx(bot_load.bot_load_score(row), abs=0.1)
+    bot_load.clear_bot_load_for_tests()
+
+
+def test_plan_rebalance_moves_hot_bot_to_cold_shard() -> None:
+    moves = rebalance.plan_rebalance(
+        {"a": 0, "b": 0, "c": 0, "d": 1},
+        {"a": 600.0, "b": 300.0, "c": 50.0, "d": 100.0},
+        [0, 1, 2],
+        capacity=3,
+    )
+    assert [(m.bot_id, m.from_shard, m.to_shard) for m in moves] == [("a", 0, 2)]
+
+
+def test_plan_rebalance_skips_small_gain_and_full_targets() -> None:
+    assert rebalance.plan_rebalance({"a": 0, "b": 1}, {"a": 100.0, "b": 95.0}, [0, 1], capacity=3) == []
+    assert rebalance.plan_rebalance({"a": 0, "b": 0, "c": 1}, {"a": 500.0, "b": 500.0}, [0, 1], capacity=1) == []
+
+
+def test_assign_prefers_measured_light_shard(shard_registry, monkeypatch) -> None:
+    monkeypatch.setattr(rebalance, "collect_bot_loads", lambda: {"3": {"score": 900.0}, "1": {"score": 5.0}})
+    assert assign_bot_to_shard("4") == 0
+
+
+@pytest.mark.asyncio
+async def test_migrate_bot_to_shard_reconnects_and_waits_online(shard_registry, monkeypatch) -> None:
+    reconnected: list[str] = []
+
+    async def reconnect(qq: str) -> bool:
+        reconnected.append(qq)
+        return True
+
+    monkeypatch.setattr(
+        "src.platform.shard.presence.read_presence_bots",
+        lambda: {"2": {"shard_id": 1}},
+    )
+    row = await rebalance.migrate_bot_to_shard("2", 1, reconnect=reconnect, wait_online_sec=1)
+    assert row["changed"]
+    assert row["online"]
+    assert reconnected == ["2"]
+    assert get_shard_registry().shard_for_bot("2") == 1
+    with pytest.raises(ValueError, match="未登记"):
+        await rebalance.migrate_bot_to_shard("9", 1, reconnect=reconnect)
+
+
+def test_assign_spreads_burst_of_unmeasured_bots(shard_registry, monkeypatch) -> None:
+    monkeypatch.setenv("PALLAS_SHARD_BOTS_PER", "5")
+    reg = get_shard_registry()
+    reg.bots_per_shard = 5
+    reg.assignments.clear()
+    reg.assignments.update({"1": 0, "3": 1})
+    save_shard_registry(reg)
+    monkeypatch.setattr(rebalance, "collect_bot_loads", lambda: {"1": {"score": 100.0}, "3": {"score": 100.0}})
+
+    picked = [assign_bot_to_shard(qq) for qq in ("10", "11", "12", "13")]
+    assert sorted(picked) == [0, 0, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_migrate_rolls_back_when_bot_never_comes_online(shard_registry, monkeypatch) -> None:
+    reconnected: list[tuple[str, int | None]] = []
+
+    async def reconnect(qq: str) -> bool:
+        reconnected.append((qq, get_shard_registry().shard_for_bot(qq)))
+        return True
+
+    monkeypatch.setattr("src.platform.shard.presence.read_presence_bots", lambda: {"2": {"shard_id": 0}})
+    row = await rebalance.migrate_bot_to_shard("2", 1, reconnect=reconnect, wait_online_sec=1)
+
+    assert row["rolled_back"]
+    assert not row["online"]
+    assert get_shard_registry().shard_for_bot("2") == 0
+    # 先按目标分片重连，失败后按原分片连回
+    assert reconnected == [("2", 1), ("2", 0)]
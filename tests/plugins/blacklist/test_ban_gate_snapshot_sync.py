@@ -10,38 +10,144 @@ from src.features.ban_gate import snapshot
 @pytest.fixture(autouse=True)
 async def reset_snapshot():
     await snapshot.reset_ban_gate_snapshot_for_tests()
-    snapshot._synced_redis_gen = -1
-    snapshot._remote_gen_checked_at = 0.0
     yield
     await snapshot.reset_ban_gate_snapshot_for_tests()
 
 
-def test_sync_remote_generation_detects_bump(monkeypatch):
-    class FakeRedis:
-        def __init__(self):
-            self.gen = 1
+class FakeChangelogRedis:
+    """只实现变更日志用到的 eval / pipeline / xrange / xrevrange。"""
 
-        def get(self, _key):
-            return str(self.gen).encode()
+    def __init__(self):
+        self.version = 0
+        self.entries: list[tuple[bytes, dict[bytes, bytes]]] = []
 
-        def incr(self, _key):
-            self.gen += 1
-            return self.gen
+    def eval(self, _script, _numkeys, _ver_key, _stream_key, payload, _maxlen):
+        self.version += 1
+        sid = f"{len(self.entries) + 1000}-0".encode()
+        self.entries.append((sid, {b"v": str(self.version).encode(), b"c": payload.encode()}))
+        return self.version
 
-    fake = FakeRedis()
-    monkeypatch.setattr(
-        "src.platform.coord.redis_claim.get_coord_redis_client",
-        lambda: fake,
-    )
-    snapshot._synced_redis_gen = 0
-    snapshot._remote_gen_checked_at = 0.0
+    def get(self, _key):
+        return str(self.version).encode() if self.version else None
 
-    assert snapshot.sync_ban_gate_snapshot_remote_generation() is True
-    assert snapshot.sync_ban_gate_snapshot_remote_generation() is False
+    def incr(self, _key):
+        self.version += 1
+        return self.version
 
-    fake.gen = 2
-    snapshot._remote_gen_checked_at = 0.0
-    assert snapshot.sync_ban_gate_snapshot_remote_generation() is True
+    def xrevrange(self, _key, count=None):
+        return list(reversed(self.entries))[:count]
+
+    def xrange(self, _key, min="-", count=None):  # noqa: A002
+        lo = snapshot_sid(min.lstrip("(")) if min != "-" else (-1, -1)
+        return [e for e in self.entries if snapshot_sid(e[0].decode()) > lo][:count]
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class _Pipe:
+            def __init__(self):
+                self.calls = []
+
+            def get(self, key):
+                self.calls.append(lambda: fake.get(key))
+
+            def xrevrange(self, key, count=None):
+                self.calls.append(lambda: fake.xrevrange(key, count=count))
+
+            def xrange(self, key, min="-", count=None):  # noqa: A002
+                self.calls.append(lambda: fake.xrange(key, min=min, count=count))
+
+            def execute(self):
+                return [c() for c in self.calls]
+
+        return _Pipe()
+
+
+def snapshot_sid(raw: str) -> tuple[int, int]:
+    ms, _, seq = raw.partition("-")
+    return int(ms), int(seq or 0)
+
+
+@pytest.fixture
+def changelog(monkeypatch):
+    fake = FakeChangelogRedis()
+    monkeypatch.setattr("src.platform.coord.redis_claim.get_coord_redis_client", lambda: fake)
+    return fake
+
+
+async def fake_full_reload(monkeypatch, users=frozenset(), groups=None, banned_groups=frozenset()):
+    async def load():
+        return frozenset(users), dict(groups or {}), frozenset(banned_groups)
+
+    monkeypatch.setattr(snapshot, "get_db_backend", lambda: "postgresql")
+    monkeypatch.setattr(snapshot, "_load_snapshot_postgresql", load)
+    await snapshot.refresh_ban_gate_snapshot()
+
+
+@pytest.mark.asyncio
+async def test_other_process_changes_apply_as_deltas(monkeypatch, changelog):
+    await fake_full_reload(monkeypatch, users={1})
+    assert snapshot.snapshot_version() == 0
+
+    # 其它进程写入：只进日志，不动本地快照
+    snapshot.append_ban_gate_change_sync({"k": "user", "id": 2, "on": True})
+    snapshot.append_ban_gate_change_sync({"k": "user", "id": 1, "on": False})
+    snapshot.append_ban_gate_change_sync({"k": "blocked", "id": 50, "uids": [7, 8]})
+    snapshot.append_ban_gate_change_sync({"k": "group", "id": 60, "on": True})
+    assert snapshot.is_user_globally_banned_fast(2) is False
+
+    assert await snapshot.sync_ban_gate_deltas() is True
+    assert snapshot.snapshot_version() == 4
+    assert snapshot.is_user_globally_banned_fast(2) is True
+    assert snapshot.is_user_globally_banned_fast(1) is False
+    assert snapshot.is_user_blocked_in_group_fast(50, 7) is True
+    assert snapshot.is_group_banned_fast(60) is True
+
+    # 本进程写入：立即生效，回放自身日志幂等
+    await snapshot.patch_group_blocked_users(50, [])
+    assert snapshot.is_user_blocked_in_group_fast(50, 7) is False
+    assert await snapshot.sync_ban_gate_deltas() is True
+    assert snapshot.snapshot_version() == 5
+    assert snapshot.is_user_blocked_in_group_fast(50, 7) is False
+
+
+@pytest.mark.asyncio
+async def test_trimmed_changelog_requests_full_reload(monkeypatch, changelog):
+    await fake_full_reload(monkeypatch)
+    snapshot.append_ban_gate_change_sync({"k": "user", "id": 3, "on": True})
+    snapshot.append_ban_gate_change_sync({"k": "user", "id": 4, "on": True})
+    del changelog.entries[0]
+
+    assert await snapshot.sync_ban_gate_deltas() is False
+    assert snapshot.is_user_globally_banned_fast(4) is False
+
+
+@pytest.mark.asyncio
+async def test_failed_append_bumps_version_for_full_reload(monkeypatch, changelog):
+    await fake_full_reload(monkeypatch)
+    refreshes: list[int] = []
+    monkeypatch.setattr(snapshot, "schedule_ban_gate_snapshot_refresh", lambda: refreshes.append(1))
+
+    def broken_eval(*_args):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(changelog, "eval", broken_eval)
+    await snapshot.patch_user_banned(5, True)
+
+    assert snapshot.is_user_globally_banned_fast(5) is True
+    assert changelog.version == 1
+    assert refreshes == [1]
+    # 其它进程：日志里没有条目，但版本号前进了 → 全量重载
+    assert await snapshot.sync_ban_gate_deltas() is False
+
+
+@pytest.mark.asyncio
+async def test_without_changelog_falls_back_to_periodic_reload(monkeypatch):
+    monkeypatch.setattr("src.platform.coord.redis_claim.get_coord_redis_client", lambda: None)
+    await fake_full_reload(monkeypatch, users={9})
+    assert snapshot.snapshot_version() is None
+    assert await snapshot.sync_ban_gate_deltas() is False
+    assert snapshot.is_user_globally_banned_fast(9) is True
 
 
 def mark_snapshot_ready() -> None:
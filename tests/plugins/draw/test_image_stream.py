@@ -0,0 +1,84 @@
+import asyncio
+import base64
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from src.plugins.draw.image_api import image_api_body_issue_label, reply_from_image_api_json
+from src.plugins.draw.image_stream import (
+    B64_SPAN_PLACEHOLDER,
+    DrawByteBudget,
+    charge_draw_bytes,
+    loads_generation_body,
+    stream_image_bytes,
+)
+
+_BIG_PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 400
+
+
+def _big_body(raw: bytes) -> str:
+    return '{"created":1,"data":[{"b64_json":"' + base64.b64encode(raw).decode() + '"}]}'
+
+
+def test_loads_generation_body_splits_large_b64() -> None:
+    body = _big_body(_BIG_PNG)
+    data, span = loads_generation_body(body)
+    assert span is not None
+    assert data["data"][0]["b64_json"] == B64_SPAN_PLACEHOLDER
+    assert image_api_body_issue_label(body) is None
+
+
+def test_large_b64_non_image_rejected_from_first_chunk() -> None:
+    body = _big_body(b"<html>" + b"x" * 100_000)
+    assert image_api_body_issue_label(body) == "invalid_image"
+
+
+@pytest.mark.asyncio
+async def test_reply_sends_incrementally_decoded_image(monkeypatch) -> None:
+    persisted: list[bytes] = []
+    monkeypatch.setattr(
+        "src.plugins.draw.image_api.schedule_persist_generated_draw",
+        lambda data, _g, _u: persisted.append(data),
+    )
+    matcher = MagicMock()
+    matcher.send = AsyncMock()
+    matcher.finish = AsyncMock()
+    ok = await reply_from_image_api_json(matcher, AsyncMock(), _big_body(_BIG_PNG), persist_draw=(1, 2))
+    assert ok is True
+    assert persisted == [_BIG_PNG]
+    seg = matcher.send.await_args.args[0]
+    assert seg.data["file"] == "base64://" + base64.b64encode(_BIG_PNG).decode()
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_queues_new_lease_until_release() -> None:
+    budget = DrawByteBudget(100)
+    entered = asyncio.Event()
+
+    async def second() -> None:
+        async with budget.lease():
+            entered.set()
+
+    async with budget.lease():
+        charge_draw_bytes("body", 150)
+        assert budget.used == 150
+        task = asyncio.create_task(second())
+        await asyncio.sleep(0)
+        assert not entered.is_set()
+    await asyncio.wait_for(entered.wait(), 1)
+    await task
+    assert budget.used == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_image_bytes_checks_header_and_cap() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/ok.png":
+            return httpx.Response(200, content=_BIG_PNG)
+        return httpx.Response(200, content=b"<html>blocked</html>")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        assert await stream_image_bytes(client, "http://x/ok.png") == (200, _BIG_PNG)
+        assert await stream_image_bytes(client, "http://x/err") == (200, None)
+        assert await stream_image_bytes(client, "http://x/ok.png", max_bytes=1024) == (200, None)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from src.plugins.dream.payload import DriftBlobPool, DriftPayload
+from src.plugins.dream.scheduler import DreamTimerPool
+
+
+@pytest.mark.asyncio
+async def test_timer_pool_runs_many_groups_with_fixed_tasks() -> None:
+    runs: dict[int, int] = {}
+
+    async def handler(key: int) -> float | None:
+        runs[key] = runs.get(key, 0) + 1
+        return 0.0 if runs[key] < 3 else None
+
+    pool: DreamTimerPool[int] = DreamTimerPool(handler, workers=3)
+    try:
+        for key in range(200):
+            pool.schedule(key, 0.0)
+        assert pool.task_count == 4
+        for _ in range(200):
+            if len(pool) == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert runs == dict.fromkeys(range(200), 3)
+        assert pool.task_count == 4
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timer_pool_cancel_drops_timer_and_interrupts_run() -> None:
+    started = asyncio.Event()
+    calls: list[str] = []
+
+    async def handler(key: str) -> float | None:
+        calls.append(key)
+        if key == "slow":
+            started.set()
+            await asyncio.sleep(10)
+        return 0.0
+
+    pool: DreamTimerPool[str] = DreamTimerPool(handler, workers=1)
+    try:
+        pool.schedule("later", 10.0)
+        pool.schedule("slow", 0.0)
+        await asyncio.wait_for(started.wait(), 1.0)
+        await pool.cancel_and_wait("slow")
+        pool.cancel("later")
+        await asyncio.sleep(0.02)
+        assert len(pool) == 0
+        assert calls == ["slow"]
+    finally:
+        await pool.shutdown()
+
+
+def test_drift_blob_pool_shares_image_bytes_by_refcount() -> None:
+    pool = DriftBlobPool()
+    img = b"\x89PNG" + b"x" * 64
+    a = pool.hold(DriftPayload(nickname="甲", image_bytes=img))
+    b = pool.hold(DriftPayload(nickname="乙", image_bytes=bytes(img)))
+    t = pool.hold(DriftPayload(nickname="丙", text="hi"))
+
+    assert len(pool) == 1
+    assert a.image_key == b.image_key
+    assert t.image_key is None
+    pool.release(a)
+    assert pool.image(b) == img
+    pool.release(b)
+    pool.release(t)
+    assert len(pool) == 0
+    assert pool.image(b) is None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from src.platform.multi_bot.group_membership import clear_group_membership_index, replace_bot_groups
 from src.plugins.duel import duel_bots as mod
 from src.plugins.duel.duel_bots import list_group_online_bot_ids, parse_group_member_list_user_ids
 
@@ -37,7 +38,7 @@ def test_parse_member_list_empty_list() -> None:
 
 
 async def test_shard_empty_member_list_prefers_presence(monkeypatch) -> None:
-    mod.clear_group_online_bot_ids_cache()
+    clear_group_membership_index()
 
     class FakeCaller:
         async def get_group_member_list(self, *, group_id: int, no_cache: bool):
@@ -56,7 +57,7 @@ async def test_shard_empty_member_list_prefers_presence(monkeypatch) -> None:
 
 
 async def test_shard_empty_member_list_skips_fleet_probe(monkeypatch) -> None:
-    mod.clear_group_online_bot_ids_cache()
+    clear_group_membership_index()
     probe_calls: list[int] = []
 
     class FakeCaller:
@@ -81,8 +82,8 @@ async def test_shard_empty_member_list_skips_fleet_probe(monkeypatch) -> None:
     assert probe_calls == []
 
 
-async def test_list_group_online_bot_ids_uses_cache(monkeypatch) -> None:
-    mod.clear_group_online_bot_ids_cache()
+async def test_list_group_online_bot_ids_uses_membership_index(monkeypatch) -> None:
+    clear_group_membership_index()
     list_calls: list[int] = []
 
     class FakeCaller:
@@ -93,17 +94,24 @@ async def test_list_group_online_bot_ids_uses_cache(monkeypatch) -> None:
     monkeypatch.setattr("src.platform.shard.context.is_sharding_active", lambda: True)
     monkeypatch.setattr("src.platform.multi_bot.fleet.get_catalog_bot_ids", lambda: frozenset({111, 222, 333}))
     monkeypatch.setattr("src.platform.shard.presence.pick_local_query_bot", lambda: FakeCaller())
+    monkeypatch.setattr("src.platform.shard.presence.get_cluster_online_bot_ids", lambda: frozenset({111, 222, 333}))
+    monkeypatch.setattr("src.platform.multi_bot.group_membership._share_change_sync", lambda *_a: True)
 
-    first = await list_group_online_bot_ids(626266904)
-    second = await list_group_online_bot_ids(626266904)
+    # 还有在线牛未建索引：回退 member API
+    assert await list_group_online_bot_ids(626266904) == [111, 222]
+    assert list_calls == [626266904]
 
-    assert first == [111, 222]
-    assert second == [111, 222]
+    await replace_bot_groups(111, [626266904])
+    await replace_bot_groups(222, [626266904, 1])
+    await replace_bot_groups(333, [1])
+    assert await list_group_online_bot_ids(626266904) == [111, 222]
+    assert await list_group_online_bot_ids(1) == [222, 333]
     assert list_calls == [626266904]
+    clear_group_membership_index()
 
 
 async def test_unified_group_online_bot_ids(monkeypatch) -> None:
-    mod.clear_group_online_bot_ids_cache()
+    clear_group_membership_index()
 
     class FakeBot:
         def __init__(self, qq: int) -> None:
@@ -1,6 +1,6 @@
 import importlib
 
-from src.plugins.help import pillowmd_bold as bold_mod
+from src.shared.utils import pillowmd_bold as bold_mod
 
 custom_markdown_renderer = importlib.import_module("pillowmd.CustomMarkdownRenderer")
 
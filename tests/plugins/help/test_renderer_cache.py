@@ -1,23 +1,118 @@
 from __future__ import annotations
 
+import asyncio
+import os
+
+import pytest
+
 from src.plugins.help import renderer
 
 
-def test_save_image_to_cache_prunes_old_pngs(tmp_path, monkeypatch):
+@pytest.fixture
+def render_store(tmp_path, monkeypatch):
     monkeypatch.setattr(renderer, "plugin_data_dir", lambda _name: tmp_path)
     monkeypatch.setattr(renderer, "_help_image_cache_suffix", lambda: "fixed-a")
-    monkeypatch.setattr(renderer, "_HELP_CACHE_FILES_PER_DIR_MAX", 2, raising=False)
+    renderer._render_mem.clear()
+    monkeypatch.setattr(renderer, "_render_mem_bytes", 0)
+    for k in renderer._RENDER_COUNTERS:
+        monkeypatch.setitem(renderer._render_stats, k, 0)
+    return tmp_path / "rendered"
+
+
+def test_cache_path_is_content_addressed(render_store):
+    a = renderer.get_cache_path("markdown", "style")
+    b = renderer.get_cache_path("markdown", "style")
+    c = renderer.get_cache_path("markdown", "other")
+    assert a == b
+    assert a != c
+    assert a.parent.parent == render_store
+    assert a.parent.name == a.stem[:2]
+
+
+def test_prune_help_render_store_keeps_newest(render_store):
+    for i in range(4):
+        renderer.save_image_to_cache(f"img-{i}".encode(), f"markdown-{i}", "style")
+        path = renderer.get_cache_path(f"markdown-{i}", "style")
+        os.utime(path, ns=(i * 1_000_000_000, i * 1_000_000_000))
+
+    removed = renderer.prune_help_render_store(keep=2)
+
+    assert removed == 2
+    assert renderer.load_cached_image("markdown-0", "style") is None
+    assert renderer.load_cached_image("markdown-1", "style") is None
+    assert renderer.load_cached_image("markdown-3", "style") == b"img-3"
+
+
+async def test_render_markdown_to_image_dedups_and_serves_from_memory(render_store, monkeypatch):
+    calls: list[str] = []
+
+    async def fake_render(markdown_content, style_name, available_styles):
+        calls.append(markdown_content)
+        return b"png:" + markdown_content.encode()
+
+    monkeypatch.setattr(renderer, "_render_off_loop", fake_render)
+
+    first, second = await asyncio.gather(
+        renderer.render_markdown_to_image("page", "style", {}),
+        renderer.render_markdown_to_image("page", "style", {}),
+    )
+    third = await renderer.render_markdown_to_image("page", "style", {})
+
+    assert first == second == third == b"png:page"
+    assert calls == ["page"]
+    assert renderer.load_cached_image("page", "style") == b"png:page"
+    snap = renderer.help_render_metrics_snapshot()
+    assert snap["mem_hits"] == 2
+    assert snap["mem_entries"] == 1
+
+
+async def test_render_markdown_to_image_reads_disk_store(render_store, monkeypatch):
+    renderer.save_image_to_cache(b"on-disk", "page", "style")
+
+    async def fail_render(*_args):
+        raise AssertionError("should not render")
+
+    monkeypatch.setattr(renderer, "_render_off_loop", fail_render)
+
+    assert await renderer.render_markdown_to_image("page", "style", {}) == b"on-disk"
+    assert renderer.help_render_metrics_snapshot()["disk_hits"] == 1
+
+
+async def test_render_off_loop_rebuilds_broken_pool(render_store, monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    pools: list[object] = []
+    shutdowns: list[int] = []
+
+    def fake_pool(_styles):
+        if len(pools) == len(shutdowns):
+            pools.append(object())
+        return pools[-1]
+
+    async def fake_in_pool(pool, markdown_content, _style_name):
+        if pool is pools[0]:
+            raise BrokenProcessPool("worker died")
+        return b"png:" + markdown_content.encode()
+
+    monkeypatch.setattr(renderer, "_get_render_pool", fake_pool)
+    monkeypatch.setattr(renderer, "_render_in_pool", fake_in_pool)
+    monkeypatch.setattr(renderer, "shutdown_help_render_pool", lambda: shutdowns.append(1))
+
+    assert await renderer._render_off_loop("page", "style", {}) == b"png:page"
+    assert len(pools) == 2
+    assert renderer.help_render_metrics_snapshot()["pool_rebuilds"] == 1
 
-    cache_dir = tmp_path / "42"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    old_a = cache_dir / "old-a.png"
-    old_b = cache_dir / "old-b.png"
-    old_a.write_bytes(b"old-a")
-    old_b.write_bytes(b"old-b")
 
-    renderer.save_image_to_cache(b"new", "markdown", "style", group_id=42)
+def test_remove_legacy_help_cache_dirs_keeps_non_png(render_store, tmp_path, monkeypatch):
+    monkeypatch.setattr(renderer, "_legacy_dirs_cleaned", False)
+    (tmp_path / "123").mkdir()
+    (tmp_path / "123" / "a.png").write_bytes(b"x")
+    (tmp_path / "private").mkdir()
+    (tmp_path / "private" / "b.png").write_bytes(b"x")
+    (tmp_path / "456").mkdir()
+    (tmp_path / "456" / "notes.txt").write_text("keep")
 
-    pngs = sorted(p.name for p in cache_dir.glob("*.png"))
-    assert len(pngs) == 2
-    assert "old-a.png" not in pngs
-    assert "old-b.png" in pngs
+    assert renderer.remove_legacy_help_cache_dirs() == 2
+    assert not (tmp_path / "123").exists()
+    assert not (tmp_path / "private").exists()
+    assert (tmp_path / "456" / "notes.txt").exists()
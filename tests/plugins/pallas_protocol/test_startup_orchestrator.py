@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.plugins.pallas_protocol import docker_cli, service
+from src.plugins.pallas_protocol.service import PallasProtocolService
+
+
+class _Backend:
+    def __init__(self, prepared: list[str]) -> None:
+        self.prepared = prepared
+
+    def apply_defaults(self, account, _resolve_qq) -> None:
+        self.prepared.append(account["id"])
+
+
+def _service(accounts: list[dict], concurrency: int) -> PallasProtocolService:
+    svc = PallasProtocolService.__new__(PallasProtocolService)
+    svc._accounts = {a["id"]: a for a in accounts}
+    svc._config = SimpleNamespace(pallas_protocol_startup_concurrency=concurrency)
+    svc._startup_timings = {}
+    svc._resolve_qq = lambda _a: ""
+    svc.saved = 0
+    svc.prepared = []
+    svc._protocol_runtime_backend = lambda _a=None, **_k: _Backend(svc.prepared)
+    svc._save_accounts = lambda: setattr(svc, "saved", svc.saved + 1)
+    svc._linux_docker_container_name = lambda a: f"pallas-proto-{a['id']}"
+    svc.is_running = lambda _aid: False
+    return svc
+
+
+def test_running_names_from_ps_ignores_blank_lines() -> None:
+    assert docker_cli._running_names_from_ps("pallas-proto-1\n\n pallas-proto-sl-2 \n") == {
+        "pallas-proto-1",
+        "pallas-proto-sl-2",
+    }
+
+
+@pytest.mark.asyncio
+async def test_start_all_enabled_accounts_bounded_parallel(monkeypatch) -> None:
+    accounts = [
+        {"id": "a", "napcat_linux_docker": True},
+        {"id": "b", "napcat_linux_docker": True},
+        {"id": "c"},
+        {"id": "d"},
+        {"id": "e", "enabled": False},
+    ]
+    svc = _service(accounts, concurrency=2)
+    ps_calls: list[str] = []
+
+    async def fake_ps(label: str = "pallas.protocol"):
+        ps_calls.append(label)
+        return {"pallas-proto-a"}
+
+    monkeypatch.setattr(service, "docker_running_names_by_label_async", fake_ps)
+    active = 0
+    peak = 0
+    started: list[str] = []
+    follow: list[str] = []
+
+    async def fake_start(account_id: str) -> dict:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if account_id == "d":
+            raise ValueError("command 不能为空")
+        started.append(account_id)
+        return {}
+
+    async def fake_follow(account_id: str) -> None:
+        follow.append(account_id)
+
+    svc.start_account = fake_start
+    svc.ensure_docker_logs_if_needed = fake_follow
+
+    await svc.start_all_enabled_accounts()
+
+    assert svc.prepared == ["a", "b", "c", "d"]
+    assert svc.saved == 1
+    assert ps_calls == ["pallas.protocol"]
+    assert follow == ["a"]
+    assert sorted(started) == ["b", "c"]
+    assert peak == 2
+    timings = svc._startup_timings
+    assert timings["a"]["action"] == "already_running"
+    assert timings["b"]["action"] == "started"
+    assert timings["d"]["action"] == "failed"
+    assert timings["d"]["error"] == "command 不能为空"
+    assert "e" not in timings
+
+
+@pytest.mark.asyncio
+async def test_list_accounts_async_probes_docker_once_off_loop(monkeypatch) -> None:
+    svc = _service([{"id": "a", "napcat_linux_docker": True}, {"id": "b", "snowluma_linux_docker": True}], 1)
+    ps_calls = 0
+
+    async def fake_ps(label: str = "pallas.protocol"):
+        nonlocal ps_calls
+        ps_calls += 1
+        return {"pallas-proto-b"}
+
+    def blocking_probe(_account):
+        raise AssertionError("blocking docker probe on the event loop")
+
+    monkeypatch.setattr(service, "docker_running_names_by_label_async", fake_ps)
+    svc._linux_docker_container_running_sync = blocking_probe
+    svc._compose_account_state = lambda aid, acc, brief=False, running_names=None: {
+        "id": aid,
+        "running": svc._linux_docker_container_name(acc) in running_names,
+    }
+
+    assert await svc.list_accounts_async() == [{"id": "a", "running": False}, {"id": "b", "running": True}]
+    assert ps_calls == 1
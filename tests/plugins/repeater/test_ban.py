@@ -21,7 +21,7 @@ async def test_ban_correct_keywords():
     group_id = 12345
     bot_id = 67890
 
-    Chat._reply_dict[group_id][bot_id] = [
+    Chat._reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "hello1",
@@ -43,7 +43,7 @@ async def test_ban_correct_keywords():
             "reply": "hi there 3",
             "reply_keywords": "hi_there_3",
         },
-    ]
+    ])
 
     ban_raw_message = "hi there 2"
     expected_keywords = "hi_there_2"
@@ -78,7 +78,7 @@ async def test_ban_latest():
     group_id = 22222
     bot_id = 33333
 
-    Chat._reply_dict[group_id][bot_id] = [
+    Chat._reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "msg1",
@@ -100,7 +100,7 @@ async def test_ban_latest():
             "reply": "reply3",
             "reply_keywords": "keywords3",
         },
-    ]
+    ])
 
     ban_raw_message = ""
 
@@ -131,7 +131,7 @@ async def test_ban_no_match():
     group_id = 44444
     bot_id = 55555
 
-    Chat._reply_dict[group_id][bot_id] = [
+    Chat._reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "msg",
@@ -139,7 +139,7 @@ async def test_ban_no_match():
             "reply": "reply",
             "reply_keywords": "keywords",
         },
-    ]
+    ])
 
     try:
         # Try to ban a non-existent message
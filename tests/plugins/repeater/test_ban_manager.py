@@ -3,11 +3,12 @@
 This test file focuses on testing the BanManager class methods independently.
 """
 
-from collections import defaultdict
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.plugins.repeater.reply_buffer import ReplyBook
+
 
 @pytest.mark.asyncio
 async def test_ban_with_reply_dict():
@@ -19,8 +20,8 @@ async def test_ban_with_reply_dict():
 
     group_id = 10001
     bot_id = 20001
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_dict[group_id][bot_id] = [
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "test input",
@@ -28,7 +29,7 @@ async def test_ban_with_reply_dict():
             "reply": "test output",
             "reply_keywords": "test_output_key",
         }
-    ]
+    ])
 
     BanManager._blacklist_answer.clear()
     BanManager._blacklist_answer_reserve.clear()
@@ -173,8 +174,8 @@ async def test_ban_second_offense():
 
     group_id = 10004
     bot_id = 20004
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_dict[group_id][bot_id] = [
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "test",
@@ -182,7 +183,7 @@ async def test_ban_second_offense():
             "reply": "bad_reply",
             "reply_keywords": "bad_keywords",
         }
-    ]
+    ])
 
     # Clean state
     BanManager._blacklist_answer.clear()
@@ -198,13 +199,15 @@ async def test_ban_second_offense():
         assert "bad_keywords" in BanManager._blacklist_answer_reserve[group_id]
         assert "bad_keywords" not in BanManager._blacklist_answer[group_id]
 
-        reply_dict[group_id][bot_id].append({
-            "time": 200,
-            "pre_raw_message": "test2",
-            "pre_keywords": "test_key2",
-            "reply": "bad_reply_again",
-            "reply_keywords": "bad_keywords",  # same keywords
-        })
+        reply_dict[group_id][bot_id].extend([
+            {
+                "time": 200,
+                "pre_raw_message": "test2",
+                "pre_keywords": "test_key2",
+                "reply": "bad_reply_again",
+                "reply_keywords": "bad_keywords",  # same keywords
+            }
+        ])
 
         with patch(
             "src.plugins.repeater.ban_manager.context_repo.append_ban",
@@ -225,7 +228,7 @@ async def test_ban_falls_back_when_reply_cache_missing():
 
     group_id = 733291779
     bot_id = 2927116873
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
 
     BanManager._blacklist_answer.clear()
     BanManager._blacklist_answer_reserve.clear()
@@ -235,12 +238,7 @@ async def test_ban_falls_back_when_reply_cache_missing():
             patch.object(
                 BanManager,
                 "find_ban_reply_fallback",
-                new=AsyncMock(
-                    return_value={
-                        "pre_keywords": "leave_notice_pre_kw",
-                        "reply_keywords": "leave_notice_reply_kw",
-                    }
-                ),
+                new=AsyncMock(return_value=("leave_notice_pre_kw", "leave_notice_reply_kw")),
             ) as mock_fallback,
             patch(
                 "src.plugins.repeater.ban_manager.context_repo.append_ban",
@@ -65,7 +65,7 @@ async def test_build_repeater_event_context_bypasses_command_before_message_trac
 async def test_build_repeater_event_context_non_sharding_claims_once(monkeypatch):
     from src.plugins.repeater import event_gate
 
-    event = _FakeEvent(raw_message="[CQ:image,file=x,subType=1]", plain_text="hello")
+    event = _FakeEvent(raw_message="[CQ:image,file=x.image,subType=1]", plain_text="hello")
     calls: list[str] = []
 
     async def fake_true(*_args, **_kwargs) -> bool:
@@ -89,7 +89,6 @@ async def test_build_repeater_event_context_non_sharding_claims_once(monkeypatch
         lambda **_: False,
     )
     monkeypatch.setattr(event_gate, "remember_group_message_id", fake_true)
-    monkeypatch.setattr(event_gate, "normalize_group_raw_message", lambda raw: f"norm:{raw}")
     monkeypatch.setattr(event_gate, "should_skip_duplicate_group_event", fake_false)
     monkeypatch.setattr(event_gate, "federate_ingress_cached_win", lambda *_args, **_kwargs: True)
     monkeypatch.setattr(event_gate, "claim_federate_group_message_ingress", fake_true)
@@ -102,7 +101,7 @@ async def test_build_repeater_event_context_non_sharding_claims_once(monkeypatch
 
     assert result == SimpleNamespace(
         plain_body="hello",
-        norm_raw="norm:[CQ:image,file=x,subType=1]",
+        norm_raw="[CQ:image,file=x.image]",
         sharding_active=False,
     )
     assert calls == ["once"]
@@ -136,7 +135,6 @@ async def test_build_repeater_event_context_sharded_without_fanout_uses_cross_bo
         lambda **_: False,
     )
     monkeypatch.setattr(event_gate, "remember_group_message_id", fake_true)
-    monkeypatch.setattr(event_gate, "normalize_group_raw_message", lambda raw: raw)
     monkeypatch.setattr(event_gate, "should_skip_duplicate_group_event", fake_false)
     monkeypatch.setattr(event_gate, "federate_ingress_cached_win", lambda *_args, **_kwargs: True)
     monkeypatch.setattr(event_gate, "claim_federate_group_message_ingress", fake_true)
@@ -171,7 +169,6 @@ async def test_build_repeater_event_context_records_sharded_cross_bot_claim_loss
         lambda **_: False,
     )
     monkeypatch.setattr(event_gate, "remember_group_message_id", fake_true)
-    monkeypatch.setattr(event_gate, "normalize_group_raw_message", lambda raw: raw)
     monkeypatch.setattr(event_gate, "should_skip_duplicate_group_event", fake_false)
     monkeypatch.setattr(event_gate, "federate_ingress_cached_win", lambda *_args, **_kwargs: True)
     monkeypatch.setattr(event_gate, "claim_federate_group_message_ingress", fake_true)
@@ -207,7 +204,6 @@ async def test_build_repeater_event_context_keeps_sharded_single_char_plaintext(
         lambda **_: False,
     )
     monkeypatch.setattr(event_gate, "remember_group_message_id", fake_true)
-    monkeypatch.setattr(event_gate, "normalize_group_raw_message", lambda raw: raw)
     monkeypatch.setattr(event_gate, "should_skip_duplicate_group_event", fake_false)
     monkeypatch.setattr(event_gate, "federate_ingress_cached_win", lambda *_args, **_kwargs: True)
     monkeypatch.setattr(event_gate, "claim_federate_group_message_ingress", fake_true)
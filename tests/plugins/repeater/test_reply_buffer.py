@@ -0,0 +1,33 @@
+from src.plugins.repeater.reply_buffer import ReplyBook, ReplyRecord
+
+
+def _rec(idx: int, reply: str) -> ReplyRecord:
+    return ReplyRecord(
+        time=idx, pre_raw_message=f"p{idx}", pre_keywords=f"pk{idx}", reply=reply, reply_keywords=f"rk{idx}"
+    )
+
+
+def test_ring_evicts_oldest_and_keeps_reply_index_consistent():
+    book = ReplyBook(3)
+    ring = book[1][2]
+    for idx, reply in enumerate(["a", "b", "a", "c"]):
+        ring.append(_rec(idx, reply))
+
+    assert [r.reply for r in ring] == ["b", "a", "c"]
+    assert ring.find_reply("a").time == 2
+    assert [r.reply for r in ring.tail(2)] == ["a", "c"]
+    assert ring.last().reply == "c"
+
+    ring.append(_rec(4, "d"))
+    assert ring.find_reply("b") is None
+
+
+def test_replace_reply_moves_index_to_new_text():
+    ring = ReplyBook(10)[1][2]
+    ring.extend([_rec(0, "x").as_dict(), _rec(1, "x").as_dict()])
+
+    ring.replace_reply(ring.find_reply("x"), "y")
+
+    assert ring.find_reply("y").time == 1
+    # 同文本的更早一条接替索引
+    assert ring.find_reply("x").time == 0
@@ -15,7 +15,7 @@ async def test_reply_post_proc_replaces_match():
     group_id = 11111
     bot_id = 22222
 
-    Chat._reply_dict[group_id][bot_id] = [
+    Chat._reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "ctx1",
@@ -37,7 +37,7 @@ async def test_reply_post_proc_replaces_match():
             "reply": "old_reply_3",
             "reply_keywords": "rk3",
         },
-    ]
+    ])
 
     try:
         result = await Chat.reply_post_proc(
@@ -49,10 +49,10 @@ async def test_reply_post_proc_replaces_match():
 
         assert result is True
         # The second entry should have been replaced
-        assert Chat._reply_dict[group_id][bot_id][1]["reply"] == "replaced_reply"
+        assert Chat._reply_dict[group_id][bot_id][1].reply == "replaced_reply"
         # Others untouched
-        assert Chat._reply_dict[group_id][bot_id][0]["reply"] == "old_reply_1"
-        assert Chat._reply_dict[group_id][bot_id][2]["reply"] == "old_reply_3"
+        assert Chat._reply_dict[group_id][bot_id][0].reply == "old_reply_1"
+        assert Chat._reply_dict[group_id][bot_id][2].reply == "old_reply_3"
     finally:
         if group_id in Chat._reply_dict and bot_id in Chat._reply_dict[group_id]:
             del Chat._reply_dict[group_id][bot_id]
@@ -66,7 +66,7 @@ async def test_reply_post_proc_no_match():
     group_id = 33333
     bot_id = 44444
 
-    Chat._reply_dict[group_id][bot_id] = [
+    Chat._reply_dict[group_id][bot_id].extend([
         {
             "time": 100,
             "pre_raw_message": "ctx",
@@ -74,7 +74,7 @@ async def test_reply_post_proc_no_match():
             "reply": "some_reply",
             "reply_keywords": "rk",
         },
-    ]
+    ])
 
     try:
         result = await Chat.reply_post_proc(
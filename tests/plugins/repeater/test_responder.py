@@ -1,4 +1,3 @@
-import asyncio
 from collections import defaultdict, deque
 from types import SimpleNamespace
 from typing import Any, cast
@@ -6,6 +5,8 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from src.plugins.repeater.reply_buffer import ReplyBook
+
 
 class _Config:
     def __init__(self, value: int):
@@ -33,8 +34,8 @@ async def test_context_find_repeat_detection():
         is_image=False,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_dict[group_id][bot_id] = [{"reply": "other", "reply_keywords": "other"}]
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][bot_id].extend([{"reply": "other", "reply_keywords": "other"}])
     message_dict = defaultdict(list)
     human = 90001
     message_dict[group_id] = [
@@ -46,7 +47,7 @@ async def test_context_find_repeat_detection():
 
     try:
         with (
-            patch("src.plugins.repeater.responder.get_bots", return_value={}),
+            patch("src.platform.multi_bot.fleet.get_catalog_bot_ids", return_value=frozenset()),
             patch(
                 "src.plugins.repeater.responder.context_repo.find_by_keywords", new_callable=AsyncMock
             ) as mock_find_one,
@@ -88,8 +89,8 @@ async def test_context_find_repeat_not_triggered_when_tail_is_only_bots():
         is_plain_text=True,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_dict[group_id][bot_id] = [{"reply": "other", "reply_keywords": "other"}]
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][bot_id].extend([{"reply": "other", "reply_keywords": "other"}])
     human = 90002
     message_dict = defaultdict(list)
     message_dict[group_id] = [
@@ -102,7 +103,10 @@ async def test_context_find_repeat_not_triggered_when_tail_is_only_bots():
 
     try:
         with (
-            patch("src.plugins.repeater.responder.get_bots", return_value={"b1": fake_bot}),
+            patch(
+                "src.platform.multi_bot.fleet.get_catalog_bot_ids",
+                return_value=frozenset({int(fake_bot.self_id)}),
+            ),
             patch(
                 "src.plugins.repeater.responder.context_repo.find_by_keywords_for_reply",
                 new_callable=AsyncMock,
@@ -148,8 +152,8 @@ async def test_context_find_repeat_skips_repeat_ignore_user_ids_config():
         is_plain_text=True,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_dict[group_id][bot_id] = [{"reply": "other", "reply_keywords": "other"}]
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][bot_id].extend([{"reply": "other", "reply_keywords": "other"}])
     human = 90003
     message_dict = defaultdict(list)
     message_dict[group_id] = [
@@ -162,7 +166,7 @@ async def test_context_find_repeat_skips_repeat_ignore_user_ids_config():
     try:
         with (
             patch.object(responder_mod.plugin_config, "repeat_ignore_user_ids", [external_bot]),
-            patch("src.plugins.repeater.responder.get_bots", return_value={}),
+            patch("src.platform.multi_bot.fleet.get_catalog_bot_ids", return_value=frozenset()),
             patch(
                 "src.plugins.repeater.responder.context_repo.find_by_keywords_for_reply",
                 new_callable=AsyncMock,
@@ -201,7 +205,7 @@ async def test_context_find_returns_none_no_context():
         is_image=False,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
     message_dict = defaultdict(list)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
 
@@ -242,7 +246,7 @@ async def test_context_find_skips_repo_lookup_when_keywords_empty():
         is_image=False,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
     message_dict = defaultdict(list)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
 
@@ -285,7 +289,7 @@ async def test_context_find_skips_repo_lookup_for_long_non_plain_raw_keywords():
         is_plain_text=False,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
     message_dict = defaultdict(list)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
 
@@ -328,7 +332,7 @@ async def test_context_find_skips_repo_lookup_for_short_plain_text_noise():
         is_plain_text=True,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
     message_dict = defaultdict(list)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
 
@@ -371,7 +375,7 @@ async def test_context_find_keeps_to_me_short_plain_text_lookup():
         is_plain_text=True,
     )
     config = _Config(0)
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
     message_dict = defaultdict(list)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
 
@@ -421,7 +425,7 @@ async def test_context_find_threshold_filtering():
     context = Context.model_construct(
         keywords="ctx_kw", time=1, trigger_count=1, answers=[low_answer, high_answer], ban=[], clear_time=0
     )
-    reply_dict = defaultdict(lambda: defaultdict(list))
+    reply_dict = ReplyBook(100)
     message_dict = defaultdict(list)
     message_dict[group_id] = []
     recent_topics = defaultdict(lambda: deque(maxlen=16))
@@ -464,9 +468,8 @@ async def test_reply_post_proc_via_responder():
 
     group_id = 555
     bot_id = 666
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_lock = asyncio.Lock()
-    reply_dict[group_id][bot_id] = [
+    reply_dict = ReplyBook(100)
+    reply_dict[group_id][bot_id].extend([
         {
             "time": 1,
             "pre_raw_message": "a",
@@ -474,11 +477,11 @@ async def test_reply_post_proc_via_responder():
             "reply": "old",
             "reply_keywords": "a",
         }
-    ]
+    ])
 
     try:
-        ok = await Responder.reply_post_proc("old", "new", bot_id, group_id, reply_dict, reply_lock)
+        ok = await Responder.reply_post_proc("old", "new", bot_id, group_id, reply_dict)
         assert ok is True
-        assert reply_dict[group_id][bot_id][0]["reply"] == "new"
+        assert reply_dict[group_id][bot_id][0].reply == "new"
     finally:
         reply_dict.clear()
@@ -4,6 +4,8 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from src.plugins.repeater.reply_buffer import ReplyBook
+
 
 def _build_message(group_id: int, user_id: int, raw_message: str, keywords: str, time_value: int):
     from src.foundation.db import Message as MessageModel
@@ -28,18 +30,17 @@ async def test_speak_returns_none_when_no_group_has_enough_messages(beanie_fixtu
     MessageStore._message_dict = defaultdict(list)
     Speaker._recent_speak = defaultdict(lambda: deque(maxlen=Speaker.DUPLICATE_REPLY))
 
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_lock = asyncio.Lock()
+    reply_dict = ReplyBook(100)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
     topics_lock = asyncio.Lock()
 
     group_id = 30001
     MessageStore._message_dict[group_id] = [_build_message(group_id, 20001, f"m{i}", f"k{i}", i + 1) for i in range(9)]
-    reply_dict[group_id][10001] = [{"time": 1, "reply": "x", "reply_keywords": "x"}]
+    reply_dict[group_id][10001].extend([{"time": 1, "reply": "x", "reply_keywords": "x"}])
 
     try:
         with patch("src.plugins.repeater.speaker.time.time", return_value=10000):
-            result = await Speaker.speak(reply_dict, reply_lock, recent_topics, topics_lock)
+            result = await Speaker.speak(reply_dict, recent_topics, topics_lock)
             assert result is None
     finally:
         MessageStore._message_dict.clear()
@@ -55,8 +56,7 @@ async def test_speak_filters_banned_keywords(beanie_fixture):
     MessageStore._message_dict = defaultdict(list)
     Speaker._recent_speak = defaultdict(lambda: deque(maxlen=Speaker.DUPLICATE_REPLY))
 
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_lock = asyncio.Lock()
+    reply_dict = ReplyBook(100)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
     topics_lock = asyncio.Lock()
 
@@ -69,7 +69,7 @@ async def test_speak_filters_banned_keywords(beanie_fixture):
     ])
     MessageStore._message_dict[group_id] = msg_list
 
-    reply_dict[group_id][bot_id] = [{"time": 1, "reply": "x", "reply_keywords": "x"}]
+    reply_dict[group_id][bot_id].extend([{"time": 1, "reply": "x", "reply_keywords": "x"}])
 
     allowed_msg = msg_list[-1]
     try:
@@ -87,7 +87,7 @@ async def test_speak_filters_banned_keywords(beanie_fixture):
             ),
             patch("src.plugins.repeater.speaker.BotConfig.taken_name", new_callable=AsyncMock, return_value=-1),
         ):
-            result = await Speaker.speak(reply_dict, reply_lock, recent_topics, topics_lock)
+            result = await Speaker.speak(reply_dict, recent_topics, topics_lock)
             assert result is not None
             _, _, speak_list, _ = result
             assert str(speak_list[0]) == "allowed-content"
@@ -105,8 +105,7 @@ async def test_speak_skips_remote_bot_when_sharded(beanie_fixture):
     MessageStore._message_dict = defaultdict(list)
     Speaker._recent_speak = defaultdict(lambda: deque(maxlen=Speaker.DUPLICATE_REPLY))
 
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_lock = asyncio.Lock()
+    reply_dict = ReplyBook(100)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
     topics_lock = asyncio.Lock()
 
@@ -115,8 +114,8 @@ async def test_speak_skips_remote_bot_when_sharded(beanie_fixture):
     remote_bot_id = 10002
     msg_list = [_build_message(group_id, 20001 + i, f"warmup-{i}", f"warmup-{i}", i + 1) for i in range(10)]
     MessageStore._message_dict[group_id] = msg_list
-    reply_dict[group_id][remote_bot_id] = [{"time": 1, "reply": "x", "reply_keywords": "x"}]
-    reply_dict[group_id][local_bot_id] = [{"time": 1, "reply": "y", "reply_keywords": "y"}]
+    reply_dict[group_id][remote_bot_id].extend([{"time": 1, "reply": "x", "reply_keywords": "x"}])
+    reply_dict[group_id][local_bot_id].extend([{"time": 1, "reply": "y", "reply_keywords": "y"}])
 
     chosen_msg = msg_list[-1]
     try:
@@ -137,7 +136,7 @@ async def test_speak_skips_remote_bot_when_sharded(beanie_fixture):
             patch("src.plugins.repeater.speaker.BotConfig.taken_name", new_callable=AsyncMock, return_value=-1),
             patch("src.plugins.repeater.reply_record_sync.publish_reply_record"),
         ):
-            result = await Speaker.speak(reply_dict, reply_lock, recent_topics, topics_lock)
+            result = await Speaker.speak(reply_dict, recent_topics, topics_lock)
             assert result is not None
             assert result[0] == local_bot_id
     finally:
@@ -154,8 +153,7 @@ async def test_speak_recent_dedup_avoids_same_message_twice(beanie_fixture):
     MessageStore._message_dict = defaultdict(list)
     Speaker._recent_speak = defaultdict(lambda: deque(maxlen=Speaker.DUPLICATE_REPLY))
 
-    reply_dict = defaultdict(lambda: defaultdict(list))
-    reply_lock = asyncio.Lock()
+    reply_dict = ReplyBook(100)
     recent_topics = defaultdict(lambda: deque(maxlen=16))
     topics_lock = asyncio.Lock()
 
@@ -168,7 +166,7 @@ async def test_speak_recent_dedup_avoids_same_message_twice(beanie_fixture):
     ])
     MessageStore._message_dict[group_id] = msg_list
 
-    reply_dict[group_id][bot_id] = [{"time": 1, "reply": "x", "reply_keywords": "x"}]
+    reply_dict[group_id][bot_id].extend([{"time": 1, "reply": "x", "reply_keywords": "x"}])
 
     dup_a_msg = msg_list[-2]
     dup_b_msg = msg_list[-1]
@@ -187,7 +185,7 @@ async def test_speak_recent_dedup_avoids_same_message_twice(beanie_fixture):
             ),
             patch("src.plugins.repeater.speaker.BotConfig.taken_name", new_callable=AsyncMock, return_value=-1),
         ):
-            first = await Speaker.speak(reply_dict, reply_lock, recent_topics, topics_lock)
+            first = await Speaker.speak(reply_dict, recent_topics, topics_lock)
             assert first is not None
             assert str(first[2][0]) == "dup-a"
 
@@ -208,7 +206,7 @@ async def test_speak_recent_dedup_avoids_same_message_twice(beanie_fixture):
             ),
             patch("src.plugins.repeater.speaker.BotConfig.taken_name", new_callable=AsyncMock, return_value=-1),
         ):
-            second = await Speaker.speak(reply_dict, reply_lock, recent_topics, topics_lock)
+            second = await Speaker.speak(reply_dict, recent_topics, topics_lock)
             assert second is not None
             assert str(second[2][0]) == "dup-b"
     finally:
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict, deque
+
+import pytest
+
+
+@pytest.fixture
+def fresh_state(monkeypatch, tmp_path):
+    from src.features.corpus import find_cache
+    from src.plugins.repeater import context_exists_cache, warm_snapshot
+    from src.plugins.repeater.message_store import MessageStore
+    from src.plugins.repeater.model import Chat
+    from src.plugins.repeater.reply_buffer import ReplyBook
+    from src.plugins.repeater.speaker import Speaker
+
+    def reset() -> None:
+        monkeypatch.setattr(MessageStore, "_message_dict", defaultdict(list))
+        monkeypatch.setattr(MessageStore, "_message_lock", asyncio.Lock())
+        monkeypatch.setattr(MessageStore, "_late_save_time", 0)
+        monkeypatch.setattr(Chat, "_recent_topics", defaultdict(lambda: deque(maxlen=Chat.TOPICS_SIZE)))
+        monkeypatch.setattr(Chat, "_reply_dict", ReplyBook(Chat.SAVE_RESERVED_SIZE))
+        monkeypatch.setattr(Speaker, "_recent_speak", defaultdict(lambda: deque(maxlen=Chat.DUPLICATE_REPLY)))
+        monkeypatch.setattr(context_exists_cache, "_exists_cache", {})
+        monkeypatch.setattr(find_cache, "_find_cache", {})
+        monkeypatch.setattr(find_cache, "_reply_find_cache", {})
+
+    monkeypatch.setattr(warm_snapshot, "warm_snapshot_path", lambda: tmp_path / "snap.bin")
+    reset()
+    return reset
+
+
+def _populate(now: int) -> None:
+    from src.features.corpus import find_cache
+    from src.foundation.db import Message as MessageModel
+    from src.foundation.db.modules import Answer, Context
+    from src.plugins.repeater import context_exists_cache
+    from src.plugins.repeater.message_store import MessageStore
+    from src.plugins.repeater.model import Chat
+    from src.plugins.repeater.reply_buffer import ReplyRecord
+    from src.plugins.repeater.speaker import Speaker
+
+    for t in (now - 20, now - 10):
+        MessageStore._message_dict[100].append(
+            MessageModel.model_construct(
+                group_id=100,
+                user_id=1,
+                bot_id=2,
+                raw_message=f"m{t}",
+                is_plain_text=True,
+                plain_text=f"m{t}",
+                keywords=f"k{t}",
+                time=t,
+            )
+        )
+    MessageStore._late_save_time = now - 15
+    Chat._recent_topics[100].extend(["牛牛", "复读"])
+    Chat._reply_dict[100][2].append(ReplyRecord(now, "pre", "pk", "reply", "rk"))
+    Speaker._recent_speak[100].append("说过的话")
+    mono = time.monotonic()
+    context_exists_cache._exists_cache["kw"] = (mono + 30, True)
+    context_exists_cache._exists_cache["gone"] = (mono - 1, True)
+    ctx = Context.model_construct(
+        keywords="kw",
+        time=now,
+        trigger_count=3,
+        answers=[Answer(keywords="ans", group_id=100, count=2, time=now, messages=["hi"])],
+        ban=[],
+        clear_time=0,
+    )
+    find_cache._reply_find_cache["kw"] = (mono + 30, ctx)
+    find_cache._find_cache["none"] = (mono + 30, None)
+
+
+async def test_snapshot_round_trip_restores_hot_state(fresh_state):
+    from src.features.corpus import find_cache
+    from src.plugins.repeater import context_exists_cache, warm_snapshot
+    from src.plugins.repeater.message_store import MessageStore
+    from src.plugins.repeater.model import Chat
+    from src.plugins.repeater.speaker import Speaker
+
+    now = int(time.time())
+    _populate(now)
+    assert await warm_snapshot.save_warm_snapshot(graceful=True) is not None
+
+    fresh_state()
+    counts = warm_snapshot.load_warm_snapshot()
+
+    assert counts is not None
+    assert counts["messages"] == 2
+    assert counts["context_exists"] == 1
+    assert [m.time for m in MessageStore._message_dict[100]] == [now - 20, now - 10]
+    # 正常退出的快照：未落库的那条仍留给下一轮 _sync
+    assert MessageStore._late_save_time == now - 15
+    assert list(Chat._recent_topics[100]) == ["牛牛", "复读"]
+    assert Chat._reply_dict[100][2].find_reply("reply").pre_keywords == "pk"
+    assert list(Speaker._recent_speak[100]) == ["说过的话"]
+    assert "gone" not in context_exists_cache._exists_cache
+    ctx = find_cache._reply_find_cache["kw"][1]
+    assert ctx.trigger_count == 3
+    assert ctx.answers[0].messages == ["hi"]
+    assert find_cache._find_cache["none"][1] is None
+    # 读后即删
+    assert warm_snapshot.load_warm_snapshot() is None
+
+
+def test_periodic_snapshot_treats_messages_as_synced(fresh_state):
+    from src.plugins.repeater import warm_snapshot
+    from src.plugins.repeater.message_store import MessageStore
+
+    now = int(time.time())
+    _populate(now)
+    state = warm_snapshot.capture_warm_state(graceful=False)
+    fresh_state()
+    warm_snapshot.apply_warm_state(state)
+
+    assert MessageStore._late_save_time == now - 10
+
+
+def test_stale_or_corrupt_snapshot_is_ignored(fresh_state, tmp_path):
+    from src.plugins.repeater import warm_snapshot
+    from src.plugins.repeater.message_store import MessageStore
+
+    _populate(int(time.time()))
+    state = warm_snapshot.capture_warm_state(graceful=True)
+    state["written_at"] -= 86400 * 2
+    fresh_state()
+    (tmp_path / "snap.bin").write_bytes(warm_snapshot.encode_snapshot(state))
+    assert warm_snapshot.load_warm_snapshot() is None
+    assert not MessageStore._message_dict
+
+    (tmp_path / "snap.bin").write_bytes(b"PWS\x01garbage")
+    assert warm_snapshot.load_warm_snapshot() is None
+    assert warm_snapshot.decode_snapshot(b"PWS\x09") is None
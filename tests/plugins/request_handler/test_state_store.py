@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.plugins.request_handler import state_store
+
+
+@pytest.fixture
+def store_dir(tmp_path: Path, monkeypatch):
+    state_store.close_state_store()
+    monkeypatch.setattr(state_store, "state_dir", lambda: tmp_path)
+    yield tmp_path
+    state_store.close_state_store()
+
+
+def test_pending_rows_are_namespaced_per_bot(store_dir: Path) -> None:
+    state_store.put_pending_friend("1001", "11", "f1")
+    state_store.put_pending_friend("1001", "12", "f2")
+    state_store.put_pending_friend("2002", "11", "other")
+    state_store.put_pending_group("1001", "555", {"flag": "g", "user_id": 11, "group_id": 555})
+
+    state_store.delete_pending_friends("1001", ["11", "12"])
+
+    assert state_store.pending_friends("1001") == {}
+    assert state_store.pending_friend_flag("2002", "11") == "other"
+    assert state_store.pending_group("1001", "555")["flag"] == "g"
+    assert state_store.all_pending_friends() == {"2002": {"11": "other"}}
+
+
+def test_clear_notice_targets_and_prune(store_dir: Path) -> None:
+    state_store.set_last_notified("1001", "friend", "11", 100.0)
+    state_store.put_approval_notices("1001", [("m1", "friend", "11", 100.0), ("m2", "group", "9", 100.0)])
+    state_store.clear_notice_targets("1001", "friend", ["11"])
+    assert state_store.get_last_notified("1001") is None
+    assert state_store.get_approval_notice("1001", "m1") is None
+    assert state_store.get_approval_notice("1001", "m2")["target_id"] == "9"
+
+    assert state_store.prune_expired_notices(50.0, now=200.0) == 1
+    assert state_store.get_approval_notice("1001", "m2") is None
+
+
+def test_legacy_json_is_imported_once(store_dir: Path) -> None:
+    (store_dir / state_store.LEGACY_FRIEND_FILE).write_text(
+        json.dumps({"1001": {"30": "f3", "11": "f1", "20": "f2"}}), encoding="utf-8"
+    )
+    (store_dir / state_store.LEGACY_DOUBT_POLL_FILE).write_text(
+        json.dumps({"primed_bots": ["1001"], "notified": {"1001": ["11", "x"]}}),
+        encoding="utf-8",
+    )
+
+    # 保持旧文件里的到达顺序
+    assert list(state_store.pending_friends("1001").items()) == [("30", "f3"), ("11", "f1"), ("20", "f2")]
+    assert state_store.load_doubt_poll_state() == ({"1001"}, {"1001": {"11"}})
+    assert not (store_dir / state_store.LEGACY_FRIEND_FILE).exists()
+    assert (store_dir / f"{state_store.LEGACY_FRIEND_FILE}.migrated").is_file()
@@ -40,3 +40,31 @@ def test_prep_players_from_game() -> None:
     game.players[20] = Player(uid=20, nickname="路人")
     rows = prep_players_from_game(game)
     assert rows == [{"uid": 10, "nickname": "房主"}, {"uid": 20, "nickname": "路人"}]
+
+
+def test_write_game_snapshot_skips_noop(monkeypatch) -> None:
+    from src.plugins.who_is_spy import coord_store
+
+    blob: dict = {}
+    writes: list[dict] = []
+
+    def fake_mutate(group_id, fn, **_kwargs):
+        fn(blob)
+        writes.append(dict(blob))
+        return blob
+
+    monkeypatch.setattr(coord_store.SPY_GROUP_LOCK, "_mutate", fake_mutate)
+    monkeypatch.setattr(coord_store, "_written_snapshots", {})
+
+    game = Game(group_id=42, owner_id=10, ready=True)
+    game.players[10] = Player(uid=10, nickname="甲")
+    game.alive_order = [10]
+
+    coord_store.write_game_snapshot(game)
+    coord_store.write_game_snapshot(game)
+    assert len(writes) == 1
+
+    game.round_no = 3
+    coord_store.write_game_snapshot(game)
+    assert len(writes) == 2
+    assert blob[coord_store.GAME_SNAPSHOT_KEY]["round_no"] == 3
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import os
 
 from src.plugins.who_is_spy import store
 
@@ -39,3 +40,42 @@ def test_recent_word_pairs_roundtrip(tmp_path, monkeypatch) -> None:
 
     recent = store.load_recent_word_keys(123, limit=2)
     assert recent == {store.word_pair_key("饺子", "馄饨"), store.word_pair_key("拿铁", "美式")}
+
+
+def test_recent_word_pairs_write_behind_merges_file(tmp_path, monkeypatch) -> None:
+    recent_file = tmp_path / "recent.json"
+    recent_file.write_text(json.dumps({"999": [["苹果", "梨"]]}), encoding="utf-8")
+    monkeypatch.setattr(store, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(store, "RECENT_WORDS_FILE", recent_file)
+    monkeypatch.setattr(store, "_start_recent_flush_timer", lambda: None)
+
+    store.record_recent_word_pair(123, "可乐", "雪碧", keep=3)
+    assert json.loads(recent_file.read_text(encoding="utf-8")) == {"999": [["苹果", "梨"]]}
+    assert store.load_recent_word_keys(999, limit=3) == {store.word_pair_key("苹果", "梨")}
+
+    store.flush_recent_word_pairs_sync()
+    saved = json.loads(recent_file.read_text(encoding="utf-8"))
+    assert saved == {"999": [["苹果", "梨"]], "123": [["可乐", "雪碧"]]}
+
+
+def test_recent_word_pairs_reload_after_other_process_writes(tmp_path, monkeypatch) -> None:
+    recent_file = tmp_path / "recent.json"
+    recent_file.write_text(json.dumps({"999": [["苹果", "梨"]]}), encoding="utf-8")
+    monkeypatch.setattr(store, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(store, "RECENT_WORDS_FILE", recent_file)
+    monkeypatch.setattr(store, "_start_recent_flush_timer", lambda: None)
+
+    assert store.load_recent_word_keys(999, limit=3) == {store.word_pair_key("苹果", "梨")}
+    store.record_recent_word_pair(123, "可乐", "雪碧", keep=3)
+
+    # 其它 worker 落盘了新词对
+    recent_file.write_text(json.dumps({"999": [["苹果", "梨"], ["猫", "狗"]]}), encoding="utf-8")
+    stat = recent_file.stat()
+    os.utime(recent_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.load_recent_word_keys(999, limit=3) == {
+        store.word_pair_key("苹果", "梨"),
+        store.word_pair_key("猫", "狗"),
+    }
+    # 本进程未落盘的群不丢
+    assert store.load_recent_word_keys(123, limit=3) == {store.word_pair_key("可乐", "雪碧")}
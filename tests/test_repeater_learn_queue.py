@@ -15,18 +15,33 @@ def test_learn_defaults_reasonable():
 
 
 @pytest.mark.asyncio
-async def test_learn_sem_limits_parallel(monkeypatch):
-    from src.plugins.repeater import learn_queue as lq
+async def test_learn_limiter_limits_parallel():
+    from src.plugins.repeater.learn_queue import AimdLimiter
 
-    monkeypatch.setattr(lq, "learn_concurrency", lambda: 2)
-    lq.clear_repeater_learn_runtime_state()
-    sem = lq.learn_sem()
-    await sem.acquire()
-    await sem.acquire()
+    limiter = AimdLimiter(2, 8)
+    await limiter.acquire()
+    await limiter.acquire()
     with pytest.raises(asyncio.TimeoutError):
-        await asyncio.wait_for(sem.acquire(), timeout=0.05)
-    sem.release()
-    sem.release()
+        await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+    await limiter.release(10.0)
+    await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+
+
+def test_learn_limiter_aimd_adjusts_with_latency():
+    from src.plugins.repeater.learn_queue import AimdLimiter
+
+    limiter = AimdLimiter(2, 4)
+    for _ in range(20):
+        limiter.observe(50.0, now=0.0)
+    assert limiter.effective == 4
+
+    limiter.observe(5000.0, now=10.0)
+    assert limiter.effective == 2
+    # 冷却期内不连续减半
+    limiter.observe(5000.0, now=10.5)
+    assert limiter.effective == 2
+    limiter.observe(0.0, pressured=True, now=12.0)
+    assert limiter.effective == 1
 
 
 def test_learn_concurrency_caps_more_conservatively_for_write_heavy_queue(monkeypatch):
@@ -95,3 +110,184 @@ async def test_wait_pg_pool_headroom_for_learn_uses_more_conservative_pressure_t
     await lq.wait_pg_pool_headroom_for_learn()
 
     assert seen == [0.25]
+
+
+class _FakeChat:
+    def __init__(self, group_id: int, n: int, done: list, delay: float = 0.0) -> None:
+        self.chat_data = type(
+            "CD",
+            (),
+            {"group_id": group_id, "user_id": n, "bot_id": 1, "time": n, "raw_message": f"m{n}", "plain_text": ""},
+        )()
+        self._done = done
+        self._delay = delay
+
+    async def learn(self) -> bool:
+        await asyncio.sleep(self._delay)
+        self._done.append((self.chat_data.group_id, self.chat_data.user_id))
+        return True
+
+
+@pytest.mark.asyncio
+async def test_learn_lanes_keep_group_order(monkeypatch):
+    from src.plugins.repeater import learn_queue as lq
+
+    monkeypatch.setattr("src.foundation.db.pool_budget.pg_pool_under_pressure", lambda threshold=0.75: False)
+    monkeypatch.setattr(lq, "_limiter", lq.AimdLimiter(4, 4))
+    done: list[tuple[int, int]] = []
+    # 群 1 的第一条最慢：同群后续必须等它，群 2 不受影响
+    batch = [_FakeChat(1, 0, done, 0.05), _FakeChat(1, 1, done), _FakeChat(2, 2, done), _FakeChat(1, 3, done)]
+    lq.dispatch_learn_batch(batch)
+    await asyncio.gather(*list(lq._lane_tasks.values()))
+
+    assert [n for g, n in done if g == 1] == [0, 1, 3]
+    assert done[0] == (2, 2)
+    assert lq._lane_pending == 0
+    assert lq._lanes == {}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_spills_under_pressure_and_replays_in_order(monkeypatch, tmp_path):
+    from src.plugins.repeater import learn_queue as lq
+    from src.plugins.repeater import learn_spill
+
+    learn_spill.set_spill_db_path(tmp_path / "backlog.sqlite3")
+    pressured = {"on": True}
+    monkeypatch.setattr(
+        "src.foundation.db.pool_budget.pg_pool_under_pressure",
+        lambda threshold=0.75: pressured["on"],
+    )
+
+    async def fake_claim(*_a, **_k):
+        return True
+
+    monkeypatch.setattr(lq, "claim_group_message_event", fake_claim)
+    learned: list[int] = []
+
+    async def fake_execute(chat):
+        learned.append(chat.chat_data.user_id)
+        return True
+
+    monkeypatch.setattr(lq, "execute_repeater_learn", fake_execute)
+    monkeypatch.setattr(lq, "_spill_rows", 0)
+    monkeypatch.setattr(lq, "_spill_buffer", [])
+    event = type("Ev", (), {"self_id": 1})()
+    done: list = []
+    try:
+        for n in range(3):
+            assert await lq.enqueue_repeater_learn(_FakeChat(5, n, done), event) is True
+        # 池恢复后仍排在积压后面，保证顺序
+        pressured["on"] = False
+        assert await lq.enqueue_repeater_learn(_FakeChat(5, 3, done), event) is True
+        assert lq.learn_queue().qsize() == 0
+
+        await lq.flush_learn_spill_buffer()
+        assert lq._spill_rows == 4
+        assert learn_spill.spill_count_sync() == 4
+
+        replayed = await lq.replay_learn_spill()
+        assert replayed == 4
+        assert lq._spill_rows == 0
+        lanes = lq._lanes[5]
+        assert [(c.chat_data.user_id, c.chat_data.raw_message) for c, _ in lanes] == [
+            (0, "m0"),
+            (1, "m1"),
+            (2, "m2"),
+            (3, "m3"),
+        ]
+        # 学完前仍在积压里
+        assert learn_spill.spill_count_sync() == 4
+        await asyncio.gather(*list(lq._lane_tasks.values()))
+        assert learned == [0, 1, 2, 3]
+        await lq.flush_learn_spill_acks()
+        assert learn_spill.spill_count_sync() == 0
+    finally:
+        learn_spill.set_spill_db_path(None)
+
+
+def test_learn_spill_evicts_oldest_over_cap(tmp_path):
+    from src.plugins.repeater import learn_spill
+
+    learn_spill.set_spill_db_path(tmp_path / "cap.sqlite3")
+    try:
+        rows = [
+            {"group_id": 1, "user_id": n, "bot_id": 1, "time": n, "raw_message": str(n), "plain_text": ""}
+            for n in range(5)
+        ]
+        assert learn_spill.spill_append_sync(rows, max_rows=3) == (5, 2)
+        read = learn_spill.spill_read_sync(learn_spill.SPILL_ID_MIN, 10)
+        assert [r["user_id"] for _, r in read] == [2, 3, 4]
+        assert learn_spill.spill_ack_sync(sid for sid, _ in read) == 3
+        assert learn_spill.spill_count_sync() == 0
+    finally:
+        learn_spill.set_spill_db_path(None)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drains_older_queue_before_replaying_spill(monkeypatch, tmp_path):
+    from src.plugins.repeater import learn_queue as lq
+    from src.plugins.repeater import learn_spill
+
+    learn_spill.set_spill_db_path(tmp_path / "order.sqlite3")
+    monkeypatch.setattr("src.foundation.db.pool_budget.pg_pool_under_pressure", lambda threshold=0.75: False)
+    monkeypatch.setattr(lq, "_queue", asyncio.Queue())
+    monkeypatch.setattr(lq, "_spill_buffer", [])
+    monkeypatch.setattr(lq, "_spill_acks", [])
+    learned: list[int] = []
+    all_learned = asyncio.Event()
+
+    async def fake_execute(chat):
+        learned.append(chat.chat_data.user_id)
+        if len(learned) == 4:
+            all_learned.set()
+        return True
+
+    monkeypatch.setattr(lq, "execute_repeater_learn", fake_execute)
+    done: list = []
+    try:
+        # 队列里的两条先入队；积压开始后的两条已落盘
+        for n in range(2):
+            lq.learn_queue().put_nowait(_FakeChat(7, n, done))
+        learn_spill.spill_append_sync([lq._spill_row(_FakeChat(7, n, done).chat_data) for n in (2, 3)])
+        scheduler = asyncio.create_task(lq.run_learn_scheduler())
+        await asyncio.wait_for(all_learned.wait(), timeout=2)
+        scheduler.cancel()
+        await asyncio.gather(scheduler, return_exceptions=True)
+        assert learned == [0, 1, 2, 3]
+    finally:
+        lq._lane_tasks.clear()
+        learn_spill.set_spill_db_path(None)
+
+
+@pytest.mark.asyncio
+async def test_stop_keeps_in_flight_and_queued_learns_ahead_of_backlog(monkeypatch, tmp_path):
+    from src.plugins.repeater import learn_queue as lq
+    from src.plugins.repeater import learn_spill
+
+    learn_spill.set_spill_db_path(tmp_path / "stop.sqlite3")
+    monkeypatch.setattr("src.foundation.db.pool_budget.pg_pool_under_pressure", lambda threshold=0.75: False)
+    monkeypatch.setattr(lq, "_queue", asyncio.Queue())
+    monkeypatch.setattr(lq, "_spill_buffer", [])
+    monkeypatch.setattr(lq, "_spill_acks", [])
+    monkeypatch.setattr(lq, "_limiter", lq.AimdLimiter(4, 4))
+    started = asyncio.Event()
+
+    async def slow_execute(chat):
+        started.set()
+        await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr(lq, "execute_repeater_learn", slow_execute)
+    done: list = []
+    try:
+        learn_spill.spill_append_sync([lq._spill_row(_FakeChat(8, 9, done).chat_data)])
+        lq.dispatch_learn_batch([_FakeChat(8, 0, done)])
+        lq.learn_queue().put_nowait(_FakeChat(8, 1, done))
+        await started.wait()
+        await lq.stop_repeater_learn_worker()
+
+        rows = learn_spill.spill_read_sync(learn_spill.SPILL_ID_MIN, 10)
+        assert [r["user_id"] for _, r in rows] == [0, 1, 9]
+        assert lq._lanes == {}
+    finally:
+        learn_spill.set_spill_db_path(None)
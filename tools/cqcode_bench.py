@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""消息段数组 <-> CQ 码转换微基准：对比旧实现（JSON 往返 + 逐段拼接 + 链式 replace）与当前实现。
+
+uv run python tools/cqcode_bench.py
+uv run python tools/cqcode_bench.py --rounds 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.shared.utils.array2cqcode import clear_cqcode_caches, cqcode_to_array, try_convert_to_cqcode  # noqa: E402
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_SAMPLE: list[dict[str, Any]] = [
+    {"type": "reply", "data": {"id": "123456"}},
+    {"type": "at", "data": {"qq": "3599334092"}},
+    {"type": "text", "data": {"text": " 今天吃什么"}},
+    {"type": "face", "data": {"id": "178"}},
+    {
+        "type": "image",
+        "data": {
+            "file": "6B4DE3DFD1BD271E3297859D41C530F5.image",
+            "subType": "1",
+            "url": "https://multimedia.nt.qq.com.cn/download?appid=1407&fileid=abc,def&rkey=xyz",
+        },
+    },
+    {"type": "text", "data": {"text": "哈哈[笑]"}},
+]
+
+
+def _legacy_escape(data: str) -> str:
+    return data.replace("&", "&amp;").replace("[", "&#91;").replace("]", "&#93;").replace(",", "&#44;")
+
+
+def legacy_array_to_cqcode(data: Any) -> str:
+    """改写前的实现：先 json.loads，失败再当 list；逐段 += 拼接。"""
+    try:
+        msg = json.loads(data)
+    except TypeError:
+        msg = data
+    out = ""
+    for seg in msg:
+        if seg["type"] == "text":
+            out += seg["data"].get("text")
+            continue
+        part = f"[CQ:{seg['type']}"
+        for k, v in seg["data"].items():
+            part += f",{k}={_legacy_escape(v)}"
+        out += part + "]"
+    return out
+
+
+_LEGACY_CQ_RE = re.compile(r"\[CQ:([^,\]]+)((?:,[^\]]*)?)\]")
+
+
+def _legacy_unescape(data: str) -> str:
+    return data.replace("&#44;", ",").replace("&#91;", "[").replace("&#93;", "]").replace("&amp;", "&")
+
+
+def legacy_cqcode_to_array(message: str) -> list[dict[str, Any]]:
+    """朴素反向解析：每次重新切分参数、链式 replace 反转义。"""
+    out: list[dict[str, Any]] = []
+    pos = 0
+    for m in _LEGACY_CQ_RE.finditer(message):
+        if m.start() > pos:
+            out.append({"type": "text", "data": {"text": _legacy_unescape(message[pos : m.start()])}})
+        data = {}
+        for part in m.group(2).split(",")[1:]:
+            k, _, v = part.partition("=")
+            data[k] = _legacy_unescape(v)
+        out.append({"type": m.group(1), "data": data})
+        pos = m.end()
+    if pos < len(message):
+        out.append({"type": "text", "data": {"text": _legacy_unescape(message[pos:])}})
+    return out
+
+
+def _time_us(fn: Callable[[Any], Any], arg: Any, rounds: int) -> tuple[float, float]:
+    samples: list[float] = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+    rounds = max(1, args.rounds)
+
+    clear_cqcode_caches()
+    cq = try_convert_to_cqcode(_SAMPLE)
+    assert cq == legacy_array_to_cqcode(_SAMPLE)
+    assert cqcode_to_array(cq) == legacy_cqcode_to_array(cq)
+    as_json = json.dumps(_SAMPLE, ensure_ascii=False)
+
+    rows = [
+        ("array->cq legacy (json str)", legacy_array_to_cqcode, as_json),
+        ("array->cq fast   (json str)", try_convert_to_cqcode, as_json),
+        ("array->cq legacy (list)", legacy_array_to_cqcode, _SAMPLE),
+        ("array->cq fast   (list)", try_convert_to_cqcode, _SAMPLE),
+        ("cq->array legacy", legacy_cqcode_to_array, cq),
+        ("cq->array fast", cqcode_to_array, cq),
+    ]
+    print(f"{'case':<30} {'avg_us':>8} {'p95_us':>8}")
+    for name, fn, arg in rows:
+        avg, p95 = _time_us(fn, arg, rounds)
+        print(f"{name:<30} {avg:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
   uv run python tools/message_path_bench.py
   uv run python tools/message_path_bench.py --bots 30 --rounds 200
   uv run python tools/message_path_bench.py --realistic --bots 30 --rounds 80
+  uv run python tools/message_path_bench.py --derive-only --rounds 20000
 """
 
 from __future__ import annotations
@@ -143,8 +144,8 @@ async def bench_unified_message_realistic(
     """30 牛 ingress + 胜牛走复读：真实 scrub/语料/学习（无发消息）。"""
     from nonebot.exception import IgnoredException
 
-    from src.foundation.config import BotConfig
     from src.features.message_scrub import is_message_scrub_blocked_async
+    from src.foundation.config import BotConfig
     from src.platform.federate.ingress import (
         claim_federate_group_message_ingress,
         federate_ingress_cached_win,
@@ -261,6 +262,85 @@ async def bench_unified_message_realistic(
     )
 
 
+_DERIVE_DISPATCH_PRIORITIES = 4
+
+
+def _derive_rows_legacy(event) -> None:
+    """解析缓存之前：各环节各自从事件重算明文 / raw 归一化 / @ / 签名。"""
+    import re
+
+    from src.platform.ingress.matcher_activation import normalize_dispatch_plain_text
+    from src.platform.ingress.unified_pass import unified_ingress_once_signature
+    from src.platform.multi_bot.at_targets import group_at_qq_ids
+    from src.platform.multi_bot.dedup import cross_bot_message_signature
+
+    gid, uid, t = int(event.group_id), int(event.user_id), int(event.time)
+    # ingress_gate
+    plain = (event.get_plaintext() or "").strip()
+    body = plain or event.raw_message
+    group_at_qq_ids(event)
+    group_at_qq_ids(event)
+    unified_ingress_once_signature(gid, uid, body, t)
+    # federate ingress
+    fed_plain = (event.get_plaintext() or "").strip()
+    cross_bot_message_signature(gid, uid, fed_plain or event.raw_message, t, include_message_time=True)
+    # matcher 分派：每个优先级取一次
+    for _ in range(_DERIVE_DISPATCH_PRIORITIES):
+        normalize_dispatch_plain_text(event.raw_message)
+        normalize_dispatch_plain_text((event.get_plaintext() or "").strip())
+    # 复读 event_gate + ChatData
+    plain_body = event.get_plaintext()
+    re.sub(r"\.image,.+?\]", ".image]", event.raw_message)
+    unified_ingress_once_signature(gid, uid, (plain_body or "").strip() or event.raw_message, t)
+    event.get_plaintext()
+    re.sub(r"\.image,.+?\]", ".image]", event.raw_message)
+
+
+def _derive_rows_parsed(event) -> None:
+    from src.platform.ingress.parsed_event import parsed_group_event
+
+    for _ in range(3):
+        parsed = parsed_group_event(event)
+        _ = parsed.plain, parsed.body, parsed.at_targets, parsed.norm_raw, parsed.plain_text
+        parsed.signature(include_message_time=True)
+    for _ in range(_DERIVE_DISPATCH_PRIORITIES):
+        _ = parsed_group_event(event).dispatch_texts
+
+
+def bench_event_derivation(*, rounds: int) -> list[BenchRow]:
+    """同一条群消息在各网关 / matcher / 复读里派生字段的 CPU 开销：逐处重算 vs 入站解析缓存。"""
+    from src.platform.ingress.parsed_event import reset_parsed_group_events_for_tests
+
+    bodies = [
+        *_REALISTIC_BODIES,
+        "[CQ:at,qq=10001] 牛牛 在吗",
+        "看这个[CQ:image,file=abc.image,subType=1,url=https://example.invalid/x]",
+    ]
+    rows: list[BenchRow] = []
+    for name, fn in (("event_derive_legacy", _derive_rows_legacy), ("event_derive_parsed", _derive_rows_parsed)):
+        reset_parsed_group_events_for_tests()
+        events = [
+            make_group_event(group_id=99_001, user_id=42, body=bodies[r % len(bodies)], message_id=r)
+            for r in range(rounds)
+        ]
+        samples: list[float] = []
+        for event in events:
+            t0 = time.perf_counter()
+            fn(event)
+            samples.append((time.perf_counter() - t0) * 1000)
+        rows.append(
+            BenchRow(
+                name=name,
+                bots=1,
+                rounds=rounds,
+                avg_ms=statistics.mean(samples),
+                p95_ms=statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0],
+                ops_per_sec=rounds / (sum(samples) / 1000),
+            )
+        )
+    return rows
+
+
 async def bench_federate_double_claim(
     *,
     rounds: int,
@@ -320,7 +400,9 @@ async def main_async(args: argparse.Namespace) -> int:
     try:
         bot_ids = resolve_bench_bot_ids(args.bots)
         rows: list[BenchRow] = []
-        if args.realistic:
+        if args.derive_only:
+            rows.extend(bench_event_derivation(rounds=args.rounds))
+        elif args.realistic:
             rows.append(
                 await bench_unified_message_realistic(
                     bot_ids=bot_ids,
@@ -332,6 +414,7 @@ async def main_async(args: argparse.Namespace) -> int:
             rows.extend([
                 await bench_ingress_fanout(bot_ids=bot_ids, rounds=args.rounds, monkeypatch=monkeypatch),
                 await bench_federate_double_claim(rounds=min(args.rounds, 500), monkeypatch=monkeypatch),
+                *bench_event_derivation(rounds=max(args.rounds, 1000)),
             ])
     finally:
         monkeypatch.undo()
@@ -350,6 +433,10 @@ async def main_async(args: argparse.Namespace) -> int:
             f"{r.name}: bots={r.bots} rounds={r.rounds} "
             f"avg={r.avg_ms:.2f}ms p95={r.p95_ms:.2f}ms ops/s={r.ops_per_sec:.0f}"
         )
+    derive = {r.name: r for r in rows if r.name.startswith("event_derive_")}
+    if len(derive) == 2:
+        saved_us = (derive["event_derive_legacy"].avg_ms - derive["event_derive_parsed"].avg_ms) * 1000
+        print(f"parsed event saves {saved_us:.1f}us CPU per message")
     return 0
 
 
@@ -362,6 +449,11 @@ def main() -> int:
         action="store_true",
         help="ingress+联邦+复读：真实 scrub/语料 find/学习（需本机 DB，不发消息）",
     )
+    p.add_argument(
+        "--derive-only",
+        action="store_true",
+        help="只测单条消息派生字段（明文/raw 归一化/@/签名）的 CPU 开销",
+    )
     return asyncio.run(main_async(p.parse_args()))
 
 
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+message 普通表 → 按月分区表 在线转换脚本
+
+流程：
+1. 建 message_partitioned 分区父表（BRIN(time) + 分区级群索引）及覆盖已有数据的月分区
+2. 在旧 message 上装镜像触发器：转换期间新写入 / 删除同步到新表，bot 不用停
+3. 按 id 分批回填存量（FOR KEY SHARE 防并发删除回魂），进度写 pallas_migration_state，可断点续传
+4. 回填完成后在一个短事务里加锁换名：message → message_legacy，message_partitioned → message
+5. 可选 --drop-legacy 删除旧表
+
+之后由 bot 启动 / 定时维护自动建新月份分区、按 PG_MESSAGE_RETENTION_MONTHS 整月删除过期分区。
+
+用法：
+    uv run --extra pg python tools/migrate_message_partitioned.py
+
+选项：
+    --batch N        每批回填条数，默认 20000
+    --pause-ms N     每批之间休眠毫秒数，默认 50，用于让出 IO
+    --dry-run        只打印计划，不做任何修改
+    --no-swap        只回填，不换名（可稍后再跑一次完成换名）
+    --drop-legacy    换名后删除 message_legacy
+    --restart        清空回填进度重新开始
+    --pg-db NAME     目标 PG 库名，覆盖 PG_DB 环境变量
+
+环境变量（从 .env 读取，也可手动设置）：
+    PG_HOST / PG_PORT / PG_USER / PG_PASSWORD / PG_DB
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote_plus
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv(ROOT / ".env")
+except ImportError:
+    env_file = ROOT / ".env"
+    if env_file.exists():
+        for line in env_file.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                k, _, v = line.partition("=")
+                os.environ.setdefault(k.strip(), v.strip())
+
+NEW_TABLE = "message_partitioned"
+LEGACY_TABLE = "message_legacy"
+# 新表索引先带后缀，换名时与旧表索引对调
+NEW_SUFFIX = "_new"
+STATE_TABLE = "pallas_migration_state"
+STATE_KEY = "message_partitioned"
+TRIGGER_NAME = "pallas_message_mirror"
+COLUMNS = "id, group_id, user_id, bot_id, raw_message, is_plain_text, plain_text, keywords, time"
+_NEW_COLUMNS = ", ".join(f"NEW.{c.strip()}" for c in COLUMNS.split(","))
+# 旧表（create_all 建的）索引 / 主键名 → 换名后加 _legacy
+LEGACY_INDEXES = (
+    "message_pkey",
+    "ix_message_time",
+    "ix_message_group_id",
+    "ix_message_group_time",
+    "ix_message_group_user_time",
+)
+NEW_INDEXES = ("message_pkey", "ix_message_time_brin", "ix_message_group_time", "ix_message_group_user_time")
+
+_MIRROR_FUNCTION_DDL = f"""
+CREATE OR REPLACE FUNCTION {TRIGGER_NAME}() RETURNS trigger LANGUAGE plpgsql AS $fn$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO {NEW_TABLE} ({COLUMNS}) VALUES ({_NEW_COLUMNS}) ON CONFLICT DO NOTHING;
+        RETURN NEW;
+    END IF;
+    DELETE FROM {NEW_TABLE} WHERE id = OLD.id AND time = OLD.time;
+    RETURN OLD;
+END
+$fn$
+"""
+
+# 回填：锁住本批源行（FOR KEY SHARE）再写入，避免与并发 DELETE 交错导致已删行被补回
+_BACKFILL_SQL = f"""
+WITH src AS (
+    SELECT {COLUMNS} FROM message
+    WHERE id > :last AND id <= :upto
+    ORDER BY id
+    LIMIT :n
+    FOR KEY SHARE
+), ins AS (
+    INSERT INTO {NEW_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM src ON CONFLICT DO NOTHING
+)
+SELECT max(id), count(*) FROM src
+"""
+
+
+def _pg_dsn() -> str:
+    h = os.getenv("PG_HOST") or os.getenv("MONGO_HOST", "127.0.0.1")
+    p = int(os.getenv("PG_PORT", "5432"))
+    u, pw = os.getenv("PG_USER", ""), os.getenv("PG_PASSWORD", "")
+    db = os.getenv("PG_DB", "PallasBot")
+    auth = f"{quote_plus(u)}:{quote_plus(pw)}@" if u and pw else ""
+    return f"postgresql+asyncpg://{auth}{h}:{p}/{db}"
+
+
+def swap_statements() -> list[str]:
+    """换名事务内的语句（不含加锁）；旧表及其索引加 _legacy，新表及其索引去掉后缀。"""
+    stmts = [f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON message", f"DROP FUNCTION IF EXISTS {TRIGGER_NAME}()"]
+    stmts += [f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_legacy" for name in LEGACY_INDEXES]
+    stmts += [
+        f"ALTER TABLE message RENAME TO {LEGACY_TABLE}",
+        # serial 序列原属旧表；解除归属，删旧表时不连带删掉新表正在用的序列
+        "ALTER SEQUENCE message_id_seq OWNED BY NONE",
+        f"ALTER TABLE {NEW_TABLE} RENAME TO message",
+    ]
+    stmts += [f"ALTER INDEX {name}{NEW_SUFFIX} RENAME TO {name}" for name in NEW_INDEXES]
+    return stmts
+
+
+async def _relkind(conn, table: str) -> str | None:
+    from src.foundation.db.message_partitions import table_relkind_sync
+
+    return await conn.run_sync(table_relkind_sync, table)
+
+
+async def _prepare(engine) -> int:
+    """建新表、月分区与镜像触发器；返回回填上界 id。"""
+    from sqlalchemy import text
+
+    from src.foundation.db.message_partitions import (
+        _AHEAD_MONTHS,
+        MIN_PARTITION_TS,
+        ensure_month_partitions_sync,
+        month_of,
+        partitioned_parent_ddl,
+        shift_month,
+    )
+
+    async with engine.begin() as conn:
+        for stmt in partitioned_parent_ddl(NEW_TABLE, index_suffix=NEW_SUFFIX):
+            await conn.exec_driver_sql(stmt)
+        # 旧表是 serial：序列已存在时 CREATE SEQUENCE IF NOT EXISTS 为空操作，新表与旧表共用同一序列
+        lo, hi = (
+            await conn.execute(
+                text("SELECT min(time), max(time) FROM message WHERE time >= :m"), {"m": MIN_PARTITION_TS}
+            )
+        ).one()
+        now_month = month_of(int(time.time()))
+        first = month_of(int(lo)) if lo is not None else now_month
+        last = max(month_of(int(hi)) if hi is not None else now_month, now_month)
+        created = await conn.run_sync(
+            ensure_month_partitions_sync, NEW_TABLE, first=first, last=shift_month(*last, _AHEAD_MONTHS)
+        )
+        print(f"[Prepare] partitions created={len(created)} range={first}..{last}")
+        await conn.exec_driver_sql(_MIRROR_FUNCTION_DDL)
+        await conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON message")
+        # 建触发器要等进行中的写事务结束；之后提交的写入都会被镜像，故随后读到的 max(id) 即回填上界
+        await conn.exec_driver_sql(
+            f"CREATE TRIGGER {TRIGGER_NAME} AFTER INSERT OR DELETE ON message "
+            f"FOR EACH ROW EXECUTE FUNCTION {TRIGGER_NAME}()"
+        )
+        upto = (await conn.execute(text("SELECT coalesce(max(id), 0) FROM message"))).scalar_one()
+        await conn.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                    table_name TEXT PRIMARY KEY,
+                    last_id TEXT NOT NULL,
+                    updated_at TIMESTAMPTZ DEFAULT NOW()
+                )
+                """
+            )
+        )
+    return int(upto)
+
+
+async def _get_last_id(engine) -> int:
+    from sqlalchemy import text
+
+    async with engine.connect() as conn:
+        val = (
+            await conn.execute(text(f"SELECT last_id FROM {STATE_TABLE} WHERE table_name = :t"), {"t": STATE_KEY})
+        ).scalar_one_or_none()
+    return int(val) if val else 0
+
+
+async def _backfill(engine, *, upto: int, batch_size: int, pause_ms: int) -> int:
+    from sqlalchemy import text
+
+    last_id = await _get_last_id(engine)
+    if last_id:
+        print(f"[Backfill] resume from id > {last_id}")
+    copied = 0
+    t0 = time.time()
+    while last_id < upto:
+        async with engine.begin() as conn:
+            max_id, n = (
+                await conn.execute(text(_BACKFILL_SQL), {"last": last_id, "upto": upto, "n": batch_size})
+            ).one()
+            if not n:
+                last_id = upto
+            else:
+                last_id = int(max_id)
+                copied += int(n)
+            await conn.execute(
+                text(
+                    f"""
+                    INSERT INTO {STATE_TABLE} (table_name, last_id, updated_at)
+                    VALUES (:t, :id, NOW())
+                    ON CONFLICT (table_name) DO UPDATE SET last_id = EXCLUDED.last_id, updated_at = NOW()
+                    """
+                ),
+                {"t": STATE_KEY, "id": str(last_id)},
+            )
+        elapsed = time.time() - t0
+        rate = copied / elapsed if elapsed else 0
+        print(f"  [Backfill] id {last_id}/{upto} copied={copied} ({rate:.0f}/s)", end="\r")
+        if pause_ms > 0:
+            await asyncio.sleep(pause_ms / 1000.0)
+    print(f"  [Backfill] done copied={copied}" + " " * 20)
+    return copied
+
+
+async def _swap(engine) -> None:
+    from sqlalchemy import text
+
+    async with engine.begin() as conn:
+        # 只在换名的这一刻阻塞读写；回填期间旧表照常使用
+        await conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+        await conn.exec_driver_sql("LOCK TABLE message IN ACCESS EXCLUSIVE MODE")
+        for stmt in swap_statements():
+            await conn.exec_driver_sql(stmt)
+        await conn.execute(text(f"DELETE FROM {STATE_TABLE} WHERE table_name = :t"), {"t": STATE_KEY})
+    print(f"[Swap] message 已切换为分区表，旧表保留为 {LEGACY_TABLE}")
+
+
+async def migrate(
+    batch_size: int,
+    pause_ms: int,
+    dry_run: bool,
+    swap: bool,
+    drop_legacy: bool,
+    restart: bool,
+    pg_db: str | None,
+) -> None:
+    if pg_db:
+        os.environ["PG_DB"] = pg_db
+    try:
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import create_async_engine
+    except ImportError:
+        print("❌ 缺少 SQLAlchemy/asyncpg，请执行：uv sync --extra pg")
+        sys.exit(1)
+
+    print(f"[PG] {_pg_dsn()}")
+    engine = create_async_engine(_pg_dsn(), echo=False)
+    try:
+        async with engine.connect() as conn:
+            kind = await _relkind(conn, "message")
+            legacy = await _relkind(conn, LEGACY_TABLE)
+        if kind == "p":
+            print("message 已是分区表，无需转换")
+            if drop_legacy and legacy is not None and not dry_run:
+                async with engine.begin() as conn:
+                    await conn.exec_driver_sql(f"DROP TABLE {LEGACY_TABLE}")
+                print(f"已删除 {LEGACY_TABLE}")
+            return
+        if kind is None:
+            print("message 表不存在；新库设置 PG_MESSAGE_PARTITIONING=true 后启动 bot 即直接建分区表")
+            return
+        if dry_run:
+            async with engine.connect() as conn:
+                n, lo, hi = (await conn.execute(text("SELECT count(*), min(time), max(time) FROM message"))).one()
+            print(f"[Dry-run] rows={n} time={lo}..{hi}；将建 {NEW_TABLE}、回填并换名")
+            return
+
+        if restart:
+            async with engine.begin() as conn:
+                if await _relkind(conn, STATE_TABLE) is not None:
+                    await conn.execute(text(f"DELETE FROM {STATE_TABLE} WHERE table_name = :t"), {"t": STATE_KEY})
+        upto = await _prepare(engine)
+        print(f"[Backfill] upto id={upto}，batch={batch_size}")
+        await _backfill(engine, upto=upto, batch_size=batch_size, pause_ms=pause_ms)
+        if not swap:
+            print("[Skip] --no-swap：镜像触发器保持工作，稍后重跑本脚本完成换名")
+            return
+        await _swap(engine)
+        if drop_legacy:
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql(f"DROP TABLE {LEGACY_TABLE}")
+            print(f"已删除 {LEGACY_TABLE}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="message 表在线转换为按月分区表",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--batch", type=int, default=20000, metavar="N", help="每批回填条数（默认 20000）")
+    parser.add_argument("--pause-ms", type=int, default=50, metavar="N", help="每批之间休眠毫秒数（默认 50）")
+    parser.add_argument("--dry-run", action="store_true", help="只打印计划，不做修改")
+    parser.add_argument("--no-swap", action="store_true", help="只回填，不换名")
+    parser.add_argument("--drop-legacy", action="store_true", help="换名后删除 message_legacy")
+    parser.add_argument("--restart", action="store_true", help="清空回填进度从头开始")
+    parser.add_argument("--pg-db", metavar="NAME", help="目标 PG 库名，覆盖 PG_DB")
+    args = parser.parse_args()
+
+    asyncio.run(
+        migrate(
+            max(100, args.batch),
+            max(0, args.pause_ms),
+            args.dry_run,
+            not args.no_swap,
+            args.drop_legacy,
+            args.restart,
+            args.pg_db,
+        )
+    )
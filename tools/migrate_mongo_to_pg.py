@@ -825,6 +825,8 @@ async def _migrate_image_cache(db, sf, ICRow, ins, batch_size, dry_run) -> _Tabl
                 rows.append({
                     "cq_code": _strip_null(cq),
                     "base64_data": _strip_null(doc.get("base64_data")) if doc.get("base64_data") else None,
+                    "blob_sha256": _as_str(doc.get("blob_sha256")) or None,
+                    "blob_size": _as_int(doc.get("blob_size"), 0),
                     "ref_times": _as_int(doc.get("ref_times"), 1),
                     "date": _as_int(doc.get("date")),
                 })
@@ -839,7 +841,10 @@ async def _migrate_image_cache(db, sf, ICRow, ins, batch_size, dry_run) -> _Tabl
                     await session.execute(
                         stmt.on_conflict_do_update(
                             index_elements=["cq_code"],
-                            set_={f: getattr(stmt.excluded, f) for f in ("base64_data", "ref_times", "date")},
+                            set_={
+                                f: getattr(stmt.excluded, f)
+                                for f in ("base64_data", "blob_sha256", "blob_size", "ref_times", "date")
+                            },
                         )
                     )
                 await _set_state(session, "imagecache", str(batch[-1]["_id"]))